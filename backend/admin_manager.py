@@ -11,10 +11,13 @@ import hashlib
 import secrets
 from datetime import datetime, timedelta
 
+from token_store import admin_tokens
+
 class AdminManager:
     def __init__(self):
         self.admin_file = 'admin.json'
-        self.admin_tokens_file = 'admin_tokens.json'
+        self.admin_tokens_file = admin_tokens.tokens_file
+        self.tokens = admin_tokens  # 内存token表，与服务器共用
         self.ensure_default_admin()
     
     def ensure_default_admin(self):
@@ -88,13 +91,8 @@ class AdminManager:
         try:
             token = f"admin_{secrets.token_hex(32)}"
             
-            # 保存token
-            tokens_data = {}
-            if os.path.exists(self.admin_tokens_file):
-                with open(self.admin_tokens_file, 'r', encoding='utf-8') as f:
-                    tokens_data = json.load(f)
-            
-            tokens_data[token] = {
+            # 保存token（过期token由后台线程定期清理）
+            self.tokens.add(token, {
                 'admin_id': admin_id,
                 'username': admin_info['username'],
                 'role': admin_info.get('role'),
@@ -102,24 +100,7 @@ class AdminManager:
                 'created_at': datetime.now().isoformat(),
                 'expires_at': (datetime.now() + timedelta(hours=8)).isoformat(),  # 8小时过期
                 'last_used': datetime.now().isoformat()
-            }
-            
-            # 清理过期token
-            current_time = datetime.now()
-            expired_tokens = []
-            for token_key, token_info in tokens_data.items():
-                try:
-                    expires_at = datetime.fromisoformat(token_info['expires_at'])
-                    if current_time > expires_at:
-                        expired_tokens.append(token_key)
-                except:
-                    expired_tokens.append(token_key)
-            
-            for expired_token in expired_tokens:
-                del tokens_data[expired_token]
-            
-            with open(self.admin_tokens_file, 'w', encoding='utf-8') as f:
-                json.dump(tokens_data, f, ensure_ascii=False, indent=2)
+            })
             
             return token
             
@@ -133,33 +114,8 @@ class AdminManager:
             if not token or not token.startswith('admin_'):
                 return None
             
-            if not os.path.exists(self.admin_tokens_file):
-                return None
-            
-            with open(self.admin_tokens_file, 'r', encoding='utf-8') as f:
-                tokens_data = json.load(f)
-            
-            if token not in tokens_data:
-                return None
-            
-            token_info = tokens_data[token]
-            
-            # 检查token是否过期
-            expires_at = datetime.fromisoformat(token_info['expires_at'])
-            if datetime.now() > expires_at:
-                # 删除过期token
-                del tokens_data[token]
-                with open(self.admin_tokens_file, 'w', encoding='utf-8') as f:
-                    json.dump(tokens_data, f, ensure_ascii=False, indent=2)
-                return None
-            
-            # 更新最后使用时间
-            token_info['last_used'] = datetime.now().isoformat()
-            tokens_data[token] = token_info
-            
-            with open(self.admin_tokens_file, 'w', encoding='utf-8') as f:
-                json.dump(tokens_data, f, ensure_ascii=False, indent=2)
-            
+            # 内存中查找，过期token会被顺带删除；last_used 由后台线程批量写回
+            token_info, error = self.tokens.validate(token)
             return token_info
             
         except Exception as e:
@@ -178,18 +134,7 @@ class AdminManager:
     def revoke_admin_token(self, token):
         """撤销管理员token"""
         try:
-            if not os.path.exists(self.admin_tokens_file):
-                return True
-            
-            with open(self.admin_tokens_file, 'r', encoding='utf-8') as f:
-                tokens_data = json.load(f)
-            
-            if token in tokens_data:
-                del tokens_data[token]
-                
-                with open(self.admin_tokens_file, 'w', encoding='utf-8') as f:
-                    json.dump(tokens_data, f, ensure_ascii=False, indent=2)
-            
+            self.tokens.remove(token)
             return True
             
         except Exception as e:
@@ -325,20 +270,7 @@ class AdminManager:
                 json.dump(admin_data, f, ensure_ascii=False, indent=2)
             
             # 撤销该管理员的所有token
-            if os.path.exists(self.admin_tokens_file):
-                with open(self.admin_tokens_file, 'r', encoding='utf-8') as f:
-                    tokens_data = json.load(f)
-                
-                tokens_to_remove = []
-                for token, token_info in tokens_data.items():
-                    if token_info.get('admin_id') == admin_id:
-                        tokens_to_remove.append(token)
-                
-                for token in tokens_to_remove:
-                    del tokens_data[token]
-                
-                with open(self.admin_tokens_file, 'w', encoding='utf-8') as f:
-                    json.dump(tokens_data, f, ensure_ascii=False, indent=2)
+            self.tokens.remove_where(lambda token_info: token_info.get('admin_id') == admin_id)
             
             return True, f"管理员 {username} 删除成功"
             
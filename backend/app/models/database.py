@@ -1,9 +1,10 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean
+import os
+from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, Text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
 
-DATABASE_URL = "sqlite:///./flappybird.db"
+DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///./flappybird.db")
 
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -13,21 +14,32 @@ class User(Base):
     __tablename__ = "users"
     
     id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(String, unique=True, index=True)  # 游戏服务器使用的用户ID
     username = Column(String, unique=True, index=True)
+    phone = Column(String, unique=True, index=True)
     email = Column(String, unique=True, index=True)
     hashed_password = Column(String)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    last_login = Column(DateTime)
+    best_score = Column(Integer, default=0, index=True)
+    best_score_at = Column(DateTime)
+    total_score = Column(Integer, default=0)
+    games_played = Column(Integer, default=0)
+    last_game_at = Column(DateTime)
+    created_by = Column(String, default="user")  # user, admin, game
+    extra = Column(Text)  # 其他字段（如分模式排行榜成绩），JSON格式
 
 class GameScore(Base):
     __tablename__ = "game_scores"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, index=True)
-    game_mode = Column(String)  # classic, timed, reverse, boss
-    score = Column(Integer)
+    user_id = Column(String, index=True)
+    game_mode = Column(String)  # classic, timed, reverse, boss, coin
+    score = Column(Integer, index=True)
     play_time = Column(Float)  # 游戏时长(秒)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    is_new_record = Column(Boolean, default=False)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
 
 class DownloadStats(Base):
     __tablename__ = "download_stats"
@@ -37,7 +49,7 @@ class DownloadStats(Base):
     version = Column(String)
     ip_address = Column(String)
     user_agent = Column(String)
-    download_time = Column(DateTime, default=datetime.utcnow)
+    download_time = Column(DateTime, default=datetime.utcnow, index=True)
 
 # 创建所有表
 def create_tables():
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+游戏历史记录模块
+历史记录以每行一条JSON的形式追加写入 game_history.jsonl，
+内存中为每个用户保存最近记录在文件中的偏移量，
+提交成绩只需追加一行，查询时直接按偏移量读取该用户的记录；
+删除用户时追加一条删除标记，过期和已删除的行由定期压缩清理
+"""
+
+import json
+import os
+import tempfile
+import threading
+from collections import deque
+
+MAX_RECORDS_PER_USER = 100
+
+
+class HistoryLog:
+    def __init__(self, log_file='game_history.jsonl', legacy_file='game_history.json',
+                 max_per_user=MAX_RECORDS_PER_USER):
+        self.log_file = log_file
+        self.legacy_file = legacy_file
+        self.max_per_user = max_per_user
+        self.lock = threading.RLock()
+        self._index = None  # user_id -> deque[(偏移量, 长度)]，只保留最近 max_per_user 条
+        self._total_lines = 0  # 文件中的总行数（含已过期、已删除的记录）
+        self._live = 0  # 索引中的有效记录数
+        self._writer = None
+
+    def _ensure_loaded(self):
+        if self._index is not None:
+            return
+        with self.lock:
+            if self._index is not None:
+                return
+            if not os.path.exists(self.log_file) and os.path.exists(self.legacy_file):
+                self._migrate_legacy()
+            self._load_index()
+            self._writer = open(self.log_file, 'ab')
+            print(f"[游戏历史] 已加载 {len(self._index)} 个用户的 {self._live} 条记录")
+
+    def _migrate_legacy(self):
+        """把旧版 game_history.json 转换为追加日志（只执行一次，旧文件改名备份）"""
+        with open(self.legacy_file, 'r', encoding='utf-8') as f:
+            history_data = json.load(f)
+        lines = []
+        for user_id, records in history_data.items():
+            records = sorted(records, key=lambda x: x.get('timestamp', ''))
+            for record in records[-self.max_per_user:]:
+                lines.append(self._encode(user_id, record))
+        self._write_file(lines)
+        os.replace(self.legacy_file, self.legacy_file + '.bak')
+        print(f"[游戏历史] 已从 {self.legacy_file} 迁移 {len(lines)} 条记录")
+
+    def _load_index(self):
+        """扫描日志文件建立偏移量索引，截掉崩溃时写了一半的末行"""
+        self._index = {}
+        self._total_lines = 0
+        self._live = 0
+        if not os.path.exists(self.log_file):
+            return
+        offset = 0
+        valid_end = 0
+        with open(self.log_file, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                length = len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+                if record is not None:
+                    self._apply(record, offset, length)
+                offset += length
+                valid_end = offset
+                self._total_lines += 1
+        if valid_end != os.path.getsize(self.log_file):
+            with open(self.log_file, 'r+b') as f:
+                f.truncate(valid_end)
+
+    def _apply(self, record, offset, length):
+        user_id = record.get('user_id')
+        if record.get('deleted'):
+            self._live -= len(self._index.pop(user_id, ()))
+            return
+        offsets = self._index.get(user_id)
+        if offsets is None:
+            offsets = self._index[user_id] = deque(maxlen=self.max_per_user)
+        if len(offsets) < self.max_per_user:
+            self._live += 1
+        offsets.append((offset, length))
+
+    @staticmethod
+    def _encode(user_id, record):
+        line = {'user_id': user_id, **record}
+        return (json.dumps(line, ensure_ascii=False) + '\n').encode('utf-8')
+
+    def _write_file(self, lines):
+        """原子地用给定内容替换日志文件"""
+        directory = os.path.dirname(os.path.abspath(self.log_file))
+        fd, tmp_path = tempfile.mkstemp(prefix='.tmp_', suffix='.jsonl', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.writelines(lines)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.log_file)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _append_line(self, line):
+        offset = self._writer.tell()
+        self._writer.write(line)
+        self._writer.flush()
+        self._total_lines += 1
+        return offset
+
+    def append(self, user_id, record):
+        """追加一条游戏记录"""
+        self._ensure_loaded()
+        with self.lock:
+            line = self._encode(user_id, record)
+            offset = self._append_line(line)
+            self._apply({'user_id': user_id}, offset, len(line))
+            self._maybe_compact()
+
+    def get(self, user_id, limit=None):
+        """读取用户的历史记录（按写入顺序，最早的在前）"""
+        self._ensure_loaded()
+        with self.lock:
+            offsets = list(self._index.get(user_id, ()))
+            if limit is not None:
+                offsets = offsets[-limit:]
+            if not offsets:
+                return []
+            records = []
+            with open(self.log_file, 'rb') as f:
+                for offset, length in offsets:
+                    f.seek(offset)
+                    record = json.loads(f.read(length))
+                    record.pop('user_id', None)
+                    records.append(record)
+            return records
+
+    def delete(self, user_id):
+        """删除用户的全部历史记录（追加删除标记），返回是否存在记录"""
+        return self.delete_many([user_id]) > 0
+
+    def delete_many(self, user_ids):
+        """批量删除用户的历史记录，返回实际删除的用户数"""
+        self._ensure_loaded()
+        deleted = 0
+        with self.lock:
+            for user_id in user_ids:
+                if user_id in self._index:
+                    line = self._encode(user_id, {'deleted': True})
+                    offset = self._append_line(line)
+                    self._apply({'user_id': user_id, 'deleted': True}, offset, len(line))
+                    deleted += 1
+            self._maybe_compact()
+        return deleted
+
+    def _maybe_compact(self):
+        """失效行超过有效记录数且超过一定数量时压缩文件（摊还后追加仍为O(1)）"""
+        if self._total_lines - self._live > max(self._live, 1000):
+            self.compact()
+
+    def compact(self):
+        """重写日志文件，只保留每个用户最近的记录"""
+        self._ensure_loaded()
+        with self.lock:
+            lines = []
+            with open(self.log_file, 'rb') as f:
+                for offsets in self._index.values():
+                    for offset, length in offsets:
+                        f.seek(offset)
+                        lines.append(f.read(length))
+            dropped = self._total_lines - len(lines)
+            self._writer.close()
+            try:
+                self._write_file(lines)
+            finally:
+                self._writer = open(self.log_file, 'ab')
+            self._load_index()
+            print(f"[游戏历史] 压缩完成，保留 {len(lines)} 条记录，清理 {dropped} 行")
+
+    def user_ids(self):
+        """返回有历史记录的用户ID列表"""
+        self._ensure_loaded()
+        with self.lock:
+            return list(self._index)
+
+    def close(self):
+        with self.lock:
+            if self._writer:
+                self._writer.close()
+                self._writer = None
+                self._index = None
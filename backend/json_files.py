@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JSON数据文件工具模块
+提供原子写入、文件锁和后台定时刷盘等通用功能
+"""
+
+import json
+import os
+import tempfile
+import threading
+
+_file_locks = {}
+_file_locks_guard = threading.Lock()
+
+
+def file_lock(path):
+    """获取数据文件对应的可重入锁（同一路径共享同一把锁）
+
+    用于多线程服务器中保护“读取-修改-写回”过程，防止并发请求互相覆盖
+    """
+    key = os.path.abspath(path)
+    with _file_locks_guard:
+        lock = _file_locks.get(key)
+        if lock is None:
+            lock = _file_locks[key] = threading.RLock()
+        return lock
+
+
+def load_json(path, default=None):
+    """读取JSON文件，文件不存在时返回默认值"""
+    if not os.path.exists(path):
+        return {} if default is None else default
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def atomic_write_text(path, content):
+    """原子写入文本文件：先写临时文件，再重命名覆盖目标文件"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.tmp_', suffix='.json', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_write_json(path, data):
+    """原子写入JSON文件，格式与手工编辑的数据文件保持一致"""
+    atomic_write_text(path, json.dumps(data, ensure_ascii=False, indent=2))
+
+
+class BackgroundFlusher:
+    """后台定时刷盘线程，按固定间隔调用回调函数"""
+
+    def __init__(self, callback, interval=2.0, name='json-flusher'):
+        self.callback = callback
+        self.interval = interval
+        self.name = name
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """启动后台线程（重复调用无副作用）"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止后台线程并等待其退出"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval + 5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.callback()
+            except Exception as e:
+                print(f"[{self.name}] 后台刷盘失败: {e}")
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+排行榜索引模块
+在内存中维护按 (最高分降序, 达成时间升序) 排好序的用户列表，
+提交分数时用二分查找增量更新，查询前N名和个人排名不再需要全表扫描排序
+
+排行榜按 游戏模式 x 时间窗口 分桶：
+- 模式: classic / timed / reverse / boss / coin，以及不分模式的 all
+- 窗口: daily（今日）/ weekly（本周）/ all（总榜）
+每个桶的成绩记录在用户数据的 leaderboard_stats 字段中（带所属周期），
+跨过日/周边界时直接换一个空榜，无需扫描历史记录
+
+附带回放、尚在排队校验的成绩记录在用户数据的 provisional_scores 字段中，
+校验完成前先以"待校验"身份上榜，校验不通过时移除
+"""
+
+import bisect
+import threading
+from datetime import datetime
+
+from user_store import user_store
+
+GAME_MODES = ('classic', 'timed', 'reverse', 'boss', 'coin')
+WINDOWS = ('daily', 'weekly', 'all')
+
+# 桌面客户端上传的是 GameMode 枚举的中文值
+MODE_ALIASES = {
+    '经典模式': 'classic',
+    '限时挑战': 'timed',
+    '重力反转': 'reverse',
+    'Boss战斗': 'boss',
+    '金币收集': 'coin',
+}
+
+
+def normalize_mode(game_mode):
+    """把客户端上传的模式名转换为排行榜使用的模式键，无法识别时返回None"""
+    if not game_mode:
+        return 'classic'
+    game_mode = str(game_mode).strip()
+    game_mode = MODE_ALIASES.get(game_mode, game_mode.lower())
+    return game_mode if game_mode in GAME_MODES else None
+
+
+def period_of(window, now=None):
+    """返回时间所属的统计周期，如 2025-06-02（日）、2025-W23（周），总榜为空字符串"""
+    now = now or datetime.now()
+    if window == 'daily':
+        return now.date().isoformat()
+    if window == 'weekly':
+        year, week, _ = now.isocalendar()
+        return f'{year}-W{week:02d}'
+    return ''
+
+
+def record_score(user_info, game_mode, score, played_at=None):
+    """把一局成绩记入用户的分桶统计，返回成绩有提高的 (模式, 窗口) 列表
+
+    修改的是用户记录本身，调用方需持有 user_store.lock 并在之后调用 save；
+    不分模式的总榜沿用原来的 best_score 字段，不在这里记录。
+    离线补交的成绩（played_at 早于当前周期）只计入总榜，不会覆盖当前的日榜/周榜
+    """
+    if score <= 0:
+        return []
+    now = datetime.now()
+    played_at = played_at or now
+    stats = user_info.setdefault('leaderboard_stats', {})
+    changed = []
+    for mode in (game_mode, 'all'):
+        for window in WINDOWS:
+            if mode == 'all' and window == 'all':
+                continue
+            period = period_of(window, played_at)
+            if period != period_of(window, now):
+                continue
+            name = f'{mode}:{window}'
+            entry = stats.get(name)
+            if entry is None or entry.get('period', '') != period or score > entry.get('score', 0):
+                stats[name] = {'score': score, 'at': played_at.isoformat(), 'period': period}
+                changed.append((mode, window))
+    return changed
+
+
+class Leaderboard:
+    def __init__(self, mode='all', window='all', period='', store=user_store, empty=False):
+        self.mode = mode
+        self.window = window
+        self.period = period
+        self.store = store
+        self.lock = threading.RLock()
+        self._keys = [] if empty else None  # 有序列表，元素为 (-分数, 达成时间, user_id)
+        self._key_of = {}  # user_id -> 当前在有序列表中的键
+        self._provisional = set()  # 当前成绩来自待校验成绩的用户
+
+    def _ensure_built(self):
+        if self._keys is None:
+            self.rebuild()
+
+    def rebuild(self):
+        """从用户存储全量重建索引（首次访问时调用一次）"""
+        with self.lock:
+            key_of = {}
+            provisional = set()
+            for user_id, user_info in self.store.items():
+                key, is_provisional = self._make_key(user_id, user_info)
+                if key is not None:
+                    key_of[user_id] = key
+                    if is_provisional:
+                        provisional.add(user_id)
+            self._key_of = key_of
+            self._provisional = provisional
+            self._keys = sorted(key_of.values())
+            print(f"[排行榜] 已建立索引 {self.mode}:{self.window}，共 {len(self._keys)} 名玩家")
+
+    def _provisional_best(self, user_info):
+        """返回待校验成绩中计入本榜的最好成绩 (-分数, 游戏时间)，没有时返回None"""
+        best = None
+        for entry in user_info.get('provisional_scores', ()):
+            if self.mode != 'all' and entry.get('game_mode') != self.mode:
+                continue
+            played_at = entry.get('played_at', '')
+            if self.window != 'all':
+                try:
+                    if period_of(self.window, datetime.fromisoformat(played_at)) != self.period:
+                        continue
+                except (TypeError, ValueError):
+                    continue
+            key = (-entry.get('score', 0), played_at)
+            if best is None or key < best:
+                best = key
+        return best
+
+    def _make_key(self, user_id, user_info):
+        """返回 (排序键, 是否为待校验成绩)，未上榜时排序键为None"""
+        key = self._verified_key(user_id, user_info)
+        provisional = self._provisional_best(user_info)
+        if provisional is not None and provisional[0] < 0 and (key is None or provisional < key[:2]):
+            return provisional + (user_id,), True
+        return key, False
+
+    def _verified_key(self, user_id, user_info):
+        if self.mode == 'all' and self.window == 'all':
+            score = user_info.get('best_score', 0)
+            achieved_at = (user_info.get('best_score_at')
+                           or user_info.get('last_game_at')
+                           or user_info.get('created_at')
+                           or '')
+        else:
+            entry = user_info.get('leaderboard_stats', {}).get(f'{self.mode}:{self.window}')
+            if not entry or entry.get('period', '') != self.period:
+                return None
+            score = entry.get('score', 0)
+            achieved_at = entry.get('at', '')
+        if score <= 0:  # 只有得过分的用户才上榜
+            return None
+        return (-score, achieved_at, user_id)
+
+    def _remove_key(self, user_id):
+        key = self._key_of.pop(user_id, None)
+        if key is not None:
+            index = bisect.bisect_left(self._keys, key)
+            if index < len(self._keys) and self._keys[index] == key:
+                del self._keys[index]
+
+    def update(self, user_id, user_info):
+        """用户成绩变化后更新其位置（索引尚未建立时无需处理，建立时会读到最新数据）"""
+        with self.lock:
+            if self._keys is None:
+                return
+            key, is_provisional = self._make_key(user_id, user_info)
+            if is_provisional:
+                self._provisional.add(user_id)
+            else:
+                self._provisional.discard(user_id)
+            if self._key_of.get(user_id) == key:
+                return
+            self._remove_key(user_id)
+            if key is not None:
+                bisect.insort(self._keys, key)
+                self._key_of[user_id] = key
+
+    def remove(self, user_id):
+        """用户被删除时移出排行榜"""
+        with self.lock:
+            if self._keys is not None:
+                self._remove_key(user_id)
+                self._provisional.discard(user_id)
+
+    def __len__(self):
+        with self.lock:
+            self._ensure_built()
+            return len(self._keys)
+
+    def rank(self, user_id):
+        """返回用户排名（从1开始），未上榜返回None"""
+        with self.lock:
+            self._ensure_built()
+            key = self._key_of.get(user_id)
+            if key is None:
+                return None
+            return bisect.bisect_left(self._keys, key) + 1
+
+    def score_of(self, user_id):
+        """返回用户在本榜的成绩，未上榜返回0"""
+        with self.lock:
+            self._ensure_built()
+            key = self._key_of.get(user_id)
+            return -key[0] if key else 0
+
+    def is_provisional(self, user_id):
+        """用户在本榜的成绩是否尚待回放校验"""
+        with self.lock:
+            self._ensure_built()
+            return user_id in self._provisional
+
+    def page(self, offset=0, limit=50):
+        """返回 [(排名, user_id), ...]，从第 offset+1 名开始取 limit 条"""
+        with self.lock:
+            self._ensure_built()
+            offset = max(0, offset)
+            keys = self._keys[offset:offset + max(0, limit)]
+        return [(offset + i + 1, key[2]) for i, key in enumerate(keys)]
+
+    def around(self, user_id, limit=10):
+        """返回以该用户为中心的一段排行榜，用户未上榜时返回None"""
+        with self.lock:
+            user_rank = self.rank(user_id)
+            if user_rank is None:
+                return None
+            offset = max(0, min(user_rank - 1 - limit // 2, len(self._keys) - limit))
+            return self.page(offset, limit)
+
+
+class LeaderboardRegistry:
+    """按 (模式, 窗口) 管理所有排行榜"""
+
+    def __init__(self, store=user_store):
+        self.store = store
+        self.lock = threading.Lock()
+        self._boards = {}
+
+    def get(self, mode='all', window='all', now=None):
+        """获取排行榜；日榜/周榜跨过周期边界时换成新的空榜"""
+        period = period_of(window, now)
+        with self.lock:
+            board = self._boards.get((mode, window))
+            if board is None:
+                board = Leaderboard(mode, window, period, self.store)
+                self._boards[(mode, window)] = board
+            elif board.period != period:
+                print(f"[排行榜] {mode}:{window} 进入新周期 {period}")
+                board = Leaderboard(mode, window, period, self.store, empty=True)
+                self._boards[(mode, window)] = board
+            return board
+
+    def update(self, user_id, user_info, changed):
+        """把 record_score 返回的变化同步到对应排行榜"""
+        for mode, window in changed:
+            self.get(mode, window).update(user_id, user_info)
+
+    def refresh(self, user_id, user_info, game_mode):
+        """待校验成绩增减后刷新该模式和不分模式的所有排行榜"""
+        for mode in (game_mode, 'all'):
+            for window in WINDOWS:
+                self.get(mode, window).update(user_id, user_info)
+
+    def remove(self, user_id):
+        """用户被删除时移出所有排行榜"""
+        with self.lock:
+            boards = list(self._boards.values())
+        for board in boards:
+            board.remove(user_id)
+
+
+# 全局排行榜实例
+leaderboards = LeaderboardRegistry()
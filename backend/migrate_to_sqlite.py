@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据迁移脚本
+把 users.json、游戏历史（game_history.jsonl 或旧版 game_history.json）
+和 download_stats.json 导入SQLite数据库，
+导入后设置环境变量 STORAGE_BACKEND=sqlite 启动服务器即可使用数据库存储
+
+用法: python migrate_to_sqlite.py [--data-dir .] [--database sqlite:///./flappybird.db] [--force]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='把JSON数据文件导入SQLite数据库')
+    parser.add_argument('--data-dir', default='.', help='JSON数据文件所在目录（默认当前目录）')
+    parser.add_argument('--database', default=os.environ.get('DATABASE_URL', 'sqlite:///./flappybird.db'),
+                        help='数据库地址（默认 sqlite:///./flappybird.db）')
+    parser.add_argument('--force', action='store_true', help='数据库中已有数据时清空后重新导入')
+    return parser.parse_args()
+
+
+def load_history(data_dir):
+    """读取游戏历史，返回 {user_id: [记录, ...]}"""
+    from history_log import HistoryLog
+
+    log_file = os.path.join(data_dir, 'game_history.jsonl')
+    legacy_file = os.path.join(data_dir, 'game_history.json')
+    if os.path.exists(log_file):
+        history_log = HistoryLog(log_file, legacy_file)
+        try:
+            return {user_id: history_log.get(user_id) for user_id in history_log.user_ids()}
+        finally:
+            history_log.close()
+    if os.path.exists(legacy_file):
+        with open(legacy_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def main():
+    args = parse_args()
+
+    # 数据库模型在导入时根据环境变量创建连接，必须先设置
+    os.environ['DATABASE_URL'] = args.database
+    os.environ['STORAGE_BACKEND'] = 'sqlite'
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from json_files import load_json
+    from storage import apply_user_row, download_row, get_database, history_row
+
+    database = get_database()
+    session = database.SessionLocal()
+    try:
+        existing = session.query(database.User).count()
+        if existing and not args.force:
+            print(f"❌ 数据库中已有 {existing} 个用户，如需覆盖请加 --force")
+            return 1
+        if args.force:
+            session.query(database.GameScore).delete()
+            session.query(database.DownloadStats).delete()
+            session.query(database.User).delete()
+
+        users = load_json(os.path.join(args.data_dir, 'users.json'))
+        for user_id, user_info in users.items():
+            row = database.User()
+            apply_user_row(row, user_id, user_info)
+            session.add(row)
+        print(f"👤 用户: {len(users)} 条")
+
+        history = load_history(args.data_dir)
+        history_count = 0
+        for user_id, records in history.items():
+            records = sorted(records, key=lambda x: x.get('timestamp', ''))
+            for record in records[-100:]:
+                session.add(history_row(user_id, record))
+                history_count += 1
+        print(f"🎮 游戏历史: {history_count} 条")
+
+        downloads = load_json(os.path.join(args.data_dir, 'download_stats.json'), {"downloads": []})
+        for entry in downloads.get('downloads', []):
+            session.add(download_row(entry))
+        print(f"📥 下载记录: {len(downloads.get('downloads', []))} 条")
+
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        print(f"❌ 迁移失败: {e}")
+        return 1
+    finally:
+        session.close()
+
+    print(f"✅ 迁移完成: {args.database}")
+    print("启动服务器前设置环境变量 STORAGE_BACKEND=sqlite 即可使用数据库存储")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+回放校验模块
+客户端提交成绩时附带本局回放（随机种子 + 按模拟步记录的输入），服务器用
+game-desktop 中同一份游戏逻辑无头重跑一局，重跑得到的分数与提交的一致才算有效。
+重跑需要安装 pygame（服务器的必需依赖）；校验器不可用或重跑出错时一律按不通过处理，
+不能让出错的校验放行伪造的成绩。
+重跑一局要几百毫秒，服务器通过 VerificationPool 交给多个校验进程并行处理，
+HTTP线程提交后立即返回
+"""
+
+import hashlib
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+# 桌面游戏代码所在目录（回放格式和游戏逻辑都从这里导入）
+GAME_DIR = os.environ.get('FLAPPY_GAME_DIR') or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'game-desktop')
+
+# 为1时拒绝没有附带回放的成绩；默认接受，但只计入局数和历史，不上排行榜（旧版客户端和网页版不上传回放）
+REQUIRE_REPLAY = os.environ.get('FLAPPY_REQUIRE_REPLAY', '') == '1'
+
+MAX_REPLAY_TEXT = 256 * 1024  # base64回放文本的最大长度
+MAX_REPLAY_STEPS = 30 * 60 * 30  # 最多重跑30分钟的游戏（每秒30步）
+
+# 校验进程数（环境变量 REPLAY_WORKERS，默认CPU核数，设为0则在请求线程内直接校验）
+REPLAY_WORKERS = int(os.environ.get('REPLAY_WORKERS', os.cpu_count() or 1))
+LATENCY_SAMPLES = 500  # 统计耗时分位数时保留的最近样本数
+
+
+def replay_digest(replay):
+    """一局回放的标识：模式和随机种子的 blake2b 摘要
+
+    每局的种子都是随机生成的，按种子识别同一局，改动输入或换一种编码重新提交同一局也会被识别出来
+    """
+    return hashlib.blake2b(f"{replay.mode}:{replay.seed}".encode(), digest_size=16).hexdigest()
+
+
+class ReplayVerifier:
+    def __init__(self, game_dir=GAME_DIR):
+        self.game_dir = os.path.abspath(game_dir)
+        self.lock = threading.Lock()  # 引擎是有状态的，同一时刻只重跑一局
+        self._import_lock = threading.Lock()
+        self._replay_cls = None
+        self._replay_error = None
+        self._engine = None
+        self._game_modes = None
+        self._engine_error = None
+
+    def _load_replay_format(self):
+        """导入回放格式（只依赖标准库），游戏目录配置错误等导入失败时返回None"""
+        if self._replay_cls is None and self._replay_error is None:
+            with self._import_lock:
+                if self._replay_cls is None and self._replay_error is None:
+                    if self.game_dir not in sys.path:
+                        sys.path.insert(0, self.game_dir)
+                    try:
+                        from src.replay import Replay
+                        self._replay_cls = Replay
+                    except Exception as e:
+                        self._replay_error = str(e)
+                        print(f"[回放校验] 回放格式不可用（检查 FLAPPY_GAME_DIR），附带回放的成绩将校验不通过: {e}")
+        return self._replay_cls
+
+    def _load_engine(self):
+        """首次校验时导入游戏逻辑并创建无头引擎，失败时返回None"""
+        if self._engine is None and self._engine_error is None:
+            with self._import_lock:
+                if self._engine is None and self._engine_error is None:
+                    try:
+                        from src.flappy import Flappy, GameMode
+                        self._engine = Flappy(headless=True, root=self.game_dir)
+                        self._game_modes = GameMode
+                        print(f"[回放校验] 已加载游戏引擎: {self.game_dir}")
+                    except Exception as e:
+                        self._engine_error = str(e)
+                        print(f"[回放校验] 游戏引擎不可用（需要安装 pygame），附带回放的成绩将校验不通过: {e}")
+        return self._engine
+
+    def check(self, data, score, game_mode):
+        """校验提交数据中的回放
+
+        返回 (结果, 说明)：结果为 True（通过）、False（不通过，包括校验器不可用和重跑出错）
+        或 None（没有附带回放，未校验）
+        """
+        replay_text = data.get('replay')
+        if not replay_text:
+            if REQUIRE_REPLAY:
+                return False, "缺少回放数据"
+            return None, "未附带回放"
+        return self.verify(replay_text, score, game_mode)
+
+    def precheck(self, replay_text, score, game_mode):
+        """不重跑游戏的快速检查（格式、模式、分数、长度、测试动作），返回 (回放或None, 不通过的原因)"""
+        if not isinstance(replay_text, str) or len(replay_text) > MAX_REPLAY_TEXT:
+            return None, "回放数据无效或过大"
+        replay_cls = self._load_replay_format()
+        if replay_cls is None:
+            return None, "校验器不可用"
+        try:
+            replay = replay_cls.from_base64(replay_text)
+        except ValueError as e:
+            return None, str(e)
+
+        if replay.mode.lower() != game_mode:
+            return None, "回放的游戏模式与提交的不一致"
+        if replay.score != score:
+            return None, "回放记录的分数与提交的不一致"
+        if replay.steps > MAX_REPLAY_STEPS:
+            return None, "回放过长"
+        if replay.has_test_actions():
+            return None, "回放包含测试模式的动作，不能计入成绩"
+        return replay, ""
+
+    def verify(self, replay_text, score, game_mode):
+        """重跑回放并与提交的分数、模式比对，返回值同 check"""
+        replay, reason = self.precheck(replay_text, score, game_mode)
+        if replay is None:
+            return False, reason
+
+        engine = self._load_engine()
+        if engine is None:
+            return False, "校验器不可用"
+
+        started = time.perf_counter()
+        try:
+            with self.lock:
+                result = engine.run_headless(self._game_modes[replay.mode], seed=replay.seed,
+                                             inputs=replay.inputs, max_steps=replay.steps)
+        except ValueError as e:
+            return False, f"回放包含无效输入: {e}"
+        except Exception as e:
+            # 重跑出错时无法确认成绩，按不通过处理（出错不能成为放行伪造成绩的途径）
+            print(f"[回放校验] 重跑出错: {e}")
+            return False, "校验出错"
+        elapsed = (time.perf_counter() - started) * 1000
+
+        if not result['finished'] or result['steps'] != replay.steps or result['score'] != score:
+            print(f"[回放校验] 不通过: 提交 {score} 分/{replay.steps} 步，"
+                  f"重跑 {result['score']} 分/{result['steps']} 步（{elapsed:.0f}ms）")
+            return False, "重跑结果与提交的成绩不一致"
+        return True, f"重跑 {replay.steps} 步用时 {elapsed:.0f}ms"
+
+
+# 校验进程内的校验器（由进程池的 initializer 创建）
+_worker_verifier = None
+
+
+def _init_worker(game_dir):
+    """校验进程启动时预先加载游戏引擎，第一局校验不必等待导入"""
+    global _worker_verifier
+    _worker_verifier = ReplayVerifier(game_dir)
+    _worker_verifier._load_engine()
+
+
+def _verify_in_worker(replay_text, score, game_mode):
+    """在校验进程中重跑一局，返回 (结果, 说明, 重跑耗时毫秒)"""
+    started = time.perf_counter()
+    verified, reason = _worker_verifier.verify(replay_text, score, game_mode)
+    return verified, reason, (time.perf_counter() - started) * 1000
+
+
+def _summarize(samples):
+    """耗时样本的平均值和分位数（毫秒）"""
+    if not samples:
+        return {'avg': 0.0, 'p50': 0.0, 'p95': 0.0, 'max': 0.0}
+    ordered = sorted(samples)
+    return {
+        'avg': round(sum(ordered) / len(ordered), 1),
+        'p50': round(ordered[len(ordered) // 2], 1),
+        'p95': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1),
+        'max': round(ordered[-1], 1),
+    }
+
+
+class VerificationPool:
+    """回放校验队列：由多个校验进程（各自持有一个无头游戏引擎）并行重跑回放
+
+    submit 立即返回，校验完成后在结果线程里调用回调；stats 返回队列深度、
+    耗时分位数和通过/拒绝计数，用于评估需要多少核
+    """
+
+    def __init__(self, workers=REPLAY_WORKERS, game_dir=GAME_DIR, verifier=None):
+        self.workers = workers
+        self.game_dir = game_dir
+        self.verifier = verifier
+        self.lock = threading.Lock()
+        self._pool = None
+        self._closed = False
+        self.submitted = 0
+        self.completed = 0
+        self.passed = 0
+        self.rejected = 0
+        self.unverified = 0
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)  # 从提交到完成的耗时
+        self._run_times = deque(maxlen=LATENCY_SAMPLES)  # 校验进程内重跑的耗时
+
+    @property
+    def inline(self):
+        """未启用校验进程时，调用方应在请求线程内直接校验"""
+        return self.workers <= 0
+
+    def _ensure_pool(self):
+        with self.lock:
+            if self._pool is None:
+                # 服务器是多线程的，用spawn启动干净的子进程，避免fork继承其他线程持有的锁
+                context = multiprocessing.get_context('spawn')
+                self._pool = context.Pool(self.workers, initializer=_init_worker,
+                                          initargs=(self.game_dir,))
+                print(f"[回放校验] 已启动 {self.workers} 个校验进程")
+            return self._pool
+
+    def _record(self, verified, latency_ms, run_ms):
+        with self.lock:
+            self.completed += 1
+            if verified is True:
+                self.passed += 1
+            elif verified is False:
+                self.rejected += 1
+            else:
+                self.unverified += 1
+            self._latencies.append(latency_ms)
+            if run_ms is not None:
+                self._run_times.append(run_ms)
+
+    def submit(self, replay_text, score, game_mode, callback):
+        """提交一局回放校验，完成后调用 callback(结果, 说明)，结果含义同 ReplayVerifier.check"""
+        submitted_at = time.perf_counter()
+        with self.lock:
+            if self._closed:
+                raise RuntimeError("校验队列已关闭")
+            self.submitted += 1
+
+        def finish(verified, reason, run_ms):
+            self._record(verified, (time.perf_counter() - submitted_at) * 1000, run_ms)
+            try:
+                callback(verified, reason)
+            except Exception as e:
+                # 回调异常不能抛进进程池的结果线程，否则后续结果都收不到
+                print(f"[回放校验] 处理校验结果出错: {e}")
+
+        def on_result(result):
+            finish(*result)
+
+        def on_error(error):
+            print(f"[回放校验] 校验进程出错: {error}")
+            finish(False, "校验出错", None)
+
+        if self.inline:
+            verifier = self.verifier or replay_verifier
+            started = time.perf_counter()
+            verified, reason = verifier.verify(replay_text, score, game_mode)
+            finish(verified, reason, (time.perf_counter() - started) * 1000)
+            return
+        self._ensure_pool().apply_async(_verify_in_worker, (replay_text, score, game_mode),
+                                        callback=on_result, error_callback=on_error)
+
+    def stats(self):
+        """校验队列的运行指标"""
+        with self.lock:
+            return {
+                'workers': self.workers,
+                'queue_depth': self.submitted - self.completed,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'passed': self.passed,
+                'rejected': self.rejected,
+                'unverified': self.unverified,
+                'latency_ms': _summarize(self._latencies),
+                'run_ms': _summarize(self._run_times),
+            }
+
+    def close(self):
+        """关闭校验进程（未完成的校验会在下次启动时从待校验成绩中恢复）"""
+        with self.lock:
+            self._closed = True
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+
+# 全局回放校验器实例
+replay_verifier = ReplayVerifier()
+
+# 全局回放校验队列实例
+verification_pool = VerificationPool(verifier=replay_verifier)
@@ -6,8 +6,11 @@
 """
 
 import os
-from simple_server_fixed import GameAPIHandler
-from http.server import HTTPServer
+from simple_server_fixed import create_server
+from user_store import user_store
+from token_store import admin_tokens, user_tokens
+from storage import history_log
+from replay_verifier import verification_pool
 
 def run_cloud_server():
     """启动云部署服务器"""
@@ -38,13 +41,19 @@ def run_cloud_server():
     
     # 监听所有网络接口（云部署必需）
     server_address = ('0.0.0.0', port)
-    httpd = HTTPServer(server_address, GameAPIHandler)
+    httpd = create_server(server_address)
     
     try:
         httpd.serve_forever()
     except KeyboardInterrupt:
         print("\n🛑 服务器已停止")
         httpd.server_close()
+    finally:
+        verification_pool.close()
+        user_store.close()
+        user_tokens.close()
+        admin_tokens.close()
+        history_log.close()
 
 if __name__ == "__main__":
     run_cloud_server() 
\ No newline at end of file
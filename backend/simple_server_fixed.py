@@ -7,6 +7,8 @@
 
 import json
 import os
+import queue
+import threading
 import zipfile
 import shutil
 import tempfile
@@ -16,19 +18,51 @@ from http.server import HTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 import mimetypes
 from user_manager import UserManager
+from json_files import atomic_write_json, file_lock, load_json
+from token_store import admin_tokens, user_tokens
+from storage import STORAGE_BACKEND, download_stats, history_log
+from leaderboard import WINDOWS, GAME_MODES, leaderboards, normalize_mode, record_score
+from user_store import user_store
+from replay_verifier import replay_digest, replay_verifier, verification_pool
 
 # 初始化用户管理器
 user_manager = UserManager()
 
+# 批量提交成绩时单次请求最多包含的局数
+MAX_BATCH_RESULTS = 100
+
 class GameAPIHandler(BaseHTTPRequestHandler):
+    def send_response(self, code, message=None):
+        """记录每个响应是否带Content-Length，用于决定能否保持长连接"""
+        self._has_content_length = False
+        super().send_response(code, message)
+
+    def send_header(self, keyword, value):
+        if keyword.lower() == 'content-length':
+            self._has_content_length = True
+        super().send_header(keyword, value)
+
     def end_headers(self):
         """重写end_headers方法，确保所有响应都包含CORS头"""
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS, PUT, DELETE')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
         self.send_header('Access-Control-Max-Age', '86400')
+        # HTTP/1.1长连接下，没有Content-Length的响应只能靠关闭连接来标记结束
+        if (self.protocol_version >= 'HTTP/1.1' and not self.close_connection
+                and not getattr(self, '_has_content_length', False)):
+            self.send_header('Connection', 'close')
         super().end_headers()
 
+    def send_json(self, status, response):
+        """发送JSON响应（带Content-Length，长连接模式下连接可以复用）"""
+        body = json.dumps(response, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
     def send_cors_headers(self):
         """发送CORS头"""
         self.send_header('Access-Control-Allow-Origin', '*')
@@ -39,6 +73,7 @@ class GameAPIHandler(BaseHTTPRequestHandler):
         """处理CORS预检请求"""
         self.send_response(200)
         self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', '0')
         self.end_headers()
 
     def do_GET(self):
@@ -52,11 +87,8 @@ class GameAPIHandler(BaseHTTPRequestHandler):
             self.serve_static_file('/index.html')
             
         elif path == '/health':
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"status": "healthy", "timestamp": datetime.now().isoformat()}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(200, response)
             
         # 路由重定向 - 让用户友好的URL重定向到实际的HTML文件
         elif path == '/login':
@@ -188,7 +220,9 @@ class GameAPIHandler(BaseHTTPRequestHandler):
             self.handle_user_logout()
         elif path == '/api/game/submit':
             self.handle_game_submit_score()
-        elif path == '/api/game/leaderboard':
+        elif path == '/api/game/submit-batch':
+            self.handle_game_submit_batch()
+        elif path in ('/api/game/leaderboard', '/api/scores/leaderboard'):
             self.handle_game_leaderboard()
         elif path == '/api/game/history':
             self.handle_user_game_history()
@@ -200,6 +234,8 @@ class GameAPIHandler(BaseHTTPRequestHandler):
             self.handle_admin_check()
         elif path == '/api/admin/stats':
             self.handle_admin_stats()
+        elif path == '/api/admin/verification':
+            self.handle_admin_verification()
         elif path == '/api/admin/logs/recent':
             self.handle_admin_logs_recent()
         elif path.startswith('/api/admin/users'):
@@ -235,7 +271,9 @@ class GameAPIHandler(BaseHTTPRequestHandler):
             self.handle_user_logout()
         elif path == '/api/game/submit':
             self.handle_game_submit_score()
-        elif path == '/api/game/leaderboard':
+        elif path == '/api/game/submit-batch':
+            self.handle_game_submit_batch()
+        elif path in ('/api/game/leaderboard', '/api/scores/leaderboard'):
             self.handle_game_leaderboard()
         elif path == '/api/game/history':
             self.handle_user_game_history()
@@ -247,6 +285,8 @@ class GameAPIHandler(BaseHTTPRequestHandler):
             self.handle_admin_check()
         elif path == '/api/admin/stats':
             self.handle_admin_stats()
+        elif path == '/api/admin/verification':
+            self.handle_admin_verification()
         elif path == '/api/admin/logs/recent':
             self.handle_admin_logs_recent()
         elif path.startswith('/api/admin/users'):
@@ -256,11 +296,8 @@ class GameAPIHandler(BaseHTTPRequestHandler):
         elif path.startswith('/api/admin/frontend'):
             self.handle_admin_frontend_api(path)
         else:
-            self.send_response(404)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"error": "Not Found"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(404, response)
 
     def do_PUT(self):
         """处理PUT请求"""
@@ -270,11 +307,8 @@ class GameAPIHandler(BaseHTTPRequestHandler):
         if path.startswith('/api/admin/admins/'):
             self.handle_admin_admins_api(path)
         else:
-            self.send_response(404)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"error": "Not Found"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(404, response)
 
     def do_DELETE(self):
         """处理DELETE请求"""
@@ -284,11 +318,8 @@ class GameAPIHandler(BaseHTTPRequestHandler):
         if path.startswith('/api/admin/admins/'):
             self.handle_admin_admins_api(path)
         else:
-            self.send_response(404)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"error": "Not Found"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(404, response)
 
     def handle_download_tracking(self):
         """处理下载统计"""
@@ -299,34 +330,18 @@ class GameAPIHandler(BaseHTTPRequestHandler):
                 data = json.loads(post_data.decode('utf-8'))
                 
                 # 记录下载统计（简化版）
-                stats_file = 'download_stats.json'
-                if os.path.exists(stats_file):
-                    with open(stats_file, 'r', encoding='utf-8') as f:
-                        stats = json.load(f)
-                else:
-                    stats = {"downloads": []}
-                
-                stats["downloads"].append({
+                download_stats.record({
                     "timestamp": datetime.now().isoformat(),
                     "type": data.get("type", "unknown"),
                     "version": data.get("version", "unknown")
                 })
-                
-                with open(stats_file, 'w', encoding='utf-8') as f:
-                    json.dump(stats, f, ensure_ascii=False, indent=2)
             
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"status": "success", "message": "统计已记录"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(200, response)
             
         except Exception as e:
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"error": f"统计失败: {str(e)}"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(500, response)
 
     def handle_sms_send(self):
         """处理短信验证码发送"""
@@ -342,11 +357,8 @@ class GameAPIHandler(BaseHTTPRequestHandler):
                 # 手机号格式验证
                 import re
                 if not re.match(r'^1[3-9]\d{9}$', phone):
-                    self.send_response(400)
-                    self.send_header('Content-Type', 'application/json; charset=utf-8')
-                    self.end_headers()
                     response = {"success": False, "message": "手机号格式不正确"}
-                    self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                    self.send_json(400, response)
                     return
                 
                 # 生成6位验证码
@@ -355,50 +367,40 @@ class GameAPIHandler(BaseHTTPRequestHandler):
                 
                 # 保存验证码到临时存储（实际项目中应该使用Redis或数据库）
                 sms_storage_file = 'sms_codes.json'
-                if os.path.exists(sms_storage_file):
-                    with open(sms_storage_file, 'r', encoding='utf-8') as f:
-                        sms_data = json.load(f)
-                else:
-                    sms_data = {}
-                
-                # 清理过期验证码（超过10分钟）
-                current_time = datetime.now()
-                for stored_phone in list(sms_data.keys()):
-                    code_time = datetime.fromisoformat(sms_data[stored_phone]['timestamp'])
-                    if (current_time - code_time).total_seconds() > 600:  # 10分钟
-                        del sms_data[stored_phone]
-                
-                # 存储新验证码
-                sms_data[phone] = {
-                    'code': verification_code,
-                    'timestamp': current_time.isoformat(),
-                    'attempts': 0
-                }
+                with file_lock(sms_storage_file):
+                    sms_data = load_json(sms_storage_file)
+                
+                    # 清理过期验证码（超过10分钟）
+                    current_time = datetime.now()
+                    for stored_phone in list(sms_data.keys()):
+                        code_time = datetime.fromisoformat(sms_data[stored_phone]['timestamp'])
+                        if (current_time - code_time).total_seconds() > 600:  # 10分钟
+                            del sms_data[stored_phone]
+                
+                    # 存储新验证码
+                    sms_data[phone] = {
+                        'code': verification_code,
+                        'timestamp': current_time.isoformat(),
+                        'attempts': 0
+                    }
                 
-                with open(sms_storage_file, 'w', encoding='utf-8') as f:
-                    json.dump(sms_data, f, ensure_ascii=False, indent=2)
+                    atomic_write_json(sms_storage_file, sms_data)
                 
                 print(f"[短信] 验证码已生成: {phone} -> {verification_code}")
                 
                 # 模拟短信发送（实际项目中应该调用短信服务商API）
                 # 这里我们直接返回成功，验证码会打印在控制台
-                self.send_response(200)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
                 response = {
                     "success": True, 
                     "message": f"验证码已发送到 {phone[:3]}****{phone[-4:]}",
                     "debug_code": verification_code  # 演示版本显示验证码
                 }
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(200, response)
                 
         except Exception as e:
             print(f"[短信] 发送失败: {e}")
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"success": False, "message": "短信发送失败，请稍后重试"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(500, response)
 
     def handle_user_register(self):
         """处理用户注册"""
@@ -419,27 +421,18 @@ class GameAPIHandler(BaseHTTPRequestHandler):
                 # 输入验证
                 import re
                 if not re.match(r'^[a-zA-Z0-9_\u4e00-\u9fa5]{3,20}$', username):
-                    self.send_response(400)
-                    self.send_header('Content-Type', 'application/json; charset=utf-8')
-                    self.end_headers()
                     response = {"success": False, "message": "用户名格式不正确"}
-                    self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                    self.send_json(400, response)
                     return
                 
                 if not re.match(r'^1[3-9]\d{9}$', phone):
-                    self.send_response(400)
-                    self.send_header('Content-Type', 'application/json; charset=utf-8')
-                    self.end_headers()
                     response = {"success": False, "message": "手机号格式不正确"}
-                    self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                    self.send_json(400, response)
                     return
                 
                 if len(password) < 6:
-                    self.send_response(400)
-                    self.send_header('Content-Type', 'application/json; charset=utf-8')
-                    self.end_headers()
                     response = {"success": False, "message": "密码至少需要6个字符"}
-                    self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                    self.send_json(400, response)
                     return
                 
                 # 验证短信验证码
@@ -449,11 +442,8 @@ class GameAPIHandler(BaseHTTPRequestHandler):
                         sms_data = json.load(f)
                     
                     if phone not in sms_data:
-                        self.send_response(400)
-                        self.send_header('Content-Type', 'application/json; charset=utf-8')
-                        self.end_headers()
                         response = {"success": False, "message": "请先获取验证码"}
-                        self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                        self.send_json(400, response)
                         return
                     
                     stored_code = sms_data[phone]['code']
@@ -462,59 +452,27 @@ class GameAPIHandler(BaseHTTPRequestHandler):
                     
                     # 检查验证码是否过期（10分钟）
                     if (current_time - code_time).total_seconds() > 600:
-                        self.send_response(400)
-                        self.send_header('Content-Type', 'application/json; charset=utf-8')
-                        self.end_headers()
                         response = {"success": False, "message": "验证码已过期，请重新获取"}
-                        self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                        self.send_json(400, response)
                         return
                     
                     # 检查验证码是否正确
                     if stored_code != sms_code:
                         # 记录错误次数
-                        sms_data[phone]['attempts'] = sms_data[phone].get('attempts', 0) + 1
-                        with open(sms_storage_file, 'w', encoding='utf-8') as f:
-                            json.dump(sms_data, f, ensure_ascii=False, indent=2)
+                        with file_lock(sms_storage_file):
+                            sms_data = load_json(sms_storage_file)
+                            if phone in sms_data:
+                                sms_data[phone]['attempts'] = sms_data[phone].get('attempts', 0) + 1
+                                atomic_write_json(sms_storage_file, sms_data)
                         
-                        self.send_response(400)
-                        self.send_header('Content-Type', 'application/json; charset=utf-8')
-                        self.end_headers()
                         response = {"success": False, "message": "验证码不正确"}
-                        self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                        self.send_json(400, response)
                         return
                 else:
-                    self.send_response(400)
-                    self.send_header('Content-Type', 'application/json; charset=utf-8')
-                    self.end_headers()
                     response = {"success": False, "message": "请先获取验证码"}
-                    self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                    self.send_json(400, response)
                     return
                 
-                # 检查用户是否已存在
-                users_file = 'users.json'
-                if os.path.exists(users_file):
-                    with open(users_file, 'r', encoding='utf-8') as f:
-                        users_data = json.load(f)
-                else:
-                    users_data = {}
-                
-                # 检查用户名和手机号是否已被使用
-                for user_id, user_info in users_data.items():
-                    if user_info.get('username') == username:
-                        self.send_response(400)
-                        self.send_header('Content-Type', 'application/json; charset=utf-8')
-                        self.end_headers()
-                        response = {"success": False, "message": "用户名已被使用"}
-                        self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
-                        return
-                    if user_info.get('phone') == phone:
-                        self.send_response(400)
-                        self.send_header('Content-Type', 'application/json; charset=utf-8')
-                        self.end_headers()
-                        response = {"success": False, "message": "手机号已被注册"}
-                        self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
-                        return
-                
                 # 创建新用户
                 import hashlib
                 import secrets
@@ -536,36 +494,40 @@ class GameAPIHandler(BaseHTTPRequestHandler):
                     'is_active': True
                 }
                 
-                users_data[user_id] = user_info
-                
-                with open(users_file, 'w', encoding='utf-8') as f:
-                    json.dump(users_data, f, ensure_ascii=False, indent=2)
+                # 检查用户名和手机号是否已被使用（索引查找），查重和创建在同一把锁内完成
+                with user_store.lock:
+                    conflict = user_store.find_conflict(username=username, phone=phone)
+                    if conflict is None:
+                        user_store.create(user_id, user_info)
+                if conflict == 'username':
+                    response = {"success": False, "message": "用户名已被使用"}
+                    self.send_json(400, response)
+                    return
+                if conflict == 'phone':
+                    response = {"success": False, "message": "手机号已被注册"}
+                    self.send_json(400, response)
+                    return
                 
                 # 删除已使用的验证码
-                if phone in sms_data:
-                    del sms_data[phone]
-                    with open(sms_storage_file, 'w', encoding='utf-8') as f:
-                        json.dump(sms_data, f, ensure_ascii=False, indent=2)
+                with file_lock(sms_storage_file):
+                    sms_data = load_json(sms_storage_file)
+                    if phone in sms_data:
+                        del sms_data[phone]
+                        atomic_write_json(sms_storage_file, sms_data)
                 
                 print(f"[注册] 用户注册成功: {username} ({user_id})")
                 
-                self.send_response(200)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
                 response = {
                     "success": True, 
                     "message": "注册成功！",
                     "user_id": user_id
                 }
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(200, response)
                 
         except Exception as e:
             print(f"[注册] 注册失败: {e}")
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"success": False, "message": "注册失败，请稍后重试"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(500, response)
 
     def handle_user_login(self):
         """处理用户登录"""
@@ -581,32 +543,11 @@ class GameAPIHandler(BaseHTTPRequestHandler):
                 print(f"[登录] 收到登录请求: {login_id}")
                 
                 # 查找用户
-                users_file = 'users.json'
-                if not os.path.exists(users_file):
-                    self.send_response(400)
-                    self.send_header('Content-Type', 'application/json; charset=utf-8')
-                    self.end_headers()
-                    response = {"success": False, "message": "用户不存在"}
-                    self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
-                    return
-                
-                with open(users_file, 'r', encoding='utf-8') as f:
-                    users_data = json.load(f)
-                
-                user_info = None
-                user_id = None
-                for uid, info in users_data.items():
-                    if info.get('username') == login_id or info.get('phone') == login_id:
-                        user_info = info
-                        user_id = uid
-                        break
+                user_id, user_info = user_store.find_by_login(login_id)
                 
                 if not user_info:
-                    self.send_response(400)
-                    self.send_header('Content-Type', 'application/json; charset=utf-8')
-                    self.end_headers()
                     response = {"success": False, "message": "用户不存在"}
-                    self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                    self.send_json(400, response)
                     return
                 
                 # 验证密码
@@ -614,46 +555,27 @@ class GameAPIHandler(BaseHTTPRequestHandler):
                 password_hash = hashlib.sha256(password.encode()).hexdigest()
                 
                 if user_info.get('password_hash') != password_hash:
-                    self.send_response(400)
-                    self.send_header('Content-Type', 'application/json; charset=utf-8')
-                    self.end_headers()
                     response = {"success": False, "message": "密码不正确"}
-                    self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                    self.send_json(400, response)
                     return
                 
                 # 更新最后登录时间
                 user_info['last_login'] = datetime.now().isoformat()
-                users_data[user_id] = user_info
-                
-                with open(users_file, 'w', encoding='utf-8') as f:
-                    json.dump(users_data, f, ensure_ascii=False, indent=2)
+                user_store.save(user_id)
                 
                 # 生成简单的token（实际项目中应该使用JWT）
                 import secrets
                 token = secrets.token_hex(32)
                 
                 # 保存token（简化实现）
-                tokens_file = 'user_tokens.json'
-                if os.path.exists(tokens_file):
-                    with open(tokens_file, 'r', encoding='utf-8') as f:
-                        tokens_data = json.load(f)
-                else:
-                    tokens_data = {}
-                
-                tokens_data[token] = {
+                user_tokens.add(token, {
                     'user_id': user_id,
                     'created_at': datetime.now().isoformat(),
                     'expires_at': (datetime.now() + timedelta(days=30)).isoformat()
-                }
-                
-                with open(tokens_file, 'w', encoding='utf-8') as f:
-                    json.dump(tokens_data, f, ensure_ascii=False, indent=2)
+                })
                 
                 print(f"[登录] 用户登录成功: {user_info['username']} ({user_id})")
                 
-                self.send_response(200)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
                 response = {
                     "success": True,
                     "message": "登录成功！",
@@ -668,15 +590,12 @@ class GameAPIHandler(BaseHTTPRequestHandler):
                         "games_played": user_info.get('games_played', 0)
                     }
                 }
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(200, response)
                 
         except Exception as e:
             print(f"[登录] 登录失败: {e}")
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"success": False, "message": "登录失败，请稍后重试"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(500, response)
 
     def handle_user_check(self):
         """处理用户登录状态检查"""
@@ -684,71 +603,28 @@ class GameAPIHandler(BaseHTTPRequestHandler):
             # 从Authorization头获取token
             auth_header = self.headers.get('Authorization', '')
             if not auth_header.startswith('Bearer '):
-                self.send_response(401)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
                 response = {"success": False, "message": "未登录"}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(401, response)
                 return
             
             token = auth_header[7:]  # 移除 "Bearer " 前缀
             
-            # 检查token
-            tokens_file = 'user_tokens.json'
-            if not os.path.exists(tokens_file):
-                self.send_response(401)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
-                response = {"success": False, "message": "token无效"}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
-                return
-            
-            with open(tokens_file, 'r', encoding='utf-8') as f:
-                tokens_data = json.load(f)
-            
-            if token not in tokens_data:
-                self.send_response(401)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
-                response = {"success": False, "message": "token无效"}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
-                return
-            
-            # 检查token是否过期
-            expires_at = datetime.fromisoformat(tokens_data[token]['expires_at'])
-            if datetime.now() > expires_at:
-                # 删除过期token
-                del tokens_data[token]
-                with open(tokens_file, 'w', encoding='utf-8') as f:
-                    json.dump(tokens_data, f, ensure_ascii=False, indent=2)
-                
-                self.send_response(401)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
-                response = {"success": False, "message": "token已过期"}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            # 检查token（内存中查找，不读磁盘）
+            token_info, error = user_tokens.validate(token)
+            if error:
+                response = {"success": False, "message": error}
+                self.send_json(401, response)
                 return
             
             # 获取用户信息
-            user_id = tokens_data[token]['user_id']
-            users_file = 'users.json'
-            
-            with open(users_file, 'r', encoding='utf-8') as f:
-                users_data = json.load(f)
+            user_id = token_info['user_id']
+            user_info = user_store.get(user_id)
             
-            if user_id not in users_data:
-                self.send_response(401)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
+            if user_info is None:
                 response = {"success": False, "message": "用户不存在"}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(401, response)
                 return
             
-            user_info = users_data[user_id]
-            
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {
                 "success": True,
                 "admin": {
@@ -757,15 +633,12 @@ class GameAPIHandler(BaseHTTPRequestHandler):
                     "permissions": user_info.get('permissions', [])
                 }
             }
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(200, response)
             
         except Exception as e:
             print(f"[用户检查] 失败: {e}")
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"success": False, "message": "检查失败"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(500, response)
 
     def handle_user_logout(self):
         """处理用户登出"""
@@ -773,93 +646,247 @@ class GameAPIHandler(BaseHTTPRequestHandler):
             # 从Authorization头获取token
             auth_header = self.headers.get('Authorization', '')
             if not auth_header.startswith('Bearer '):
-                self.send_response(401)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
                 response = {"success": False, "message": "未登录"}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(401, response)
                 return
             
             token = auth_header[7:]  # 移除 "Bearer " 前缀
             
-            # 检查token
-            tokens_file = 'user_tokens.json'
-            if not os.path.exists(tokens_file):
-                self.send_response(401)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
-                response = {"success": False, "message": "token无效"}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
-                return
-            
-            with open(tokens_file, 'r', encoding='utf-8') as f:
-                tokens_data = json.load(f)
-            
-            if token not in tokens_data:
-                self.send_response(401)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
-                response = {"success": False, "message": "token无效"}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
-                return
-            
-            # 检查token是否过期
-            expires_at = datetime.fromisoformat(tokens_data[token]['expires_at'])
-            if datetime.now() > expires_at:
-                # 删除过期token
-                del tokens_data[token]
-                with open(tokens_file, 'w', encoding='utf-8') as f:
-                    json.dump(tokens_data, f, ensure_ascii=False, indent=2)
-                
-                self.send_response(401)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
-                response = {"success": False, "message": "token已过期"}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            # 检查token（内存中查找，不读磁盘）
+            token_info, error = user_tokens.validate(token)
+            if error:
+                response = {"success": False, "message": error}
+                self.send_json(401, response)
                 return
             
             # 获取用户信息
-            user_id = tokens_data[token]['user_id']
-            users_file = 'users.json'
-            
-            with open(users_file, 'r', encoding='utf-8') as f:
-                users_data = json.load(f)
+            user_id = token_info['user_id']
+            user_info = user_store.get(user_id)
             
-            if user_id not in users_data:
-                self.send_response(401)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
+            if user_info is None:
                 response = {"success": False, "message": "用户不存在"}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(401, response)
                 return
             
-            user_info = users_data[user_id]
-            
             # 更新用户状态为非活跃
             user_info['is_active'] = False
-            users_data[user_id] = user_info
-            
-            with open(users_file, 'w', encoding='utf-8') as f:
-                json.dump(users_data, f, ensure_ascii=False, indent=2)
+            user_store.save(user_id)
             
             # 删除token
-            del tokens_data[token]
-            with open(tokens_file, 'w', encoding='utf-8') as f:
-                json.dump(tokens_data, f, ensure_ascii=False, indent=2)
+            user_tokens.remove(token)
             
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"success": True, "message": "用户已登出"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(200, response)
             
         except Exception as e:
             print(f"[用户登出] 失败: {e}")
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"success": False, "message": "登出失败"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(500, response)
+
+    @staticmethod
+    def ensure_game_user(user_id):
+        """返回用户数据，用户不存在时创建匿名用户记录（调用方需持有 user_store.lock）"""
+        if user_id not in user_store:
+            user_store.create(user_id, {
+                'user_id': user_id,
+                'username': f'游客{user_id[:8]}',
+                'phone': None,
+                'email': None,
+                'created_at': datetime.now().isoformat(),
+                'last_login': datetime.now().isoformat(),
+                'best_score': 0,
+                'total_score': 0,
+                'games_played': 0,
+                'is_active': True,
+                'created_by': 'game'
+            })
+        return user_store.get(user_id)
+
+    @staticmethod
+    def apply_game_results(user_id, results, ranked=True):
+        """把若干局成绩记入用户数据、排行榜和游戏历史（用户数据在一次加锁内完成修改）
+
+        results 为 [(分数, 模式, 游戏时长, 游戏时间), ...]，返回 (用户数据, 每局是否新记录列表)
+        ranked 为 False 时（没有附带回放、未经校验的成绩）只计入局数、总分和游戏历史，
+        不更新最高分和各排行榜
+        """
+        changed_boards = set()
+        new_records = []
+        
+        # 更新用户数据时持有存储锁，避免后台刷盘读到写了一半的记录
+        with user_store.lock:
+            # 如果用户不存在，创建匿名用户记录
+            user_info = GameAPIHandler.ensure_game_user(user_id)
+            for score, game_mode, playtime, played_at in results:
+                # 更新用户游戏数据
+                user_info['games_played'] = user_info.get('games_played', 0) + 1
+                user_info['total_score'] = user_info.get('total_score', 0) + score
+                
+                if played_at.isoformat() > user_info.get('last_game_at', ''):
+                    user_info['last_game_at'] = played_at.isoformat()
+                
+                if not ranked:
+                    new_records.append(False)
+                    continue
+                
+                # 更新最高分
+                is_new_record = score > user_info.get('best_score', 0)
+                if is_new_record:
+                    user_info['best_score'] = score
+                    user_info['best_score_at'] = played_at.isoformat()
+                    changed_boards.add(('all', 'all'))
+                new_records.append(is_new_record)
+                
+                # 记录分模式、分时间窗口的成绩
+                changed_boards.update(record_score(user_info, game_mode, score, played_at))
+            
+            # 保存用户数据
+            user_store.save(user_id)
+        
+        # 成绩提高的排行榜增量更新（在存储锁外调用，避免与排行榜重建互相等待）
+        leaderboards.update(user_id, user_info, changed_boards)
+        
+        # 记录游戏历史（追加写入，每个用户只保留最近100条）
+        for (score, game_mode, playtime, played_at), is_new_record in zip(results, new_records):
+            history_log.append(user_id, {
+                'score': score,
+                'game_mode': game_mode,
+                'playtime': playtime,
+                'timestamp': played_at.isoformat(),
+                'is_new_record': is_new_record,
+                'verified': ranked
+            })
+        
+        return user_info, new_records
+
+    @staticmethod
+    def claim_replay(user_id, digest):
+        """登记一局回放（digest 为 replay_digest 的结果），该用户已提交过同一局时返回False
+
+        在校验和记入成绩之前调用，同一局回放无论单局、批量还是并发提交都只能计入一次
+        """
+        with user_store.lock:
+            user_info = GameAPIHandler.ensure_game_user(user_id)
+            digests = user_info.setdefault('replay_digests', [])
+            if digest in digests:
+                return False
+            digests.append(digest)
+            user_store.save(user_id)
+            return True
+
+    @staticmethod
+    def release_replay(user_id, digest):
+        """校验不通过时撤销登记，回放没有计入成绩，修正后（或校验器恢复后）可以重新提交"""
+        with user_store.lock:
+            user_info = user_store.get(user_id)
+            digests = user_info.get('replay_digests', []) if user_info else []
+            if digest in digests:
+                digests.remove(digest)
+                user_store.save(user_id)
+
+    @staticmethod
+    def submit_provisional_score(user_id, result, replay_text, digest):
+        """把附带回放的成绩记为待校验成绩并交给校验队列，返回用户数据
+
+        待校验成绩先出现在排行榜上（标记为 provisional），校验通过后才计入用户统计；
+        回放需已通过 claim_replay 登记
+        """
+        import secrets
+        score, game_mode, playtime, played_at = result
+        entry = {
+            'id': secrets.token_hex(8),
+            'score': score,
+            'game_mode': game_mode,
+            'playtime': playtime,
+            'played_at': played_at.isoformat(),
+            'replay': replay_text,
+            'digest': digest
+        }
+        with user_store.lock:
+            user_info = GameAPIHandler.ensure_game_user(user_id)
+            user_info.setdefault('provisional_scores', []).append(entry)
+            user_store.save(user_id)
+        leaderboards.refresh(user_id, user_info, game_mode)
+        GameAPIHandler.verify_provisional_score(user_id, entry)
+        return user_info
+
+    @staticmethod
+    def verify_provisional_score(user_id, entry):
+        """把一条待校验成绩提交到校验队列"""
+        def on_verified(verified, reason):
+            GameAPIHandler.finish_provisional_score(user_id, entry, verified, reason)
+        verification_pool.submit(entry['replay'], entry['score'], entry['game_mode'], on_verified)
+
+    @staticmethod
+    def finish_provisional_score(user_id, entry, verified, reason):
+        """校验完成：只有通过的成绩正式记入，不通过或校验出错的移出排行榜"""
+        with user_store.lock:
+            user_info = user_store.get(user_id)
+            pending = user_info.get('provisional_scores', []) if user_info else []
+            if not any(item['id'] == entry['id'] for item in pending):
+                return  # 用户已被删除，或该成绩已处理过
+        
+        if verified is not True:
+            print(f"[回放校验] 不通过: 用户 {user_id}, 分数: {entry['score']}, 原因: {reason}")
+            if entry.get('digest'):
+                GameAPIHandler.release_replay(user_id, entry['digest'])
+        else:
+            # 先记入正式成绩再移除待校验记录，排行榜上不会出现成绩暂时消失的间隙
+            result = (entry['score'], entry['game_mode'], entry['playtime'],
+                      datetime.fromisoformat(entry['played_at']))
+            GameAPIHandler.apply_game_results(user_id, [result])
+            print(f"[回放校验] 已记入: 用户 {user_id}, 分数: {entry['score']}, 校验: {reason}")
+        
+        with user_store.lock:
+            user_info = user_store.get(user_id)
+            if user_info is None:
+                return
+            remaining = [item for item in user_info.get('provisional_scores', []) if item['id'] != entry['id']]
+            if remaining:
+                user_info['provisional_scores'] = remaining
+            else:
+                user_info.pop('provisional_scores', None)
+            user_store.save(user_id)
+        leaderboards.refresh(user_id, user_info, entry['game_mode'])
+
+    @staticmethod
+    def resume_provisional_scores():
+        """重新提交上次运行时未校验完的成绩，返回提交的数量"""
+        with user_store.lock:
+            pending = [(user_id, entry)
+                       for user_id, user_info in user_store.items()
+                       for entry in user_info.get('provisional_scores', [])]
+        for user_id, entry in pending:
+            GameAPIHandler.verify_provisional_score(user_id, entry)
+        if pending:
+            print(f"[回放校验] 恢复 {len(pending)} 局待校验成绩")
+        return len(pending)
+
+    @staticmethod
+    def parse_game_result(data, now):
+        """解析一局成绩，返回 (分数, 模式, 游戏时长, 游戏时间)，模式无法识别时返回None"""
+        game_mode = normalize_mode(data.get('game_mode'))
+        if game_mode is None:
+            return None
+        
+        try:
+            score = int(data.get('score', 0))
+        except (ValueError, TypeError):
+            score = 0
+        try:
+            playtime = max(0, int(data.get('playtime', 0)))
+        except (ValueError, TypeError):
+            playtime = 0
+        
+        # 离线缓存的成绩带有实际游戏时间，不接受未来的时间
+        played_at = now
+        if data.get('played_at'):
+            try:
+                played_at = min(datetime.fromisoformat(data['played_at']), now)
+            except (TypeError, ValueError):
+                pass
+        
+        return score, game_mode, playtime, played_at
 
     def handle_game_submit_score(self):
         """处理游戏分数提交"""
@@ -870,167 +897,261 @@ class GameAPIHandler(BaseHTTPRequestHandler):
                 data = json.loads(post_data.decode('utf-8'))
                 
                 user_id = data.get('user_id', '').strip()
-                score = data.get('score', 0)
-                
-                try:
-                    score = int(score)
-                except (ValueError, TypeError):
-                    score = 0
-                
                 if not user_id:
-                    self.send_response(400)
-                    self.send_header('Content-Type', 'application/json; charset=utf-8')
-                    self.end_headers()
                     response = {"success": False, "message": "缺少用户ID"}
-                    self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                    self.send_json(400, response)
                     return
                 
-                # 获取用户数据
-                users_file = 'users.json'
-                if os.path.exists(users_file):
-                    with open(users_file, 'r', encoding='utf-8') as f:
-                        users_data = json.load(f)
-                else:
-                    users_data = {}
-                
-                # 如果用户不存在，创建匿名用户记录
-                if user_id not in users_data:
-                    users_data[user_id] = {
-                        'user_id': user_id,
-                        'username': f'游客{user_id[:8]}',
-                        'phone': None,
-                        'email': None,
-                        'created_at': datetime.now().isoformat(),
-                        'last_login': datetime.now().isoformat(),
-                        'best_score': 0,
-                        'total_score': 0,
-                        'games_played': 0,
-                        'is_active': True,
-                        'created_by': 'game'
-                    }
-                
-                # 更新用户游戏数据
-                user_info = users_data[user_id]
-                user_info['games_played'] = user_info.get('games_played', 0) + 1
-                user_info['total_score'] = user_info.get('total_score', 0) + score
-                
-                # 更新最高分
-                current_best = user_info.get('best_score', 0)
-                if score > current_best:
-                    user_info['best_score'] = score
-                    is_new_record = True
-                else:
-                    is_new_record = False
-                
-                user_info['last_game_at'] = datetime.now().isoformat()
-                
-                # 保存用户数据
-                with open(users_file, 'w', encoding='utf-8') as f:
-                    json.dump(users_data, f, ensure_ascii=False, indent=2)
-                
-                # 记录游戏历史
-                history_file = 'game_history.json'
-                if os.path.exists(history_file):
-                    with open(history_file, 'r', encoding='utf-8') as f:
-                        history_data = json.load(f)
-                else:
-                    history_data = {}
-                
-                if user_id not in history_data:
-                    history_data[user_id] = []
+                result = self.parse_game_result(data, datetime.now())
+                if result is None:
+                    response = {"success": False, "message": f"未知的游戏模式: {data.get('game_mode')}"}
+                    self.send_json(400, response)
+                    return
                 
-                # 添加本次游戏记录
-                game_record = {
-                    'score': score,
-                    'timestamp': datetime.now().isoformat(),
-                    'is_new_record': is_new_record
-                }
+                # 附带回放的成绩先做快速检查并登记，同一局回放只能计入一次
+                replay_text = data.get('replay')
+                digest = None
+                if replay_text:
+                    replay, reason = replay_verifier.precheck(replay_text, result[0], result[1])
+                    if replay is None:
+                        print(f"[游戏分数提交] 回放校验未通过: 用户 {user_id}, 分数: {result[0]}, 原因: {reason}")
+                        response = {"success": False, "message": f"成绩校验未通过: {reason}"}
+                        self.send_json(400, response)
+                        return
+                    digest = replay_digest(replay)
+                    if not self.claim_replay(user_id, digest):
+                        print(f"[游戏分数提交] 重复提交的回放: 用户 {user_id}, 分数: {result[0]}")
+                        response = {"success": False, "message": "该局成绩已经提交过"}
+                        self.send_json(400, response)
+                        return
                 
-                history_data[user_id].append(game_record)
+                # 有校验进程时排队重跑，不等待结果
+                if replay_text and not verification_pool.inline:
+                    user_info = self.submit_provisional_score(user_id, result, replay_text, digest)
+                    score = result[0]
+                    print(f"[游戏分数提交] 用户: {user_info['username']} ({user_id}), 分数: {score}, 等待回放校验")
+                    
+                    response = {
+                        "success": True,
+                        "message": "分数已提交，等待回放校验",
+                        "score": score,
+                        "best_score": user_info.get('best_score', 0),
+                        "games_played": user_info.get('games_played', 0),
+                        "is_new_record": score > user_info.get('best_score', 0),
+                        "verified": False,
+                        "provisional": True
+                    }
+                    self.send_json(200, response)
+                    return
                 
-                # 只保留最近100条记录
-                if len(history_data[user_id]) > 100:
-                    history_data[user_id] = history_data[user_id][-100:]
+                # 附带回放的成绩先重跑校验，不一致的直接拒绝；没有回放的成绩只记入统计，不上排行榜
+                verified, reason = replay_verifier.check(data, result[0], result[1])
+                if verified is False:
+                    if digest:
+                        self.release_replay(user_id, digest)
+                    print(f"[游戏分数提交] 回放校验未通过: 用户 {user_id}, 分数: {result[0]}, 原因: {reason}")
+                    response = {"success": False, "message": f"成绩校验未通过: {reason}"}
+                    self.send_json(400, response)
+                    return
                 
-                with open(history_file, 'w', encoding='utf-8') as f:
-                    json.dump(history_data, f, ensure_ascii=False, indent=2)
+                user_info, new_records = self.apply_game_results(user_id, [result], ranked=verified is True)
+                score, is_new_record = result[0], new_records[0]
                 
-                print(f"[游戏分数提交] 用户: {user_info['username']} ({user_id}), 分数: {score}, 新记录: {is_new_record}")
+                print(f"[游戏分数提交] 用户: {user_info['username']} ({user_id}), 分数: {score}, 新记录: {is_new_record}, 校验: {reason}")
                 
-                self.send_response(200)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
                 response = {
                     "success": True, 
-                    "message": "分数提交成功",
+                    "message": "分数提交成功" if verified else "分数已记录（未附带回放，不计入排行榜）",
                     "score": score,
                     "best_score": user_info['best_score'],
                     "games_played": user_info['games_played'],
-                    "is_new_record": is_new_record
+                    "is_new_record": is_new_record,
+                    "verified": bool(verified),
+                    "provisional": False
                 }
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(200, response)
             
         except Exception as e:
             print(f"[游戏分数提交] 错误: {e}")
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"success": False, "message": f"分数提交失败: {str(e)}"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(500, response)
 
-    def handle_game_leaderboard(self):
-        """处理游戏排行榜查询"""
+    def handle_game_submit_batch(self):
+        """处理批量成绩提交（客户端离线缓存的多局成绩一次提交）
+
+        请求体: {"token" 或 "user_id", "results": [{"score", "game_mode", "playtime", "played_at", "replay"}, ...]}
+        无法识别模式、回放校验未通过或回放已提交过的成绩会被跳过并计入 rejected，避免客户端反复重传；
+        有校验进程时附带回放的成绩排队校验，计入 accepted 和 provisional；
+        没有回放的成绩计入 accepted 和 unranked，只记入统计，不上排行榜
+        """
         try:
-            # 获取用户数据
-            users_file = 'users.json'
-            if not os.path.exists(users_file):
-                self.send_response(200)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
-                response = {"success": True, "leaderboard": []}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            content_length = int(self.headers.get('Content-Length', 0))
+            data = json.loads(self.rfile.read(content_length).decode('utf-8')) if content_length > 0 else {}
+            
+            # 优先用登录token确定用户，兼容直接传user_id的提交方式
+            token = data.get('token', '').strip()
+            if token:
+                token_info, error = user_tokens.validate(token)
+                if error:
+                    response = {"success": False, "message": error}
+                    self.send_json(401, response)
+                    return
+                user_id = token_info['user_id']
+            else:
+                user_id = data.get('user_id', '').strip()
+            if not user_id:
+                response = {"success": False, "message": "缺少用户ID"}
+                self.send_json(400, response)
                 return
             
-            with open(users_file, 'r', encoding='utf-8') as f:
-                users_data = json.load(f)
+            items = data.get('results')
+            if not isinstance(items, list) or not items:
+                response = {"success": False, "message": "缺少成绩列表"}
+                self.send_json(400, response)
+                return
+            if len(items) > MAX_BATCH_RESULTS:
+                response = {"success": False, "message": f"单次最多提交 {MAX_BATCH_RESULTS} 局成绩"}
+                self.send_json(400, response)
+                return
             
-            # 获取排行榜数据
-            leaderboard_data = []
-            for user_id, user_info in users_data.items():
-                if user_info.get('best_score', 0) > 0:  # 只显示有分数的用户
-                    leaderboard_data.append({
-                        "rank": 0,  # 将在排序后设置
-                        "user_id": user_id,
-                        "username": user_info.get('username', f'用户{user_id[:8]}'),
-                        "best_score": user_info.get('best_score', 0),
-                        "total_score": user_info.get('total_score', 0),
-                        "games_played": user_info.get('games_played', 0),
-                        "last_game_at": user_info.get('last_game_at', user_info.get('created_at', ''))
-                    })
+            now = datetime.now()
+            results = []
+            unranked = []  # 没有附带回放的成绩，只计入统计，不上排行榜
+            provisional = []
+            for item in items:
+                result = self.parse_game_result(item, now) if isinstance(item, dict) else None
+                if result is None:
+                    continue
+                replay_text = item.get('replay')
+                digest = None
+                if replay_text:
+                    replay, reason = replay_verifier.precheck(replay_text, result[0], result[1])
+                    if replay is None:
+                        print(f"[批量成绩提交] 回放校验未通过: 用户 {user_id}, 分数: {result[0]}, 原因: {reason}")
+                        continue
+                    digest = replay_digest(replay)
+                    if not self.claim_replay(user_id, digest):
+                        print(f"[批量成绩提交] 重复提交的回放: 用户 {user_id}, 分数: {result[0]}")
+                        continue
+                    if not verification_pool.inline:
+                        provisional.append((result, replay_text, digest))
+                        continue
+                verified, reason = replay_verifier.check(item, result[0], result[1])
+                if verified is False:
+                    if digest:
+                        self.release_replay(user_id, digest)
+                    print(f"[批量成绩提交] 回放校验未通过: 用户 {user_id}, 分数: {result[0]}, 原因: {reason}")
+                    continue
+                (results if verified is True else unranked).append(result)
+            accepted = len(results) + len(unranked) + len(provisional)
+            rejected = len(items) - accepted
+            
+            user_info, new_records = user_store.get(user_id) or {}, []
+            if unranked:
+                unranked.sort(key=lambda result: result[3])
+                user_info, _ = self.apply_game_results(user_id, unranked, ranked=False)
+            if results:
+                # 按游戏时间顺序记录，保证新纪录判断和历史顺序正确
+                results.sort(key=lambda result: result[3])
+                user_info, new_records = self.apply_game_results(user_id, results)
+            for result, replay_text, digest in provisional:
+                user_info = self.submit_provisional_score(user_id, result, replay_text, digest)
+            
+            print(f"[批量成绩提交] 用户: {user_info.get('username', user_id)} ({user_id}), "
+                  f"接收: {accepted} 局 (待校验 {len(provisional)} 局), 跳过: {rejected} 局")
+            
+            response = {
+                "success": True,
+                "message": "成绩提交成功",
+                "accepted": accepted,
+                "provisional": len(provisional),
+                "unranked": len(unranked),
+                "rejected": rejected,
+                "best_score": user_info.get('best_score', 0),
+                "games_played": user_info.get('games_played', 0),
+                "new_records": sum(new_records)
+            }
+            self.send_json(200, response)
+            
+        except Exception as e:
+            print(f"[批量成绩提交] 错误: {e}")
+            response = {"success": False, "message": f"成绩提交失败: {str(e)}"}
+            self.send_json(500, response)
+
+    def handle_game_leaderboard(self):
+        """处理游戏排行榜查询
+
+        查询参数: limit 返回条数(默认50，最多100), offset 起始偏移,
+        around_user 返回以该用户为中心的一段排行榜（同时返回其排名）,
+        mode 游戏模式(classic/timed/reverse/boss/coin，默认all不分模式),
+        window 时间窗口(daily/weekly/all，默认all)
+        """
+        try:
+            parsed_url = urlparse(self.path)
+            query_params = parse_qs(parsed_url.query)
+            try:
+                limit = max(1, min(int(query_params.get('limit', ['50'])[0]), 100))
+                offset = max(0, int(query_params.get('offset', ['0'])[0]))
+            except ValueError:
+                response = {"success": False, "message": "limit和offset必须是整数"}
+                self.send_json(400, response)
+                return
+            around_user = query_params.get('around_user', [''])[0].strip()
             
-            # 按最高分降序排序
-            leaderboard_data.sort(key=lambda x: x['best_score'], reverse=True)
+            mode = query_params.get('mode', ['all'])[0].strip() or 'all'
+            if mode != 'all':
+                mode = normalize_mode(mode)
+            window = query_params.get('window', ['all'])[0].strip() or 'all'
+            if mode is None or window not in WINDOWS:
+                response = {
+                    "success": False,
+                    "message": f"mode必须是 all/{'/'.join(GAME_MODES)}，window必须是 {'/'.join(WINDOWS)}"
+                }
+                self.send_json(400, response)
+                return
+            board = leaderboards.get(mode, window)
             
-            # 设置排名
-            for i, player in enumerate(leaderboard_data):
-                player['rank'] = i + 1
+            user_rank = None
+            if around_user:
+                user_rank = board.rank(around_user)
+                page = board.around(around_user, limit) or []
+            else:
+                page = board.page(offset, limit)
             
-            # 只返回前50名
-            leaderboard_data = leaderboard_data[:50]
+            # 只为本页用户组装数据
+            leaderboard_data = []
+            for rank, user_id in page:
+                user_info = user_store.get(user_id) or {}
+                leaderboard_data.append({
+                    "rank": rank,
+                    "user_id": user_id,
+                    "username": user_info.get('username', f'用户{user_id[:8]}'),
+                    "best_score": user_info.get('best_score', 0),
+                    "score": board.score_of(user_id),  # 本榜成绩（兼容桌面客户端字段）
+                    "provisional": board.is_provisional(user_id),  # 本榜成绩尚待回放校验
+                    "total_score": user_info.get('total_score', 0),
+                    "games_played": user_info.get('games_played', 0),
+                    "last_game_at": user_info.get('last_game_at', user_info.get('created_at', ''))
+                })
             
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
-            response = {"success": True, "leaderboard": leaderboard_data}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            response = {
+                "success": True,
+                "leaderboard": leaderboard_data,
+                "data": leaderboard_data,  # 兼容桌面客户端 /api/scores/leaderboard
+                "mode": mode,
+                "window": window,
+                "total": len(board),
+                "limit": limit,
+                "offset": page[0][0] - 1 if page else offset
+            }
+            if around_user:
+                response["user_rank"] = user_rank
+            self.send_json(200, response)
             
         except Exception as e:
             print(f"[游戏排行榜] 错误: {e}")
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"success": False, "message": f"获取排行榜失败: {str(e)}"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(500, response)
 
     def handle_user_game_history(self):
         """处理用户游戏历史记录查询"""
@@ -1040,44 +1161,23 @@ class GameAPIHandler(BaseHTTPRequestHandler):
             user_id = query_params.get('user_id', [''])[0].strip()
             
             if not user_id:
-                self.send_response(400)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
                 response = {"success": False, "message": "缺少用户ID"}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
-                return
-            
-            # 获取用户游戏历史记录
-            history_file = 'game_history.json'
-            if not os.path.exists(history_file):
-                self.send_response(200)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
-                response = {"success": True, "history": []}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(400, response)
                 return
             
-            with open(history_file, 'r', encoding='utf-8') as f:
-                history_data = json.load(f)
-            
-            user_history = history_data.get(user_id, [])
+            # 获取用户游戏历史记录（按索引直接读取该用户的记录）
+            user_history = history_log.get(user_id)
             
             # 按时间降序排序（最新的在前面）
             user_history.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
             
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"success": True, "history": user_history}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(200, response)
             
         except Exception as e:
             print(f"[用户游戏历史] 错误: {e}")
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"success": False, "message": f"获取游戏历史失败: {str(e)}"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(500, response)
 
     def serve_static_file(self, path):
         """提供静态文件服务"""
@@ -1285,19 +1385,14 @@ class GameAPIHandler(BaseHTTPRequestHandler):
                     admin_token = f"admin_{secrets.token_hex(32)}"
                     
                     # 更新最后登录时间
-                    admin_data[admin_id]['last_login'] = datetime.now().isoformat()
-                    with open(admin_file, 'w', encoding='utf-8') as f:
-                        json.dump(admin_data, f, ensure_ascii=False, indent=2)
+                    with file_lock(admin_file):
+                        admin_data = load_json(admin_file)
+                        if admin_id in admin_data:
+                            admin_data[admin_id]['last_login'] = datetime.now().isoformat()
+                            atomic_write_json(admin_file, admin_data)
                     
                     # 保存管理员token
-                    admin_tokens_file = 'admin_tokens.json'
-                    if os.path.exists(admin_tokens_file):
-                        with open(admin_tokens_file, 'r', encoding='utf-8') as f:
-                            tokens_data = json.load(f)
-                    else:
-                        tokens_data = {}
-                    
-                    tokens_data[admin_token] = {
+                    admin_tokens.add(admin_token, {
                         'admin_id': admin_id,
                         'username': username,
                         'role': found_admin.get('role', 'admin'),
@@ -1305,16 +1400,10 @@ class GameAPIHandler(BaseHTTPRequestHandler):
                         'expires_at': (datetime.now() + timedelta(hours=8)).isoformat(),
                         'permissions': found_admin.get('permissions', []),
                         'last_used': datetime.now().isoformat()
-                    }
-                    
-                    with open(admin_tokens_file, 'w', encoding='utf-8') as f:
-                        json.dump(tokens_data, f, ensure_ascii=False, indent=2)
+                    })
                     
                     print(f"[管理员登录] 管理员登录成功: {username}")
                     
-                    self.send_response(200)
-                    self.send_header('Content-Type', 'application/json; charset=utf-8')
-                    self.end_headers()
                     response = {
                         "success": True,
                         "message": "登录成功",
@@ -1325,60 +1414,37 @@ class GameAPIHandler(BaseHTTPRequestHandler):
                             "permissions": found_admin.get('permissions', [])
                         }
                     }
-                    self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                    self.send_json(200, response)
                 else:
-                    self.send_response(401)
-                    self.send_header('Content-Type', 'application/json; charset=utf-8')
-                    self.end_headers()
                     response = {"success": False, "message": "用户名或密码不正确，或账号已被禁用"}
-                    self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                    self.send_json(401, response)
             
         except Exception as e:
             print(f"[管理员登录] 错误: {e}")
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"success": False, "message": f"登录失败: {str(e)}"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(500, response)
 
     def handle_admin_logout(self):
         """处理管理员登出"""
         try:
             auth_header = self.headers.get('Authorization', '')
             if not auth_header.startswith('Bearer '):
-                self.send_response(401)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
                 response = {"success": False, "message": "未登录"}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(401, response)
                 return
             
             token = auth_header[7:]
             
             # 删除管理员token
-            admin_tokens_file = 'admin_tokens.json'
-            if os.path.exists(admin_tokens_file):
-                with open(admin_tokens_file, 'r', encoding='utf-8') as f:
-                    tokens_data = json.load(f)
-                
-                if token in tokens_data:
-                    del tokens_data[token]
-                    with open(admin_tokens_file, 'w', encoding='utf-8') as f:
-                        json.dump(tokens_data, f, ensure_ascii=False, indent=2)
+            admin_tokens.remove(token)
             
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"success": True, "message": "登出成功"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(200, response)
             
         except Exception as e:
             print(f"[管理员登出] 错误: {e}")
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"success": False, "message": f"登出失败: {str(e)}"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(500, response)
 
     def verify_admin_permission(self, required_permission):
         """验证管理员权限"""
@@ -1389,31 +1455,10 @@ class GameAPIHandler(BaseHTTPRequestHandler):
             
             token = auth_header[7:]
             
-            admin_tokens_file = 'admin_tokens.json'
-            if not os.path.exists(admin_tokens_file):
-                return None, "token无效"
-            
-            with open(admin_tokens_file, 'r', encoding='utf-8') as f:
-                tokens_data = json.load(f)
-            
-            if token not in tokens_data:
-                return None, "token无效"
-            
-            token_info = tokens_data[token]
-            
-            # 检查token是否过期
-            expires_at = datetime.fromisoformat(token_info['expires_at'])
-            if datetime.now() > expires_at:
-                del tokens_data[token]
-                with open(admin_tokens_file, 'w', encoding='utf-8') as f:
-                    json.dump(tokens_data, f, ensure_ascii=False, indent=2)
-                return None, "token已过期"
-            
-            # 更新最后使用时间
-            token_info['last_used'] = datetime.now().isoformat()
-            tokens_data[token] = token_info
-            with open(admin_tokens_file, 'w', encoding='utf-8') as f:
-                json.dump(tokens_data, f, ensure_ascii=False, indent=2)
+            # 内存中校验token，last_used 由后台线程批量写回
+            token_info, error = admin_tokens.validate(token)
+            if error:
+                return None, error
             
             # 检查权限
             permissions = token_info.get('permissions', [])
@@ -1433,16 +1478,10 @@ class GameAPIHandler(BaseHTTPRequestHandler):
         try:
             token_info, error = self.verify_admin_permission('user_management')
             if error:
-                self.send_response(401)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
                 response = {"success": False, "message": error}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(401, response)
                 return
             
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {
                 "success": True,
                 "admin": {
@@ -1451,15 +1490,12 @@ class GameAPIHandler(BaseHTTPRequestHandler):
                     "permissions": token_info['permissions']
                 }
             }
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(200, response)
             
         except Exception as e:
             print(f"[管理员检查] 错误: {e}")
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"success": False, "message": f"检查失败: {str(e)}"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(500, response)
 
     def handle_admin_users_api(self, path):
         """处理管理员用户API路由"""
@@ -1482,22 +1518,16 @@ class GameAPIHandler(BaseHTTPRequestHandler):
         elif path.startswith('/api/admin/users/detail'):
             self.handle_admin_user_detail()
         else:
-            self.send_response(404)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"success": False, "message": "API不存在"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(404, response)
 
     def handle_admin_users_list(self):
         """处理管理员用户列表查询"""
         try:
             token_info, error = self.verify_admin_permission('user_management')
             if error:
-                self.send_response(401)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
                 response = {"success": False, "message": error}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(401, response)
                 return
             
             # 解析查询参数
@@ -1507,22 +1537,9 @@ class GameAPIHandler(BaseHTTPRequestHandler):
             limit = int(query_params.get('limit', ['20'])[0])
             search = query_params.get('search', [''])[0].strip()
             
-            # 获取用户数据
-            users_file = 'users.json'
-            if not os.path.exists(users_file):
-                self.send_response(200)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
-                response = {"success": True, "users": [], "total": 0, "page": page, "limit": limit}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
-                return
-            
-            with open(users_file, 'r', encoding='utf-8') as f:
-                users_data = json.load(f)
-            
             # 过滤用户数据
             users_list = []
-            for user_id, user_info in users_data.items():
+            for user_id, user_info in user_store.items():
                 # 搜索过滤
                 if search and search.lower() not in user_info.get('username', '').lower() and search not in user_info.get('phone', ''):
                     continue
@@ -1546,9 +1563,6 @@ class GameAPIHandler(BaseHTTPRequestHandler):
             end = start + limit
             users_list = users_list[start:end]
             
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {
                 "success": True,
                 "users": users_list,
@@ -1556,39 +1570,30 @@ class GameAPIHandler(BaseHTTPRequestHandler):
                 "page": page,
                 "limit": limit
             }
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(200, response)
             
         except Exception as e:
             print(f"[管理员用户列表] 错误: {e}")
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"success": False, "message": f"获取用户列表失败: {str(e)}"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(500, response)
 
     def handle_admin_stats(self):
         """处理管理员统计数据查询"""
         try:
             token_info, error = self.verify_admin_permission('data_management')
             if error:
-                self.send_response(401)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
                 response = {"success": False, "message": error}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(401, response)
                 return
             
             # 获取用户统计
-            users_file = 'users.json'
+            users_data = user_store.values()
             users_stats = {"total": 0, "active": 0, "today": 0}
-            if os.path.exists(users_file):
-                with open(users_file, 'r', encoding='utf-8') as f:
-                    users_data = json.load(f)
-                
+            if users_data:
                 today = datetime.now().date()
                 users_stats["total"] = len(users_data)
                 
-                for user_info in users_data.values():
+                for user_info in users_data:
                     # 活跃用户（最近7天登录过）
                     last_login = user_info.get('last_login')
                     if last_login:
@@ -1610,33 +1615,14 @@ class GameAPIHandler(BaseHTTPRequestHandler):
                             pass
             
             # 获取下载统计
-            downloads_file = 'download_stats.json'
-            downloads_stats = {"total": 0, "today": 0}
-            if os.path.exists(downloads_file):
-                with open(downloads_file, 'r', encoding='utf-8') as f:
-                    downloads_data = json.load(f)
-                
-                downloads = downloads_data.get('downloads', [])
-                downloads_stats["total"] = len(downloads)
-                
-                today = datetime.now().date()
-                for download in downloads:
-                    try:
-                        download_date = datetime.fromisoformat(download['timestamp']).date()
-                        if download_date == today:
-                            downloads_stats["today"] += 1
-                    except:
-                        pass
+            downloads_stats = download_stats.summary()
             
             # 获取游戏统计
             games_stats = {"total": 0, "best_score": 0}
-            if os.path.exists(users_file):
-                with open(users_file, 'r', encoding='utf-8') as f:
-                    users_data = json.load(f)
-                
+            if users_data:
                 total_games = 0
                 best_score = 0
-                for user_info in users_data.values():
+                for user_info in users_data:
                     total_games += user_info.get('games_played', 0)
                     best_score = max(best_score, user_info.get('best_score', 0))
                 
@@ -1655,32 +1641,41 @@ class GameAPIHandler(BaseHTTPRequestHandler):
                 "users": users_stats,
                 "downloads": downloads_stats,
                 "games": games_stats,
-                "system": system_stats
+                "system": system_stats,
+                "verification": verification_pool.stats()
             }
             
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
-            self.wfile.write(json.dumps(stats, ensure_ascii=False).encode('utf-8'))
+            self.send_json(200, stats)
             
         except Exception as e:
             print(f"[管理员统计] 错误: {e}")
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"error": f"获取统计数据失败: {str(e)}"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(500, response)
+
+    def handle_admin_verification(self):
+        """处理回放校验队列指标查询（队列深度、耗时分位数、通过/拒绝计数）"""
+        try:
+            token_info, error = self.verify_admin_permission('data_management')
+            if error:
+                response = {"success": False, "message": error}
+                self.send_json(401, response)
+                return
+            
+            response = {"success": True, "verification": verification_pool.stats()}
+            self.send_json(200, response)
+            
+        except Exception as e:
+            print(f"[回放校验统计] 错误: {e}")
+            response = {"success": False, "message": f"获取校验统计失败: {str(e)}"}
+            self.send_json(500, response)
 
     def handle_admin_logs_recent(self):
         """处理获取最近日志"""
         try:
             token_info, error = self.verify_admin_permission('system_management')
             if error:
-                self.send_response(401)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
                 response = {"success": False, "message": error}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(401, response)
                 return
             
             # 模拟日志数据（实际项目中应该从日志文件读取）
@@ -1712,35 +1707,26 @@ class GameAPIHandler(BaseHTTPRequestHandler):
                 }
             ]
             
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"success": True, "logs": logs}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(200, response)
             
         except Exception as e:
             print(f"[管理员日志] 错误: {e}")
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"success": False, "message": f"获取日志失败: {str(e)}"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(500, response)
 
     def handle_admin_users_statistics(self):
         """处理用户统计数据"""
         try:
             token_info, error = self.verify_admin_permission('data_management')
             if error:
-                self.send_response(401)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
                 response = {"success": False, "message": error}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(401, response)
                 return
             
             # 获取用户数据
-            users_file = 'users.json'
-            if not os.path.exists(users_file):
+            users_data = user_store.values()
+            if not users_data:
                 stats = {
                     "total_users": 0,
                     "active_users": 0,
@@ -1749,9 +1735,6 @@ class GameAPIHandler(BaseHTTPRequestHandler):
                     "average_score": 0
                 }
             else:
-                with open(users_file, 'r', encoding='utf-8') as f:
-                    users_data = json.load(f)
-                
                 today = datetime.now().date()
                 total_users = len(users_data)
                 active_users = 0
@@ -1759,7 +1742,7 @@ class GameAPIHandler(BaseHTTPRequestHandler):
                 total_games = 0
                 total_score = 0
                 
-                for user_info in users_data.values():
+                for user_info in users_data:
                     # 活跃用户（最近7天登录过）
                     last_login = user_info.get('last_login')
                     if last_login:
@@ -1794,19 +1777,13 @@ class GameAPIHandler(BaseHTTPRequestHandler):
                     "average_score": average_score
                 }
             
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"success": True, "statistics": stats}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(200, response)
             
         except Exception as e:
             print(f"[用户统计] 错误: {e}")
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"success": False, "message": f"获取用户统计失败: {str(e)}"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(500, response)
 
     def handle_admin_user_create(self):
         """处理管理员创建用户"""
@@ -1814,21 +1791,15 @@ class GameAPIHandler(BaseHTTPRequestHandler):
             # 检查权限：只有超级管理员才能管理其他管理员
             token_info, error = self.verify_admin_permission('admin_management')
             if error:
-                self.send_response(401)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
                 response = {"success": False, "message": error}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(401, response)
                 return
             
             # 额外检查：确保是超级管理员
             current_role = token_info.get('role', '')
             if current_role != 'super_admin':
-                self.send_response(403)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
                 response = {"success": False, "message": "只有超级管理员才能创建其他管理员"}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(403, response)
                 return
             
             content_length = int(self.headers.get('Content-Length', 0))
@@ -1844,53 +1815,20 @@ class GameAPIHandler(BaseHTTPRequestHandler):
                 # 输入验证
                 import re
                 if not re.match(r'^[a-zA-Z0-9_\u4e00-\u9fa5]{3,20}$', username):
-                    self.send_response(400)
-                    self.send_header('Content-Type', 'application/json; charset=utf-8')
-                    self.end_headers()
                     response = {"success": False, "message": "用户名格式不正确"}
-                    self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                    self.send_json(400, response)
                     return
                 
                 if phone and not re.match(r'^1[3-9]\d{9}$', phone):
-                    self.send_response(400)
-                    self.send_header('Content-Type', 'application/json; charset=utf-8')
-                    self.end_headers()
                     response = {"success": False, "message": "手机号格式不正确"}
-                    self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                    self.send_json(400, response)
                     return
                 
                 if len(password) < 6:
-                    self.send_response(400)
-                    self.send_header('Content-Type', 'application/json; charset=utf-8')
-                    self.end_headers()
                     response = {"success": False, "message": "密码至少需要6个字符"}
-                    self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                    self.send_json(400, response)
                     return
                 
-                # 检查用户是否已存在
-                users_file = 'users.json'
-                if os.path.exists(users_file):
-                    with open(users_file, 'r', encoding='utf-8') as f:
-                        users_data = json.load(f)
-                else:
-                    users_data = {}
-                
-                for user_info in users_data.values():
-                    if user_info.get('username') == username:
-                        self.send_response(400)
-                        self.send_header('Content-Type', 'application/json; charset=utf-8')
-                        self.end_headers()
-                        response = {"success": False, "message": "用户名已被使用"}
-                        self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
-                        return
-                    if phone and user_info.get('phone') == phone:
-                        self.send_response(400)
-                        self.send_header('Content-Type', 'application/json; charset=utf-8')
-                        self.end_headers()
-                        response = {"success": False, "message": "手机号已被注册"}
-                        self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
-                        return
-                
                 # 创建新用户
                 import hashlib
                 import secrets
@@ -1913,37 +1851,37 @@ class GameAPIHandler(BaseHTTPRequestHandler):
                     'created_by': 'admin'
                 }
                 
-                users_data[user_id] = user_info
-                
-                with open(users_file, 'w', encoding='utf-8') as f:
-                    json.dump(users_data, f, ensure_ascii=False, indent=2)
+                # 检查用户是否已存在（索引查找），查重和创建在同一把锁内完成
+                with user_store.lock:
+                    conflict = user_store.find_conflict(username=username, phone=phone)
+                    if conflict is None:
+                        user_store.create(user_id, user_info)
+                if conflict == 'username':
+                    response = {"success": False, "message": "用户名已被使用"}
+                    self.send_json(400, response)
+                    return
+                if conflict == 'phone':
+                    response = {"success": False, "message": "手机号已被注册"}
+                    self.send_json(400, response)
+                    return
                 
                 print(f"[管理员创建用户] 用户创建成功: {username} ({user_id})")
                 
-                self.send_response(200)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
                 response = {"success": True, "message": "用户创建成功", "user_id": user_id}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(200, response)
             
         except Exception as e:
             print(f"[管理员创建用户] 错误: {e}")
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"success": False, "message": f"用户创建失败: {str(e)}"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(500, response)
 
     def handle_admin_user_update(self):
         """处理管理员更新用户信息"""
         try:
             token_info, error = self.verify_admin_permission('user_management')
             if error:
-                self.send_response(401)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
                 response = {"success": False, "message": error}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(401, response)
                 return
             
             content_length = int(self.headers.get('Content-Length', 0))
@@ -1954,62 +1892,36 @@ class GameAPIHandler(BaseHTTPRequestHandler):
                 user_id = data.get('user_id', '').strip()
                 
                 if not user_id:
-                    self.send_response(400)
-                    self.send_header('Content-Type', 'application/json; charset=utf-8')
-                    self.end_headers()
                     response = {"success": False, "message": "缺少用户ID"}
-                    self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                    self.send_json(400, response)
                     return
                 
                 # 读取用户数据
-                users_file = 'users.json'
-                if not os.path.exists(users_file):
-                    self.send_response(404)
-                    self.send_header('Content-Type', 'application/json; charset=utf-8')
-                    self.end_headers()
-                    response = {"success": False, "message": "用户不存在"}
-                    self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
-                    return
-                
-                with open(users_file, 'r', encoding='utf-8') as f:
-                    users_data = json.load(f)
-                
-                if user_id not in users_data:
-                    self.send_response(404)
-                    self.send_header('Content-Type', 'application/json; charset=utf-8')
-                    self.end_headers()
+                user_info = user_store.get(user_id)
+                if user_info is None:
                     response = {"success": False, "message": "用户不存在"}
-                    self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                    self.send_json(404, response)
                     return
                 
                 # 更新用户信息
-                user_info = users_data[user_id]
                 old_username = user_info.get('username', '')
                 
                 # 检查用户名重复（如果修改了用户名）
                 new_username = data.get('username', '').strip()
                 if new_username and new_username != old_username:
-                    for uid, uinfo in users_data.items():
-                        if uid != user_id and uinfo.get('username') == new_username:
-                            self.send_response(400)
-                            self.send_header('Content-Type', 'application/json; charset=utf-8')
-                            self.end_headers()
-                            response = {"success": False, "message": "用户名已被使用"}
-                            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
-                            return
+                    if user_store.find_conflict(user_id, username=new_username):
+                        response = {"success": False, "message": "用户名已被使用"}
+                        self.send_json(400, response)
+                        return
                     user_info['username'] = new_username
                 
                 # 检查手机号重复（如果修改了手机号）
                 new_phone = data.get('phone', '').strip()
                 if new_phone and new_phone != user_info.get('phone', ''):
-                    for uid, uinfo in users_data.items():
-                        if uid != user_id and uinfo.get('phone') == new_phone:
-                            self.send_response(400)
-                            self.send_header('Content-Type', 'application/json; charset=utf-8')
-                            self.end_headers()
-                            response = {"success": False, "message": "手机号已被使用"}
-                            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
-                            return
+                    if user_store.find_conflict(user_id, phone=new_phone):
+                        response = {"success": False, "message": "手机号已被使用"}
+                        self.send_json(400, response)
+                        return
                     user_info['phone'] = new_phone
                 
                 # 更新其他字段
@@ -2024,35 +1936,25 @@ class GameAPIHandler(BaseHTTPRequestHandler):
                     user_info['password_hash'] = hashlib.sha256(data['password'].encode()).hexdigest()
                 
                 # 保存数据
-                with open(users_file, 'w', encoding='utf-8') as f:
-                    json.dump(users_data, f, ensure_ascii=False, indent=2)
+                user_store.save(user_id)
                 
                 print(f"[管理员更新用户] 用户信息更新成功: {user_info.get('username')} ({user_id})")
                 
-                self.send_response(200)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
                 response = {"success": True, "message": "用户信息更新成功"}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(200, response)
             
         except Exception as e:
             print(f"[管理员更新用户] 错误: {e}")
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"success": False, "message": f"更新用户失败: {str(e)}"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(500, response)
 
     def handle_admin_user_delete(self):
         """处理管理员删除单个用户"""
         try:
             token_info, error = self.verify_admin_permission('user_management')
             if error:
-                self.send_response(401)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
                 response = {"success": False, "message": error}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(401, response)
                 return
             
             content_length = int(self.headers.get('Content-Length', 0))
@@ -2063,77 +1965,40 @@ class GameAPIHandler(BaseHTTPRequestHandler):
                 user_id = data.get('user_id', '').strip()
                 
                 if not user_id:
-                    self.send_response(400)
-                    self.send_header('Content-Type', 'application/json; charset=utf-8')
-                    self.end_headers()
                     response = {"success": False, "message": "缺少用户ID"}
-                    self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                    self.send_json(400, response)
                     return
                 
                 # 删除用户
-                users_file = 'users.json'
-                if not os.path.exists(users_file):
-                    self.send_response(404)
-                    self.send_header('Content-Type', 'application/json; charset=utf-8')
-                    self.end_headers()
-                    response = {"success": False, "message": "用户不存在"}
-                    self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
-                    return
-                
-                with open(users_file, 'r', encoding='utf-8') as f:
-                    users_data = json.load(f)
-                
-                if user_id not in users_data:
-                    self.send_response(404)
-                    self.send_header('Content-Type', 'application/json; charset=utf-8')
-                    self.end_headers()
+                deleted_user = user_store.delete(user_id)
+                if deleted_user is None:
                     response = {"success": False, "message": "用户不存在"}
-                    self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                    self.send_json(404, response)
                     return
+                leaderboards.remove(user_id)
                 
-                username = users_data[user_id].get('username', '')
-                del users_data[user_id]
-                
-                with open(users_file, 'w', encoding='utf-8') as f:
-                    json.dump(users_data, f, ensure_ascii=False, indent=2)
+                username = deleted_user.get('username', '')
                 
                 # 也删除相关的游戏历史
-                history_file = 'game_history.json'
-                if os.path.exists(history_file):
-                    with open(history_file, 'r', encoding='utf-8') as f:
-                        history_data = json.load(f)
-                    
-                    if user_id in history_data:
-                        del history_data[user_id]
-                        with open(history_file, 'w', encoding='utf-8') as f:
-                            json.dump(history_data, f, ensure_ascii=False, indent=2)
+                history_log.delete(user_id)
                 
                 print(f"[管理员删除用户] 用户删除成功: {username} ({user_id})")
                 
-                self.send_response(200)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
                 response = {"success": True, "message": "用户删除成功"}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(200, response)
             
         except Exception as e:
             print(f"[管理员删除用户] 错误: {e}")
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"success": False, "message": f"用户删除失败: {str(e)}"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(500, response)
 
     def handle_admin_users_batch_delete(self):
         """处理管理员批量删除用户"""
         try:
             token_info, error = self.verify_admin_permission('user_management')
             if error:
-                self.send_response(401)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
                 response = {"success": False, "message": error}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(401, response)
                 return
             
             content_length = int(self.headers.get('Content-Length', 0))
@@ -2144,74 +2009,37 @@ class GameAPIHandler(BaseHTTPRequestHandler):
                 user_ids = data.get('user_ids', [])
                 
                 if not user_ids:
-                    self.send_response(400)
-                    self.send_header('Content-Type', 'application/json; charset=utf-8')
-                    self.end_headers()
                     response = {"success": False, "message": "缺少用户ID列表"}
-                    self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                    self.send_json(400, response)
                     return
                 
                 # 批量删除用户
-                users_file = 'users.json'
-                if not os.path.exists(users_file):
-                    self.send_response(404)
-                    self.send_header('Content-Type', 'application/json; charset=utf-8')
-                    self.end_headers()
-                    response = {"success": False, "message": "用户数据不存在"}
-                    self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
-                    return
-                
-                with open(users_file, 'r', encoding='utf-8') as f:
-                    users_data = json.load(f)
-                
                 deleted_count = 0
                 for user_id in user_ids:
-                    if user_id in users_data:
-                        del users_data[user_id]
+                    if user_store.delete(user_id) is not None:
+                        leaderboards.remove(user_id)
                         deleted_count += 1
                 
-                with open(users_file, 'w', encoding='utf-8') as f:
-                    json.dump(users_data, f, ensure_ascii=False, indent=2)
-                
                 # 批量删除游戏历史
-                history_file = 'game_history.json'
-                if os.path.exists(history_file):
-                    with open(history_file, 'r', encoding='utf-8') as f:
-                        history_data = json.load(f)
-                    
-                    for user_id in user_ids:
-                        if user_id in history_data:
-                            del history_data[user_id]
-                    
-                    with open(history_file, 'w', encoding='utf-8') as f:
-                        json.dump(history_data, f, ensure_ascii=False, indent=2)
+                history_log.delete_many(user_ids)
                 
                 print(f"[管理员批量删除] 删除用户数量: {deleted_count}")
                 
-                self.send_response(200)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
                 response = {"success": True, "message": f"成功删除 {deleted_count} 个用户"}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(200, response)
             
         except Exception as e:
             print(f"[管理员批量删除] 错误: {e}")
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"success": False, "message": f"批量删除失败: {str(e)}"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(500, response)
 
     def handle_admin_user_reset_password(self):
         """处理管理员重置用户密码"""
         try:
             token_info, error = self.verify_admin_permission('user_management')
             if error:
-                self.send_response(401)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
                 response = {"success": False, "message": error}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(401, response)
                 return
             
             content_length = int(self.headers.get('Content-Length', 0))
@@ -2223,77 +2051,46 @@ class GameAPIHandler(BaseHTTPRequestHandler):
                 new_password = data.get('new_password', '')
                 
                 if not user_id:
-                    self.send_response(400)
-                    self.send_header('Content-Type', 'application/json; charset=utf-8')
-                    self.end_headers()
                     response = {"success": False, "message": "缺少用户ID"}
-                    self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                    self.send_json(400, response)
                     return
                 
                 if len(new_password) < 6:
-                    self.send_response(400)
-                    self.send_header('Content-Type', 'application/json; charset=utf-8')
-                    self.end_headers()
                     response = {"success": False, "message": "密码至少需要6个字符"}
-                    self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                    self.send_json(400, response)
                     return
                 
                 # 重置密码
-                users_file = 'users.json'
-                if not os.path.exists(users_file):
-                    self.send_response(404)
-                    self.send_header('Content-Type', 'application/json; charset=utf-8')
-                    self.end_headers()
-                    response = {"success": False, "message": "用户不存在"}
-                    self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
-                    return
-                
-                with open(users_file, 'r', encoding='utf-8') as f:
-                    users_data = json.load(f)
-                
-                if user_id not in users_data:
-                    self.send_response(404)
-                    self.send_header('Content-Type', 'application/json; charset=utf-8')
-                    self.end_headers()
+                user_info = user_store.get(user_id)
+                if user_info is None:
                     response = {"success": False, "message": "用户不存在"}
-                    self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                    self.send_json(404, response)
                     return
                 
                 # 更新密码
                 import hashlib
                 password_hash = hashlib.sha256(new_password.encode()).hexdigest()
-                users_data[user_id]['password_hash'] = password_hash
+                user_info['password_hash'] = password_hash
+                user_store.save(user_id)
                 
-                with open(users_file, 'w', encoding='utf-8') as f:
-                    json.dump(users_data, f, ensure_ascii=False, indent=2)
-                
-                username = users_data[user_id].get('username', '')
+                username = user_info.get('username', '')
                 print(f"[管理员重置密码] 密码重置成功: {username} ({user_id})")
                 
-                self.send_response(200)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
                 response = {"success": True, "message": "密码重置成功"}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(200, response)
             
         except Exception as e:
             print(f"[管理员重置密码] 错误: {e}")
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"success": False, "message": f"密码重置失败: {str(e)}"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(500, response)
 
     def handle_admin_users_export(self):
         """处理用户数据导出"""
         try:
             token_info, error = self.verify_admin_permission('data_management')
             if error:
-                self.send_response(401)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
                 response = {"success": False, "message": error}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(401, response)
                 return
             
             # 解析查询参数
@@ -2302,18 +2099,12 @@ class GameAPIHandler(BaseHTTPRequestHandler):
             export_format = query_params.get('format', ['json'])[0]
             
             # 获取用户数据
-            users_file = 'users.json'
-            if not os.path.exists(users_file):
-                self.send_response(404)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
+            users_data = user_store.items()
+            if not users_data:
                 response = {"success": False, "message": "暂无用户数据"}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(404, response)
                 return
             
-            with open(users_file, 'r', encoding='utf-8') as f:
-                users_data = json.load(f)
-            
             if export_format == 'csv':
                 # 导出CSV格式
                 import csv
@@ -2326,7 +2117,7 @@ class GameAPIHandler(BaseHTTPRequestHandler):
                 writer.writerow(['用户ID', '用户名', '手机号', '邮箱', '注册时间', '最后登录', '最高分', '游戏次数', '状态'])
                 
                 # 写入数据行
-                for user_id, user_info in users_data.items():
+                for user_id, user_info in users_data:
                     writer.writerow([
                         user_id,
                         user_info.get('username', ''),
@@ -2352,7 +2143,7 @@ class GameAPIHandler(BaseHTTPRequestHandler):
                 # 导出JSON格式
                 # 清理敏感信息
                 export_data = {}
-                for user_id, user_info in users_data.items():
+                for user_id, user_info in users_data:
                     export_data[user_id] = {
                         'user_id': user_id,
                         'username': user_info.get('username', ''),
@@ -2379,33 +2170,24 @@ class GameAPIHandler(BaseHTTPRequestHandler):
             
         except Exception as e:
             print(f"[用户数据导出] 错误: {e}")
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"success": False, "message": f"数据导出失败: {str(e)}"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(500, response)
 
     def handle_admin_frontend_api(self, path):
         """处理前端管理API路由"""
         if path == '/api/admin/frontend/stats':
             self.handle_admin_frontend_stats()
         else:
-            self.send_response(404)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"success": False, "message": "API不存在"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(404, response)
 
     def handle_admin_frontend_stats(self):
         """处理前端管理统计数据"""
         try:
             token_info, error = self.verify_admin_permission('system_management')
             if error:
-                self.send_response(401)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
                 response = {"success": False, "message": error}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(401, response)
                 return
             
             # 前端文件统计
@@ -2441,19 +2223,13 @@ class GameAPIHandler(BaseHTTPRequestHandler):
             # 转换文件大小为MB
             stats["total_size_mb"] = round(stats["total_size"] / (1024 * 1024), 2)
             
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"success": True, "stats": stats}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(200, response)
             
         except Exception as e:
             print(f"[前端管理统计] 错误: {e}")
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"success": False, "message": f"获取前端统计失败: {str(e)}"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(500, response)
 
     def handle_admin_admins_api(self, path):
         """处理管理员管理API路由"""
@@ -2469,11 +2245,8 @@ class GameAPIHandler(BaseHTTPRequestHandler):
             elif self.command == 'DELETE':
                 self.handle_admin_admin_delete(admin_id)
         else:
-            self.send_response(404)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"success": False, "message": "API不存在"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(404, response)
 
     def handle_admin_admins_list(self):
         """获取管理员列表"""
@@ -2481,21 +2254,15 @@ class GameAPIHandler(BaseHTTPRequestHandler):
             # 检查权限：只有超级管理员才能管理其他管理员
             token_info, error = self.verify_admin_permission('admin_management')
             if error:
-                self.send_response(401)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
                 response = {"success": False, "message": error}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(401, response)
                 return
             
             # 额外检查：确保是超级管理员
             current_role = token_info.get('role', '')
             if current_role != 'super_admin':
-                self.send_response(403)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
                 response = {"success": False, "message": "只有超级管理员才能查看管理员列表"}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(403, response)
                 return
             
             # 读取管理员数据
@@ -2521,34 +2288,25 @@ class GameAPIHandler(BaseHTTPRequestHandler):
                     'permissions': admin_info.get('permissions', [])
                 })
             
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {
                 "success": True,
                 "data": safe_admin_list,
                 "total": len(safe_admin_list)
             }
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(200, response)
             
         except Exception as e:
             print(f"[管理员列表] 错误: {e}")
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"success": False, "message": f"获取管理员列表失败: {str(e)}"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(500, response)
 
     def handle_admin_admin_create(self):
         """创建新管理员"""
         try:
             token_info, error = self.verify_admin_permission('user_management')  # 降低权限要求
             if error:
-                self.send_response(401)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
                 response = {"success": False, "message": error}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(401, response)
                 return
             
             # 读取请求数据
@@ -2564,79 +2322,67 @@ class GameAPIHandler(BaseHTTPRequestHandler):
                 permissions = data.get('permissions', [])
                 
                 if not username or not password:
-                    self.send_response(400)
-                    self.send_header('Content-Type', 'application/json; charset=utf-8')
-                    self.end_headers()
                     response = {"success": False, "message": "用户名和密码不能为空"}
-                    self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                    self.send_json(400, response)
                     return
                 
                 # 读取现有管理员数据
                 admin_file = 'admin.json'
-                admin_data = {}
-                if os.path.exists(admin_file):
-                    with open(admin_file, 'r', encoding='utf-8') as f:
-                        admin_data = json.load(f)
-                
-                # 检查用户名是否已存在
-                for admin_info in admin_data.values():
-                    if admin_info.get('username') == username:
-                        self.send_response(400)
-                        self.send_header('Content-Type', 'application/json; charset=utf-8')
-                        self.end_headers()
-                        response = {"success": False, "message": "管理员用户名已存在"}
-                        self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
-                        return
+                with file_lock(admin_file):
+                    admin_data = {}
+                    if os.path.exists(admin_file):
+                        with open(admin_file, 'r', encoding='utf-8') as f:
+                            admin_data = json.load(f)
+                
+                    # 检查用户名是否已存在
+                    for admin_info in admin_data.values():
+                        if admin_info.get('username') == username:
+                            response = {"success": False, "message": "管理员用户名已存在"}
+                            self.send_json(400, response)
+                            return
                 
-                # 创建新管理员
-                import secrets
-                import hashlib
+                    # 创建新管理员
+                    import secrets
+                    import hashlib
                 
-                admin_id = secrets.token_hex(16)
-                password_hash = hashlib.sha256(password.encode()).hexdigest()
+                    admin_id = secrets.token_hex(16)
+                    password_hash = hashlib.sha256(password.encode()).hexdigest()
                 
-                # 默认权限设置
-                if not permissions:
-                    if role == 'super_admin':
-                        permissions = ['user_management', 'data_management', 'system_management', 'admin_management']
-                    else:
-                        permissions = ['user_management', 'data_management']
+                    # 默认权限设置
+                    if not permissions:
+                        if role == 'super_admin':
+                            permissions = ['user_management', 'data_management', 'system_management', 'admin_management']
+                        else:
+                            permissions = ['user_management', 'data_management']
                 
-                admin_data[admin_id] = {
-                    'username': username,
-                    'password_hash': password_hash,
-                    'email': email,
-                    'role': role,
-                    'created_at': datetime.now().isoformat(),
-                    'last_login': None,
-                    'is_active': True,
-                    'permissions': permissions,
-                    'created_by': token_info.get('username', 'system')
-                }
+                    admin_data[admin_id] = {
+                        'username': username,
+                        'password_hash': password_hash,
+                        'email': email,
+                        'role': role,
+                        'created_at': datetime.now().isoformat(),
+                        'last_login': None,
+                        'is_active': True,
+                        'permissions': permissions,
+                        'created_by': token_info.get('username', 'system')
+                    }
                 
-                # 保存数据
-                with open(admin_file, 'w', encoding='utf-8') as f:
-                    json.dump(admin_data, f, ensure_ascii=False, indent=2)
+                    # 保存数据
+                    atomic_write_json(admin_file, admin_data)
                 
                 print(f"[管理员创建] 新管理员创建成功: {username} (角色: {role})")
                 
-                self.send_response(200)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
                 response = {
                     "success": True,
                     "message": f"管理员 {username} 创建成功",
                     "admin_id": admin_id
                 }
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(200, response)
             
         except Exception as e:
             print(f"[管理员创建] 错误: {e}")
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"success": False, "message": f"创建管理员失败: {str(e)}"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(500, response)
 
     def handle_admin_admin_delete(self, admin_id):
         """删除管理员"""
@@ -2644,144 +2390,103 @@ class GameAPIHandler(BaseHTTPRequestHandler):
             # 检查权限：只有超级管理员才能管理其他管理员
             token_info, error = self.verify_admin_permission('admin_management')
             if error:
-                self.send_response(401)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
                 response = {"success": False, "message": error}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(401, response)
                 return
             
             # 额外检查：确保是超级管理员
             current_role = token_info.get('role', '')
             if current_role != 'super_admin':
-                self.send_response(403)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
                 response = {"success": False, "message": "只有超级管理员才能删除其他管理员"}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(403, response)
                 return
             
             # 读取管理员数据
             admin_file = 'admin.json'
-            if not os.path.exists(admin_file):
-                self.send_response(404)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
-                response = {"success": False, "message": "管理员不存在"}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
-                return
+            with file_lock(admin_file):
+                if not os.path.exists(admin_file):
+                    response = {"success": False, "message": "管理员不存在"}
+                    self.send_json(404, response)
+                    return
             
-            with open(admin_file, 'r', encoding='utf-8') as f:
-                admin_data = json.load(f)
+                with open(admin_file, 'r', encoding='utf-8') as f:
+                    admin_data = json.load(f)
             
-            if admin_id not in admin_data:
-                self.send_response(404)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
-                response = {"success": False, "message": "管理员不存在"}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
-                return
+                if admin_id not in admin_data:
+                    response = {"success": False, "message": "管理员不存在"}
+                    self.send_json(404, response)
+                    return
             
-            admin_info = admin_data[admin_id]
+                admin_info = admin_data[admin_id]
             
-            # 不能删除超级管理员
-            if admin_info.get('role') == 'super_admin':
-                self.send_response(403)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
-                response = {"success": False, "message": "不能删除超级管理员"}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
-                return
+                # 不能删除超级管理员
+                if admin_info.get('role') == 'super_admin':
+                    response = {"success": False, "message": "不能删除超级管理员"}
+                    self.send_json(403, response)
+                    return
             
-            # 不能删除自己
-            current_admin_id = token_info.get('admin_id')
-            if admin_id == current_admin_id:
-                self.send_response(403)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
-                response = {"success": False, "message": "不能删除自己"}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
-                return
+                # 不能删除自己
+                current_admin_id = token_info.get('admin_id')
+                if admin_id == current_admin_id:
+                    response = {"success": False, "message": "不能删除自己"}
+                    self.send_json(403, response)
+                    return
             
-            username = admin_info.get('username')
-            del admin_data[admin_id]
+                username = admin_info.get('username')
+                del admin_data[admin_id]
             
-            # 保存数据
-            with open(admin_file, 'w', encoding='utf-8') as f:
-                json.dump(admin_data, f, ensure_ascii=False, indent=2)
+                # 保存数据
+                atomic_write_json(admin_file, admin_data)
             
             # 撤销该管理员的所有token
             self.revoke_admin_tokens(admin_id)
             
             print(f"[管理员删除] 管理员删除成功: {username}")
             
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"success": True, "message": f"管理员 {username} 删除成功"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(200, response)
             
         except Exception as e:
             print(f"[管理员删除] 错误: {e}")
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"success": False, "message": f"删除管理员失败: {str(e)}"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(500, response)
 
     def ensure_default_admin(self):
         """确保存在默认管理员"""
         admin_file = 'admin.json'
-        if not os.path.exists(admin_file):
-            import hashlib
-            import secrets
-            
-            default_admin_id = secrets.token_hex(16)
-            default_admin = {
-                default_admin_id: {
-                    'username': 'admin',
-                    'password_hash': hashlib.sha256('admin123'.encode()).hexdigest(),
-                    'email': 'admin@flappybird.com',
-                    'role': 'super_admin',
-                    'created_at': datetime.now().isoformat(),
-                    'last_login': None,
-                    'is_active': True,
-                    'permissions': [
-                        'user_management',
-                        'system_management', 
-                        'data_management',
-                        'admin_management'
-                    ]
+        with file_lock(admin_file):
+            if not os.path.exists(admin_file):
+                import hashlib
+                import secrets
+            
+                default_admin_id = secrets.token_hex(16)
+                default_admin = {
+                    default_admin_id: {
+                        'username': 'admin',
+                        'password_hash': hashlib.sha256('admin123'.encode()).hexdigest(),
+                        'email': 'admin@flappybird.com',
+                        'role': 'super_admin',
+                        'created_at': datetime.now().isoformat(),
+                        'last_login': None,
+                        'is_active': True,
+                        'permissions': [
+                            'user_management',
+                            'system_management', 
+                            'data_management',
+                            'admin_management'
+                        ]
+                    }
                 }
-            }
             
-            with open(admin_file, 'w', encoding='utf-8') as f:
-                json.dump(default_admin, f, ensure_ascii=False, indent=2)
+                atomic_write_json(admin_file, default_admin)
             
-            print("[管理员] 默认管理员账户已创建 (用户名: admin, 密码: admin123)")
+                print("[管理员] 默认管理员账户已创建 (用户名: admin, 密码: admin123)")
 
     def revoke_admin_tokens(self, admin_id):
         """撤销指定管理员的所有token"""
         try:
-            admin_tokens_file = 'admin_tokens.json'
-            if not os.path.exists(admin_tokens_file):
-                return
-            
-            with open(admin_tokens_file, 'r', encoding='utf-8') as f:
-                tokens_data = json.load(f)
-            
-            tokens_to_remove = []
-            for token, token_info in tokens_data.items():
-                if token_info.get('admin_id') == admin_id:
-                    tokens_to_remove.append(token)
-            
-            for token in tokens_to_remove:
-                del tokens_data[token]
-            
-            with open(admin_tokens_file, 'w', encoding='utf-8') as f:
-                json.dump(tokens_data, f, ensure_ascii=False, indent=2)
-            
-            print(f"[管理员] 已撤销管理员 {admin_id} 的 {len(tokens_to_remove)} 个token")
+            removed = admin_tokens.remove_where(lambda token_info: token_info.get('admin_id') == admin_id)
+            print(f"[管理员] 已撤销管理员 {admin_id} 的 {removed} 个token")
             
         except Exception as e:
             print(f"[管理员] 撤销token失败: {e}")
@@ -2792,21 +2497,15 @@ class GameAPIHandler(BaseHTTPRequestHandler):
             # 检查权限：只有超级管理员才能管理其他管理员
             token_info, error = self.verify_admin_permission('admin_management')
             if error:
-                self.send_response(401)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
                 response = {"success": False, "message": error}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(401, response)
                 return
             
             # 额外检查：确保是超级管理员
             current_role = token_info.get('role', '')
             if current_role != 'super_admin':
-                self.send_response(403)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
                 response = {"success": False, "message": "只有超级管理员才能管理其他管理员"}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(403, response)
                 return
             
             # 读取请求数据
@@ -2817,82 +2516,67 @@ class GameAPIHandler(BaseHTTPRequestHandler):
                 
                 # 读取管理员数据
                 admin_file = 'admin.json'
-                if not os.path.exists(admin_file):
-                    self.send_response(404)
-                    self.send_header('Content-Type', 'application/json; charset=utf-8')
-                    self.end_headers()
-                    response = {"success": False, "message": "管理员不存在"}
-                    self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
-                    return
+                with file_lock(admin_file):
+                    if not os.path.exists(admin_file):
+                        response = {"success": False, "message": "管理员不存在"}
+                        self.send_json(404, response)
+                        return
                 
-                with open(admin_file, 'r', encoding='utf-8') as f:
-                    admin_data = json.load(f)
+                    with open(admin_file, 'r', encoding='utf-8') as f:
+                        admin_data = json.load(f)
                 
-                if admin_id not in admin_data:
-                    self.send_response(404)
-                    self.send_header('Content-Type', 'application/json; charset=utf-8')
-                    self.end_headers()
-                    response = {"success": False, "message": "管理员不存在"}
-                    self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
-                    return
+                    if admin_id not in admin_data:
+                        response = {"success": False, "message": "管理员不存在"}
+                        self.send_json(404, response)
+                        return
                 
-                # 更新管理员信息
-                admin_info = admin_data[admin_id]
+                    # 更新管理员信息
+                    admin_info = admin_data[admin_id]
                 
-                # 可更新的字段
-                if 'email' in data:
-                    admin_info['email'] = data['email'].strip()
-                if 'role' in data and data['role'] in ['admin', 'super_admin']:
-                    admin_info['role'] = data['role']
-                if 'is_active' in data:
-                    admin_info['is_active'] = bool(data['is_active'] == 'true' if isinstance(data['is_active'], str) else data['is_active'])
+                    # 可更新的字段
+                    if 'email' in data:
+                        admin_info['email'] = data['email'].strip()
+                    if 'role' in data and data['role'] in ['admin', 'super_admin']:
+                        admin_info['role'] = data['role']
+                    if 'is_active' in data:
+                        admin_info['is_active'] = bool(data['is_active'] == 'true' if isinstance(data['is_active'], str) else data['is_active'])
                 
-                # 如果有新密码
-                if 'password' in data and data['password'].strip():
-                    import hashlib
-                    admin_info['password_hash'] = hashlib.sha256(data['password'].encode()).hexdigest()
+                    # 如果有新密码
+                    if 'password' in data and data['password'].strip():
+                        import hashlib
+                        admin_info['password_hash'] = hashlib.sha256(data['password'].encode()).hexdigest()
                 
-                # 根据角色设置权限
-                if 'role' in data:
-                    if data['role'] == 'super_admin':
-                        admin_info['permissions'] = ['user_management', 'data_management', 'system_management', 'admin_management']
-                    else:
-                        admin_info['permissions'] = ['user_management', 'data_management']
+                    # 根据角色设置权限
+                    if 'role' in data:
+                        if data['role'] == 'super_admin':
+                            admin_info['permissions'] = ['user_management', 'data_management', 'system_management', 'admin_management']
+                        else:
+                            admin_info['permissions'] = ['user_management', 'data_management']
                 
-                # 如果手动设置了权限，优先使用手动设置的
-                if 'permissions' in data:
-                    admin_info['permissions'] = data['permissions']
+                    # 如果手动设置了权限，优先使用手动设置的
+                    if 'permissions' in data:
+                        admin_info['permissions'] = data['permissions']
                 
-                # 保存数据
-                with open(admin_file, 'w', encoding='utf-8') as f:
-                    json.dump(admin_data, f, ensure_ascii=False, indent=2)
+                    # 保存数据
+                    atomic_write_json(admin_file, admin_data)
                 
                 print(f"[管理员更新] 管理员信息更新成功: {admin_info.get('username')}")
                 
-                self.send_response(200)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
                 response = {"success": True, "message": "管理员信息更新成功"}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(200, response)
             
         except Exception as e:
             print(f"[管理员更新] 错误: {e}")
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"success": False, "message": f"更新管理员失败: {str(e)}"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(500, response)
 
     def handle_admin_user_detail(self):
         """处理用户详情查询"""
         try:
             token_info, error = self.verify_admin_permission('user_management')
             if error:
-                self.send_response(401)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
                 response = {"success": False, "message": error}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(401, response)
                 return
             
             # 解析查询参数
@@ -2901,46 +2585,22 @@ class GameAPIHandler(BaseHTTPRequestHandler):
             user_id = query_params.get('user_id', [''])[0].strip()
             
             if not user_id:
-                self.send_response(400)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
                 response = {"success": False, "message": "缺少用户ID"}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(400, response)
                 return
             
             # 读取用户数据
-            users_file = 'users.json'
-            if not os.path.exists(users_file):
-                self.send_response(404)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
+            user_info = user_store.get(user_id)
+            if user_info is None:
                 response = {"success": False, "message": "用户不存在"}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+                self.send_json(404, response)
                 return
             
-            with open(users_file, 'r', encoding='utf-8') as f:
-                users_data = json.load(f)
-            
-            if user_id not in users_data:
-                self.send_response(404)
-                self.send_header('Content-Type', 'application/json; charset=utf-8')
-                self.end_headers()
-                response = {"success": False, "message": "用户不存在"}
-                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
-                return
-            
-            user_info = users_data[user_id]
-            
             # 获取用户游戏历史
-            history_file = 'game_history.json'
-            user_history = []
-            if os.path.exists(history_file):
-                with open(history_file, 'r', encoding='utf-8') as f:
-                    history_data = json.load(f)
-                user_history = history_data.get(user_id, [])
-                # 按时间降序排序，只取最近20条
-                user_history.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
-                user_history = user_history[:20]
+            user_history = history_log.get(user_id)
+            # 按时间降序排序，只取最近20条
+            user_history.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
+            user_history = user_history[:20]
             
             # 清理敏感信息并添加额外统计
             safe_user_info = {
@@ -2959,24 +2619,144 @@ class GameAPIHandler(BaseHTTPRequestHandler):
                 "recent_games": user_history
             }
             
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {
                 "success": True,
                 "user": safe_user_info
             }
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(200, response)
             
         except Exception as e:
             print(f"[用户详情] 错误: {e}")
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.end_headers()
             response = {"success": False, "message": f"获取用户详情失败: {str(e)}"}
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_json(500, response)
+
+class KeepAliveGameAPIHandler(GameAPIHandler):
+    """支持HTTP/1.1长连接的处理器（线程池模式下使用）
+
+    工作线程数量固定，等待下一个请求时只等 timeout 秒：空闲的长连接很快关闭并释放
+    工作线程，不会几个空闲客户端就占满线程池；收到请求行后再放宽到 request_timeout
+    """
+    protocol_version = 'HTTP/1.1'
+    timeout = 2  # 等待请求行的超时时间（秒），空闲长连接超时后释放工作线程
+    request_timeout = 15  # 收到请求行后读取请求和发送响应的超时时间（秒）
+    _waiting = False  # 是否正在等待下一个请求
+
+    def handle_one_request(self):
+        self.connection.settimeout(self.timeout)
+        self._waiting = True
+        super().handle_one_request()
+        # 有新连接在排队时主动关闭长连接，把工作线程让给排队的请求
+        if not self.close_connection and self.server.has_pending_requests():
+            self.close_connection = True
+
+    def parse_request(self):
+        # 请求行已到达，读取请求头和请求体时使用正常的超时
+        self._waiting = False
+        self.connection.settimeout(self.request_timeout)
+        return super().parse_request()
+
+    def log_error(self, format, *args):
+        if self._waiting and format.startswith("Request timed out"):
+            return  # 空闲长连接超时关闭是正常情况，不记录
+        super().log_error(format, *args)
+
+
+class PooledHTTPServer(HTTPServer):
+    """固定大小工作线程池的HTTP服务器
+
+    主线程只负责accept，连接放入有界队列交给工作线程处理；
+    队列已满时直接返回503，避免慢请求（如源码打包下载）拖住所有请求
+    """
+
+    def __init__(self, server_address, handler_class, workers=8, queue_size=64):
+        # 先建好队列和线程列表：绑定端口失败时 socketserver 会调用 server_close，
+        # 它要能正常执行，才不会掩盖真正的错误（如端口已被占用）
+        self.workers = workers
+        self.queue_size = queue_size
+        self._requests = queue.Queue(maxsize=queue_size)
+        self._threads = []
+        super().__init__(server_address, handler_class)
+        for i in range(workers):
+            thread = threading.Thread(target=self._worker_loop, name=f'http-worker-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def has_pending_requests(self):
+        """是否有连接正在排队等待工作线程"""
+        return not self._requests.empty()
+
+    def process_request(self, request, client_address):
+        try:
+            self._requests.put_nowait((request, client_address))
+        except queue.Full:
+            self._reject_busy(request, client_address)
+
+    def _worker_loop(self):
+        while True:
+            item = self._requests.get()
+            if item is None:
+                break
+            request, client_address = item
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    def _reject_busy(self, request, client_address):
+        """队列已满时直接返回503"""
+        print(f"[服务器] 请求队列已满({self.queue_size})，拒绝连接: {client_address[0]}")
+        body = json.dumps({"success": False, "message": "服务器繁忙，请稍后重试"},
+                          ensure_ascii=False).encode('utf-8')
+        headers = (
+            'HTTP/1.1 503 Service Unavailable\r\n'
+            'Content-Type: application/json; charset=utf-8\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            'Retry-After: 1\r\n'
+            'Access-Control-Allow-Origin: *\r\n'
+            'Connection: close\r\n\r\n'
+        )
+        try:
+            request.settimeout(1)
+            request.sendall(headers.encode('ascii') + body)
+        except OSError:
+            pass
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        for _ in self._threads:
+            self._requests.put(None)
+
+
+def create_server(server_address, workers=None, queue_size=None):
+    """创建HTTP服务器
+
+    workers 工作线程数（环境变量 SERVER_WORKERS，默认8，设为0使用原来的单线程模式）
+    queue_size 排队连接上限（环境变量 SERVER_QUEUE_SIZE，默认64），超出返回503
+    """
+    if workers is None:
+        workers = int(os.environ.get('SERVER_WORKERS', 8))
+    if queue_size is None:
+        queue_size = int(os.environ.get('SERVER_QUEUE_SIZE', 64))
+    
+    print(f"🗄️  存储后端: {STORAGE_BACKEND}")
+    if verification_pool.inline:
+        print("🔍 回放校验: 请求线程内同步校验")
+    else:
+        print(f"🔍 回放校验: {verification_pool.workers} 个校验进程")
+        GameAPIHandler.resume_provisional_scores()
+    if workers <= 0:
+        print("🔧 服务模式: 单线程")
+        return HTTPServer(server_address, GameAPIHandler)
+    
+    print(f"🔧 服务模式: 线程池 ({workers} 个工作线程, 队列上限 {queue_size}, 支持长连接)")
+    return PooledHTTPServer(server_address, KeepAliveGameAPIHandler, workers, queue_size)
+
 
-def run_server(port=None):
+def run_server(port=None, workers=None, queue_size=None):
     """启动服务器 - 适配Replit环境"""
     # 自动检测运行环境和端口
     if port is None:
@@ -3004,7 +2784,7 @@ def run_server(port=None):
         print(f"❤️  状态检查: http://localhost:{port}/health")
     
     server_address = (host, port)
-    httpd = HTTPServer(server_address, GameAPIHandler)
+    httpd = create_server(server_address, workers, queue_size)
     
     print(f"🔧 服务器配置: {host if host else 'localhost'}:{port}")
     print("💡 按 Ctrl+C 停止服务器")
@@ -3016,6 +2796,13 @@ def run_server(port=None):
     except KeyboardInterrupt:
         print("\n🛑 服务器已停止")
         httpd.server_close()
+    finally:
+        verification_pool.close()
+        # 关闭前把内存中的用户数据和token写回磁盘
+        user_store.close()
+        user_tokens.close()
+        admin_tokens.close()
+        history_log.close()
 
 if __name__ == "__main__":
     run_server() 
\ No newline at end of file
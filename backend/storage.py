@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据存储后端模块
+用户数据、游戏历史和下载统计的持久化方式由环境变量 STORAGE_BACKEND 选择：
+- json（默认）: users.json / game_history.jsonl / download_stats.json
+- sqlite: app/models/database.py 中的SQLAlchemy模型（需要安装sqlalchemy，
+  数据库地址由环境变量 DATABASE_URL 指定，旧数据用 migrate_to_sqlite.py 导入）
+
+两种后端下用户数据都常驻内存（见 user_store.py），后端只负责加载和写回：
+JSON后端整文件原子替换，SQLite后端只写入有变化的行
+"""
+
+import copy
+import json
+import os
+from datetime import datetime
+
+from history_log import HistoryLog
+from json_files import atomic_write_json, atomic_write_text, file_lock, load_json
+
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'json').strip().lower()
+
+# users.json 中有独立数据库列的字段，其余字段存入 extra 列
+USER_COLUMNS = ('username', 'phone', 'email', 'is_active', 'best_score', 'total_score',
+                'games_played', 'created_by')
+USER_TIME_COLUMNS = ('created_at', 'last_login', 'best_score_at', 'last_game_at')
+
+
+class JsonUserBackend:
+    """用户数据保存在 users.json"""
+    name = 'users.json'
+
+    def __init__(self, users_file='users.json'):
+        self.users_file = users_file
+
+    def load(self):
+        return load_json(self.users_file)
+
+    def prepare(self, users, dirty):
+        """在存储锁内调用：序列化需要写回的数据"""
+        return json.dumps(users, ensure_ascii=False, indent=2)
+
+    def commit(self, payload):
+        """在存储锁外调用：真正写入磁盘"""
+        atomic_write_text(self.users_file, payload)
+
+
+class JsonDownloadStats:
+    """下载统计保存在 download_stats.json"""
+
+    def __init__(self, stats_file='download_stats.json'):
+        self.stats_file = stats_file
+
+    def record(self, entry):
+        with file_lock(self.stats_file):
+            stats = load_json(self.stats_file, {"downloads": []})
+            stats["downloads"].append(entry)
+            atomic_write_json(self.stats_file, stats)
+
+    def summary(self):
+        """返回 {"total": 总下载量, "today": 今日下载量}"""
+        downloads = load_json(self.stats_file, {"downloads": []}).get('downloads', [])
+        today = datetime.now().date()
+        today_count = 0
+        for download in downloads:
+            try:
+                if datetime.fromisoformat(download['timestamp']).date() == today:
+                    today_count += 1
+            except (KeyError, TypeError, ValueError):
+                pass
+        return {"total": len(downloads), "today": today_count}
+
+
+# ---------------------------------------------------------------------------
+# SQLite 后端
+# ---------------------------------------------------------------------------
+
+_database = None
+
+
+def get_database():
+    """延迟导入SQLAlchemy模型并建表，只有使用sqlite后端时才需要安装sqlalchemy"""
+    global _database
+    if _database is None:
+        from app.models import database
+        database.create_tables()
+        _database = database
+    return _database
+
+
+def _to_datetime(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_iso(value):
+    return value.isoformat() if value else None
+
+
+def apply_user_row(row, user_id, user_info):
+    """把 users.json 格式的用户记录写入 User 行"""
+    row.user_id = user_id
+    for column in USER_COLUMNS:
+        setattr(row, column, user_info.get(column))
+    # phone/email 有唯一约束，空字符串统一存为NULL
+    row.phone = user_info.get('phone') or None
+    row.email = user_info.get('email') or None
+    row.hashed_password = user_info.get('password_hash')
+    for column in USER_TIME_COLUMNS:
+        setattr(row, column, _to_datetime(user_info.get(column)))
+    extra = {key: value for key, value in user_info.items()
+             if key not in USER_COLUMNS and key not in USER_TIME_COLUMNS
+             and key not in ('user_id', 'password_hash')}
+    row.extra = json.dumps(extra, ensure_ascii=False) if extra else None
+
+
+def user_row_to_dict(row):
+    """把 User 行还原为 users.json 格式的用户记录"""
+    user_info = {'user_id': row.user_id}
+    for column in USER_COLUMNS:
+        user_info[column] = getattr(row, column)
+    if row.hashed_password is not None:
+        user_info['password_hash'] = row.hashed_password
+    for column in USER_TIME_COLUMNS:
+        value = getattr(row, column)
+        if value is not None or column == 'last_login':
+            user_info[column] = _to_iso(value)
+    if row.extra:
+        user_info.update(json.loads(row.extra))
+    return user_info
+
+
+def history_row(user_id, record):
+    """把一条游戏历史记录转换为 GameScore 行（playtime 毫秒 -> play_time 秒）"""
+    database = get_database()
+    return database.GameScore(
+        user_id=user_id,
+        game_mode=record.get('game_mode'),
+        score=record.get('score', 0),
+        play_time=record.get('playtime', 0) / 1000.0,
+        is_new_record=bool(record.get('is_new_record')),
+        created_at=_to_datetime(record.get('timestamp')) or datetime.now(),
+    )
+
+
+def history_row_to_dict(row):
+    record = {
+        'score': row.score,
+        'timestamp': _to_iso(row.created_at),
+        'is_new_record': bool(row.is_new_record),
+    }
+    if row.game_mode is not None:
+        record['game_mode'] = row.game_mode
+        record['playtime'] = int(round((row.play_time or 0) * 1000))
+    return record
+
+
+def download_row(entry):
+    """把 download_stats.json 中的一条记录转换为 DownloadStats 行"""
+    database = get_database()
+    return database.DownloadStats(
+        platform=entry.get('type', 'unknown'),
+        version=entry.get('version', 'unknown'),
+        download_time=_to_datetime(entry.get('timestamp')) or datetime.now(),
+    )
+
+
+class SqlUserBackend:
+    """用户数据保存在 users 表，写回时只处理有变化的行"""
+    name = 'SQLite'
+
+    def load(self):
+        database = get_database()
+        session = database.SessionLocal()
+        try:
+            return {row.user_id: user_row_to_dict(row)
+                    for row in session.query(database.User).filter(database.User.user_id.isnot(None))}
+        finally:
+            session.close()
+
+    def prepare(self, users, dirty):
+        """在存储锁内调用：复制有变化的记录，已删除的用户对应None"""
+        return {user_id: copy.deepcopy(users.get(user_id)) for user_id in dirty}
+
+    def commit(self, changes):
+        from sqlalchemy.exc import IntegrityError
+        database = get_database()
+        session = database.SessionLocal()
+        try:
+            try:
+                self._write(session, changes)
+                session.commit()
+                return
+            except IntegrityError:
+                session.rollback()
+            # 批量写入违反唯一约束时逐行重试，避免一条坏数据拖住所有写回
+            for user_id, user_info in changes.items():
+                try:
+                    self._write(session, {user_id: user_info})
+                    session.commit()
+                except Exception as e:
+                    session.rollback()
+                    print(f"[数据库] 写入用户 {user_id} 失败: {e}")
+        finally:
+            session.close()
+
+    @staticmethod
+    def _write(session, changes):
+        User = get_database().User
+        for user_id, user_info in changes.items():
+            row = session.query(User).filter(User.user_id == user_id).one_or_none()
+            if user_info is None:
+                if row is not None:
+                    session.delete(row)
+                continue
+            if row is None:
+                row = User()
+                session.add(row)
+            apply_user_row(row, user_id, user_info)
+        session.flush()
+
+
+class SqlHistory:
+    """游戏历史保存在 game_scores 表，接口与 HistoryLog 相同"""
+
+    def __init__(self, max_per_user=100):
+        self.max_per_user = max_per_user
+
+    def append(self, user_id, record):
+        database = get_database()
+        GameScore = database.GameScore
+        session = database.SessionLocal()
+        try:
+            session.add(history_row(user_id, record))
+            session.flush()
+            # 每个用户只保留最近的记录（按 user_id 索引查询）
+            expired = [row_id for (row_id,) in session.query(GameScore.id)
+                       .filter(GameScore.user_id == user_id)
+                       .order_by(GameScore.id.desc())
+                       .offset(self.max_per_user)]
+            if expired:
+                session.query(GameScore).filter(GameScore.id.in_(expired)).delete(synchronize_session=False)
+            session.commit()
+        finally:
+            session.close()
+
+    def get(self, user_id, limit=None):
+        """读取用户的历史记录（按写入顺序，最早的在前）"""
+        database = get_database()
+        GameScore = database.GameScore
+        session = database.SessionLocal()
+        try:
+            rows = (session.query(GameScore)
+                    .filter(GameScore.user_id == user_id)
+                    .order_by(GameScore.id.desc())
+                    .limit(limit or self.max_per_user)
+                    .all())
+            return [history_row_to_dict(row) for row in reversed(rows)]
+        finally:
+            session.close()
+
+    def delete(self, user_id):
+        return self.delete_many([user_id]) > 0
+
+    def delete_many(self, user_ids):
+        database = get_database()
+        GameScore = database.GameScore
+        session = database.SessionLocal()
+        try:
+            deleted_users = {user_id for (user_id,) in session.query(GameScore.user_id)
+                             .filter(GameScore.user_id.in_(list(user_ids))).distinct()}
+            if deleted_users:
+                session.query(GameScore).filter(GameScore.user_id.in_(list(deleted_users))) \
+                    .delete(synchronize_session=False)
+                session.commit()
+            return len(deleted_users)
+        finally:
+            session.close()
+
+    def close(self):
+        pass
+
+
+class SqlDownloadStats:
+    """下载统计保存在 download_stats 表"""
+
+    def record(self, entry):
+        database = get_database()
+        session = database.SessionLocal()
+        try:
+            session.add(download_row(entry))
+            session.commit()
+        finally:
+            session.close()
+
+    def summary(self):
+        database = get_database()
+        DownloadStats = database.DownloadStats
+        session = database.SessionLocal()
+        try:
+            today_start = datetime.combine(datetime.now().date(), datetime.min.time())
+            return {
+                "total": session.query(DownloadStats).count(),
+                "today": session.query(DownloadStats)
+                .filter(DownloadStats.download_time >= today_start).count(),
+            }
+        finally:
+            session.close()
+
+
+if STORAGE_BACKEND == 'json':
+    user_backend = JsonUserBackend()
+    history_log = HistoryLog()
+    download_stats = JsonDownloadStats()
+elif STORAGE_BACKEND == 'sqlite':
+    try:
+        get_database()
+    except ImportError as e:
+        raise ImportError("使用sqlite存储后端需要先安装sqlalchemy: pip install sqlalchemy") from e
+    user_backend = SqlUserBackend()
+    history_log = SqlHistory()
+    download_stats = SqlDownloadStats()
+else:
+    raise ValueError(f"未知的存储后端: {STORAGE_BACKEND}（可选 json / sqlite）")
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+回放校验回归测试
+校验出错（游戏引擎抛异常、校验器不可用）时成绩必须按不通过处理，不能记入正式成绩；
+没有回放的成绩不能进入排行榜。
+不需要 pygame：用抛异常的假引擎代替无头游戏引擎。
+
+运行: cd backend && python -m unittest test_replay_verifier
+"""
+
+import io
+import json
+import sys
+import unittest
+from datetime import datetime
+from unittest import mock
+
+import simple_server_fixed
+from replay_verifier import ReplayVerifier, VerificationPool
+from simple_server_fixed import GameAPIHandler
+
+
+class BrokenEngine:
+    """重跑时抛异常的引擎"""
+
+    def run_headless(self, *args, **kwargs):
+        raise AttributeError("'SilentSound' object has no attribute 'set_volume'")
+
+
+class PassingEngine:
+    """按回放原样给出通过结果的引擎"""
+
+    def run_headless(self, game_mode, seed=None, inputs=(), max_steps=0):
+        return {'finished': True, 'steps': max_steps, 'score': 50}
+
+
+def make_replay_text(score=50, mode="CLASSIC", inputs=((0, 1), (10, 1))):
+    replay_cls = ReplayVerifier()._load_replay_format()
+    return replay_cls(mode, seed=1, inputs=list(inputs), steps=300, score=score).to_base64()
+
+
+def post(handler_method, body):
+    """不经过HTTP直接调用提交接口，返回 (状态码, 响应)"""
+    handler = GameAPIHandler.__new__(GameAPIHandler)
+    raw = json.dumps(body).encode('utf-8')
+    handler.headers = {'Content-Length': str(len(raw))}
+    handler.rfile = io.BytesIO(raw)
+    sent = []
+    handler.send_json = lambda status, response: sent.append((status, response))
+    handler_method(handler)
+    return sent[0]
+
+
+def make_verifier(engine):
+    verifier = ReplayVerifier()
+    verifier._engine = engine
+    verifier._game_modes = {"CLASSIC": "CLASSIC"}
+    if engine is None:
+        verifier._engine_error = "No module named 'pygame'"
+    return verifier
+
+
+class ReplayVerifierFailClosedTest(unittest.TestCase):
+    def test_engine_exception_is_rejected(self):
+        verified, reason = make_verifier(BrokenEngine()).verify(make_replay_text(), 50, "classic")
+        self.assertIs(verified, False)
+        self.assertEqual(reason, "校验出错")
+
+    def test_missing_engine_is_rejected(self):
+        verified, _ = make_verifier(None).verify(make_replay_text(), 50, "classic")
+        self.assertIs(verified, False)
+
+    def test_missing_replay_format_is_rejected(self):
+        """游戏目录配置错误、回放格式导入失败时按不通过处理，不抛出异常"""
+        replay_text = make_replay_text()
+        verifier = ReplayVerifier('/nonexistent/game-desktop')
+        with mock.patch.dict(sys.modules, {'src.replay': None}):
+            self.assertEqual(verifier.precheck(replay_text, 50, "classic"), (None, "校验器不可用"))
+            verified, _ = verifier.verify(replay_text, 50, "classic")
+        self.assertIs(verified, False)
+
+    def test_engine_exception_never_applies_results(self):
+        """待校验成绩重跑出错时不调用 apply_game_results，并从待校验列表移除"""
+        entry = {
+            'id': 'e1', 'score': 50, 'game_mode': 'classic', 'playtime': 10,
+            'played_at': '2026-01-01T00:00:00', 'replay': make_replay_text(),
+        }
+        user_info = {'user_id': 'u1', 'username': 'u1', 'provisional_scores': [dict(entry)]}
+        store = mock.MagicMock()
+        store.get.return_value = user_info
+        pool = VerificationPool(workers=0, verifier=make_verifier(BrokenEngine()))
+
+        with mock.patch.object(simple_server_fixed, 'user_store', store), \
+                mock.patch.object(simple_server_fixed, 'leaderboards', mock.MagicMock()), \
+                mock.patch.object(simple_server_fixed, 'verification_pool', pool), \
+                mock.patch.object(GameAPIHandler, 'apply_game_results') as apply_results:
+            GameAPIHandler.verify_provisional_score('u1', entry)
+
+        apply_results.assert_not_called()
+        self.assertNotIn('provisional_scores', user_info)
+        self.assertEqual(pool.stats()['rejected'], 1)
+
+    def test_test_mode_actions_are_rejected(self):
+        """包含测试模式生成道具动作（编码8起）的回放在重跑前就被拒绝"""
+        replay_text = make_replay_text(inputs=[(0, 1), (5, 9)])
+        replay, reason = make_verifier(BrokenEngine()).precheck(replay_text, 50, "classic")
+        self.assertIsNone(replay)
+        self.assertIn("测试模式", reason)
+
+    def test_unranked_results_stay_off_leaderboards(self):
+        """没有回放的成绩只计入局数和总分，不更新最高分和排行榜"""
+        user_info = {'user_id': 'u1', 'username': 'u1', 'best_score': 5, 'games_played': 1, 'total_score': 5}
+        store = mock.MagicMock()
+        store.get.return_value = user_info
+        boards = mock.MagicMock()
+        result = (99, 'classic', 10, datetime(2026, 1, 1))
+
+        with mock.patch.object(simple_server_fixed, 'user_store', store), \
+                mock.patch.object(simple_server_fixed, 'leaderboards', boards), \
+                mock.patch.object(simple_server_fixed, 'history_log', mock.MagicMock()), \
+                mock.patch.object(simple_server_fixed, 'record_score') as record_score:
+            _, new_records = GameAPIHandler.apply_game_results('u1', [result], ranked=False)
+
+        self.assertEqual(new_records, [False])
+        self.assertEqual(user_info['best_score'], 5)
+        self.assertEqual(user_info['games_played'], 2)
+        record_score.assert_not_called()
+        boards.update.assert_called_once_with('u1', user_info, set())
+
+    def test_worker_error_is_rejected(self):
+        """校验进程自身出错（error_callback）同样按不通过处理"""
+        results = []
+        pool = VerificationPool(workers=1)
+        fake_pool = mock.MagicMock()
+        fake_pool.apply_async.side_effect = lambda *args, error_callback, **kwargs: error_callback(RuntimeError("boom"))
+        with mock.patch.object(pool, '_ensure_pool', return_value=fake_pool):
+            pool.submit(make_replay_text(), 50, "classic", lambda verified, reason: results.append(verified))
+        self.assertEqual(results, [False])
+
+
+class DuplicateReplayTest(unittest.TestCase):
+    """同一局回放只能计入一次成绩"""
+
+    def setUp(self):
+        self.user_info = {'user_id': 'u1', 'username': 'u1', 'best_score': 0, 'games_played': 0, 'total_score': 0}
+        store = mock.MagicMock()
+        store.get.return_value = self.user_info
+        store.__contains__.return_value = True
+        self.history = mock.MagicMock()
+        patches = [
+            mock.patch.object(simple_server_fixed, 'user_store', store),
+            mock.patch.object(simple_server_fixed, 'leaderboards', mock.MagicMock()),
+            mock.patch.object(simple_server_fixed, 'history_log', self.history),
+            mock.patch.object(simple_server_fixed, 'record_score', return_value=set()),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def use_verifier(self, engine, workers=0):
+        verifier = make_verifier(engine)
+        pool = VerificationPool(workers=workers, verifier=verifier)
+        for name, value in (('replay_verifier', verifier), ('verification_pool', pool)):
+            patch = mock.patch.object(simple_server_fixed, name, value)
+            patch.start()
+            self.addCleanup(patch.stop)
+        return pool
+
+    def submit(self, replay_text):
+        body = {'user_id': 'u1', 'score': 50, 'game_mode': 'classic', 'replay': replay_text}
+        return post(GameAPIHandler.handle_game_submit_score, body)
+
+    def test_same_replay_submitted_twice(self):
+        self.use_verifier(PassingEngine())
+        replay_text = make_replay_text()
+
+        first_status, _ = self.submit(replay_text)
+        second_status, second = self.submit(replay_text)
+
+        self.assertEqual(first_status, 200)
+        self.assertEqual(second_status, 400)
+        self.assertFalse(second['success'])
+        self.assertEqual(self.user_info['games_played'], 1)
+        self.assertEqual(self.user_info['total_score'], 50)
+        self.assertEqual(self.history.append.call_count, 1)
+
+    def test_same_game_with_changed_inputs_is_a_duplicate(self):
+        """改动输入重新编码的同一局（同一种子）同样视为重复"""
+        self.use_verifier(PassingEngine())
+        self.submit(make_replay_text())
+        status, _ = self.submit(make_replay_text(inputs=[(0, 1), (11, 1)]))
+        self.assertEqual(status, 400)
+        self.assertEqual(self.user_info['games_played'], 1)
+
+    def test_duplicates_rejected_before_queueing(self):
+        """有校验进程时，重复的回放不会再次排队"""
+        pool = self.use_verifier(PassingEngine(), workers=1)
+        fake_pool = mock.MagicMock()
+        with mock.patch.object(pool, '_ensure_pool', return_value=fake_pool):
+            replay_text = make_replay_text()
+            self.assertEqual(self.submit(replay_text)[0], 200)
+            self.assertEqual(self.submit(replay_text)[0], 400)
+            body = {'user_id': 'u1', 'results': [{'score': 50, 'game_mode': 'classic', 'replay': replay_text}]}
+            _, response = post(GameAPIHandler.handle_game_submit_batch, body)
+
+        self.assertEqual(response['rejected'], 1)
+        self.assertEqual(fake_pool.apply_async.call_count, 1)
+        self.assertEqual(len(self.user_info['provisional_scores']), 1)
+
+    def test_batch_with_repeated_replay(self):
+        self.use_verifier(PassingEngine())
+        item = {'score': 50, 'game_mode': 'classic', 'replay': make_replay_text()}
+        _, response = post(GameAPIHandler.handle_game_submit_batch, {'user_id': 'u1', 'results': [item, item]})
+
+        self.assertEqual((response['accepted'], response['rejected']), (1, 1))
+        self.assertEqual(self.user_info['games_played'], 1)
+
+    def test_rejected_replay_can_be_resubmitted(self):
+        """校验不通过的回放没有计入成绩，不占用登记"""
+        self.use_verifier(BrokenEngine())
+        self.assertEqual(self.submit(make_replay_text())[0], 400)
+        self.assertEqual(self.user_info['replay_digests'], [])
+        self.assertEqual(self.user_info['games_played'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
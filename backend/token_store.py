@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+登录Token存储模块
+Token表常驻内存，校验只需一次字典查找，不再每次请求读写磁盘；
+过期时间放在最小堆里由后台线程定期清理，last_used 等修改合并后批量写回
+"""
+
+import atexit
+import heapq
+import json
+import threading
+import time
+from datetime import datetime
+
+from json_files import BackgroundFlusher, atomic_write_text, load_json
+
+
+def _expiry_timestamp(token_info):
+    """解析token的过期时间，格式错误的token视为已过期"""
+    try:
+        return datetime.fromisoformat(token_info['expires_at']).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return 0.0
+
+
+class TokenStore:
+    def __init__(self, tokens_file, name='Token存储', flush_interval=2.0, sweep_interval=60.0):
+        self.tokens_file = tokens_file
+        self.name = name
+        self.sweep_interval = sweep_interval
+        self.lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._tokens = None
+        self._expires = {}  # token -> 过期时间戳
+        self._heap = []  # (过期时间戳, token)，被删除或续期的token在出堆时跳过
+        self._dirty = False
+        self._last_sweep = 0.0
+        self._flusher = BackgroundFlusher(self._tick, flush_interval, name=name)
+
+    def _ensure_loaded(self):
+        """首次访问时加载token文件，并启动后台线程"""
+        if self._tokens is not None:
+            return
+        with self.lock:
+            if self._tokens is not None:
+                return
+            try:
+                tokens = load_json(self.tokens_file)
+            except Exception as e:
+                print(f"[{self.name}] 加载token失败: {e}")
+                tokens = {}
+            self._tokens = {}
+            for token, token_info in tokens.items():
+                self._put(token, token_info)
+            self._last_sweep = time.time()
+            print(f"[{self.name}] 已加载 {len(self._tokens)} 个token")
+            self._flusher.start()
+            atexit.register(self.close)
+
+    def _put(self, token, token_info):
+        expires = _expiry_timestamp(token_info)
+        self._tokens[token] = token_info
+        self._expires[token] = expires
+        heapq.heappush(self._heap, (expires, token))
+
+    def _pop(self, token):
+        self._expires.pop(token, None)
+        return self._tokens.pop(token, None)
+
+    def validate(self, token, touch=True):
+        """校验token，返回 (token_info, 错误信息)
+
+        touch 为True时更新 last_used（只改内存，由后台线程批量写回）
+        """
+        self._ensure_loaded()
+        with self.lock:
+            token_info = self._tokens.get(token)
+            if token_info is None:
+                return None, "token无效"
+            if time.time() > self._expires[token]:
+                self._pop(token)
+                self._dirty = True
+                return None, "token已过期"
+            if touch:
+                token_info['last_used'] = datetime.now().isoformat()
+                self._dirty = True
+            return token_info, None
+
+    def get(self, token):
+        """获取未过期的token信息，不存在或已过期返回None"""
+        return self.validate(token, touch=False)[0]
+
+    def add(self, token, token_info):
+        """保存新token"""
+        self._ensure_loaded()
+        with self.lock:
+            self._put(token, token_info)
+            self._dirty = True
+
+    def remove(self, token):
+        """删除token，返回被删除的token信息"""
+        self._ensure_loaded()
+        with self.lock:
+            token_info = self._pop(token)
+            if token_info is not None:
+                self._dirty = True
+            return token_info
+
+    def remove_where(self, predicate):
+        """删除满足条件的所有token（如某用户的全部会话），返回删除数量"""
+        self._ensure_loaded()
+        with self.lock:
+            tokens = [token for token, token_info in self._tokens.items() if predicate(token_info)]
+            for token in tokens:
+                self._pop(token)
+            if tokens:
+                self._dirty = True
+            return len(tokens)
+
+    def items(self):
+        """返回 (token, token_info) 列表快照"""
+        self._ensure_loaded()
+        with self.lock:
+            return list(self._tokens.items())
+
+    def sweep(self):
+        """清理已过期的token，返回清理数量"""
+        self._ensure_loaded()
+        now = time.time()
+        removed = 0
+        with self.lock:
+            while self._heap and self._heap[0][0] < now:
+                expires, token = heapq.heappop(self._heap)
+                if self._expires.get(token) == expires:
+                    self._pop(token)
+                    removed += 1
+            # 续期或删除留下的失效堆元素过多时重建堆
+            if len(self._heap) > 2 * len(self._tokens) + 64:
+                self._heap = [(expires, token) for token, expires in self._expires.items()]
+                heapq.heapify(self._heap)
+            if removed:
+                self._dirty = True
+            self._last_sweep = now
+        if removed:
+            print(f"[{self.name}] 已清理 {removed} 个过期token")
+        return removed
+
+    def flush(self):
+        """有修改时把整个token表写回磁盘，返回是否写入"""
+        if self._tokens is None:
+            return False
+        with self._flush_lock:
+            with self.lock:
+                if not self._dirty:
+                    return False
+                self._dirty = False
+                content = json.dumps(self._tokens, ensure_ascii=False, indent=2)
+            try:
+                atomic_write_text(self.tokens_file, content)
+            except Exception:
+                with self.lock:
+                    self._dirty = True
+                raise
+            return True
+
+    def _tick(self):
+        """后台线程：按间隔清理过期token，然后批量写回"""
+        if time.time() - self._last_sweep >= self.sweep_interval:
+            self.sweep()
+        self.flush()
+
+    def close(self):
+        """停止后台线程并写回剩余修改"""
+        self._flusher.stop()
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"[{self.name}] 关闭时写回失败: {e}")
+
+
+# 全局token存储实例
+user_tokens = TokenStore('user_tokens.json', name='用户Token')
+admin_tokens = TokenStore('admin_tokens.json', name='管理员Token')
@@ -3,57 +3,47 @@
 """
 用户管理模块
 提供完整的用户管理功能，包括增删改查、数据统计等
+用户数据和登录token都通过进程内的共享存储（user_store、user_tokens）读写，
+不直接读写 users.json / user_tokens.json，否则会被后台写回覆盖或读到旧数据
 """
 
 import json
-import os
 import hashlib
 from datetime import datetime, timedelta
 
+from token_store import user_tokens
+from user_store import user_store
+
 class UserAdmin:
-    def __init__(self):
-        self.users_file = 'users.json'
-        self.tokens_file = 'user_tokens.json'
-        self.sms_file = 'sms_codes.json'
-        self.stats_file = 'download_stats.json'
+    def _user_snapshots(self):
+        """返回去掉密码哈希的用户记录副本列表"""
+        users_list = []
+        for user_id, user_info in user_store.items():
+            # 修复：确保只对字典类型的用户数据调用.copy()方法
+            if isinstance(user_info, dict):
+                user_dict = user_info.copy()
+                user_dict['user_id'] = user_id
+                # 移除敏感信息
+                user_dict.pop('password_hash', None)
+                users_list.append(user_dict)
+            else:
+                print(f"[警告] 用户数据格式错误: {user_id} = {type(user_info)}")
+        return users_list
     
     def get_all_users(self, page=1, page_size=20, search=None, sort_by='created_at', order='desc'):
         """获取所有用户（分页、搜索、排序）"""
         try:
-            if not os.path.exists(self.users_file):
-                return {
-                    'users': [],
-                    'total': 0,
-                    'page': page,
-                    'page_size': page_size,
-                    'total_pages': 0
-                }
-            
-            with open(self.users_file, 'r', encoding='utf-8') as f:
-                users_data = json.load(f)
-            
             # 转换为列表格式便于处理
-            users_list = []
-            for user_id, user_info in users_data.items():
-                # 修复：确保只对字典类型的用户数据调用.copy()方法
-                if isinstance(user_info, dict):
-                    user_dict = user_info.copy()
-                    user_dict['user_id'] = user_id
-                    # 移除敏感信息
-                    user_dict.pop('password_hash', None)
-                    users_list.append(user_dict)
-                else:
-                    print(f"[警告] 用户数据格式错误: {user_id} = {type(user_info)}")
-                    continue
+            users_list = self._user_snapshots()
             
             # 搜索过滤
             if search:
                 search_lower = search.lower()
                 filtered_users = []
                 for user in users_list:
-                    if (search_lower in user.get('username', '').lower() or
-                        search_lower in user.get('phone', '') or
-                        search_lower in user.get('email', '').lower()):
+                    if (search_lower in (user.get('username') or '').lower() or
+                        search_lower in (user.get('phone') or '') or
+                        search_lower in (user.get('email') or '').lower()):
                         filtered_users.append(user)
                 users_list = filtered_users
             
@@ -94,17 +84,10 @@ class UserAdmin:
     def get_user_detail(self, user_id):
         """获取用户详细信息"""
         try:
-            if not os.path.exists(self.users_file):
-                return None
-            
-            with open(self.users_file, 'r', encoding='utf-8') as f:
-                users_data = json.load(f)
-            
-            if user_id not in users_data:
-                return None
-            
             # 修复：确保用户数据是字典类型
-            user_info = users_data[user_id]
+            user_info = user_store.get(user_id)
+            if user_info is None:
+                return None
             if not isinstance(user_info, dict):
                 print(f"[警告] 用户数据格式错误: {user_id} = {type(user_info)}")
                 return None
@@ -113,21 +96,11 @@ class UserAdmin:
             user_info['user_id'] = user_id
             user_info.pop('password_hash', None)  # 移除密码哈希
             
-            # 获取用户的token信息
-            user_info['active_tokens'] = 0
-            if os.path.exists(self.tokens_file):
-                with open(self.tokens_file, 'r', encoding='utf-8') as f:
-                    tokens_data = json.load(f)
-                
-                current_time = datetime.now()
-                for token_info in tokens_data.values():
-                    if token_info.get('user_id') == user_id:
-                        try:
-                            expires_at = datetime.fromisoformat(token_info['expires_at'])
-                            if current_time <= expires_at:
-                                user_info['active_tokens'] += 1
-                        except:
-                            pass
+            # 获取用户的token信息（get 只返回未过期的token）
+            user_info['active_tokens'] = sum(
+                1 for token, token_info in user_tokens.items()
+                if token_info.get('user_id') == user_id and user_tokens.get(token) is not None
+            )
             
             return user_info
             
@@ -138,37 +111,28 @@ class UserAdmin:
     def update_user(self, user_id, updates):
         """更新用户信息"""
         try:
-            if not os.path.exists(self.users_file):
-                return False, "用户文件不存在"
-            
-            with open(self.users_file, 'r', encoding='utf-8') as f:
-                users_data = json.load(f)
-            
-            if user_id not in users_data:
-                return False, "用户不存在"
-            
-            user_info = users_data[user_id]
-            
-            # 更新允许的字段
-            allowed_fields = ['username', 'email', 'best_score', 'total_score', 'games_played', 'is_active']
-            for field in allowed_fields:
-                if field in updates:
-                    if field == 'username':
-                        # 检查用户名是否已被其他用户使用
-                        for uid, uinfo in users_data.items():
-                            if uid != user_id and uinfo.get('username') == updates[field]:
-                                return False, "用户名已被使用"
-                    user_info[field] = updates[field]
-            
-            # 如果更新了密码
-            if 'password' in updates and updates['password']:
-                user_info['password_hash'] = hashlib.sha256(updates['password'].encode()).hexdigest()
-            
-            user_info['updated_at'] = datetime.now().isoformat()
-            users_data[user_id] = user_info
-            
-            with open(self.users_file, 'w', encoding='utf-8') as f:
-                json.dump(users_data, f, ensure_ascii=False, indent=2)
+            # 查重和修改在同一把锁内完成
+            with user_store.lock:
+                user_info = user_store.get(user_id)
+                if user_info is None:
+                    return False, "用户不存在"
+                
+                # 检查用户名是否已被其他用户使用
+                if 'username' in updates and user_store.find_conflict(user_id, username=updates['username']):
+                    return False, "用户名已被使用"
+                
+                # 更新允许的字段
+                allowed_fields = ['username', 'email', 'best_score', 'total_score', 'games_played', 'is_active']
+                for field in allowed_fields:
+                    if field in updates:
+                        user_info[field] = updates[field]
+                
+                # 如果更新了密码
+                if 'password' in updates and updates['password']:
+                    user_info['password_hash'] = hashlib.sha256(updates['password'].encode()).hexdigest()
+                
+                user_info['updated_at'] = datetime.now().isoformat()
+                user_store.save(user_id)
             
             return True, "用户信息更新成功"
             
@@ -179,58 +143,22 @@ class UserAdmin:
     def delete_user(self, user_id):
         """删除用户"""
         try:
-            if not os.path.exists(self.users_file):
-                return False, "用户文件不存在"
-            
-            with open(self.users_file, 'r', encoding='utf-8') as f:
-                users_data = json.load(f)
-            
-            if user_id not in users_data:
+            user_info = user_store.delete(user_id)
+            if user_info is None:
                 return False, "用户不存在"
             
-            username = users_data[user_id].get('username')
-            del users_data[user_id]
-            
-            with open(self.users_file, 'w', encoding='utf-8') as f:
-                json.dump(users_data, f, ensure_ascii=False, indent=2)
-            
             # 删除用户的所有token
-            if os.path.exists(self.tokens_file):
-                with open(self.tokens_file, 'r', encoding='utf-8') as f:
-                    tokens_data = json.load(f)
-                
-                tokens_to_remove = []
-                for token, token_info in tokens_data.items():
-                    if token_info.get('user_id') == user_id:
-                        tokens_to_remove.append(token)
-                
-                for token in tokens_to_remove:
-                    del tokens_data[token]
-                
-                with open(self.tokens_file, 'w', encoding='utf-8') as f:
-                    json.dump(tokens_data, f, ensure_ascii=False, indent=2)
+            user_tokens.remove_where(lambda token_info: token_info.get('user_id') == user_id)
             
-            return True, f"用户 {username} 删除成功"
+            return True, f"用户 {user_info.get('username')} 删除成功"
             
         except Exception as e:
             print(f"[用户管理] 删除用户错误: {e}")
             return False, f"删除失败: {str(e)}"
     
     def create_user(self, username, phone, password, email=None):
-        """创建新用户"""
+        """创建新用户（写入共享的内存用户存储，查重走用户名/手机号索引）"""
         try:
-            users_data = {}
-            if os.path.exists(self.users_file):
-                with open(self.users_file, 'r', encoding='utf-8') as f:
-                    users_data = json.load(f)
-            
-            # 检查用户名和手机号是否已存在
-            for user_info in users_data.values():
-                if user_info.get('username') == username:
-                    return False, "用户名已存在"
-                if user_info.get('phone') == phone:
-                    return False, "手机号已被注册"
-            
             # 创建新用户
             import secrets
             user_id = secrets.token_hex(16)
@@ -250,10 +178,15 @@ class UserAdmin:
                 'is_active': True
             }
             
-            users_data[user_id] = user_info
-            
-            with open(self.users_file, 'w', encoding='utf-8') as f:
-                json.dump(users_data, f, ensure_ascii=False, indent=2)
+            # 检查用户名和手机号是否已存在，查重和创建在同一把锁内完成
+            with user_store.lock:
+                conflict = user_store.find_conflict(username=username, phone=phone)
+                if conflict is None:
+                    user_store.create(user_id, user_info)
+            if conflict == 'username':
+                return False, "用户名已存在"
+            if conflict == 'phone':
+                return False, "手机号已被注册"
             
             return True, f"用户 {username} 创建成功"
             
@@ -264,42 +197,20 @@ class UserAdmin:
     def batch_delete_users(self, user_ids):
         """批量删除用户"""
         try:
-            if not os.path.exists(self.users_file):
-                return False, "用户文件不存在"
-            
-            with open(self.users_file, 'r', encoding='utf-8') as f:
-                users_data = json.load(f)
-            
             deleted_users = []
             not_found_users = []
             
             for user_id in user_ids:
-                if user_id in users_data:
-                    username = users_data[user_id].get('username')
-                    del users_data[user_id]
-                    deleted_users.append(username)
+                user_info = user_store.delete(user_id)
+                if user_info is not None:
+                    deleted_users.append(user_info.get('username'))
                 else:
                     not_found_users.append(user_id)
             
             if deleted_users:
-                with open(self.users_file, 'w', encoding='utf-8') as f:
-                    json.dump(users_data, f, ensure_ascii=False, indent=2)
-                
                 # 删除这些用户的所有token
-                if os.path.exists(self.tokens_file):
-                    with open(self.tokens_file, 'r', encoding='utf-8') as f:
-                        tokens_data = json.load(f)
-                    
-                    tokens_to_remove = []
-                    for token, token_info in tokens_data.items():
-                        if token_info.get('user_id') in user_ids:
-                            tokens_to_remove.append(token)
-                    
-                    for token in tokens_to_remove:
-                        del tokens_data[token]
-                    
-                    with open(self.tokens_file, 'w', encoding='utf-8') as f:
-                        json.dump(tokens_data, f, ensure_ascii=False, indent=2)
+                deleted_ids = set(user_ids)
+                user_tokens.remove_where(lambda token_info: token_info.get('user_id') in deleted_ids)
             
             message = f"成功删除 {len(deleted_users)} 个用户"
             if not_found_users:
@@ -326,28 +237,12 @@ class UserAdmin:
                 'activity_chart': []
             }
             
-            if not os.path.exists(self.users_file):
-                return stats
-            
-            with open(self.users_file, 'r', encoding='utf-8') as f:
-                users_data = json.load(f)
-            
             current_time = datetime.now()
             today = current_time.date()
             week_ago = current_time - timedelta(days=7)
             month_ago = current_time - timedelta(days=30)
             
-            all_users = []
-            for user_id, user_info in users_data.items():
-                # 修复：确保只对字典类型的用户数据调用.copy()方法
-                if isinstance(user_info, dict):
-                    user_dict = user_info.copy()
-                    user_dict['user_id'] = user_id
-                    user_dict.pop('password_hash', None)
-                    all_users.append(user_dict)
-                else:
-                    print(f"[警告] 用户统计数据格式错误: {user_id} = {type(user_info)}")
-                    continue
+            all_users = self._user_snapshots()
             
             stats['total_users'] = len(all_users)
             
@@ -414,24 +309,9 @@ class UserAdmin:
     def force_logout_user(self, user_id):
         """强制用户登出（删除所有token）"""
         try:
-            if not os.path.exists(self.tokens_file):
-                return True, "用户已登出"
+            removed = user_tokens.remove_where(lambda token_info: token_info.get('user_id') == user_id)
             
-            with open(self.tokens_file, 'r', encoding='utf-8') as f:
-                tokens_data = json.load(f)
-            
-            tokens_to_remove = []
-            for token, token_info in tokens_data.items():
-                if token_info.get('user_id') == user_id:
-                    tokens_to_remove.append(token)
-            
-            for token in tokens_to_remove:
-                del tokens_data[token]
-            
-            with open(self.tokens_file, 'w', encoding='utf-8') as f:
-                json.dump(tokens_data, f, ensure_ascii=False, indent=2)
-            
-            return True, f"已强制登出用户，删除 {len(tokens_to_remove)} 个会话"
+            return True, f"已强制登出用户，删除 {removed} 个会话"
             
         except Exception as e:
             print(f"[用户管理] 强制登出错误: {e}")
@@ -440,22 +320,14 @@ class UserAdmin:
     def reset_user_password(self, user_id, new_password):
         """重置用户密码"""
         try:
-            if not os.path.exists(self.users_file):
-                return False, "用户文件不存在"
-            
-            with open(self.users_file, 'r', encoding='utf-8') as f:
-                users_data = json.load(f)
-            
-            if user_id not in users_data:
-                return False, "用户不存在"
-            
-            user_info = users_data[user_id]
-            user_info['password_hash'] = hashlib.sha256(new_password.encode()).hexdigest()
-            user_info['password_reset_at'] = datetime.now().isoformat()
-            users_data[user_id] = user_info
-            
-            with open(self.users_file, 'w', encoding='utf-8') as f:
-                json.dump(users_data, f, ensure_ascii=False, indent=2)
+            with user_store.lock:
+                user_info = user_store.get(user_id)
+                if user_info is None:
+                    return False, "用户不存在"
+                
+                user_info['password_hash'] = hashlib.sha256(new_password.encode()).hexdigest()
+                user_info['password_reset_at'] = datetime.now().isoformat()
+                user_store.save(user_id)
             
             # 同时强制用户登出
             self.force_logout_user(user_id)
@@ -469,24 +341,8 @@ class UserAdmin:
     def export_users_data(self, format='json'):
         """导出用户数据"""
         try:
-            if not os.path.exists(self.users_file):
-                return None, "用户文件不存在"
-            
-            with open(self.users_file, 'r', encoding='utf-8') as f:
-                users_data = json.load(f)
-            
             # 移除敏感信息
-            export_data = {}
-            for user_id, user_info in users_data.items():
-                # 修复：确保只对字典类型的用户数据调用.copy()方法
-                if isinstance(user_info, dict):
-                    safe_info = user_info.copy()
-                    safe_info.pop('password_hash', None)
-                    safe_info['user_id'] = user_id
-                    export_data[user_id] = safe_info
-                else:
-                    print(f"[警告] 导出数据格式错误: {user_id} = {type(user_info)}")
-                    continue
+            export_data = {user['user_id']: user for user in self._user_snapshots()}
             
             if format == 'json':
                 return json.dumps(export_data, ensure_ascii=False, indent=2), "users_export.json"
@@ -17,6 +17,12 @@ class UserManager:
         self.data_file = data_file
         self.users = self.load_users()
         self.sessions = {}  # 存储用户会话
+        # 邮箱 -> 用户名 索引，注册查重不再遍历所有用户
+        self.email_index = {
+            user_data["email"]: username
+            for username, user_data in self.users.get("users", {}).items()
+            if user_data.get("email")
+        }
     
     def load_users(self) -> Dict:
         """加载用户数据"""
@@ -53,9 +59,8 @@ class UserManager:
             return {"success": False, "message": "用户名已存在"}
         
         # 检查邮箱是否存在
-        for user_data in self.users["users"].values():
-            if user_data.get("email") == email:
-                return {"success": False, "message": "邮箱已被注册"}
+        if email and email in self.email_index:
+            return {"success": False, "message": "邮箱已被注册"}
         
         # 创建用户
         user_id = str(uuid.uuid4())
@@ -77,6 +82,8 @@ class UserManager:
         
         self.users["users"][username] = user_data
         self.users["total_users"] = len(self.users["users"])
+        if email:
+            self.email_index[email] = username
         self.save_users()
         
         print(f"[用户系统] 新用户注册: {username}")
@@ -221,7 +228,9 @@ class UserManager:
     def delete_user(self, username: str) -> bool:
         """删除用户（管理员功能）"""
         if username in self.users["users"]:
-            del self.users["users"][username]
+            user_data = self.users["users"].pop(username)
+            if self.email_index.get(user_data.get("email")) == username:
+                del self.email_index[user_data["email"]]
             self.users["total_users"] = len(self.users["users"])
             self.save_users()
             print(f"[用户系统] 删除用户: {username}")
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+用户数据存储模块
+进程内只加载一次用户数据，读请求直接走内存，
+修改过的用户记录标记为脏数据，由后台线程定时批量写回（JSON文件或SQLite，见 storage.py）；
+用户名、手机号、邮箱维护哈希索引，登录和注册查重不再遍历所有用户
+"""
+
+import atexit
+import threading
+
+from json_files import BackgroundFlusher
+from storage import user_backend
+
+# 建立查找索引的字段
+INDEXED_FIELDS = ('username', 'phone', 'email')
+
+
+class UserStore:
+    def __init__(self, backend=user_backend, flush_interval=2.0):
+        self.backend = backend
+        self.lock = threading.RLock()  # 保护内存数据，复合操作可在外部持有
+        self._flush_lock = threading.Lock()  # 保证同一时间只有一个线程写文件
+        self._users = None
+        self._dirty = set()
+        self._indexes = {field: {} for field in INDEXED_FIELDS}  # 字段值 -> user_id
+        self._indexed_values = {}  # user_id -> 建立索引时的字段值，用于更新时删除旧索引
+        self._flusher = BackgroundFlusher(self.flush, flush_interval, name='用户存储')
+
+    def _ensure_loaded(self):
+        """首次访问时加载用户数据，并启动后台刷盘线程"""
+        if self._users is not None:
+            return
+        with self.lock:
+            if self._users is not None:
+                return
+            try:
+                self._users = self.backend.load()
+            except Exception as e:
+                # 加载失败时不能以空数据继续运行，否则后台写回会覆盖原有数据
+                print(f"[用户存储] 加载用户数据失败: {e}")
+                raise
+            for user_id in self._users:
+                self._reindex(user_id)
+            print(f"[用户存储] 已从 {self.backend.name} 加载 {len(self._users)} 个用户")
+            self._flusher.start()
+            atexit.register(self.close)
+
+    def get(self, user_id):
+        """获取用户记录（返回内存中的对象，修改后需调用 save）"""
+        self._ensure_loaded()
+        return self._users.get(user_id)
+
+    def __contains__(self, user_id):
+        self._ensure_loaded()
+        return user_id in self._users
+
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self._users)
+
+    def items(self):
+        """返回 (user_id, user_info) 列表快照，可在遍历时安全修改存储"""
+        self._ensure_loaded()
+        with self.lock:
+            return list(self._users.items())
+
+    def values(self):
+        """返回用户记录列表快照"""
+        self._ensure_loaded()
+        with self.lock:
+            return list(self._users.values())
+
+    def _reindex(self, user_id):
+        """按用户当前数据更新索引（调用方持有锁）"""
+        old_values = self._indexed_values.pop(user_id, ())
+        for field, value in zip(INDEXED_FIELDS, old_values):
+            if value and self._indexes[field].get(value) == user_id:
+                del self._indexes[field][value]
+        user_info = self._users.get(user_id)
+        if user_info is None:
+            return
+        values = tuple(user_info.get(field) or None for field in INDEXED_FIELDS)
+        for field, value in zip(INDEXED_FIELDS, values):
+            if value:
+                self._indexes[field].setdefault(value, user_id)
+        self._indexed_values[user_id] = values
+
+    def find_by(self, field, value):
+        """按用户名/手机号/邮箱查找用户ID，不存在返回None"""
+        self._ensure_loaded()
+        if not value:
+            return None
+        with self.lock:
+            return self._indexes[field].get(value)
+
+    def find_by_login(self, login_id):
+        """按用户名或手机号查找用户，返回 (user_id, user_info)"""
+        with self.lock:
+            user_id = self.find_by('username', login_id) or self.find_by('phone', login_id)
+            if user_id is None:
+                return None, None
+            return user_id, self._users.get(user_id)
+
+    def find_conflict(self, user_id=None, **fields):
+        """检查字段值是否已被其他用户使用，返回第一个冲突的字段名（无冲突返回None）
+
+        例如 find_conflict(username='abc', phone='138...')；
+        修改已有用户时传入 user_id，忽略该用户自身
+        """
+        for field, value in fields.items():
+            owner = self.find_by(field, value)
+            if owner is not None and owner != user_id:
+                return field
+        return None
+
+    def create(self, user_id, user_info):
+        """新增用户记录"""
+        self._ensure_loaded()
+        with self.lock:
+            self._users[user_id] = user_info
+            self._reindex(user_id)
+            self._dirty.add(user_id)
+
+    def save(self, user_id):
+        """标记用户记录已修改，等待后台批量写回（同时更新索引）"""
+        self._ensure_loaded()
+        with self.lock:
+            if user_id in self._users:
+                self._reindex(user_id)
+                self._dirty.add(user_id)
+
+    def delete(self, user_id):
+        """删除用户记录，返回被删除的记录（不存在时返回None）"""
+        self._ensure_loaded()
+        with self.lock:
+            user_info = self._users.pop(user_id, None)
+            if user_info is not None:
+                self._reindex(user_id)
+                self._dirty.add(user_id)
+            return user_info
+
+    def flush(self):
+        """把脏数据写回存储后端，返回本次写回的记录数"""
+        if self._users is None:
+            return 0
+        with self._flush_lock:
+            with self.lock:
+                if not self._dirty:
+                    return 0
+                dirty = self._dirty
+                self._dirty = set()
+                payload = self.backend.prepare(self._users, dirty)
+            try:
+                self.backend.commit(payload)
+            except Exception:
+                with self.lock:
+                    self._dirty |= dirty
+                raise
+            return len(dirty)
+
+    def close(self):
+        """停止后台线程并写回剩余的脏数据（服务器关闭时调用）"""
+        self._flusher.stop()
+        try:
+            count = self.flush()
+            if count:
+                print(f"[用户存储] 关闭前已写回 {count} 条用户记录")
+        except Exception as e:
+            print(f"[用户存储] 关闭时写回失败: {e}")
+
+
+# 全局用户存储实例
+user_store = UserStore()
@@ -0,0 +1,56 @@
+"""
+无头模拟：不打开窗口、不限帧地批量运行游戏逻辑，用于数值平衡和回归测试。
+
+用法:
+    python simulate.py --mode CLASSIC --runs 1000 --seed 1 --flap-chance 0.12
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+# 确保使用UTF-8编码
+os.environ['PYTHONIOENCODING'] = 'utf-8'
+
+# 资源路径相对于本脚本所在目录
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.flappy import Flappy, GameMode, InputAction
+
+
+def random_inputs(rng, flap_chance, max_steps):
+    """生成一串随机拍打输入，用作最简单的模拟玩家"""
+    return [(step, InputAction.FLAP) for step in range(max_steps) if rng.random() < flap_chance]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flappy Bird 无头模拟")
+    parser.add_argument("--mode", default="CLASSIC", choices=[m.name for m in GameMode])
+    parser.add_argument("--runs", type=int, default=100, help="模拟局数")
+    parser.add_argument("--seed", type=int, default=0, help="第一局的种子，之后依次加1")
+    parser.add_argument("--flap-chance", type=float, default=0.12, help="每步拍打的概率")
+    parser.add_argument("--max-steps", type=int, default=30 * 60 * 5, help="每局最多模拟的步数")
+    args = parser.parse_args()
+
+    game = Flappy(headless=True)
+    mode = GameMode[args.mode]
+    scores = []
+    started = time.perf_counter()
+
+    for i in range(args.runs):
+        seed = args.seed + i
+        # 输入使用独立的随机源，不影响游戏内的随机序列
+        inputs = random_inputs(random.Random(seed), args.flap_chance, args.max_steps)
+        result = game.run_headless(mode, seed=seed, inputs=inputs, max_steps=args.max_steps)
+        scores.append(result['score'])
+
+    elapsed = time.perf_counter() - started
+    print(f"[模拟] 模式={mode.name} 局数={args.runs} 用时={elapsed:.2f}s "
+          f"({args.runs / elapsed * 60:.0f} 局/分钟)")
+    print(f"[模拟] 平均分={sum(scores) / len(scores):.2f} 最高分={max(scores)} 最低分={min(scores)}")
+
+
+if __name__ == "__main__":
+    main()
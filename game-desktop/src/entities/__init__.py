@@ -7,8 +7,8 @@ from .player import Player, PlayerMode
 from .score import Score
 from .welcome_message import WelcomeMessage
 from .boss import Boss
-from .bullet import Bullet
-from .coin import Coin, CoinManager, CoinType
+from .bullet import Bullet, bullet_pool
+from .coin import Coin, CoinManager, CoinType, coin_pool
 
 __all__ = [
     "Background",  # 游戏背景
@@ -22,8 +22,10 @@ __all__ = [
     "GameOver",  # 游戏结束信息
     "Boss",  # Boss
     "Bullet",  # 子弹
+    "bullet_pool",  # 子弹对象池
     "PlayerMode",  # 玩家模式
     "Coin",
     "CoinManager",
     "CoinType",
+    "coin_pool",
 ]
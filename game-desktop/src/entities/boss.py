@@ -1,12 +1,12 @@
-import random
 import pygame
 import math
+import random
 from typing import List
 from enum import Enum
 
-from ..utils import GameConfig
+from ..utils import GameConfig, ParticleSystem, SpatialGrid, get_font, render_text, sprite_atlas
 from .entity import Entity
-from .bullet import Bullet
+from .bullet import Bullet, bullet_pool
 
 
 class BossType(Enum):
@@ -17,6 +17,21 @@ class BossType(Enum):
     TANK = "坦克型Boss"     # 紫色高防Boss
 
 
+FIREBALL_VARIANTS = 8  # 普通Boss大招火球预先绘制的外观数量
+
+# 各类型Boss大招特效粒子的属性
+ULTIMATE_PARTICLE_FIELDS = {
+    BossType.NORMAL: ('angle', 'distance', 'speed', 'size', 'green', 'phase'),
+    BossType.SPEEDY: ('x', 'y', 'target_x', 'target_y', 'progress', 'speed', 'thickness', 'green'),
+    BossType.SPLITTER: ('x', 'y', 'vel_x', 'vel_y', 'size', 'alpha', 'fade_speed'),
+    BossType.TANK: ('x', 'y', 'radius', 'max_radius', 'growth_speed', 'thickness', 'delay'),
+}
+
+# 速度型Boss闪电分支的属性（起点，目标，生长进度，以及所属主闪电的进度和速度）
+LIGHTNING_BRANCH_FIELDS = ('x', 'y', 'target_x', 'target_y', 'start_progress', 'progress', 'speed',
+                           'thickness', 'green', 'trunk_progress', 'trunk_speed')
+
+
 # 新增伤害数字显示类
 class DamageText:
     """显示伤害数值的飘动文本"""
@@ -30,13 +45,10 @@ class DamageText:
         self.velocity_y = -1.5  # 向上飘动速度
         self.alpha = 255  # 透明度
         
-        # 创建字体
-        try:
-            self.font = pygame.font.SysFont('Arial', 14)
-        except:
-            self.font = pygame.font.Font(None, 14)
+        # 字体由字体注册表缓存，伤害数字很多时也不会重复创建
+        self.font = get_font('Arial', 14)
     
-    def tick(self):
+    def update(self):
         """更新伤害文本状态"""
         self.life -= 1
         self.y += self.velocity_y
@@ -45,8 +57,12 @@ class DamageText:
         if self.life < 10:
             self.alpha = int(self.alpha * 0.8)
         
+        return self.life > 0  # 返回是否仍然存活
+    
+    def draw(self):
+        """绘制伤害文本"""
         # 渲染文本
-        text = self.font.render(f"{self.damage}", True, self.color)
+        text = render_text(self.font, f"{self.damage}", self.color)
         text_surface = pygame.Surface(text.get_size(), pygame.SRCALPHA)
         text_surface.fill((0, 0, 0, 0))  # 透明背景
         text_surface.blit(text, (0, 0))
@@ -56,8 +72,6 @@ class DamageText:
         
         # 绘制到屏幕上
         self.config.screen.blit(text_surface, (self.x, self.y))
-        
-        return self.life > 0  # 返回是否仍然存活
 
 
 class Boss(Entity):
@@ -99,7 +113,9 @@ class Boss(Entity):
         self.is_using_ultimate = False  # 是否正在释放大招
         self.ultimate_duration = 0   # 大招剩余持续时间
         self.ultimate_cooldown = 0   # 大招冷却时间
-        self.ultimate_effect_particles = []  # 大招特效粒子
+        # 大招特效粒子，各类型Boss的粒子属性不同
+        self.ultimate_effect_particles = ParticleSystem(*ULTIMATE_PARTICLE_FIELDS[boss_type])
+        self.ultimate_effect_branches = ParticleSystem(*LIGHTNING_BRANCH_FIELDS)  # 速度型Boss的闪电分支
         self.ultimate_warning_shown = False  # 是否已显示大招警告
         self.pre_ultimate_delay = 0  # 大招释放前的延迟
         
@@ -155,9 +171,10 @@ class Boss(Entity):
             self.default_color = (128, 0, 128)  # 紫色Boss
         
         self.bullets: List[Bullet] = []  # Boss发射的子弹
+        self.bullet_grid = SpatialGrid()  # 子弹的碰撞粗检测网格
         
-        # 创建Boss图像
-        surface = self.create_boss_appearance()
+        # 同类型Boss共用一张图像，只在首次出现时绘制
+        surface = sprite_atlas.get(("boss", boss_type), self.create_boss_appearance)
         
         # 设置位置 (右侧屏幕)
         x = config.window.width - self.base_size - 40
@@ -271,10 +288,14 @@ class Boss(Entity):
             pygame.draw.rect(surface, (180, 180, 180), rect)
             pygame.draw.rect(surface, (100, 100, 100), rect, 2)
     
-    def tick(self) -> None:
+    def update(self) -> None:
         """更新Boss状态"""
         self.move()
         
+        # 受击闪烁计时
+        if self.hit_flash > 0:
+            self.hit_flash -= 1
+        
         # 更新准备阶段
         if self.is_preparing:
             self.preparation_time -= 1
@@ -287,10 +308,11 @@ class Boss(Entity):
             self.animation_tick += 1
             self.special_behavior()
             
-            # 更新并绘制伤害文本
+            # 更新伤害文本
             self.update_damage_texts()
             
-            self.draw()
+            # 本步发射的子弹全部就位后登记到网格
+            self.bullet_grid.rebuild(self.bullets)
             return
             
         # 管理射击冷却
@@ -305,10 +327,10 @@ class Boss(Entity):
         # 更新动画
         self.animation_tick += 1
         
-        # 更新并绘制子弹
+        # 更新子弹
         self.update_bullets()
         
-        # 更新并绘制伤害文本
+        # 更新伤害文本
         self.update_damage_texts()
         
         # 更新怒气和大招状态
@@ -317,22 +339,25 @@ class Boss(Entity):
         # 特殊行为
         self.special_behavior()
         
-        # 绘制Boss
-        self.draw()
+        # 子弹移动、大招和特殊行为发射的子弹全部就位后再登记到网格，
+        # 本步新发射的子弹同样参与碰撞检测
+        self.bullet_grid.rebuild(self.bullets)
     
     def draw(self) -> None:
+        # 子弹、伤害文本和大招特效绘制在Boss下层
+        for bullet in self.bullets:
+            bullet.draw()
+        for damage_text in self.damage_texts:
+            damage_text.draw()
+        if self.is_using_ultimate:
+            self.draw_ultimate_particles()
+        
         # 受击闪烁效果
         if self.hit_flash > 0:
-            self.hit_flash -= 1
             flash_color = (255, 255, 255)
-            surface = pygame.Surface((self.base_size, self.base_size), pygame.SRCALPHA)
-            pygame.draw.circle(surface, flash_color, (self.base_size//2, self.base_size//2), self.base_size//2)
+            surface = sprite_atlas.circle(self.base_size, flash_color)
             self.config.screen.blit(surface, (self.x, self.y))
         else:
-            # 确保恢复正常显示
-            if not hasattr(self, 'normal_displayed') or not self.normal_displayed:
-                self.image = self.create_boss_appearance()
-                self.normal_displayed = True
             # 正常绘制
             self.config.screen.blit(self.image, (self.x, self.y))
             
@@ -348,12 +373,9 @@ class Boss(Entity):
         
         # 准备阶段显示提示和准备进度条
         if self.is_preparing:
-            try:
-                warning_font = pygame.font.SysFont('Arial', 18)
-            except:
-                warning_font = pygame.font.Font(None, 18)
+            warning_font = get_font('Arial', 18)
                 
-            warning_text = warning_font.render("准备攻击...", True, (255, 50, 50))
+            warning_text = render_text(warning_font, "准备攻击...", (255, 50, 50))
             text_x = self.x + (self.base_size - warning_text.get_width()) // 2
             text_y = self.y - 30
             self.config.screen.blit(warning_text, (text_x, text_y))
@@ -446,24 +468,18 @@ class Boss(Entity):
                          pygame.Rect(bar_x, bar_y, bar_width, bar_height), 1)
         
         # 添加血量数值显示
-        try:
-            hp_font = pygame.font.SysFont('Arial', 10)
-        except:
-            hp_font = pygame.font.Font(None, 10)
+        hp_font = get_font('Arial', 10)
         
-        hp_text = hp_font.render(f"{int(self.health)}/{self.max_health}", True, (255, 255, 255))
+        hp_text = render_text(hp_font, f"{int(self.health)}/{self.max_health}", (255, 255, 255))
         hp_text_rect = hp_text.get_rect(midleft=(bar_x + bar_width + 5, bar_y + bar_height // 2))
         self.config.screen.blit(hp_text, hp_text_rect)
         
         # 如果是Boss战斗的第二轮或以上，在血条旁显示等级
         if hasattr(self, 'level') and self.level > 1:
             # 使用小字体
-            try:
-                level_font = pygame.font.SysFont('Arial', 12)
-            except:
-                level_font = pygame.font.Font(None, 12)
+            level_font = get_font('Arial', 12)
             
-            level_text = level_font.render(f"Lv{self.level}", True, (255, 255, 255))
+            level_text = render_text(level_font, f"Lv{self.level}", (255, 255, 255))
             self.config.screen.blit(level_text, (bar_x + bar_width + 2, bar_y))
     
     def draw_rage_bar(self, x, y, width, height):
@@ -531,7 +547,7 @@ class Boss(Entity):
         for i in range(2):
             # 创建子弹代表分裂物
             offset_y = 50 if i == 0 else -50
-            bullet = Bullet(self.config, self.x, self.y + offset_y)
+            bullet = bullet_pool.acquire(self.config, self.x, self.y + offset_y)
             
             # 设置子弹属性
             bullet.vel_x = -3
@@ -539,10 +555,7 @@ class Boss(Entity):
             bullet.damage = 1
             
             # 设置外观 - 小一点的绿色圆形
-            size = 20
-            bullet_surface = pygame.Surface((size, size), pygame.SRCALPHA)
-            pygame.draw.circle(bullet_surface, self.default_color, (size//2, size//2), size//2)
-            bullet.image = bullet_surface
+            bullet.image = sprite_atlas.circle(20, self.default_color)
             
             # 添加到子弹列表
             self.bullets.append(bullet)
@@ -564,12 +577,12 @@ class Boss(Entity):
         # 根据Boss类型设置移动行为
         if self.boss_type == BossType.NORMAL:
             # 普通Boss - 正常移动
-            if self.animation_tick % 120 == 0 and random.random() < 0.3:
+            if self.animation_tick % 120 == 0 and self.config.rng.random() < 0.3:
                 self.direction *= -1
                 
         elif self.boss_type == BossType.SPEEDY:
             # 速度型Boss - 更频繁地改变方向
-            if self.animation_tick % 60 == 0 and random.random() < 0.5:
+            if self.animation_tick % 60 == 0 and self.config.rng.random() < 0.5:
                 self.direction *= -1
                 
         elif self.boss_type == BossType.SPLITTER:
@@ -612,14 +625,13 @@ class Boss(Entity):
     def normal_shoot(self) -> None:
         """普通Boss直线射击"""
         # 创建子弹
-        bullet_surface = pygame.Surface((15, 8), pygame.SRCALPHA)
-        pygame.draw.ellipse(bullet_surface, (255, 0, 0), bullet_surface.get_rect())
+        bullet_surface = sprite_atlas.ellipse(15, 8, (255, 0, 0))
         
         # 从嘴巴位置发射
         bullet_x = self.x - 10
         bullet_y = self.y + self.h // 2
         
-        bullet = Bullet(self.config, bullet_x, bullet_y)
+        bullet = bullet_pool.acquire(self.config, bullet_x, bullet_y)
         bullet.image = bullet_surface
         bullet.vel_x = -8  # 向左飞行
         bullet.damage = 1
@@ -632,14 +644,13 @@ class Boss(Entity):
     def speedy_shoot(self) -> None:
         """速度型Boss三连射"""
         for i in range(3):
-            bullet_surface = pygame.Surface((10, 6), pygame.SRCALPHA)
-            pygame.draw.ellipse(bullet_surface, (0, 0, 255), bullet_surface.get_rect())
+            bullet_surface = sprite_atlas.ellipse(10, 6, (0, 0, 255))
             
             # 从嘴巴位置发射
             bullet_x = self.x - 10
             bullet_y = self.y + self.h // 2
             
-            bullet = Bullet(self.config, bullet_x, bullet_y)
+            bullet = bullet_pool.acquire(self.config, bullet_x, bullet_y)
             bullet.image = bullet_surface
             bullet.vel_x = -12  # 更快速度
             bullet.delay = i * 5  # 设置发射延迟
@@ -652,14 +663,13 @@ class Boss(Entity):
     
     def splitter_shoot(self) -> None:
         """分裂型Boss发射分裂子弹"""
-        bullet_surface = pygame.Surface((12, 12), pygame.SRCALPHA)
-        pygame.draw.circle(bullet_surface, (0, 255, 0), (6, 6), 6)
+        bullet_surface = sprite_atlas.circle(12, (0, 255, 0))
         
         # 从嘴巴位置发射
         bullet_x = self.x - 10
         bullet_y = self.y + self.h // 2
         
-        bullet = Bullet(self.config, bullet_x, bullet_y)
+        bullet = bullet_pool.acquire(self.config, bullet_x, bullet_y)
         bullet.image = bullet_surface
         bullet.vel_x = -6  # 慢一些
         bullet.is_splitter = True
@@ -674,14 +684,13 @@ class Boss(Entity):
     
     def tank_shoot(self) -> None:
         """坦克型Boss发射大型子弹"""
-        bullet_surface = pygame.Surface((20, 20), pygame.SRCALPHA)
-        pygame.draw.circle(bullet_surface, (128, 0, 128), (10, 10), 10)
+        bullet_surface = sprite_atlas.circle(20, (128, 0, 128))
         
         # 从嘴巴位置发射
         bullet_x = self.x - 20
         bullet_y = self.y + self.h // 2
         
-        bullet = Bullet(self.config, bullet_x, bullet_y)
+        bullet = bullet_pool.acquire(self.config, bullet_x, bullet_y)
         bullet.image = bullet_surface
         bullet.vel_x = -5  # 慢一些
         bullet.damage = 2  # 伤害更高
@@ -775,211 +784,204 @@ class Boss(Entity):
     
     def prepare_ultimate_effect(self):
         """准备大招特效"""
-        # 清空现有特效
-        self.ultimate_effect_particles = []
+        # 清空现有特效（保留粒子缓冲区复用）
+        particles = self.ultimate_effect_particles
+        particles.clear()
+        self.ultimate_effect_branches.clear()
         
         # 根据Boss类型创建不同的特效
         if self.boss_type == BossType.NORMAL:
             # 普通Boss - 火焰环特效
             for i in range(30):
-                angle = random.random() * math.pi * 2
-                distance = self.base_size * (0.7 + random.random() * 0.3)
-                speed = 1 + random.random() * 2
+                angle = self.config.rng.random() * math.pi * 2
+                distance = self.base_size * (0.7 + self.config.rng.random() * 0.3)
+                speed = 1 + self.config.rng.random() * 2
                 
-                particle = {
-                    'x': self.x + self.base_size // 2,
-                    'y': self.y + self.base_size // 2,
-                    'angle': angle,
-                    'distance': distance,
-                    'speed': speed,
-                    'size': 3 + random.random() * 5,
-                    'color': (255, 100 + random.randint(0, 155), 0, 255),
-                    'phase': random.random() * math.pi * 2
-                }
-                self.ultimate_effect_particles.append(particle)
+                particles.emit(
+                    angle=angle,
+                    distance=distance,
+                    speed=speed,
+                    size=3 + self.config.rng.random() * 5,
+                    green=100 + self.config.rng.randint(0, 155),
+                    phase=self.config.rng.random() * math.pi * 2
+                )
                 
         elif self.boss_type == BossType.SPEEDY:
             # 速度型Boss - 蓝色闪电特效
             for i in range(20):
-                x = self.x + random.randint(0, self.base_size)
-                y = self.y + random.randint(0, self.base_size)
+                x = self.x + self.config.rng.randint(0, self.base_size)
+                y = self.y + self.config.rng.randint(0, self.base_size)
+                target_x = self.x - 200 - self.config.rng.random() * 100
+                target_y = self.config.rng.randint(50, self.config.window.height - 50)
+                speed = 0.03 + self.config.rng.random() * 0.02
+                thickness = 1 + self.config.rng.random() * 2
+                green = 100 + self.config.rng.randint(0, 155)
                 
-                particle = {
-                    'x': x,
-                    'y': y,
-                    'target_x': self.x - 200 - random.random() * 100,
-                    'target_y': random.randint(50, self.config.window.height - 50),
-                    'progress': 0,
-                    'speed': 0.03 + random.random() * 0.02,
-                    'thickness': 1 + random.random() * 2,
-                    'color': (0, 100 + random.randint(0, 155), 255, 255),
-                    'branches': []
-                }
+                particles.emit(
+                    x=x,
+                    y=y,
+                    target_x=target_x,
+                    target_y=target_y,
+                    speed=speed,
+                    thickness=thickness,
+                    green=green
+                )
                 
-                # 添加分支
-                if random.random() > 0.5:
-                    num_branches = random.randint(1, 3)
+                # 添加分支，分支记下主闪电的速度，与主闪电同步推进
+                if self.config.rng.random() > 0.5:
+                    num_branches = self.config.rng.randint(1, 3)
                     for j in range(num_branches):
-                        branch = {
-                            'start_progress': 0.3 + random.random() * 0.4,
-                            'target_x': particle['target_x'] + random.randint(-100, 100),
-                            'target_y': particle['target_y'] + random.randint(-100, 100),
-                            'progress': 0,
-                            'speed': 0.04 + random.random() * 0.02,
-                            'thickness': 0.5 + random.random() * 1.5,
-                            'color': particle['color']
-                        }
-                        particle['branches'].append(branch)
-                        
-                self.ultimate_effect_particles.append(particle)
+                        start_progress = 0.3 + self.config.rng.random() * 0.4
+                        self.ultimate_effect_branches.emit(
+                            x=x + (target_x - x) * start_progress,  # 分支从主闪电上的这一点长出
+                            y=y + (target_y - y) * start_progress,
+                            start_progress=start_progress,
+                            target_x=target_x + self.config.rng.randint(-100, 100),
+                            target_y=target_y + self.config.rng.randint(-100, 100),
+                            speed=0.04 + self.config.rng.random() * 0.02,
+                            thickness=0.5 + self.config.rng.random() * 1.5,
+                            green=green,
+                            trunk_speed=speed
+                        )
                 
         elif self.boss_type == BossType.SPLITTER:
             # 分裂型Boss - 绿色能量爆炸特效
             for i in range(50):
-                angle = random.random() * math.pi * 2
+                angle = self.config.rng.random() * math.pi * 2
                 
-                particle = {
-                    'x': self.x + self.base_size // 2,
-                    'y': self.y + self.base_size // 2,
-                    'vel_x': math.cos(angle) * (2 + random.random() * 4),
-                    'vel_y': math.sin(angle) * (2 + random.random() * 4),
-                    'size': 2 + random.random() * 4,
-                    'color': (0, 255, 0, 255),
-                    'fade_speed': 3 + random.random() * 5
-                }
-                self.ultimate_effect_particles.append(particle)
+                particles.emit(
+                    x=self.x + self.base_size // 2,
+                    y=self.y + self.base_size // 2,
+                    vel_x=math.cos(angle) * (2 + self.config.rng.random() * 4),
+                    vel_y=math.sin(angle) * (2 + self.config.rng.random() * 4),
+                    size=2 + self.config.rng.random() * 4,
+                    alpha=255,
+                    fade_speed=3 + self.config.rng.random() * 5
+                )
                 
         elif self.boss_type == BossType.TANK:
             # 坦克型Boss - 紫色能量波特效
             for i in range(5):
-                particle = {
-                    'x': self.x + self.base_size // 2,
-                    'y': self.y + self.base_size // 2,
-                    'radius': 10,
-                    'max_radius': 300 + random.random() * 100,
-                    'growth_speed': 3 + random.random() * 2,
-                    'thickness': 4 + random.random() * 3,
-                    'color': (128, 0, 128, 200),
-                    'delay': i * 15  # 每个波浪之间的延迟
-                }
-                self.ultimate_effect_particles.append(particle)
+                particles.emit(
+                    x=self.x + self.base_size // 2,
+                    y=self.y + self.base_size // 2,
+                    radius=10,
+                    max_radius=300 + self.config.rng.random() * 100,
+                    growth_speed=3 + self.config.rng.random() * 2,
+                    thickness=4 + self.config.rng.random() * 3,
+                    delay=i * 15  # 每个波浪之间的延迟
+                )
     
     def update_ultimate_particles(self):
-        """更新大招特效粒子"""
+        """更新大招特效粒子（整列更新，死亡粒子一次压缩移除）"""
+        particles = self.ultimate_effect_particles
+        
         # 根据Boss类型更新不同类型的特效
         if self.boss_type == BossType.NORMAL:
-            # 普通Boss - 火焰环特效
-            for particle in self.ultimate_effect_particles:
-                # 更新相位
-                particle['phase'] += 0.1
+            # 普通Boss - 火焰环特效：更新相位
+            particles.add('phase', 0.1)
                 
+        elif self.boss_type == BossType.SPEEDY:
+            # 速度型Boss - 蓝色闪电特效：更新进度，进度完成的闪电移除
+            particles.add('progress', 'speed')
+            particles.compact(lambda progress: progress < 1, 'progress')
+            
+            # 更新分支，主闪电进度超过分支起始进度后分支才开始生长，主闪电消失时分支一起移除
+            branches = self.ultimate_effect_branches
+            branches.add('trunk_progress', 'trunk_speed')
+            branches.compact(lambda trunk_progress: trunk_progress < 1, 'trunk_progress')
+            branches.apply(
+                'progress',
+                lambda progress, speed, trunk_progress, start_progress:
+                    progress + speed if trunk_progress >= start_progress and progress < 1 else progress,
+                'progress', 'speed', 'trunk_progress', 'start_progress'
+            )
+                
+        elif self.boss_type == BossType.SPLITTER:
+            # 分裂型Boss - 绿色能量爆炸特效：更新位置和透明度，完全透明的粒子移除
+            particles.integrate()
+            particles.apply('alpha', lambda alpha, fade_speed: max(0, alpha - fade_speed), 'alpha', 'fade_speed')
+            particles.compact(lambda alpha: alpha > 0, 'alpha')
+                
+        elif self.boss_type == BossType.TANK:
+            # 坦克型Boss - 紫色能量波特效：延迟结束后扩大半径，超过最大半径的移除
+            particles.apply('radius', lambda radius, growth_speed, delay: radius if delay > 0 else radius + growth_speed,
+                            'radius', 'growth_speed', 'delay')
+            particles.apply('delay', lambda delay: delay - 1 if delay > 0 else delay, 'delay')
+            particles.compact(lambda radius, max_radius: radius < max_radius, 'radius', 'max_radius')
+    
+    def draw_ultimate_particles(self):
+        """绘制大招特效粒子"""
+        particles = self.ultimate_effect_particles
+        
+        if self.boss_type == BossType.NORMAL:
+            # 普通Boss - 火焰环特效
+            center_x = self.x + self.base_size // 2
+            center_y = self.y + self.base_size // 2
+            for angle, phase, distance, size, green in particles.rows('angle', 'phase', 'distance', 'size', 'green'):
                 # 计算位置
-                angle = particle['angle'] + math.sin(particle['phase']) * 0.2
-                x = self.x + self.base_size // 2 + math.cos(angle) * particle['distance']
-                y = self.y + self.base_size // 2 + math.sin(angle) * particle['distance']
+                angle = angle + math.sin(phase) * 0.2
+                x = center_x + math.cos(angle) * distance
+                y = center_y + math.sin(angle) * distance
                 
                 # 绘制粒子
-                pygame.draw.circle(self.config.screen, particle['color'], 
-                                  (int(x), int(y)), int(particle['size']))
+                pygame.draw.circle(self.config.screen, (255, int(green), 0, 255), 
+                                  (int(x), int(y)), int(size))
                 
         elif self.boss_type == BossType.SPEEDY:
             # 速度型Boss - 蓝色闪电特效
-            for particle in list(self.ultimate_effect_particles):
-                # 更新进度
-                particle['progress'] += particle['speed']
-                
-                # 如果进度完成，移除粒子
-                if particle['progress'] >= 1:
-                    self.ultimate_effect_particles.remove(particle)
-                    continue
-                    
+            for x1, y1, target_x, target_y, progress, thickness, green in particles.rows(
+                    'x', 'y', 'target_x', 'target_y', 'progress', 'thickness', 'green'):
                 # 计算当前位置
-                x1 = particle['x']
-                y1 = particle['y']
-                x2 = particle['x'] + (particle['target_x'] - particle['x']) * particle['progress']
-                y2 = particle['y'] + (particle['target_y'] - particle['y']) * particle['progress']
+                x2 = x1 + (target_x - x1) * progress
+                y2 = y1 + (target_y - y1) * progress
                 
                 # 绘制闪电
-                pygame.draw.line(self.config.screen, particle['color'], 
+                pygame.draw.line(self.config.screen, (0, int(green), 255, 255), 
                                 (int(x1), int(y1)), (int(x2), int(y2)), 
-                                int(particle['thickness']))
-                
-                # 更新分支
-                for branch in particle['branches']:
-                    # 只有当主闪电进度超过分支起始进度时才绘制分支
-                    if particle['progress'] >= branch['start_progress']:
-                        # 计算分支起始位置
-                        branch_x1 = particle['x'] + (particle['target_x'] - particle['x']) * branch['start_progress']
-                        branch_y1 = particle['y'] + (particle['target_y'] - particle['y']) * branch['start_progress']
-                        
-                        # 更新分支进度
-                        if branch['progress'] < 1:
-                            branch['progress'] += branch['speed']
-                            
-                        # 计算分支当前位置
-                        branch_x2 = branch_x1 + (branch['target_x'] - branch_x1) * branch['progress']
-                        branch_y2 = branch_y1 + (branch['target_y'] - branch_y1) * branch['progress']
-                        
-                        # 绘制分支
-                        pygame.draw.line(self.config.screen, branch['color'], 
-                                        (int(branch_x1), int(branch_y1)), 
-                                        (int(branch_x2), int(branch_y2)), 
-                                        int(branch['thickness']))
+                                int(thickness))
+            
+            for branch_x1, branch_y1, target_x, target_y, progress, start_progress, trunk_progress, thickness, green in \
+                    self.ultimate_effect_branches.rows('x', 'y', 'target_x', 'target_y', 'progress', 'start_progress',
+                                                       'trunk_progress', 'thickness', 'green'):
+                # 只有当主闪电进度超过分支起始进度时才绘制分支
+                if trunk_progress >= start_progress:
+                    # 计算分支当前位置
+                    branch_x2 = branch_x1 + (target_x - branch_x1) * progress
+                    branch_y2 = branch_y1 + (target_y - branch_y1) * progress
+                    
+                    # 绘制分支
+                    pygame.draw.line(self.config.screen, (0, int(green), 255, 255), 
+                                    (int(branch_x1), int(branch_y1)), 
+                                    (int(branch_x2), int(branch_y2)), 
+                                    int(thickness))
                 
         elif self.boss_type == BossType.SPLITTER:
             # 分裂型Boss - 绿色能量爆炸特效
-            for particle in list(self.ultimate_effect_particles):
-                # 更新位置
-                particle['x'] += particle['vel_x']
-                particle['y'] += particle['vel_y']
-                
-                # 更新透明度
-                if 'color' in particle and len(particle['color']) > 3:
-                    r, g, b, a = particle['color']
-                    a = max(0, a - particle['fade_speed'])
-                    
-                    # 如果完全透明，移除粒子
-                    if a <= 0:
-                        self.ultimate_effect_particles.remove(particle)
-                        continue
-                        
-                    particle['color'] = (r, g, b, a)
-                
-                # 绘制粒子
-                if 'color' in particle and 'size' in particle:
-                    surface = pygame.Surface((int(particle['size'] * 2), int(particle['size'] * 2)), pygame.SRCALPHA)
-                    pygame.draw.circle(surface, particle['color'], 
-                                      (int(particle['size']), int(particle['size'])), 
-                                      int(particle['size']))
-                    self.config.screen.blit(surface, 
-                                           (int(particle['x'] - particle['size']), 
-                                            int(particle['y'] - particle['size'])))
+            for x, y, size, alpha in particles.rows('x', 'y', 'size', 'alpha'):
+                surface = pygame.Surface((int(size * 2), int(size * 2)), pygame.SRCALPHA)
+                pygame.draw.circle(surface, (0, 255, 0, int(alpha)), 
+                                  (int(size), int(size)), 
+                                  int(size))
+                self.config.screen.blit(surface, 
+                                       (int(x - size), 
+                                        int(y - size)))
                 
         elif self.boss_type == BossType.TANK:
             # 坦克型Boss - 紫色能量波特效
-            for particle in list(self.ultimate_effect_particles):
-                # 处理延迟
-                if 'delay' in particle and particle['delay'] > 0:
-                    particle['delay'] -= 1
-                    continue
-                
-                # 更新半径
-                particle['radius'] += particle['growth_speed']
-                
-                # 如果超过最大半径，移除粒子
-                if particle['radius'] >= particle['max_radius']:
-                    self.ultimate_effect_particles.remove(particle)
+            for x, y, radius, max_radius, thickness, delay in particles.rows(
+                    'x', 'y', 'radius', 'max_radius', 'thickness', 'delay'):
+                if delay > 0:
                     continue
                 
                 # 计算透明度，随半径增大而降低
-                alpha = int(200 * (1 - particle['radius'] / particle['max_radius']))
-                color = (particle['color'][0], particle['color'][1], particle['color'][2], alpha)
+                alpha = int(200 * (1 - radius / max_radius))
                 
                 # 绘制能量波
-                pygame.draw.circle(self.config.screen, color, 
-                                  (int(particle['x']), int(particle['y'])), 
-                                  int(particle['radius']), 
-                                  int(particle['thickness']))
+                pygame.draw.circle(self.config.screen, (128, 0, 128, alpha), 
+                                  (int(x), int(y)), 
+                                  int(radius), 
+                                  int(thickness))
     
     def perform_ultimate_effect(self):
         """执行大招效果"""
@@ -998,25 +1000,18 @@ class Boss(Entity):
         # 每8帧发射一颗火球(增加频率)
         if self.ultimate_duration % 8 == 0:
             # 从Boss周围随机位置发射
-            offset_x = random.randint(-20, 20)
-            offset_y = random.randint(-20, 20)
-            
-            # 创建火球子弹
-            bullet_surface = pygame.Surface((25, 25), pygame.SRCALPHA)  # 增大火球尺寸
-            pygame.draw.circle(bullet_surface, (255, 100, 0), (12, 12), 12)
-            
-            # 添加更多火焰效果
-            for i in range(8):  # 增加火焰数量
-                flame_size = 6 + random.random() * 6
-                flame_x = 12 + random.randint(-8, 8)
-                flame_y = 12 + random.randint(-8, 8)
-                flame_color = (255, 200 + random.randint(0, 55), 0, 150)
-                pygame.draw.circle(bullet_surface, flame_color, (flame_x, flame_y), flame_size)
-            
-            bullet = Bullet(self.config, self.x + offset_x, self.y + offset_y)
+            offset_x = self.config.rng.randint(-20, 20)
+            offset_y = self.config.rng.randint(-20, 20)
+            
+            # 创建火球子弹（从预先绘制的几种火焰外观中随机选一种）
+            variant = self.config.rng.randrange(FIREBALL_VARIANTS)
+            bullet_surface = sprite_atlas.get(("fireball", variant),
+                                              lambda: self.create_fireball_surface(variant))
+            
+            bullet = bullet_pool.acquire(self.config, self.x + offset_x, self.y + offset_y)
             bullet.image = bullet_surface
-            bullet.vel_x = -7 - random.random() * 3  # 略微提高速度
-            bullet.vel_y = -3 + random.random() * 6
+            bullet.vel_x = -7 - self.config.rng.random() * 3  # 略微提高速度
+            bullet.vel_y = -3 + self.config.rng.random() * 6
             bullet.damage = 3  # 增加伤害
             bullet.color = (255, 100, 0)
             
@@ -1025,18 +1020,35 @@ class Boss(Entity):
             # 播放发射音效
             self.config.sounds.swoosh.play()
     
+    @staticmethod
+    def create_fireball_surface(variant):
+        """绘制一种火球外观（火焰位置由外观编号决定，不消耗游戏随机数）"""
+        flame_rng = random.Random(variant)
+        bullet_surface = pygame.Surface((25, 25), pygame.SRCALPHA)  # 增大火球尺寸
+        pygame.draw.circle(bullet_surface, (255, 100, 0), (12, 12), 12)
+        
+        # 添加更多火焰效果
+        for i in range(8):  # 增加火焰数量
+            flame_size = 6 + flame_rng.random() * 6
+            flame_x = 12 + flame_rng.randint(-8, 8)
+            flame_y = 12 + flame_rng.randint(-8, 8)
+            flame_color = (255, 200 + flame_rng.randint(0, 55), 0, 150)
+            pygame.draw.circle(bullet_surface, flame_color, (flame_x, flame_y), flame_size)
+        
+        return bullet_surface
+    
     def speedy_ultimate(self):
         """速度型Boss的大招：闪电风暴"""
         # 每4帧发射一道闪电(增加频率)
         if self.ultimate_duration % 4 == 0:
             # 从Boss周围发射多个闪电
             for i in range(4):  # 增加闪电数量
-                start_x = self.x + random.randint(0, self.base_size)
-                start_y = self.y + random.randint(0, self.base_size)
+                start_x = self.x + self.config.rng.randint(0, self.base_size)
+                start_y = self.y + self.config.rng.randint(0, self.base_size)
                 
                 # 目标位置朝左侧
-                target_x = -20 + random.randint(-100, 100)
-                target_y = random.randint(50, self.config.window.height - 50)
+                target_x = -20 + self.config.rng.randint(-100, 100)
+                target_y = self.config.rng.randint(50, self.config.window.height - 50)
                 
                 # 计算方向向量
                 dx = target_x - start_x
@@ -1050,7 +1062,7 @@ class Boss(Entity):
                 zigzag_points.append((start_x, start_y))
                 
                 # 闪电段数
-                segments = 5 + random.randint(0, 3)
+                segments = 5 + self.config.rng.randint(0, 3)
                 segment_length = length / segments
                 
                 current_x = start_x
@@ -1058,8 +1070,8 @@ class Boss(Entity):
                 
                 for j in range(segments):
                     # 添加随机偏移
-                    offset = 10 + random.random() * 20
-                    if random.random() > 0.5:
+                    offset = 10 + self.config.rng.random() * 20
+                    if self.config.rng.random() > 0.5:
                         offset = -offset
                         
                     # 添加垂直于方向的偏移
@@ -1075,13 +1087,13 @@ class Boss(Entity):
                     current_y = next_y
                 
                 # 创建闪电子弹
-                bullet = Bullet(self.config, start_x, start_y)
+                bullet = bullet_pool.acquire(self.config, start_x, start_y)
                 bullet.target_x = target_x
                 bullet.target_y = target_y
                 bullet.zigzag_points = zigzag_points
-                bullet.width = 3 + random.random() * 2  # 增加闪电宽度
-                bullet.vel_x = -14 - random.random() * 6  # 增加速度
-                bullet.vel_y = -3 + random.random() * 6
+                bullet.width = 3 + self.config.rng.random() * 2  # 增加闪电宽度
+                bullet.vel_x = -14 - self.config.rng.random() * 6  # 增加速度
+                bullet.vel_y = -3 + self.config.rng.random() * 6
                 bullet.damage = 2  # 增加伤害
                 bullet.color = (30, 180, 255)  # 更亮的蓝色
                 bullet.is_lightning = True
@@ -1100,11 +1112,10 @@ class Boss(Entity):
                 angle = 2 * math.pi * i / num_bullets
                 
                 # 创建更大的分裂子弹
-                bullet_surface = pygame.Surface((18, 18), pygame.SRCALPHA)
-                pygame.draw.circle(bullet_surface, (0, 255, 0), (9, 9), 9)
+                bullet_surface = sprite_atlas.circle(18, (0, 255, 0))
                 
                 # 从Boss中心发射
-                bullet = Bullet(self.config, self.x + self.base_size // 2, self.y + self.base_size // 2)
+                bullet = bullet_pool.acquire(self.config, self.x + self.base_size // 2, self.y + self.base_size // 2)
                 bullet.image = bullet_surface
                 bullet.vel_x = math.cos(angle) * 6  # 增加速度
                 bullet.vel_y = math.sin(angle) * 6
@@ -1124,17 +1135,9 @@ class Boss(Entity):
         # 每25帧释放一次冲击波
         if self.ultimate_duration % 25 == 0:
             # 创建冲击波子弹
-            bullet_surface = pygame.Surface((50, 50), pygame.SRCALPHA)  # 增大尺寸
-            
-            # 绘制紫色能量球
-            pygame.draw.circle(bullet_surface, (128, 0, 128, 200), (25, 25), 25)
+            bullet_surface = sprite_atlas.get("shockwave", self.create_shockwave_surface)
             
-            # 添加能量环效果
-            for i in range(4):  # 增加环数
-                ring_radius = 6 + i * 6
-                pygame.draw.circle(bullet_surface, (220, 120, 255, 150), (25, 25), ring_radius, 2)
-            
-            bullet = Bullet(self.config, self.x, self.y + self.base_size // 2 - 25)
+            bullet = bullet_pool.acquire(self.config, self.x, self.y + self.base_size // 2 - 25)
             bullet.image = bullet_surface
             bullet.vel_x = -4  # 降低速度，因为威力大
             bullet.vel_y = 0
@@ -1146,6 +1149,21 @@ class Boss(Entity):
             # 播放能量冲击波音效
             self.config.sounds.swoosh.play()
     
+    @staticmethod
+    def create_shockwave_surface():
+        """绘制坦克Boss大招的冲击波图像"""
+        bullet_surface = pygame.Surface((50, 50), pygame.SRCALPHA)  # 增大尺寸
+        
+        # 绘制紫色能量球
+        pygame.draw.circle(bullet_surface, (128, 0, 128, 200), (25, 25), 25)
+        
+        # 添加能量环效果
+        for i in range(4):  # 增加环数
+            ring_radius = 6 + i * 6
+            pygame.draw.circle(bullet_surface, (220, 120, 255, 150), (25, 25), ring_radius, 2)
+        
+        return bullet_surface
+    
     def take_damage(self, damage: int) -> None:
         """Boss受到伤害"""
         self.health -= damage
@@ -1171,8 +1189,8 @@ class Boss(Entity):
             
         # 创建伤害数值显示
         # 在Boss身体上随机位置显示，增加一些随机性
-        x_offset = random.randint(-int(self.base_size * 0.3), int(self.base_size * 0.3))
-        y_offset = random.randint(-int(self.base_size * 0.3), int(self.base_size * 0.3))
+        x_offset = self.config.rng.randint(-int(self.base_size * 0.3), int(self.base_size * 0.3))
+        y_offset = self.config.rng.randint(-int(self.base_size * 0.3), int(self.base_size * 0.3))
         
         # 根据伤害值选择颜色
         if damage >= 5:
@@ -1229,36 +1247,44 @@ class Boss(Entity):
         pygame.draw.rect(self.config.screen, (200, 200, 200), 
                         (x, y, bar_width, bar_height), 2)
         
-        # 添加文字和Boss类型 - 使用默认字体避免乱码
-        try:
-            # 尝试使用Arial字体 - 几乎所有Windows系统都有
-            font = pygame.font.SysFont('Arial', 16)
-            # 显示简化的文本
-            text = font.render(f"HP: {self.health}/{self.max_health}", True, (255, 255, 255))
-        except:
-            # 如果失败，使用系统默认字体
-            font = pygame.font.Font(None, 16)
-            text = font.render(f"HP: {self.health}/{self.max_health}", True, (255, 255, 255))
+        # 添加文字和Boss类型 - Arial几乎所有Windows系统都有，不可用时退回默认字体
+        font = get_font('Arial', 16)
+        # 显示简化的文本
+        text = render_text(font, f"HP: {self.health}/{self.max_health}", (255, 255, 255))
             
         text_rect = text.get_rect(center=(x + bar_width // 2, y + bar_height // 2))
         self.config.screen.blit(text, text_rect)
     
     def update_bullets(self):
-        """更新并绘制Boss的子弹"""
-        for bullet in list(self.bullets):
-            bullet.tick()
-            # 移除超出屏幕的子弹
+        """更新Boss的子弹"""
+        bullets = self.bullets
+        count = len(bullets)  # 本步分裂出的子弹会追加到列表末尾，下一步才开始移动
+        active_bullets = []
+        for i in range(count):
+            bullet = bullets[i]
+            bullet.step()
+            # 超出屏幕的子弹放回对象池，一次遍历完成移除
             if bullet.is_out_of_screen():
-                self.bullets.remove(bullet) 
+                bullet_pool.release(bullet)
+            else:
+                active_bullets.append(bullet)
+        active_bullets.extend(bullets[count:])
+        self.bullets = active_bullets
+    
+    def release_bullets(self):
+        """Boss被替换或游戏重置时把剩余子弹放回对象池"""
+        bullet_pool.release_all(self.bullets)
+        self.bullets = []
+        self.bullet_grid.clear()
     
     def update_damage_texts(self):
-        """更新并绘制伤害文本"""
+        """更新伤害文本"""
         # 保存仍然存活的伤害文本
         active_texts = []
         
-        # 更新并绘制每个伤害文本
+        # 更新每个伤害文本
         for damage_text in self.damage_texts:
-            if damage_text.tick():  # 如果文本仍然存活
+            if damage_text.update():  # 如果文本仍然存活
                 active_texts.append(damage_text)
         
         # 更新伤害文本列表
@@ -1292,10 +1318,7 @@ class Boss(Entity):
         self.config.screen.blit(glow_surface, glow_rect)
         
         # 绘制警告文本
-        try:
-            warning_font = pygame.font.SysFont('SimHei', 22, bold=True)
-        except:
-            warning_font = pygame.font.Font(None, 22)
+        warning_font = get_font('SimHei', 22, bold=True)
             
         # 根据Boss类型显示不同的警告文本
         if self.boss_type == BossType.NORMAL:
@@ -1307,7 +1330,7 @@ class Boss(Entity):
         elif self.boss_type == BossType.TANK:
             warning_text = "能量冲击!"
             
-        text_surface = warning_font.render(warning_text, True, warning_color[:3])
+        text_surface = render_text(warning_font, warning_text, warning_color[:3])
         text_rect = text_surface.get_rect(center=(self.x + self.base_size//2, 
                                                 self.y - 30))
         self.config.screen.blit(text_surface, text_rect) 
\ No newline at end of file
@@ -2,21 +2,33 @@ import pygame
 import copy
 import math
 
-from ..utils import GameConfig
+from ..utils import GameConfig, ObjectPool, Trail, sprite_atlas
 from .entity import Entity
 
 
 class Bullet(Entity):
     """玩家发射的子弹类"""
     
+    __slots__ = (
+        'vel_x', 'vel_y', 'damage', 'color',
+        'is_laser', 'is_homing', 'is_splitter', 'is_lightning', 'has_split',
+        'split_time', 'target', 'target_x', 'target_y', 'speed', 'turn_rate', 'delay',
+        'trail', 'trail_length', 'zigzag_points', 'width',
+        'parent', 'update_homing', 'original_image',
+    )
+    
     def __init__(self, config: GameConfig, x: int, y: int) -> None:
+        self.trail = Trail()  # 拖尾位置的环形缓冲区，随子弹一起复用
+        self.reset(config, x, y)
+    
+    def reset(self, config: GameConfig, x: int, y: int) -> None:
+        """初始化子弹（对象池复用旧子弹时也调用，所有属性都要重新设置）"""
         # 创建子弹表面
         size = 8
         color = (255, 255, 0)  # 黄色子弹
         
-        # 创建子弹图像
-        surface = pygame.Surface((size, size), pygame.SRCALPHA)
-        pygame.draw.circle(surface, color, (size//2, size//2), size//2)
+        # 子弹图像来自精灵缓存（同外观的子弹共用一张图像）
+        surface = sprite_atlas.circle(size, color)
         
         # 子弹速度
         self.vel_x = 10  # 水平速度
@@ -29,74 +41,89 @@ class Bullet(Entity):
         self.is_homing = False
         self.is_splitter = False
         self.is_lightning = False  # 闪电特效
+        self.has_split = False  # 分裂子弹是否已经分裂
         self.split_time = 0
         self.target = None
+        self.target_x = 0
+        self.target_y = 0
         self.speed = 10
         self.turn_rate = 0
         self.delay = 0  # 延迟发射
-        self.trail_frames = []
         self.trail_length = 0
+        self.trail.reset(0)
         
         # 闪电zigzag效果点
         self.zigzag_points = []
         self.width = 2  # 闪电宽度
         
+        self.parent = None  # 分裂子弹所属的Boss，分裂出的子弹加入它的子弹列表
+        self.update_homing = None  # 追踪弹的更新方法，由武器设置
+        
         # 初始化实体
         super().__init__(config, surface, x, y)
         
-        # 保存原始图像用于旋转
-        self.original_image = self.image.copy()
+        # 原始图像用于旋转（共享图像，只读）
+        self.original_image = self.image
     
-    def draw(self) -> None:
+    def enable_trail(self, length: int) -> None:
+        """开启拖尾效果，记录最近 length 步的位置（图像须来自精灵缓存）"""
+        self.trail_length = length
+        self.trail.reset(length)
+    
+    def recycle(self) -> None:
+        """放回对象池前释放对Boss、目标和武器的引用"""
+        self.target = None
+        self.parent = None
+        self.update_homing = None
+        self.zigzag_points = []
+    
+    def update(self) -> None:
         # 处理延迟发射
         if self.delay > 0:
-            self.delay -= 1
-            super().draw()  # 仍然绘制子弹但不移动
+            self.delay -= 1  # 仍然显示子弹但不移动
             return
         
         # 特殊子弹类型的更新逻辑
-        if self.is_homing and hasattr(self, 'update_homing'):
+        if self.is_homing and self.update_homing is not None:
             self.update_homing(self)
-        elif self.is_lightning and hasattr(self, 'zigzag_points') and len(self.zigzag_points) > 1:
-            # 闪电效果特殊处理
-            self.draw_lightning()
+        elif self.is_lightning and len(self.zigzag_points) > 1:
+            # 闪电效果：子弹的实际位置取闪电末端，用于碰撞检测
+            self.x, self.y = self.zigzag_points[-1]
             return
         else:
             # 普通更新
             self.x += self.vel_x
             self.y += self.vel_y
         
-        # 处理激光拖尾效果
+        # 记录激光拖尾（只保留最近几步的位置）
         if self.trail_length > 0:
-            # 保存当前位置信息
-            self.trail_frames.append((self.x, self.y, self.image.copy()))
-            
-            # 只保留最近的几帧
-            if len(self.trail_frames) > self.trail_length:
-                self.trail_frames.pop(0)
-            
-            # 绘制拖尾效果（半透明）
-            for i, (trail_x, trail_y, trail_img) in enumerate(self.trail_frames[:-1]):
-                alpha = 128 * (i + 1) // len(self.trail_frames)  # 越早的帧越透明
-                trail_img.set_alpha(alpha)
-                self.config.screen.blit(trail_img, (trail_x, trail_y))
+            self.trail.push(self.x, self.y)
         
         # 分裂子弹逻辑
         if self.is_splitter:
             self.split_time -= 1
-            if self.split_time <= 0 and not hasattr(self, 'has_split'):
+            if self.split_time <= 0 and not self.has_split:
                 self.has_split = True
                 self.split()
+    
+    def draw(self) -> None:
+        if self.delay <= 0 and self.is_lightning and len(self.zigzag_points) > 1:
+            self.draw_lightning()
+            return
+        
+        # 绘制拖尾效果（半透明）
+        if self.trail_length > 0:
+            self.trail.draw(self.config.screen, self.image)
         
         super().draw()  # 调用父类绘制方法
     
     def draw_lightning(self) -> None:
         """绘制闪电效果"""
-        if not hasattr(self, 'zigzag_points') or len(self.zigzag_points) < 2:
+        if len(self.zigzag_points) < 2:
             return
             
         # 获取闪电颜色
-        lightning_color = self.color if hasattr(self, 'color') else (0, 150, 255)
+        lightning_color = self.color
         
         # 绘制主闪电
         for i in range(len(self.zigzag_points) - 1):
@@ -121,11 +148,6 @@ class Bullet(Entity):
                 end,
                 int(glow_width * 2)
             )
-            
-        # 更新子弹的实际位置，用于碰撞检测
-        if len(self.zigzag_points) > 0:
-            last_point = self.zigzag_points[-1]
-            self.x, self.y = last_point
     
     def split(self) -> None:
         """分裂子弹逻辑"""
@@ -136,7 +158,7 @@ class Bullet(Entity):
             new_x = self.x
             new_y = self.y
             
-            bullet = Bullet(self.config, new_x, new_y)
+            bullet = bullet_pool.acquire(self.config, new_x, new_y)
             bullet.damage = self.damage // 2  # 伤害减半
             
             # 设置速度
@@ -146,15 +168,14 @@ class Bullet(Entity):
             bullet.vel_y = speed * math.sin(angle_rad)
             
             # 设置外观 - 小一点的绿色子弹
-            size = 5
-            bullet_surface = pygame.Surface((size, size), pygame.SRCALPHA)
-            pygame.draw.circle(bullet_surface, (0, 255, 0), (size//2, size//2), size//2)
-            bullet.image = bullet_surface
+            bullet.image = sprite_atlas.circle(5, (0, 255, 0))
             bullet.color = (0, 255, 0)
             
             # 添加到父弹所属的子弹列表中
-            if hasattr(self, 'parent') and hasattr(self.parent, 'bullets'):
+            if self.parent is not None:
                 self.parent.bullets.append(bullet)
+            else:
+                bullet_pool.release(bullet)
         
     def is_out_of_screen(self) -> bool:
         """检查子弹是否超出屏幕范围"""
@@ -162,3 +183,7 @@ class Bullet(Entity):
                 self.x < -self.w or
                 self.y > self.config.window.height or
                 self.y < -self.h)
+
+
+# 全局子弹对象池实例
+bullet_pool = ObjectPool(Bullet)
@@ -1,10 +1,9 @@
-import random
 import pygame
 from enum import Enum
 from typing import List
 
 from .entity import Entity
-from ..utils import GameConfig
+from ..utils import GameConfig, ObjectPool, SpatialGrid, sprite_atlas, transform_cache
 
 
 class CoinType(Enum):
@@ -17,6 +16,9 @@ class CoinType(Enum):
 class Coin(Entity):
     """金币实体类"""
     
+    __slots__ = ('coin_type', 'coin_size', 'velocity', 'rotation_angle', 'rotation_speed',
+                 'active', 'color', 'score_value')
+    
     def __init__(self, config: GameConfig, coin_type: CoinType = CoinType.BRONZE, x: int = 0, y: int = 0) -> None:
         """初始化金币实体
         
@@ -26,6 +28,10 @@ class Coin(Entity):
             x: 初始x坐标
             y: 初始y坐标
         """
+        self.reset(config, coin_type, x, y)
+    
+    def reset(self, config: GameConfig, coin_type: CoinType = CoinType.BRONZE, x: int = 0, y: int = 0) -> None:
+        """初始化金币（对象池复用旧金币时也调用，参数同构造函数）"""
         self.coin_type = coin_type
         self.config = config
         
@@ -47,12 +53,16 @@ class Coin(Entity):
             self.color = (255, 215, 0)  # 金色
             self.score_value = 5
         
-        # 创建金币表面
-        coin_surface = self.create_coin_surface()
+        # 同类型金币共用一张图像，只在首次生成时绘制
+        coin_surface = sprite_atlas.get(("coin", coin_type), self.create_coin_surface)
         
         # 调用父类初始化
         super().__init__(config, coin_surface, x, y)
     
+    def recycle(self) -> None:
+        """放回对象池（金币不引用其他对象，无需清理）"""
+        self.active = False
+    
     def create_coin_surface(self) -> pygame.Surface:
         """创建金币表面"""
         # 创建圆形金币
@@ -103,7 +113,7 @@ class Coin(Entity):
         r, g, b = color
         return (min(r + amount, 255), min(g + amount, 255), min(b + amount, 255))
     
-    def tick(self) -> None:
+    def update(self) -> None:
         """更新金币状态"""
         if not self.active:
             return
@@ -113,17 +123,24 @@ class Coin(Entity):
         
         # 旋转金币
         self.rotation_angle = (self.rotation_angle + self.rotation_speed) % 360
-        rotated_image = pygame.transform.rotate(self.image, self.rotation_angle)
+        
+        # 检查是否超出屏幕
+        if self.x + self.coin_size < 0:
+            self.active = False
+    
+    def draw(self) -> None:
+        """绘制金币"""
+        if not self.active:
+            return
+        
+        rotated_image = transform_cache.rotate(self.image, self.rotation_angle)
         
         # 获取旋转后的矩形，并保持中心点不变
-        rect = rotated_image.get_rect(center=(self.x + self.w//2, self.y + self.h//2))
+        x, y = self.draw_pos()
+        rect = rotated_image.get_rect(center=(x + self.w//2, y + self.h//2))
         
         # 绘制金币
         self.config.screen.blit(rotated_image, rect.topleft)
-        
-        # 检查是否超出屏幕
-        if self.x + self.coin_size < 0:
-            self.active = False
     
     def is_active(self) -> bool:
         """检查金币是否激活"""
@@ -146,6 +163,7 @@ class CoinManager:
         """
         self.config = config
         self.coins: List[Coin] = []  # 金币列表
+        self.grid = SpatialGrid()  # 碰撞粗检测网格
         
         # 生成参数
         self.spawn_rate = 120  # 生成间隔（帧数）
@@ -158,11 +176,20 @@ class CoinManager:
         self.gold_chance = 0.1    # 金币概率
     
     def tick(self, delta_time: int) -> None:
-        """更新金币管理器状态
+        """更新并绘制金币（不区分模拟与渲染时使用）
         
         Args:
             delta_time: 帧间隔时间
         """
+        self.update(delta_time)
+        self.draw()
+    
+    def update(self, delta_time: int) -> None:
+        """推进一个模拟步：生成、移动并清理金币
+        
+        Args:
+            delta_time: 模拟步长（毫秒）
+        """
         # 更新金币生成计时器
         self.spawn_timer += 1
         
@@ -171,24 +198,34 @@ class CoinManager:
             self.spawn_coin()
             self.spawn_timer = 0
         
-        # 更新并绘制所有金币
+        # 更新所有金币，失活的金币放回对象池
         active_coins = []
         for coin in self.coins:
             if coin.is_active():
-                coin.tick()
+                coin.step()
                 active_coins.append(coin)
+            else:
+                coin_pool.release(coin)
         
         # 更新金币列表，清除已失活的金币
         self.coins = active_coins
+        
+        # 金币移动后重新登记到网格
+        self.grid.rebuild(self.coins)
+    
+    def draw(self) -> None:
+        """绘制所有金币"""
+        for coin in self.coins:
+            coin.draw()
     
     def spawn_coin(self) -> None:
         """生成新金币"""
         # 随机位置（在屏幕右侧，垂直位置随机）
         x = self.config.window.width
-        y = random.randint(50, self.config.window.height - 100)
+        y = self.config.rng.randint(50, self.config.window.height - 100)
         
         # 根据概率选择金币类型
-        coin_type_rand = random.random()
+        coin_type_rand = self.config.rng.random()
         if coin_type_rand < self.bronze_chance:
             coin_type = CoinType.BRONZE
         elif coin_type_rand < self.bronze_chance + self.silver_chance:
@@ -197,7 +234,7 @@ class CoinManager:
             coin_type = CoinType.GOLD
         
         # 创建金币并添加到列表
-        coin = Coin(self.config, coin_type, x, y)
+        coin = coin_pool.acquire(self.config, coin_type, x, y)
         self.coins.append(coin)
     
     def check_player_collision(self, player) -> int:
@@ -210,25 +247,33 @@ class CoinManager:
             int: 获得的分数
         """
         score = 0
-        coins_to_remove = []
+        collected = set()
         
-        for coin in self.coins:
+        # 只对网格中与玩家矩形相交的金币做像素检测
+        for coin in self.grid.query(player.rect):
             if coin.is_active() and player.collide(coin):
                 # 收集金币并获得分数
                 score += coin.collect()
-                coins_to_remove.append(coin)
+                self.grid.remove(coin)
+                collected.add(coin)
                 
                 # 播放得分音效
                 self.config.sounds.point.play()
         
-        # 移除已收集的金币
-        for coin in coins_to_remove:
-            if coin in self.coins:
-                self.coins.remove(coin)
+        # 一次遍历移除已收集的金币并放回对象池
+        if collected:
+            self.coins = [coin for coin in self.coins if coin not in collected]
+            coin_pool.release_all(collected)
         
         return score
     
     def clear(self) -> None:
         """清空所有金币"""
+        coin_pool.release_all(self.coins)
         self.coins.clear()
-        self.spawn_timer = 0 
\ No newline at end of file
+        self.grid.clear()
+        self.spawn_timer = 0 
+
+
+# 全局金币对象池实例
+coin_pool = ObjectPool(Coin)
@@ -8,8 +8,13 @@ from ..utils import GameConfig, get_hit_mask, pixel_collision  # 导入游戏配
 class Entity:  # 定义实体基类，所有游戏实体的父类
     """
     实体基类，所有游戏实体的父类。
+    
+    基类只用 __slots__ 存放公共属性；子弹、金币、道具这类大量生成的实体在子类中
+    也声明 __slots__，实例不带 __dict__，占用更少内存。其他子类照常使用 __dict__。
     """
 
+    __slots__ = ('config', 'x', 'y', 'w', 'h', 'image', 'hit_mask', 'prev_x', 'prev_y')
+
     def __init__(self, config: GameConfig, image: Optional[pygame.Surface] = None, x=0, y=0, w: int = None, h: int = None, **kwargs) -> None:  # 构造函数，初始化实体
         """
         构造函数，初始化实体。
@@ -35,7 +40,10 @@ class Entity:  # 定义实体基类，所有游戏实体的父类
             self.h = image.get_height() if image else 0  # 获取图像高度
 
         self.hit_mask = get_hit_mask(image) if image else None  # 获取碰撞掩码
-        self.__dict__.update(kwargs)  # 更新其他属性
+        for name, value in kwargs.items():  # 更新其他属性
+            setattr(self, name, value)
+        self.prev_x = self.x  # 上一个模拟步的位置，用于渲染插值
+        self.prev_y = self.y
 
     def update_image(self, image: pygame.Surface, w: int = None, h: int = None) -> None:  # 更新实体图像
         """
@@ -84,14 +92,40 @@ class Entity:  # 定义实体基类，所有游戏实体的父类
         :param other: 另一个实体
         :return: 是否碰撞
         """
-        if not self.hit_mask or not other.hit_mask:  # 如果没有碰撞掩码
+        if self.hit_mask is None or other.hit_mask is None:  # 如果没有碰撞掩码
             return self.rect.colliderect(other.rect)  # 使用矩形碰撞检测
         return pixel_collision(self.rect, other.rect, self.hit_mask, other.hit_mask)  # 使用像素碰撞检测
 
+    def draw_pos(self) -> tuple:
+        """
+        返回渲染位置：按插值系数取上一步和当前位置之间的点。
+        
+        :return: (x, y)
+        """
+        alpha = self.config.interpolation
+        return (
+            self.prev_x + (self.x - self.prev_x) * alpha,
+            self.prev_y + (self.y - self.prev_y) * alpha,
+        )
+
+    def update(self) -> None:  # 推进一个模拟步
+        """
+        推进一个固定时间步的模拟（移动、计时等），不做任何绘制；由子类重写。
+        """
+
+    def step(self) -> None:
+        """
+        记录当前位置用于插值，然后推进一个模拟步。
+        """
+        self.prev_x = self.x
+        self.prev_y = self.y
+        self.update()
+
     def tick(self) -> None:  # 更新实体状态
         """
-        更新实体状态。
+        推进一步并绘制（菜单等不区分模拟与渲染的界面使用）。
         """
+        self.step()  # 更新实体
         self.draw()  # 绘制实体
         # 禁用调试显示
         # rect = self.rect  # 获取矩形区域
@@ -110,4 +144,4 @@ class Entity:  # 定义实体基类，所有游戏实体的父类
         绘制实体。
         """
         if self.image:  # 如果有图像
-            self.config.screen.blit(self.image, self.rect)  # 在屏幕上绘制图像
+            self.config.screen.blit(self.image, self.draw_pos())  # 在屏幕上绘制图像
@@ -22,10 +22,17 @@ class Floor(Entity):
         """
         self.vel_x = 0
 
+    def update(self) -> None:
+        """
+        滚动地面实体。
+        """
+        # 使地面实体循环滚动
+        self.x = -((-self.x + self.vel_x) % self.x_extra)
+
     def draw(self) -> None:
         """
         绘制地面实体。
         """
-        # 使地面实体循环绘制
-        self.x = -((-self.x + self.vel_x) % self.x_extra)
-        super().draw()
+        # 按插值系数在上一步的位置上继续滚动，避免跨过循环点时插值出错
+        x = -((-self.prev_x + self.vel_x * self.config.interpolation) % self.x_extra)
+        self.config.screen.blit(self.image, (x, self.y))
@@ -1,7 +1,7 @@
-import random
+from itertools import chain
 from typing import List
 
-from ..utils import GameConfig
+from ..utils import GameConfig, SpatialGrid
 from .entity import Entity
 
 
@@ -10,9 +10,8 @@ class Pipe(Entity):
         super().__init__(*args, **kwargs)
         self.vel_x = -5  # 管道的水平速度
 
-    def draw(self) -> None:
+    def update(self) -> None:
         self.x += self.vel_x  # 更新管道位置
-        super().draw()  # 调用父类的绘制方法
 
 
 class Pipes(Entity):
@@ -26,16 +25,25 @@ class Pipes(Entity):
         self.bottom = self.config.window.viewport_height  # 底部位置
         self.upper = []  # 初始化上方管道列表
         self.lower = []  # 初始化下方管道列表
+        self.grid = SpatialGrid()  # 碰撞粗检测网格
         self.spawn_initial_pipes()  # 生成初始管道
+        self.grid.rebuild(chain(self.upper, self.lower))  # 登记初始管道
 
-    def tick(self) -> None:
+    def update(self) -> None:
         if self.can_spawn_pipes():  # 检查是否可以生成管道
             self.spawn_new_pipes()  # 生成新管道
         self.remove_old_pipes()  # 移除旧管道
 
         for up_pipe, low_pipe in zip(self.upper, self.lower):
-            up_pipe.tick()  # 更新上方管道状态
-            low_pipe.tick()  # 更新下方管道状态
+            up_pipe.step()  # 更新上方管道状态
+            low_pipe.step()  # 更新下方管道状态
+
+        self.grid.rebuild(chain(self.upper, self.lower))  # 管道移动后重新登记到网格
+
+    def draw(self) -> None:
+        for up_pipe, low_pipe in zip(self.upper, self.lower):
+            up_pipe.draw()  # 绘制上方管道
+            low_pipe.draw()  # 绘制下方管道
 
     def stop(self) -> None:
         for pipe in self.upper + self.lower:
@@ -82,14 +90,14 @@ class Pipes(Entity):
         # 上下管道之间的间隙y坐标
         base_y = self.config.window.viewport_height
 
-        gap_y = random.randrange(0, int(base_y * 0.6 - self.pipe_gap))  # 随机生成间隙y坐标
+        gap_y = self.config.rng.randrange(0, int(base_y * 0.6 - self.pipe_gap))  # 随机生成间隙y坐标
         gap_y += int(base_y * 0.2)  # 调整间隙y坐标
         pipe_height = self.config.images.pipe[0].get_height()  # 获取管道高度
         pipe_x = self.config.window.width + 10  # 设置管道x坐标
 
         # 随机生成特殊管道
-        if random.random() < 0.2:  # 20% 概率生成特殊管道
-            pipe_type = random.choice(['speed_up', 'speed_down'])
+        if self.config.rng.random() < 0.2:  # 20% 概率生成特殊管道
+            pipe_type = self.config.rng.choice(['speed_up', 'speed_down'])
             if pipe_type == 'speed_up':
                 upper_pipe = Pipe(
                     self.config,
@@ -2,16 +2,15 @@ from enum import Enum
 from itertools import cycle
 from typing import List
 import math
-import random
 
 import pygame
 
-from ..utils import GameConfig, clamp, get_font
+from ..utils import GameConfig, ParticleSystem, SpatialGrid, clamp, get_font, render_text, transform_cache
 from .entity import Entity
 from .floor import Floor
 from .pipe import Pipe, Pipes
 from .powerup import PowerUpType
-from .bullet import Bullet
+from .bullet import Bullet, bullet_pool
 from .weapon import Weapon, WeaponType
 
 
@@ -49,6 +48,7 @@ class Player(Entity):
         
         # 子弹
         self.bullets = []
+        self.bullet_grid = SpatialGrid()  # 子弹的碰撞粗检测网格
         self.bullet_damage = 10  # 默认伤害值
         self.invincible = False  # 是否无敌
         
@@ -64,7 +64,7 @@ class Player(Entity):
         self.bullet_cooldown = 0  # 当前冷却计时器
         
         # 爆炸特效
-        self.explosions = []
+        self.explosions = ParticleSystem('x', 'y', 'vel_x', 'vel_y', 'size', 'duration', 'red', 'green', 'blue')
         
         # 添加弹药显示 - 位置调整到右下角，但与边缘保持适当距离
         self.bullet_ui_pos = (config.window.width - 120, config.window.height - 60)
@@ -154,8 +154,8 @@ class Player(Entity):
         self.flap_acc = -7  # 拍打加速度
         self.flapped = False  # 拍打状态
         
-        # 重置子弹
-        self.bullets = []
+        # 重置子弹（放回对象池）
+        self.release_bullets()
         self.bullet_cooldown = 0
         self.boss_target = None  # 存储Boss引用，用于追踪弹
         
@@ -199,7 +199,7 @@ class Player(Entity):
             original_img = self.config.images.player[idx]
             new_width = int(original_img.get_width() * size_scale)
             new_height = int(original_img.get_height() * size_scale)
-            self.image = pygame.transform.scale(original_img, (new_width, new_height))
+            self.image = transform_cache.scale(original_img, (new_width, new_height))
             self.w = new_width
             self.h = new_height
         else:
@@ -247,31 +247,41 @@ class Player(Entity):
         # 更新武器冷却时间
         self.update_weapons()
         
-        # 更新并绘制子弹
+        # 更新子弹
         self.update_bullets()
         
         # 更新爆炸特效
         self.update_explosions()
-        
-        # 绘制武器UI
-        self.draw_weapon_ui()
     
     def update_weapons(self):
         """更新所有武器状态"""
         for weapon in self.weapons:
             weapon.update()
     
+    def release_bullets(self):
+        """把所有子弹放回对象池"""
+        bullet_pool.release_all(self.bullets)
+        self.bullets = []
+        self.bullet_grid.clear()
+    
     def update_bullets(self):
-        """更新并绘制所有子弹"""
-        for bullet in list(self.bullets):
-            if hasattr(bullet, 'is_homing') and bullet.is_homing:
+        """更新所有子弹"""
+        active_bullets = []
+        for bullet in self.bullets:
+            if bullet.is_homing:
                 # 更新追踪弹的目标
                 bullet.target = self.boss_target
                 
-            bullet.tick()
-            # 移除超出屏幕的子弹
+            bullet.step()
+            # 超出屏幕的子弹放回对象池，一次遍历完成移除
             if bullet.is_out_of_screen():
-                self.bullets.remove(bullet)
+                bullet_pool.release(bullet)
+            else:
+                active_bullets.append(bullet)
+        self.bullets = active_bullets
+        
+        # 子弹移动后重新登记到网格
+        self.bullet_grid.rebuild(self.bullets)
     
     def draw_weapon_ui(self):
         """绘制当前武器信息UI"""
@@ -331,46 +341,35 @@ class Player(Entity):
         short_name = name_map.get(weapon.weapon_type.value, weapon.weapon_type.value)
         
         # 显示武器名称 - 在图标旁边
-        name_text = font.render(short_name, True, weapon.color)
+        name_text = render_text(font, short_name, weapon.color)
         self.config.screen.blit(name_text, (icon_x + icon_size + 5, icon_y))
         
         # 弹药符号
         ammo_text = "∞" if weapon.ammo < 0 else f"{weapon.ammo}"
-        ammo_surface = font.render(f"{ammo_text}", True, (255, 255, 255))
+        ammo_surface = render_text(font, f"{ammo_text}", (255, 255, 255))
         self.config.screen.blit(ammo_surface, (icon_x + icon_size + 5, icon_y + 20))
         
         # 快捷键提示 - 在底部，更短
-        keys_text = small_font.render("Q/E切换", True, (180, 180, 180))
+        keys_text = render_text(small_font, "Q/E切换", (180, 180, 180))
         self.config.screen.blit(keys_text, (self.bullet_ui_pos[0] + bg_width//2 - keys_text.get_width()//2, 
                                             self.bullet_ui_pos[1] + bg_height - 12))
 
     def update_explosions(self):
-        """更新爆炸特效"""
-        explosions_to_remove = []
-        
-        for explosion in self.explosions:
-            # 更新位置
-            explosion['x'] += explosion['vel_x']
-            explosion['y'] += explosion['vel_y']
-            
-            # 减少持续时间
-            explosion['duration'] -= 1
-            
-            # 绘制粒子
-            if explosion['duration'] > 0:
-                pygame.draw.circle(
-                    self.config.screen,
-                    explosion['color'],
-                    (int(explosion['x']), int(explosion['y'])),
-                    int(explosion['size'] * (explosion['duration'] / 20))
-                )
-            else:
-                explosions_to_remove.append(explosion)
-        
-        # 移除已完成的爆炸
-        for explosion in explosions_to_remove:
-            if explosion in self.explosions:
-                self.explosions.remove(explosion)
+        """更新爆炸特效：移动粒子、减少持续时间，一次移除已完成的粒子"""
+        self.explosions.integrate()
+        self.explosions.add('duration', -1)
+        self.explosions.compact(lambda duration: duration > 0, 'duration')
+
+    def draw_explosions(self):
+        """绘制爆炸特效"""
+        for x, y, size, duration, red, green, blue in self.explosions.rows(
+                'x', 'y', 'size', 'duration', 'red', 'green', 'blue'):
+            pygame.draw.circle(
+                self.config.screen,
+                (int(red), int(green), int(blue)),
+                (int(x), int(y)),
+                int(size * (duration / 20))
+            )
 
     def tick_shm(self) -> None:
         """有规律地上下移动玩家，用于显示欢迎界面"""
@@ -398,7 +397,7 @@ class Player(Entity):
     def rotate(self) -> None:
         self.rot = clamp(self.rot + self.vel_rot, self.rot_min, self.rot_max)
 
-    def draw(self) -> None:
+    def update(self) -> None:
         self.update_image()
         if self.mode == PlayerMode.SHM:
             self.tick_shm()
@@ -410,10 +409,18 @@ class Player(Entity):
             self.tick_boss()
         elif self.mode == PlayerMode.CRASH:
             self.tick_crash()
+
+    def draw(self) -> None:
+        if self.mode == PlayerMode.BOSS:
+            for bullet in self.bullets:
+                bullet.draw()
+            self.draw_explosions()
+            self.draw_weapon_ui()
         
         self.draw_player()
 
     def draw_player(self) -> None:
+        x, y = self.draw_pos()
         # Rotate bird for normal mode bird and crashed bird (in air)
         if (
             self.mode == PlayerMode.NORMAL
@@ -423,8 +430,8 @@ class Player(Entity):
         ):
             rotation = self.rot if self.mode != PlayerMode.REVERSE else -self.rot
             # pygame.transform.rotate rotates clockwise (opposite of what we want)
-            img = pygame.transform.rotate(self.image, rotation)
-            rotated_rect = img.get_rect(center=(self.x + self.w // 2, self.y + self.h // 2))
+            img = transform_cache.rotate(self.image, rotation)
+            rotated_rect = img.get_rect(center=(x + self.w // 2, y + self.h // 2))
             
             # 如果处于无敌状态，添加视觉特效
             if self.invincible:
@@ -484,7 +491,7 @@ class Player(Entity):
             self.config.screen.blit(img, rotated_rect)
         # For crashed bird on ground or message bird
         else:
-            self.config.screen.blit(self.image, (self.x, self.y))
+            self.config.screen.blit(self.image, (x, y))
     
     def switch_weapon(self, direction: int) -> None:
         """切换武器 (1: 下一个, -1: 上一个)"""
@@ -548,7 +555,8 @@ class Player(Entity):
             self.crash_entity = "floor"
             return True
 
-        for pipe in pipes.upper + pipes.lower:
+        # 只对网格中与玩家矩形相交的管道做像素检测
+        for pipe in pipes.grid.query(self.rect):
             if self.collide(pipe):
                 self.crash_entity = "pipe"
                 return True
@@ -557,7 +565,10 @@ class Player(Entity):
         
     def check_boss_bullet_collision(self, boss) -> bool:
         """检查玩家是否被Boss子弹击中"""
-        for bullet in boss.bullets:
+        # 只对网格中与玩家矩形相交的子弹做像素检测
+        for bullet in boss.bullet_grid.query(self.rect):
+            if bullet not in boss.bullet_grid:
+                continue  # 已被其他逻辑移除
             if self.collide(bullet):
                 # 只有非无敌状态下才会受到伤害
                 if not self.invincible:
@@ -569,11 +580,15 @@ class Player(Entity):
                     
                     # 从Boss的子弹列表中移除
                     boss.bullets.remove(bullet)
+                    boss.bullet_grid.remove(bullet)
+                    bullet_pool.release(bullet)
                     
                     return True
                 else:
                     # 无敌状态下子弹被弹开但不造成伤害
                     boss.bullets.remove(bullet)
+                    boss.bullet_grid.remove(bullet)
+                    bullet_pool.release(bullet)
                     
                     # 播放无敌反弹音效
                     self.config.sounds.swoosh.play()
@@ -586,13 +601,16 @@ class Player(Entity):
     def check_bullet_hit_boss(self, boss) -> bool:
         """检查玩家的子弹是否击中Boss"""
         hit = False
-        for bullet in list(self.bullets):
+        # 只对网格中与Boss矩形相交的子弹做像素检测
+        for bullet in self.bullet_grid.query(boss.rect):
             # 判断玩家子弹与Boss的碰撞
-            if bullet.collide(boss):
+            if bullet in self.bullet_grid and bullet.collide(boss):
                 # 应用伤害
                 boss.take_damage(bullet.damage)
                 # 移除子弹
                 self.bullets.remove(bullet)
+                self.bullet_grid.remove(bullet)
+                bullet_pool.release(bullet)
                 hit = True
         
         return hit
@@ -606,16 +624,18 @@ class Player(Entity):
         duration = 20
         
         for i in range(particles):
-            angle = random.random() * math.pi * 2
-            vel_x = math.cos(angle) * speed * random.random()
-            vel_y = math.sin(angle) * speed * random.random()
+            angle = self.config.rng.random() * math.pi * 2
+            vel_x = math.cos(angle) * speed * self.config.rng.random()
+            vel_y = math.sin(angle) * speed * self.config.rng.random()
             
-            self.explosions.append({
-                'x': x,
-                'y': y,
-                'vel_x': vel_x,
-                'vel_y': vel_y,
-                'size': size,
-                'color': color,
-                'duration': duration
-            })
+            self.explosions.emit(
+                x=x,
+                y=y,
+                vel_x=vel_x,
+                vel_y=vel_y,
+                size=size,
+                duration=duration,
+                red=color[0],
+                green=color[1],
+                blue=color[2]
+            )
@@ -1,11 +1,10 @@
-import random
 from enum import Enum
 from typing import Optional
 import math
 
 import pygame
 
-from ..utils import GameConfig
+from ..utils import GameConfig, ObjectPool, sprite_atlas, transform_cache
 from .entity import Entity
 
 
@@ -17,9 +16,55 @@ class PowerUpType(Enum):
     SMALL_SIZE = "SMALL_SIZE"    # 缩小玩家
 
 
+# 各类道具效果的持续时间（毫秒）
+POWERUP_DURATIONS = {
+    PowerUpType.SPEED_BOOST: 8000,    # 8秒
+    PowerUpType.INVINCIBLE: 10000,    # 10秒
+    PowerUpType.SLOW_MOTION: 8000,    # 8秒
+    PowerUpType.SMALL_SIZE: 8000,     # 8秒
+}
+
+# 拾取各类道具时的音效序列：(相对拾取时的延迟毫秒, 音效名, 音量(None为不变), 是否播放)
+POWERUP_SOUNDS = {
+    # 加速 - point音效稍轻，连续播放两次表示加速感
+    PowerUpType.SPEED_BOOST: [
+        (0, "point", 0.8, True),
+        (100, "point", None, True),
+        (150, "point", 1.0, False),
+    ],
+    # 无敌 - wing音效稍响，随后播放point音效增强获得感
+    PowerUpType.INVINCIBLE: [
+        (0, "wing", 1.2, True),  # 音量稍微提高
+        (150, "point", None, True),
+        (200, "wing", 1.0, False),
+    ],
+    # 慢动作 - 较轻的swoosh音效
+    PowerUpType.SLOW_MOTION: [
+        (0, "swoosh", 0.7, True),
+        (100, "swoosh", 1.0, False),
+    ],
+    # 缩小 - swoosh和point的组合
+    PowerUpType.SMALL_SIZE: [
+        (0, "swoosh", 0.6, True),
+        (50, "point", 0.6, True),
+        (100, "swoosh", 1.0, False),
+        (100, "point", 1.0, False),
+    ],
+}
+
+
 class PowerUp(Entity):
     """道具实体类"""
+    
+    __slots__ = ('power_type', 'primary_color', 'secondary_color', 'duration', 'vel_x',
+                 'animation_tick', 'rotation_angle', 'pulse_scale', 'pulse_direction',
+                 'original_image', 'shine_angle', 'center_x', 'center_y')
+    
     def __init__(self, config: GameConfig, power_type: PowerUpType, x: int, y: int) -> None:
+        self.reset(config, power_type, x, y)
+    
+    def reset(self, config: GameConfig, power_type: PowerUpType, x: int, y: int) -> None:
+        """初始化道具（对象池复用旧道具时也调用，参数同构造函数）"""
         self.config = config
         self.power_type = power_type
         
@@ -36,16 +81,35 @@ class PowerUp(Entity):
         self.secondary_color = color_map[power_type][1]
         
         # 根据道具类型设置持续时间
-        duration_map = {
-            PowerUpType.SPEED_BOOST: 8000,    # 8秒
-            PowerUpType.INVINCIBLE: 10000,    # 10秒
-            PowerUpType.SLOW_MOTION: 8000,    # 8秒
-            PowerUpType.SMALL_SIZE: 8000,     # 8秒
-        }
-        self.duration = duration_map[power_type]  # 道具持续时间(毫秒)
+        self.duration = POWERUP_DURATIONS[power_type]  # 道具持续时间(毫秒)
         
         self.vel_x = -4  # 水平移动速度
         
+        # 同类型道具共用一张图像，只在首次生成时绘制
+        final_surface = sprite_atlas.get(("powerup", power_type), self.create_powerup_surface)
+        
+        super().__init__(config, final_surface, x, y)
+        
+        # 动画参数
+        self.animation_tick = 0
+        self.rotation_angle = 0  # 旋转角度
+        self.pulse_scale = 1.0
+        self.pulse_direction = 0.01
+        self.original_image = self.image  # 原始图像用于动画（共享图像，只读）
+        self.shine_angle = 0  # 闪光效果角度
+        
+        # 保存中心坐标
+        self.center_x = self.x + self.w / 2
+        self.center_y = self.y + self.h / 2
+    
+    def recycle(self) -> None:
+        """放回对象池前丢弃动画生成的临时图像"""
+        self.image = self.original_image
+    
+    def create_powerup_surface(self) -> pygame.Surface:
+        """绘制道具图像（图标加外部光环）"""
+        power_type = self.power_type
+        
         # 创建更精美的道具图像
         size = 32  # 略微增大尺寸
         
@@ -74,19 +138,7 @@ class PowerUp(Entity):
         final_surface.blit(glow_surface, (0, 0))
         final_surface.blit(main_surface, ((glow_size - size) // 2, (glow_size - size) // 2))
         
-        super().__init__(config, final_surface, x, y)
-        
-        # 动画参数
-        self.animation_tick = 0
-        self.rotation_angle = 0  # 旋转角度
-        self.pulse_scale = 1.0
-        self.pulse_direction = 0.01
-        self.original_image = self.image.copy()  # 保存原始图像用于动画
-        self.shine_angle = 0  # 闪光效果角度
-        
-        # 保存中心坐标
-        self.center_x = self.x + self.w / 2
-        self.center_y = self.y + self.h / 2
+        return final_surface
     
     def draw_powerup_icon(self, surface, power_type, size):
         """根据不同道具类型绘制不同图标"""
@@ -212,13 +264,12 @@ class PowerUp(Entity):
             # 中心小圆
             pygame.draw.circle(surface, arrow_color, (center, center), 3)
     
-    def draw(self) -> None:
+    def update(self) -> None:
         self.x += self.vel_x  # 更新位置
         # 更新中心坐标
         self.center_x = self.x + self.w / 2
         self.center_y = self.y + self.h / 2
         self.animate()  # 更新动画
-        super().draw()  # 调用父类绘制方法
     
     def animate(self) -> None:
         """使道具产生更丰富的动画效果"""
@@ -249,17 +300,11 @@ class PowerUp(Entity):
         # 应用所有动画效果创建新图像
         scaled_size = int(self.original_image.get_width() * self.pulse_scale)
         
-        # 先缩放原始图像
-        scaled_image = pygame.transform.scale(self.original_image, (scaled_size, scaled_size))
-        
-        # 然后旋转图像
-        if rotation_speed > 0:
-            rotated_image = pygame.transform.rotate(scaled_image, self.rotation_angle)
-        else:
-            rotated_image = scaled_image
+        # 先缩放原始图像，然后旋转（变换结果来自缓存）
+        rotation = self.rotation_angle if rotation_speed > 0 else 0
         
         # 更新图像和尺寸
-        self.image = rotated_image
+        self.image = transform_cache.get(self.original_image, rotation, (scaled_size, scaled_size))
         self.w = self.image.get_width()
         self.h = self.image.get_height()
         
@@ -277,31 +322,49 @@ class PowerUpManager:
         self.spawn_interval = 1500  # 从3000ms减少到1500ms，每1.5秒生成一次道具的机会
         self.spawn_chance = 0.9     # 从0.6增加到0.9，90%概率生成道具
         self.active_effects = {}    # 当前激活的效果 {PowerUpType: end_time}
+        self.elapsed = 0            # 已模拟的游戏时间（毫秒），效果计时以此为准
+        self.sound_queue = []       # 待播放的音效 [(播放时间, 音效名, 音量, 是否播放)]
     
     def tick(self, delta_time: int) -> None:
-        """更新所有道具状态"""
+        """更新并绘制所有道具（不区分模拟与渲染时使用）"""
+        self.update(delta_time)
+        self.draw()
+    
+    def draw(self) -> None:
+        """绘制所有道具"""
+        for powerup in self.powerups:
+            powerup.draw()
+    
+    def update(self, delta_time: int) -> None:
+        """推进一个模拟步：生成、移动道具并结束到期的效果"""
+        self.elapsed += delta_time
+        self.play_due_sounds()
+        
         # 更新生成计时器
         self.spawn_timer += delta_time
         if self.spawn_timer >= self.spawn_interval:
             self.spawn_timer = 0
-            if random.random() < self.spawn_chance:
+            if self.config.rng.random() < self.spawn_chance:
                 # 有概率同时生成多个道具
                 num_powerups = 1
-                if random.random() < 0.4:  # 40%的概率生成多个道具
-                    num_powerups = random.randint(2, 3)  # 生成2-3个道具
+                if self.config.rng.random() < 0.4:  # 40%的概率生成多个道具
+                    num_powerups = self.config.rng.randint(2, 3)  # 生成2-3个道具
                 
                 for _ in range(num_powerups):
                     self.spawn_powerup()
         
-        # 更新和移除道具
-        for powerup in list(self.powerups):
-            powerup.tick()
-            # 移除超出屏幕的道具
+        # 更新道具，超出屏幕的道具放回对象池，一次遍历完成移除
+        active_powerups = []
+        for powerup in self.powerups:
+            powerup.step()
             if powerup.x < -powerup.w:
-                self.powerups.remove(powerup)
+                powerup_pool.release(powerup)
+            else:
+                active_powerups.append(powerup)
+        self.powerups = active_powerups
         
         # 更新激活效果的剩余时间
-        current_time = pygame.time.get_ticks()
+        current_time = self.elapsed
         expired_effects = []
         
         for effect_type, end_time in self.active_effects.items():
@@ -315,66 +378,67 @@ class PowerUpManager:
     def spawn_powerup(self) -> None:
         """生成一个随机道具"""
         # 从枚举中随机选择一个道具类型
-        power_type = random.choice(list(PowerUpType))
+        power_type = self.config.rng.choice(list(PowerUpType))
         
         # 在合适的位置生成道具
         x = self.config.window.width + 10
         # 在屏幕中央区域随机生成
         min_y = int(self.config.window.height * 0.2)
         max_y = int(self.config.window.height * 0.7)
-        y = random.randint(min_y, max_y)
+        y = self.config.rng.randint(min_y, max_y)
         
         # 创建道具并添加到列表
-        powerup = PowerUp(self.config, power_type, x, y)
+        powerup = powerup_pool.acquire(self.config, power_type, x, y)
         self.powerups.append(powerup)
     
+    def remove(self, powerups) -> None:
+        """一次移除一组道具（如被玩家拾取的）并放回对象池"""
+        removed = set(powerups)
+        if removed:
+            self.powerups = [powerup for powerup in self.powerups if powerup not in removed]
+            powerup_pool.release_all(removed)
+    
+    def clear(self) -> None:
+        """清空所有道具和激活的效果"""
+        powerup_pool.release_all(self.powerups)
+        self.powerups = []
+        self.active_effects = {}
+        # 未播放的音效丢弃，但要恢复被临时调整的音量
+        for entry in self.sound_queue:
+            self.apply_sound(entry, play=False)
+        self.sound_queue = []
+    
     def activate_effect(self, power_type: PowerUpType) -> None:
         """激活道具效果"""
-        current_time = pygame.time.get_ticks()
-        # 使用临时道具对象获取持续时间，避免创建完整的道具实例
-        temp_powerup = PowerUp(self.config, power_type, 0, 0)
-        end_time = current_time + temp_powerup.duration
+        current_time = self.elapsed
+        end_time = current_time + POWERUP_DURATIONS[power_type]
         self.active_effects[power_type] = end_time
         
-        # 为不同道具播放不同音效
-        if power_type == PowerUpType.SPEED_BOOST:
-            # 加速音效 - 使用point音效，但设置频率更高
-            self.config.sounds.point.set_volume(0.8)
-            self.config.sounds.point.play()
-            # 连续播放两次来表示加速感
-            pygame.time.delay(100)
-            self.config.sounds.point.play()
-            # 恢复音量
-            pygame.time.delay(50)
-            self.config.sounds.point.set_volume(1.0)
-        elif power_type == PowerUpType.INVINCIBLE:
-            # 无敌音效 - 使用wing音效，但通过设置频率来获得更金属的感觉
-            self.config.sounds.wing.set_volume(1.2)  # 音量稍微提高
-            self.config.sounds.wing.play()
-            # 延迟一点后播放point音效增强无敌获得的感觉
-            pygame.time.delay(150)
-            self.config.sounds.point.play()
-            # 恢复音量
-            pygame.time.delay(50)
-            self.config.sounds.wing.set_volume(1.0)
-        elif power_type == PowerUpType.SLOW_MOTION:
-            # 慢动作音效 - 使用swoosh音效，较低的音调
-            self.config.sounds.swoosh.set_volume(0.7)
-            self.config.sounds.swoosh.play()
-            # 恢复音量
-            pygame.time.delay(100)
-            self.config.sounds.swoosh.set_volume(1.0)
-        elif power_type == PowerUpType.SMALL_SIZE:
-            # 缩小音效 - 使用point和swoosh的组合
-            self.config.sounds.swoosh.set_volume(0.6)
-            self.config.sounds.swoosh.play()
-            pygame.time.delay(50)
-            self.config.sounds.point.set_volume(0.6)
-            self.config.sounds.point.play()
-            # 恢复音量
-            pygame.time.delay(50)
-            self.config.sounds.swoosh.set_volume(1.0)
-            self.config.sounds.point.set_volume(1.0)
+        # 为不同道具播放不同音效：按游戏时间排入队列，之后的模拟步里再播放，模拟步不等待
+        for delay, name, volume, play in POWERUP_SOUNDS[power_type]:
+            self.sound_queue.append((current_time + delay, name, volume, play))
+        self.play_due_sounds()  # 延迟为0的音效立即播放
+    
+    def play_due_sounds(self) -> None:
+        """播放到时的道具音效"""
+        if not self.sound_queue:
+            return
+        pending = []
+        for entry in self.sound_queue:
+            if entry[0] <= self.elapsed:
+                self.apply_sound(entry)
+            else:
+                pending.append(entry)
+        self.sound_queue = pending
+    
+    def apply_sound(self, entry, play: bool = True) -> None:
+        """执行一条音效队列项：调整音量并按需播放"""
+        _, name, volume, should_play = entry
+        sound = getattr(self.config.sounds, name)
+        if volume is not None:
+            sound.set_volume(volume)
+        if play and should_play:
+            sound.play()
     
     def has_effect(self, power_type: PowerUpType) -> bool:
         """检查指定的效果是否处于激活状态"""
@@ -385,6 +449,10 @@ class PowerUpManager:
         if not self.has_effect(power_type):
             return None
         
-        current_time = pygame.time.get_ticks()
+        current_time = self.elapsed
         end_time = self.active_effects[power_type]
         return max(0, end_time - current_time)
+
+
+# 全局道具对象池实例
+powerup_pool = ObjectPool(PowerUp)
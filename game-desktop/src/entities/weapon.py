@@ -3,8 +3,8 @@ import pygame
 import math
 from typing import List, Optional
 
-from ..utils import GameConfig
-from .bullet import Bullet
+from ..utils import GameConfig, sprite_atlas, transform_cache
+from .bullet import Bullet, bullet_pool
 from .boss import Boss
 
 class WeaponType(Enum):
@@ -100,15 +100,12 @@ class Weapon:
         
     def create_normal_bullet(self, x: int, y: int) -> Bullet:
         """创建普通子弹"""
-        bullet = Bullet(self.config, x, y)
+        bullet = bullet_pool.acquire(self.config, x, y)
         bullet.damage = self.damage
         bullet.vel_x = 10  # 向右飞行
         
         # 自定义外观
-        size = 8
-        bullet_surface = pygame.Surface((size, size), pygame.SRCALPHA)
-        pygame.draw.circle(bullet_surface, self.color, (size//2, size//2), size//2)
-        bullet.image = bullet_surface
+        bullet.image = sprite_atlas.circle(8, self.color)
         
         return bullet
         
@@ -118,7 +115,7 @@ class Weapon:
         angles = [-15, 0, 15]  # 发射角度
         
         for angle in angles:
-            bullet = Bullet(self.config, x, y)
+            bullet = bullet_pool.acquire(self.config, x, y)
             bullet.damage = self.damage
             
             # 计算速度分量
@@ -126,11 +123,8 @@ class Weapon:
             bullet.vel_x = 10 * math.cos(angle_rad)
             bullet.vel_y = 10 * math.sin(angle_rad)
             
-            # 自定义外观
-            size = 6  # 略小的子弹
-            bullet_surface = pygame.Surface((size, size), pygame.SRCALPHA)
-            pygame.draw.circle(bullet_surface, self.color, (size//2, size//2), size//2)
-            bullet.image = bullet_surface
+            # 自定义外观 - 略小的子弹
+            bullet.image = sprite_atlas.circle(6, self.color)
             
             bullets.append(bullet)
             
@@ -139,12 +133,19 @@ class Weapon:
     def create_laser_bullet(self, x: int, y: int) -> Bullet:
         """创建激光子弹"""
         # 创建一个特殊的激光子弹
-        bullet = Bullet(self.config, x, y)
+        bullet = bullet_pool.acquire(self.config, x, y)
         bullet.damage = self.damage
         bullet.vel_x = 20  # 非常快的速度
         bullet.is_laser = True
         
         # 自定义外观 - 细长的矩形
+        bullet.image = sprite_atlas.get(("laser", self.laser_width, self.color), self.create_laser_surface)
+        bullet.enable_trail(3)  # 激光拖尾效果
+        
+        return bullet
+        
+    def create_laser_surface(self) -> pygame.Surface:
+        """绘制激光子弹图像"""
         width = 20
         height = self.laser_width
         laser_surface = pygame.Surface((width, height), pygame.SRCALPHA)
@@ -160,15 +161,11 @@ class Weapon:
         final_surface.blit(glow_surface, (0, 0))
         final_surface.blit(laser_surface, (2, 2))  # 居中放置
         
-        bullet.image = final_surface
-        bullet.trail_length = 3  # 激光拖尾效果
-        bullet.trail_frames = []  # 存储拖尾帧
-        
-        return bullet
+        return final_surface
         
     def create_homing_bullet(self, x: int, y: int, target: Optional[Boss]) -> Bullet:
         """创建追踪子弹"""
-        bullet = Bullet(self.config, x, y)
+        bullet = bullet_pool.acquire(self.config, x, y)
         bullet.damage = self.damage
         bullet.vel_x = 5  # 初始速度
         bullet.vel_y = 0
@@ -178,6 +175,13 @@ class Weapon:
         bullet.is_homing = True
         
         # 自定义外观 - 小火箭形状
+        bullet.image = sprite_atlas.get(("rocket", self.color), self.create_rocket_surface)
+        bullet.update_homing = self.update_homing_bullet  # 添加特殊的更新方法
+        
+        return bullet
+        
+    def create_rocket_surface(self) -> pygame.Surface:
+        """绘制追踪导弹图像"""
         size = 12
         rocket_surface = pygame.Surface((size, size), pygame.SRCALPHA)
         
@@ -201,10 +205,7 @@ class Weapon:
         final_surface.blit(glow_surface, (0, 0))
         final_surface.blit(rocket_surface, (3, 3))
         
-        bullet.image = final_surface
-        bullet.update_homing = self.update_homing_bullet  # 添加特殊的更新方法
-        
-        return bullet
+        return final_surface
         
     def update_homing_bullet(self, bullet) -> None:
         """更新追踪子弹的轨迹"""
@@ -241,4 +242,4 @@ class Weapon:
         
         # 旋转子弹精灵以面向移动方向
         angle_degrees = math.degrees(current_angle)
-        bullet.image = pygame.transform.rotate(bullet.original_image, -angle_degrees) 
\ No newline at end of file
+        bullet.image = transform_cache.rotate(bullet.original_image, -angle_degrees) 
\ No newline at end of file
@@ -1,10 +1,11 @@
 import asyncio
+import os
 import sys
 import math
 import time
 
 import pygame
-from pygame.locals import K_ESCAPE, K_SPACE, K_UP, KEYDOWN, QUIT, K_q, K_e, K_1, K_2, K_3, K_4, K_5, K_6, K_7, K_8
+from pygame.locals import K_ESCAPE, K_SPACE, K_UP, KEYDOWN, QUIT, K_q, K_e, K_1, K_2, K_3, K_4, K_5, K_6, K_7, K_8, K_F3, K_F4
 
 from .entities import (
     Background,
@@ -16,15 +17,18 @@ from .entities import (
     Score,
     WelcomeMessage,
 )
-from .entities.powerup import PowerUpManager, PowerUpType, PowerUp
+from .entities.powerup import PowerUpManager, PowerUpType, powerup_pool
 from .entities.boss import Boss, BossType
 from .entities.bullet import Bullet
 from .entities.weapon import WeaponType
 from .entities.coin import CoinManager
-from .utils import GameConfig, Images, Sounds, Window, get_font
+from .utils import GameConfig, Images, Sounds, Window, dirty_rects, entity_rect, font_registry, frame_profiler, get_font, render_text
 from .network_manager import NetworkManager
 from .login_screen import LoginScreen
-from enum import Enum
+from .replay import Replay
+from enum import Enum, IntEnum
+
+BOSS_TRANSITION_STEPS = 60  # Boss转场动画的模拟步数（约2秒）
 
 
 class GameMode(Enum):
@@ -36,16 +40,42 @@ class GameMode(Enum):
     COIN = "金币收集"     # 金币收集模式
 
 
+class InputAction(IntEnum):
+    """玩家输入动作，游戏逻辑只通过这些动作接收输入，便于无头模拟和回放"""
+    FLAP = 1             # 拍打（Boss模式下同时射击）
+    WEAPON_PREV = 2      # 上一个武器
+    WEAPON_NEXT = 3      # 下一个武器
+    WEAPON_1 = 4         # 直接选择武器1-4
+    WEAPON_2 = 5
+    WEAPON_3 = 6
+    WEAPON_4 = 7
+    # 测试模式：生成道具（编码大于 replay.MAX_PLAYER_ACTION，服务器拒绝包含这些动作的回放）
+    SPAWN_SPEED_BOOST = 8
+    SPAWN_INVINCIBLE = 9
+    SPAWN_SLOW_MOTION = 10
+    SPAWN_SMALL_SIZE = 11
+
+
 class Flappy:
-    def __init__(self):
+    def __init__(self, headless: bool = False, root: str = ""):
         """
         初始化Flappy Bird游戏
+        :param headless: 无头模式，不打开窗口、不播放声音、不连接服务器，只运行游戏逻辑
+        :param root: 游戏资源所在目录（assets的上级目录），默认为当前工作目录
         """
+        self.headless = headless
+        if headless:
+            # 使用SDL的虚拟驱动，图像仍可加载（碰撞掩码需要），但不会显示
+            os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+            os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
         pygame.init()  # 初始化pygame
         pygame.display.set_caption("Flappy Bird")  # 设置窗口标题
         window = Window(350, 600)  # 扩大窗口尺寸
         screen = pygame.display.set_mode((window.width, window.height))  # 设置屏幕大小
-        images = Images()  # 加载图像资源
+        images = Images(root)  # 加载图像资源
+        if not headless:
+            # 菜单和HUD使用的中文字号在启动时解析一次，之后每帧直接取用
+            font_registry.preload((10, 12, 14, 16, 18, 20, 24, 28, 32, 36, 42, 48))
 
         self.config = GameConfig(
             screen=screen,
@@ -53,7 +83,7 @@ class Flappy:
             fps=30,
             window=window,
             images=images,
-            sounds=Sounds(),
+            sounds=Sounds(muted=headless),
         )
         # 设置调试模式为False，关闭调试信息显示
         self.config.debug = False
@@ -79,11 +109,22 @@ class Flappy:
         # 初始化金币收集计数
         self.collected_coins = 0
         
-        # 初始化网络管理器
-        self.network = NetworkManager()
+        # 已推进的模拟步数，输入按步数记录
+        self.step_count = 0
+        self.replay = None  # 当前这局的回放记录
         
-        # 初始化登录界面
-        self.login_screen = LoginScreen(self.config, self.network)
+        # 测试模式：允许数字键5-8直接生成道具
+        self.test_mode = True
+        
+        if headless:
+            self.network = None
+            self.login_screen = None
+        else:
+            # 初始化网络管理器
+            self.network = NetworkManager()
+            
+            # 初始化登录界面
+            self.login_screen = LoginScreen(self.config, self.network)
         
         # 游戏状态
         self.show_login = False
@@ -138,14 +179,14 @@ class Flappy:
         desc_font = get_font('SimHei', 16)
         
         # 创建文本
-        title_text = title_font.render("🐦 FlapPy Bird 增强版", True, (255, 255, 255))
-        subtitle_text = desc_font.render("请选择游戏模式", True, (200, 200, 200))
+        title_text = render_text(title_font, "🐦 FlapPy Bird 增强版", (255, 255, 255))
+        subtitle_text = render_text(desc_font, "请选择游戏模式", (200, 200, 200))
         
-        login_text = button_font.render("🔐 用户登录", True, (255, 255, 255))
-        guest_text = button_font.render("👤 游客模式", True, (255, 255, 255))
+        login_text = render_text(button_font, "🔐 用户登录", (255, 255, 255))
+        guest_text = render_text(button_font, "👤 游客模式", (255, 255, 255))
         
-        login_desc = desc_font.render("登录注册，保存游戏成就和排行榜", True, (180, 180, 180))
-        guest_desc = desc_font.render("直接开始游戏，不保存数据", True, (180, 180, 180))
+        login_desc = render_text(desc_font, "登录注册，保存游戏成就和排行榜", (180, 180, 180))
+        guest_desc = render_text(desc_font, "直接开始游戏，不保存数据", (180, 180, 180))
         
         # 颜色定义
         primary_color = (64, 128, 255)  # 蓝色
@@ -305,7 +346,7 @@ class Flappy:
             status_color = (64, 192, 64) if self.network.is_online else (255, 64, 64)
             status_text = "🌐 服务器在线" if self.network.is_online else "🌐 离线模式"
             status_font = get_font('SimHei', 14)
-            status_surface = status_font.render(status_text, True, status_color)
+            status_surface = render_text(status_font, status_text, status_color)
             status_rect = status_surface.get_rect(center=(window_center_x, window_center_y + 120))
             self.config.screen.blit(status_surface, status_rect)
             
@@ -321,6 +362,7 @@ class Flappy:
             # 处理事件
             for event in pygame.event.get():
                 if event.type == QUIT or (event.type == KEYDOWN and event.key == K_ESCAPE and not self.login_screen.input_active):
+                    self.network.close()
                     pygame.quit()
                     sys.exit()
                 elif event.type == pygame.USEREVENT + 1:
@@ -358,19 +400,19 @@ class Flappy:
         user_font = get_font('SimHei', 14)
         
         # 创建文本
-        title_text = title_font.render("🎮 FlapPy Bird", True, (255, 255, 255))
-        subtitle_text = desc_font.render("增强版游戏", True, (200, 200, 200))
+        title_text = render_text(title_font, "🎮 FlapPy Bird", (255, 255, 255))
+        subtitle_text = render_text(desc_font, "增强版游戏", (200, 200, 200))
         
-        start_text = button_font.render("🚀 开始游戏", True, (255, 255, 255))
-        start_desc = desc_font.render("选择游戏模式并开始冒险", True, (180, 180, 180))
+        start_text = render_text(button_font, "🚀 开始游戏", (255, 255, 255))
+        start_desc = render_text(desc_font, "选择游戏模式并开始冒险", (180, 180, 180))
         
         # 添加新功能按钮文本
-        shop_text = desc_font.render("🛒 商店", True, (255, 255, 255))
-        bag_text = desc_font.render("🎒 背包", True, (255, 255, 255))
-        ranking_text = desc_font.render("🏆 排行榜", True, (255, 255, 255))
-        settings_text = desc_font.render("⚙️ 设置", True, (255, 255, 255))
+        shop_text = render_text(desc_font, "🛒 商店", (255, 255, 255))
+        bag_text = render_text(desc_font, "🎒 背包", (255, 255, 255))
+        ranking_text = render_text(desc_font, "🏆 排行榜", (255, 255, 255))
+        settings_text = render_text(desc_font, "⚙️ 设置", (255, 255, 255))
         
-        instruction_text = desc_font.render("空格/回车 开始    鼠标点击", True, (160, 160, 160))
+        instruction_text = render_text(desc_font, "空格/回车 开始    鼠标点击", (160, 160, 160))
         
         # 颜色定义
         primary_color = (255, 165, 0)  # 橙色
@@ -447,9 +489,124 @@ class Flappy:
             y = 12 + 10 * pygame.math.Vector2(1, 0).rotate(angle).y
             pygame.draw.circle(settings_icon, (255, 255, 255), (int(x), int(y)), 2)
         
+        # 静止不变的主面板背景只创建一次
+        panel_width = 400
+        panel_height = 350
+        panel_x = window_center_x - panel_width // 2
+        panel_y = window_center_y - 170
+        
+        panel_surface = pygame.Surface((panel_width, panel_height), pygame.SRCALPHA)
+        panel_surface.fill((0, 0, 0, 200))
+        pygame.draw.rect(panel_surface, (255, 255, 255, 80), (0, 0, panel_width, panel_height), 3, border_radius=20)
+        
+        title_center = (window_center_x, 40 + title_text.get_height()//2)
+        scaled_title = title_text
+        status_y = window_center_y - 20
+        network_status_y = window_center_y + 160
+        
+        # 用户状态和网络状态所在的区域（内容变化时重画）
+        status_area = pygame.Rect(panel_x, status_y - 12, panel_width, 70)
+        network_area = pygame.Rect(panel_x, network_status_y - 12, panel_width, 24)
+        
+        def draw_menu():
+            # 绘制背景
+            self.background.draw()
+            self.floor.draw()
+            self.player.draw()
+            
+            # 绘制主面板背景
+            self.config.screen.blit(panel_surface, (panel_x, panel_y))
+            
+            # 绘制标题（带动画效果）
+            self.config.screen.blit(scaled_title, title_rect)
+            
+            # 绘制副标题
+            subtitle_rect = subtitle_text.get_rect(center=(window_center_x, window_center_y - 70))
+            self.config.screen.blit(subtitle_text, subtitle_rect)
+            
+            # 绘制开始游戏按钮
+            pygame.draw.rect(self.config.screen, button_color, scaled_button_rect, border_radius=15)
+            pygame.draw.rect(self.config.screen, (255, 255, 255), scaled_button_rect, 4, border_radius=15)
+            
+            # 添加发光效果
+            if glow_surface is not None:
+                self.config.screen.blit(glow_surface, (scaled_button_rect.x-10, scaled_button_rect.y-10))
+            
+            # 绘制按钮图标
+            icon_x = scaled_button_rect.x + 30
+            icon_y = scaled_button_rect.y + (scaled_button_rect.height - scaled_icon.get_height()) // 2
+            self.config.screen.blit(scaled_icon, (icon_x, icon_y))
+            
+            # 绘制按钮文本
+            text_x = icon_x + scaled_icon.get_width() + 20
+            text_y = scaled_button_rect.y + (scaled_button_rect.height - start_text.get_height()) // 2
+            self.config.screen.blit(start_text, (text_x, text_y))
+            
+            # 绘制按钮描述
+            desc_rect = start_desc.get_rect(center=(window_center_x, main_button_y + main_button_height + 25))
+            self.config.screen.blit(start_desc, desc_rect)
+            
+            # 绘制商店、背包、排行榜和设置按钮
+            func_buttons = [
+                (shop_rect, shop_icon, shop_text),
+                (bag_rect, bag_icon, bag_text),
+                (ranking_rect, ranking_icon, ranking_text),
+                (settings_rect, settings_icon, settings_text),
+            ]
+            for i, (rect, icon, text) in enumerate(func_buttons, start=1):
+                color = secondary_hover_color if button_hovers[i] else secondary_color
+                pygame.draw.rect(self.config.screen, color, rect, border_radius=8)
+                pygame.draw.rect(self.config.screen, (255, 255, 255), rect, 2, border_radius=8)
+                
+                # 绘制按钮内容
+                icon_x = rect.x + 10
+                icon_y = rect.y + (rect.height - 24) // 2
+                self.config.screen.blit(icon, (icon_x, icon_y))
+                
+                text_x = icon_x + 30
+                text_y = rect.y + (rect.height - text.get_height()) // 2
+                self.config.screen.blit(text, (text_x, text_y))
+            
+            # 绘制指令文本
+            instruction_rect = instruction_text.get_rect(center=(window_center_x, window_center_y + 140))
+            self.config.screen.blit(instruction_text, instruction_rect)
+            
+            # 用户状态显示（在面板内部）
+            if logged_in:
+                if user_info:
+                    user_status_text = render_text(user_font, f"👤 欢迎, {user_info['username']}", (255, 255, 255))
+                    user_status_rect = user_status_text.get_rect(center=(window_center_x, status_y))
+                    self.config.screen.blit(user_status_text, user_status_rect)
+                    
+                    # 显示最佳分数
+                    best_score_text = render_text(user_font, f"🏆 最佳分数: {user_info.get('best_score', 0)}分", (255, 215, 0))
+                    best_score_rect = best_score_text.get_rect(center=(window_center_x, status_y + 20))
+                    self.config.screen.blit(best_score_text, best_score_rect)
+                    
+                    # 添加登出按钮（小按钮）
+                    logout_button_text = render_text(user_font, "[ESC] 切换账户", (200, 200, 200))
+                    logout_button_rect = logout_button_text.get_rect(center=(window_center_x, status_y + 45))
+                    self.config.screen.blit(logout_button_text, logout_button_rect)
+            else:
+                guest_text = render_text(user_font, "👤 游客模式", (192, 192, 192))
+                guest_rect = guest_text.get_rect(center=(window_center_x, status_y))
+                self.config.screen.blit(guest_text, guest_rect)
+            
+            # 网络状态指示（小一点，放在右下角）
+            if self.network.is_online:
+                network_text = render_text(user_font, "🌐 在线", (64, 192, 64))
+            else:
+                network_text = render_text(user_font, "🌐 离线", (255, 64, 64))
+            
+            network_rect = network_text.get_rect(center=(window_center_x, network_status_y))
+            self.config.screen.blit(network_text, network_rect)
+        
+        dirty_rects.invalidate()  # 进入界面时整屏绘制一次
+        
         while True:
             for event in pygame.event.get():
                 self.check_quit_event(event)
+                dirty_rects.handle_event(event)
                 
                 # 鼠标事件处理
                 if event.type == pygame.MOUSEMOTION:
@@ -467,15 +624,19 @@ class Flappy:
                     elif shop_rect.collidepoint(mouse_x, mouse_y):
                         # 进入商店
                         await self.show_coming_soon("商店功能")
+                        dirty_rects.invalidate()
                     elif bag_rect.collidepoint(mouse_x, mouse_y):
                         # 进入背包
                         await self.show_coming_soon("背包功能")
+                        dirty_rects.invalidate()
                     elif ranking_rect.collidepoint(mouse_x, mouse_y):
                         # 进入排行榜
                         await self.show_ranking()
+                        dirty_rects.invalidate()
                     elif settings_rect.collidepoint(mouse_x, mouse_y):
                         # 进入设置
                         await self.show_coming_soon("设置功能")
+                        dirty_rects.invalidate()
                 
                 # 键盘事件处理
                 elif event.type == pygame.KEYDOWN:
@@ -502,39 +663,18 @@ class Flappy:
                 else:
                     button_scales[i] = max(button_scales[i] - 0.02, 1.0)
             
-            # 绘制背景
-            self.background.tick()
-            self.floor.tick()
-            self.player.tick()
+            # 推进地面和玩家
+            self.floor.step()
+            self.player.step()
             
-            # 绘制主面板背景
-            panel_width = 400
-            panel_height = 350
-            panel_x = window_center_x - panel_width // 2
-            panel_y = window_center_y - 170
-            
-            panel_surface = pygame.Surface((panel_width, panel_height), pygame.SRCALPHA)
-            panel_surface.fill((0, 0, 0, 200))
-            pygame.draw.rect(panel_surface, (255, 255, 255, 80), (0, 0, panel_width, panel_height), 3, border_radius=20)
-            self.config.screen.blit(panel_surface, (panel_x, panel_y))
-            
-            # 绘制标题（带动画效果）
-            scaled_title = pygame.transform.scale(
-                title_text, 
-                (int(title_text.get_width() * title_scale), 
-                 int(title_text.get_height() * title_scale))
-            )
-            title_rect = scaled_title.get_rect(center=(window_center_x, 40 + title_text.get_height()//2))
-            self.config.screen.blit(scaled_title, title_rect)
-            
-            # 绘制副标题
-            subtitle_rect = subtitle_text.get_rect(center=(window_center_x, window_center_y - 70))
-            self.config.screen.blit(subtitle_text, subtitle_rect)
+            # 标题只在缩放后的像素尺寸变化时重新缩放
+            title_size = (int(title_text.get_width() * title_scale), int(title_text.get_height() * title_scale))
+            if scaled_title.get_size() != title_size:
+                scaled_title = pygame.transform.scale(title_text, title_size)
+            title_rect = scaled_title.get_rect(center=title_center)
             
-            # 绘制开始游戏按钮
+            # 计算开始按钮的缩放和颜色
             button_color = hover_color if button_hovers[0] else primary_color
-            
-            # 计算按钮缩放
             scaled_width = int(main_button_width * button_scales[0])
             scaled_height = int(main_button_height * button_scales[0])
             scaled_button_rect = pygame.Rect(
@@ -544,128 +684,30 @@ class Flappy:
                 scaled_height
             )
             
-            pygame.draw.rect(self.config.screen, button_color, scaled_button_rect, border_radius=15)
-            pygame.draw.rect(self.config.screen, (255, 255, 255), scaled_button_rect, 4, border_radius=15)
-            
-            # 添加发光效果
+            glow_surface = None
             if button_hovers[0]:
                 glow_surface = pygame.Surface((scaled_width+20, scaled_height+20), pygame.SRCALPHA)
                 pygame.draw.rect(glow_surface, (button_color[0], button_color[1], button_color[2], 50), 
                                pygame.Rect(10, 10, scaled_width, scaled_height), border_radius=15)
-                self.config.screen.blit(glow_surface, (scaled_button_rect.x-10, scaled_button_rect.y-10))
             
-            # 绘制按钮图标
             icon_size = int(40 * button_scales[0])
             scaled_icon = pygame.transform.scale(start_icon, (icon_size, icon_size))
-            icon_x = scaled_button_rect.x + 30
-            icon_y = scaled_button_rect.y + (scaled_height - icon_size) // 2
-            self.config.screen.blit(scaled_icon, (icon_x, icon_y))
             
-            # 绘制按钮文本
-            text_x = icon_x + icon_size + 20
-            text_y = scaled_button_rect.y + (scaled_height - start_text.get_height()) // 2
-            self.config.screen.blit(start_text, (text_x, text_y))
+            logged_in = self.network.is_logged_in()
+            user_info = self.network.get_user_info() if logged_in else None
+            user_state = (logged_in, user_info and (user_info['username'], user_info.get('best_score', 0)))
+            
+            # 登记会变化的元素，只重画变化的区域
+            dirty_rects.track('floor', self.floor.rect, self.floor.x)
+            dirty_rects.track('player', entity_rect(self.player), (self.player.y, self.player.image))
+            dirty_rects.track('title', title_rect, title_size)
+            dirty_rects.track('start', scaled_button_rect.inflate(20, 20), (button_hovers[0], button_scales[0]))
+            for i, rect in enumerate((shop_rect, bag_rect, ranking_rect, settings_rect), start=1):
+                dirty_rects.track(('button', i), rect, button_hovers[i])
+            dirty_rects.track('status', status_area, user_state)
+            dirty_rects.track('network', network_area, self.network.is_online)
+            dirty_rects.present(self.config.screen, draw_menu)
             
-            # 绘制按钮描述
-            desc_rect = start_desc.get_rect(center=(window_center_x, main_button_y + main_button_height + 25))
-            self.config.screen.blit(start_desc, desc_rect)
-            
-            # 绘制商店按钮
-            shop_color = secondary_hover_color if button_hovers[1] else secondary_color
-            pygame.draw.rect(self.config.screen, shop_color, shop_rect, border_radius=8)
-            pygame.draw.rect(self.config.screen, (255, 255, 255), shop_rect, 2, border_radius=8)
-            
-            # 绘制商店按钮内容
-            icon_x = shop_rect.x + 10
-            icon_y = shop_rect.y + (shop_rect.height - 24) // 2
-            self.config.screen.blit(shop_icon, (icon_x, icon_y))
-            
-            text_x = icon_x + 30
-            text_y = shop_rect.y + (shop_rect.height - shop_text.get_height()) // 2
-            self.config.screen.blit(shop_text, (text_x, text_y))
-            
-            # 绘制背包按钮
-            bag_color = secondary_hover_color if button_hovers[2] else secondary_color
-            pygame.draw.rect(self.config.screen, bag_color, bag_rect, border_radius=8)
-            pygame.draw.rect(self.config.screen, (255, 255, 255), bag_rect, 2, border_radius=8)
-            
-            # 绘制背包按钮内容
-            icon_x = bag_rect.x + 10
-            icon_y = bag_rect.y + (bag_rect.height - 24) // 2
-            self.config.screen.blit(bag_icon, (icon_x, icon_y))
-            
-            text_x = icon_x + 30
-            text_y = bag_rect.y + (bag_rect.height - bag_text.get_height()) // 2
-            self.config.screen.blit(bag_text, (text_x, text_y))
-            
-            # 绘制排行榜按钮
-            ranking_color = secondary_hover_color if button_hovers[3] else secondary_color
-            pygame.draw.rect(self.config.screen, ranking_color, ranking_rect, border_radius=8)
-            pygame.draw.rect(self.config.screen, (255, 255, 255), ranking_rect, 2, border_radius=8)
-            
-            # 绘制排行榜按钮内容
-            icon_x = ranking_rect.x + 10
-            icon_y = ranking_rect.y + (ranking_rect.height - 24) // 2
-            self.config.screen.blit(ranking_icon, (icon_x, icon_y))
-            
-            text_x = icon_x + 30
-            text_y = ranking_rect.y + (ranking_rect.height - ranking_text.get_height()) // 2
-            self.config.screen.blit(ranking_text, (text_x, text_y))
-            
-            # 绘制设置按钮
-            settings_color = secondary_hover_color if button_hovers[4] else secondary_color
-            pygame.draw.rect(self.config.screen, settings_color, settings_rect, border_radius=8)
-            pygame.draw.rect(self.config.screen, (255, 255, 255), settings_rect, 2, border_radius=8)
-            
-            # 绘制设置按钮内容
-            icon_x = settings_rect.x + 10
-            icon_y = settings_rect.y + (settings_rect.height - 24) // 2
-            self.config.screen.blit(settings_icon, (icon_x, icon_y))
-            
-            text_x = icon_x + 30
-            text_y = settings_rect.y + (settings_rect.height - settings_text.get_height()) // 2
-            self.config.screen.blit(settings_text, (text_x, text_y))
-            
-            # 绘制指令文本
-            instruction_rect = instruction_text.get_rect(center=(window_center_x, window_center_y + 140))
-            self.config.screen.blit(instruction_text, instruction_rect)
-            
-            # 绘制用户状态信息（在面板内部）
-            status_y = window_center_y - 20
-            
-            # 用户状态显示
-            if self.network.is_logged_in():
-                user_info = self.network.get_user_info()
-                if user_info:
-                    user_status_text = user_font.render(f"👤 欢迎, {user_info['username']}", True, (255, 255, 255))
-                    user_status_rect = user_status_text.get_rect(center=(window_center_x, status_y))
-                    self.config.screen.blit(user_status_text, user_status_rect)
-                    
-                    # 显示最佳分数
-                    best_score_text = user_font.render(f"🏆 最佳分数: {user_info.get('best_score', 0)}分", True, (255, 215, 0))
-                    best_score_rect = best_score_text.get_rect(center=(window_center_x, status_y + 20))
-                    self.config.screen.blit(best_score_text, best_score_rect)
-                    
-                    # 添加登出按钮（小按钮）
-                    logout_button_text = user_font.render("[ESC] 切换账户", True, (200, 200, 200))
-                    logout_button_rect = logout_button_text.get_rect(center=(window_center_x, status_y + 45))
-                    self.config.screen.blit(logout_button_text, logout_button_rect)
-            else:
-                guest_text = user_font.render("👤 游客模式", True, (192, 192, 192))
-                guest_rect = guest_text.get_rect(center=(window_center_x, status_y))
-                self.config.screen.blit(guest_text, guest_rect)
-            
-            # 网络状态指示（小一点，放在右下角）
-            network_status_y = window_center_y + 160
-            if self.network.is_online:
-                network_text = user_font.render("🌐 在线", True, (64, 192, 64))
-            else:
-                network_text = user_font.render("🌐 离线", True, (255, 64, 64))
-            
-            network_rect = network_text.get_rect(center=(window_center_x, network_status_y))
-            self.config.screen.blit(network_text, network_rect)
-            
-            pygame.display.update()
             await asyncio.sleep(0)
             self.config.tick()
 
@@ -683,23 +725,23 @@ class Flappy:
         user_font = get_font('SimHei', 16)   # 用户信息字体
         
         # 创建文本
-        title_text = title_font.render("🎮 选择游戏模式", True, (255, 255, 255))  # 修改标题
-        classic_text = mode_font.render("经典模式", True, (255, 255, 255))
-        timed_text = mode_font.render("限时挑战", True, (255, 255, 255))
-        reverse_text = mode_font.render("重力反转", True, (255, 255, 255))
-        boss_text = mode_font.render("Boss战斗", True, (255, 255, 255))
-        coin_text = mode_font.render("金币收集", True, (255, 255, 255))
-        user_text = mode_font.render("用户登录", True, (255, 255, 255))
+        title_text = render_text(title_font, "🎮 选择游戏模式", (255, 255, 255))  # 修改标题
+        classic_text = render_text(mode_font, "经典模式", (255, 255, 255))
+        timed_text = render_text(mode_font, "限时挑战", (255, 255, 255))
+        reverse_text = render_text(mode_font, "重力反转", (255, 255, 255))
+        boss_text = render_text(mode_font, "Boss战斗", (255, 255, 255))
+        coin_text = render_text(mode_font, "金币收集", (255, 255, 255))
+        user_text = render_text(mode_font, "用户登录", (255, 255, 255))
         
         # 添加模式描述文本
-        classic_desc = desc_font.render("无尽挑战的经典玩法", True, (220, 220, 220))
-        timed_desc = desc_font.render("60秒内获得最高分", True, (220, 220, 220))
-        reverse_desc = desc_font.render("颠倒重力，挑战不同体验", True, (220, 220, 220))
-        boss_desc = desc_font.render("击败强大的Boss敌人", True, (220, 220, 220))
-        coin_desc = desc_font.render("收集金币获取更高分数", True, (220, 220, 220))
-        user_desc = desc_font.render("登录注册，保存游戏成就", True, (220, 220, 220))
+        classic_desc = render_text(desc_font, "无尽挑战的经典玩法", (220, 220, 220))
+        timed_desc = render_text(desc_font, "60秒内获得最高分", (220, 220, 220))
+        reverse_desc = render_text(desc_font, "颠倒重力，挑战不同体验", (220, 220, 220))
+        boss_desc = render_text(desc_font, "击败强大的Boss敌人", (220, 220, 220))
+        coin_desc = render_text(desc_font, "收集金币获取更高分数", (220, 220, 220))
+        user_desc = render_text(desc_font, "登录注册，保存游戏成就", (220, 220, 220))
         
-        instruction_text = instruction_font.render("↑↓ 选择    空格 开始    鼠标点击", True, (255, 255, 255))
+        instruction_text = render_text(instruction_font, "↑↓ 选择    空格 开始    鼠标点击", (255, 255, 255))
         
         # 菜单颜色方案
         primary_color = (255, 204, 0)  # 主要颜色（金黄色）
@@ -790,11 +832,8 @@ class Flappy:
         pygame.draw.circle(coin_icon, (255, 215, 0), (12, 12), 10)  # 金色圆形
         pygame.draw.circle(coin_icon, (255, 235, 100), (12, 12), 7)  # 浅金色内圈
         # 添加 "$" 符号
-        try:
-            coin_font = pygame.font.SysFont("Arial", 12, bold=True)
-        except:
-            coin_font = pygame.font.Font(None, 12)
-        coin_text = coin_font.render("$", True, (100, 80, 0))
+        coin_font = get_font("Arial", 12, bold=True)
+        coin_text = render_text(coin_font, "$", (100, 80, 0))
         coin_text_rect = coin_text.get_rect(center=(12, 12))
         coin_icon.blit(coin_text, coin_text_rect)
         icons.append(coin_icon)
@@ -826,9 +865,76 @@ class Flappy:
         instruction_pos = (window_center_x - instruction_text.get_width()//2, 
                           menu_panel_pos[1] + menu_panel_height + 20)
 
+        # 用户状态和网络状态所在的区域（内容变化时重画）
+        status_area = pygame.Rect(window_center_x - 100, 58, 200, 60)
+        
+        def draw_selection():
+            # 绘制背景、地面和玩家
+            self.background.draw()
+            self.floor.draw()
+            self.player.draw()
+            self.welcome_message.draw()
+            
+            # 绘制半透明菜单背景
+            self.config.screen.blit(menu_panel, menu_panel_pos)
+            
+            # 绘制游戏标题
+            self.config.screen.blit(scaled_title, title_rect)
+            
+            # 绘制每个按钮
+            for i in range(5):  # 5个游戏模式按钮
+                animation = button_animations[i]
+                draw_rect = draw_rects[i]
+                
+                # 绘制按钮背景和边框
+                if i == selected_index:
+                    # 选中的按钮 - 亮色渐变背景
+                    bg_color = (
+                        int(dark_color[0] + (primary_color[0] - dark_color[0]) * animation),
+                        int(dark_color[1] + (primary_color[1] - dark_color[1]) * animation),
+                        int(dark_color[2] + (primary_color[2] - dark_color[2]) * animation),
+                        200
+                    )
+                    # 绘制背景
+                    pygame.draw.rect(self.config.screen, bg_color, draw_rect, border_radius=10)
+                    # 添加高亮边框
+                    pygame.draw.rect(self.config.screen, primary_color, draw_rect, 3, border_radius=10)
+                    # 添加发光效果
+                    self.config.screen.blit(glow_surface, (draw_rect.x-5, draw_rect.y-5))
+                else:
+                    # 未选中的按钮 - 暗色背景
+                    pygame.draw.rect(self.config.screen, dark_color, draw_rect, border_radius=10)
+                    pygame.draw.rect(self.config.screen, (100, 100, 100, 180), draw_rect, 2, border_radius=10)
+                
+                # 绘制按钮图标
+                scaled_icon = scaled_icons[i]
+                icon_x = draw_rect.x + 20
+                icon_y = draw_rect.y + (draw_rect.height - scaled_icon.get_height()) // 2
+                self.config.screen.blit(scaled_icon, (icon_x, icon_y))
+                
+                # 绘制按钮文本
+                text_x = draw_rect.x + scaled_icon.get_width() + 30
+                text_y = draw_rect.y + (draw_rect.height - button_texts[i].get_height()) // 2
+                self.config.screen.blit(button_texts[i], (text_x, text_y))
+                
+                # 绘制按钮描述（只为选中的按钮显示）
+                if i == selected_index:
+                    desc_rect = desc_texts[i].get_rect(center=desc_positions[i])
+                    self.config.screen.blit(desc_texts[i], desc_rect)
+            
+            # 绘制指令文本
+            self.config.screen.blit(instruction_text, instruction_pos)
+            
+            # 绘制用户状态和网络状态
+            self.render_user_status(user_font, window_center_x)
+        
+        scaled_title = title_text
+        dirty_rects.invalidate()  # 进入界面时整屏绘制一次
+
         while True:
             for event in pygame.event.get():
                 self.check_quit_event(event)  # 检查退出事件
+                dirty_rects.handle_event(event)
                 
                 # 处理鼠标点击事件
                 if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:  # 左键点击
@@ -913,85 +1019,53 @@ class Flappy:
                         button_animations[i] = 0
                     button_scale[i] = 1.0
             
-            # 绘制背景、地面和玩家
-            self.background.tick()
-            self.floor.tick()
-            self.player.tick()
-            self.welcome_message.tick()
+            # 推进地面和玩家
+            self.floor.step()
+            self.player.step()
             
-            # 绘制半透明菜单背景
-            self.config.screen.blit(menu_panel, menu_panel_pos)
-            
-            # 绘制游戏标题
-            scaled_title = pygame.transform.scale(
-                title_text, 
-                (int(title_text.get_width() * title_scale), 
-                 int(title_text.get_height() * title_scale))
-            )
+            # 标题只在缩放后的像素尺寸变化时重新缩放
+            title_size = (int(title_text.get_width() * title_scale), int(title_text.get_height() * title_scale))
+            if scaled_title.get_size() != title_size:
+                scaled_title = pygame.transform.scale(title_text, title_size)
             title_rect = scaled_title.get_rect(center=(window_center_x, 40 + title_text.get_height()//2))
-            self.config.screen.blit(scaled_title, title_rect)
             
-            # 绘制每个按钮
-            for i in range(5):  # 5个游戏模式按钮
-                # 计算动画效果
-                animation = button_animations[i]
-                current_scale = button_scale[i]
-                
-                # 计算绘制矩形（添加缩放效果）
-                scaled_width = int(button_width * current_scale)
-                scaled_height = int(button_height * current_scale)
-                button_x = window_center_x - scaled_width//2
-                button_y = button_positions[i] - (scaled_height - button_height)//2
-                
-                draw_rect = pygame.Rect(button_x, button_y, scaled_width, scaled_height)
-                
-                # 绘制按钮背景和边框
-                if i == selected_index:
-                    # 选中的按钮 - 亮色渐变背景
-                    bg_color = (
-                        int(dark_color[0] + (primary_color[0] - dark_color[0]) * animation),
-                        int(dark_color[1] + (primary_color[1] - dark_color[1]) * animation),
-                        int(dark_color[2] + (primary_color[2] - dark_color[2]) * animation),
-                        200
-                    )
-                    # 绘制背景
-                    pygame.draw.rect(self.config.screen, bg_color, draw_rect, border_radius=10)
-                    # 添加高亮边框
-                    pygame.draw.rect(self.config.screen, primary_color, draw_rect, 3, border_radius=10)
-                    # 添加发光效果
-                    glow_surface = pygame.Surface((scaled_width+10, scaled_height+10), pygame.SRCALPHA)
-                    pygame.draw.rect(glow_surface, (primary_color[0], primary_color[1], primary_color[2], 50), 
-                                   pygame.Rect(5, 5, scaled_width, scaled_height), border_radius=10)
-                    self.config.screen.blit(glow_surface, (button_x-5, button_y-5))
-                else:
-                    # 未选中的按钮 - 暗色背景
-                    pygame.draw.rect(self.config.screen, dark_color, draw_rect, border_radius=10)
-                    pygame.draw.rect(self.config.screen, (100, 100, 100, 180), draw_rect, 2, border_radius=10)
-                
-                # 绘制按钮图标
-                icon_size = int(24 * current_scale)
-                scaled_icon = pygame.transform.scale(icons[i], (icon_size, icon_size))
-                icon_x = button_x + 20
-                icon_y = button_y + (scaled_height - icon_size) // 2
-                self.config.screen.blit(scaled_icon, (icon_x, icon_y))
-                
-                # 绘制按钮文本
-                text_x = button_x + icon_size + 30
-                text_y = button_y + (scaled_height - button_texts[i].get_height()) // 2
-                self.config.screen.blit(button_texts[i], (text_x, text_y))
-                
-                # 绘制按钮描述（只为选中的按钮显示）
-                if i == selected_index:
-                    desc_rect = desc_texts[i].get_rect(center=desc_positions[i])
-                    self.config.screen.blit(desc_texts[i], desc_rect)
-            
-            # 绘制指令文本
-            self.config.screen.blit(instruction_text, instruction_pos)
-            
-            # 绘制用户状态和网络状态
-            self.render_user_status(user_font, window_center_x)
+            # 计算每个按钮本帧的绘制矩形（添加缩放效果）和图标
+            draw_rects = []
+            scaled_icons = []
+            for i in range(5):
+                scaled_width = int(button_width * button_scale[i])
+                scaled_height = int(button_height * button_scale[i])
+                draw_rects.append(pygame.Rect(
+                    window_center_x - scaled_width//2,
+                    button_positions[i] - (scaled_height - button_height)//2,
+                    scaled_width,
+                    scaled_height
+                ))
+                icon_size = int(24 * button_scale[i])
+                scaled_icons.append(icons[i] if icon_size == 24 else pygame.transform.scale(icons[i], (icon_size, icon_size)))
+            
+            selected_rect = draw_rects[selected_index]
+            glow_surface = pygame.Surface((selected_rect.width+10, selected_rect.height+10), pygame.SRCALPHA)
+            pygame.draw.rect(glow_surface, (primary_color[0], primary_color[1], primary_color[2], 50), 
+                           pygame.Rect(5, 5, selected_rect.width, selected_rect.height), border_radius=10)
+            
+            logged_in = self.network.is_logged_in()
+            user_info = self.network.get_user_info() if logged_in else None
+            user_state = (self.network.is_online, logged_in,
+                          user_info and (user_info['username'], user_info.get('best_score', 0)))
+            
+            # 登记会变化的元素，只重画变化的区域
+            dirty_rects.track('floor', self.floor.rect, self.floor.x)
+            dirty_rects.track('player', entity_rect(self.player), (self.player.y, self.player.image))
+            dirty_rects.track('title', title_rect, title_size)
+            for i in range(5):
+                dirty_rects.track(('button', i), draw_rects[i].inflate(10, 10),
+                                  (i == selected_index, button_animations[i], draw_rects[i].size))
+                desc_rect = desc_texts[i].get_rect(center=desc_positions[i])
+                dirty_rects.track(('desc', i), desc_rect, i == selected_index)
+            dirty_rects.track('status', status_area, user_state)
+            dirty_rects.present(self.config.screen, draw_selection)
             
-            pygame.display.update()  # 刷新显示
             await asyncio.sleep(0)  # 等待下一帧
             self.config.tick()  # 更新游戏配置
 
@@ -1002,6 +1076,7 @@ class Flappy:
         if event.type == QUIT or (
             event.type == KEYDOWN and event.key == K_ESCAPE
         ):
+            self.network.close()  # 关闭网络线程
             pygame.quit()  # 退出pygame
             sys.exit()  # 退出程序
 
@@ -1016,6 +1091,63 @@ class Flappy:
         screen_tap = event.type == pygame.FINGERDOWN  # 检查触摸事件
         return m_left or space_or_up or screen_tap  # 返回是否有点击事件
 
+    def event_actions(self, event):
+        """
+        把pygame事件转换为输入动作列表
+        """
+        actions = []
+        if self.is_tap_event(event):
+            actions.append(InputAction.FLAP)
+        
+        if event.type == KEYDOWN:
+            # 武器切换 - Q/E键，数字键1-4直接选择武器
+            boss_keys = {
+                K_q: InputAction.WEAPON_PREV,
+                K_e: InputAction.WEAPON_NEXT,
+                K_1: InputAction.WEAPON_1,
+                K_2: InputAction.WEAPON_2,
+                K_3: InputAction.WEAPON_3,
+                K_4: InputAction.WEAPON_4,
+            }
+            # 测试模式 - 数字键5-8直接生成特定道具
+            test_keys = {
+                K_5: InputAction.SPAWN_SPEED_BOOST,
+                K_6: InputAction.SPAWN_INVINCIBLE,
+                K_7: InputAction.SPAWN_SLOW_MOTION,
+                K_8: InputAction.SPAWN_SMALL_SIZE,
+            }
+            if self.game_mode == GameMode.BOSS and event.key in boss_keys:
+                actions.append(boss_keys[event.key])
+            if self.test_mode and event.key in test_keys:
+                actions.append(test_keys[event.key])
+        return actions
+
+    def apply_action(self, action):
+        """
+        把一个输入动作作用到游戏状态上（在下一个模拟步之前调用）
+        """
+        if action == InputAction.FLAP:
+            self.player.flap()  # 玩家点击，执行拍打动作
+            # Boss模式下，空格键也用于射击
+            if self.game_mode == GameMode.BOSS:
+                self.player.shoot()
+        elif action == InputAction.WEAPON_PREV:
+            self.player.switch_weapon(-1)  # 上一个武器
+        elif action == InputAction.WEAPON_NEXT:
+            self.player.switch_weapon(1)   # 下一个武器
+        elif InputAction.WEAPON_1 <= action <= InputAction.WEAPON_4:
+            index = action - InputAction.WEAPON_1
+            if len(self.player.weapons) > index:
+                self.player.current_weapon_index = index
+        elif action == InputAction.SPAWN_SPEED_BOOST:
+            self.spawn_test_powerup(PowerUpType.SPEED_BOOST)
+        elif action == InputAction.SPAWN_INVINCIBLE:
+            self.spawn_test_powerup(PowerUpType.INVINCIBLE)
+        elif action == InputAction.SPAWN_SLOW_MOTION:
+            self.spawn_test_powerup(PowerUpType.SLOW_MOTION)
+        elif action == InputAction.SPAWN_SMALL_SIZE:
+            self.spawn_test_powerup(PowerUpType.SMALL_SIZE)
+
     def calculate_delta_time(self):
         """
         计算两帧之间的时间差
@@ -1044,9 +1176,7 @@ class Flappy:
                 powerups_to_remove.append(powerup)
         
         # 从管理器中删除已收集的道具
-        for powerup in powerups_to_remove:
-            if powerup in self.powerup_manager.powerups:
-                self.powerup_manager.powerups.remove(powerup)
+        self.powerup_manager.remove(powerups_to_remove)
 
     def update_player_effects(self):
         """更新玩家的状态效果"""
@@ -1160,7 +1290,7 @@ class Flappy:
                 self.config.screen.blit(icon_surface, (panel_pos[0] + 5, y_pos + 4))
                 
                 # 创建文本
-                text_surface = effect_font.render(text, True, color)
+                text_surface = render_text(effect_font, text, color)
                 text_rect = text_surface.get_rect(midleft=(panel_pos[0] + 20, y_pos + 10))
                 
                 # 绘制文本
@@ -1201,14 +1331,35 @@ class Flappy:
                 # 播放得分声音
                 self.config.sounds.point.play()
 
-    async def play(self):
+    def setup_play(self, seed=None):
         """
-        主要游戏循环
+        开始一局游戏前重置所有游戏状态。
+        同一种子、同一游戏模式和同一输入序列总会得到完全相同的一局。
+        :param seed: 随机种子，为None时随机生成
+        :return: 本局使用的种子
         """
-        # 记录游戏开始时间
-        self.game_start_time = time.time()
+        seed = self.config.reseed(seed)
+        self.step_count = 0
+        
+        # 上一局剩下的子弹放回对象池
+        if getattr(self, 'player', None) is not None:
+            self.player.release_bullets()
+        if self.boss is not None:
+            self.boss.release_bullets()
+        
+        # 重新创建本局实体，不受菜单界面停留时间影响
+        self.background = Background(self.config)
+        self.floor = Floor(self.config)
+        self.player = Player(self.config)
+        self.pipes = Pipes(self.config)
+        self.score = Score(self.config)
+        self.boss = None
+        self.boss_level = 0
+        self.boss_cycle = 0
+        self.coin_manager.clear()
+        self.powerup_manager.elapsed = 0
+        self.powerup_manager.spawn_timer = 0
         
-        # 当玩家开始游戏时
         # 根据游戏模式设置玩家模式
         if self.game_mode == GameMode.REVERSE:
             self.player.set_mode(PlayerMode.REVERSE)  # 设置玩家模式为REVERSE（反向模式）
@@ -1239,243 +1390,360 @@ class Flappy:
         else:
             self.player.set_mode(PlayerMode.NORMAL)  # 设置玩家模式为NORMAL（正常模式）
             
-        self.powerup_manager.powerups = []  # 清空道具列表
-        self.powerup_manager.active_effects = {}  # 清空活跃效果
+        self.powerup_manager.clear()  # 清空道具列表和活跃效果
         
         # 重置计时器（如果是限时模式）
         if self.game_mode == GameMode.TIMED:
             self.time_remaining = self.time_limit
-            
+        
+        return seed
+
+    async def play(self):
+        """
+        主要游戏循环
+        """
+        # 记录游戏开始时间
+        self.game_start_time = time.time()
+        
+        # 重新设定随机种子并重置本局的所有游戏状态，同时开始记录回放
+        seed = self.setup_play()
+        self.replay = Replay(self.game_mode.name, seed)
+        
         # 创建字体用于显示剩余时间 - 使用中文字体
         time_font = get_font('SimHei', 24)
-        game_over = False
         
         # 添加测试模式提示信息
-        test_mode_active = True
-        try:
-            test_mode_font = get_font('SimHei', 10)  # 更小字体
-        except:
-            test_mode_font = pygame.font.SysFont('Arial', 10)
+        test_mode_active = self.test_mode
+        test_mode_font = get_font('SimHei', 10)  # 更小字体
         
         # 将测试模式提示分成多行，避免文字拥挤
         test_mode_bg = pygame.Surface((140, 20), pygame.SRCALPHA)  # 更小尺寸
         test_mode_bg.fill((0, 0, 0, 150))  # 半透明黑色背景
         
         # 简化提示文本，减少长度
-        test_mode_text = test_mode_font.render("5加速 6无敌 7慢速 8缩小", True, (255, 255, 255))
+        test_mode_text = render_text(test_mode_font, "5加速 6无敌 7慢速 8缩小", (255, 255, 255))
+        
+        step_ms = self.config.step_ms
+        accumulator = 0.0
+        self.last_frame_time = pygame.time.get_ticks()
         
         while True:
-            # 计算帧间隔时间
+            frame_profiler.begin_frame()
+            
+            # 计算帧间隔时间，卡顿时最多追赶max_frame_ms
             current_time = pygame.time.get_ticks()
             delta_time = current_time - self.last_frame_time
             self.last_frame_time = current_time
+            accumulator += min(delta_time, self.config.max_frame_ms)
 
-            for event in pygame.event.get():
-                self.check_quit_event(event)  # 检查退出事件
-                if self.is_tap_event(event):
-                    self.player.flap()  # 玩家点击，执行拍打动作
-                    # Boss模式下，空格键也用于射击
-                    if self.game_mode == GameMode.BOSS:
-                        self.player.shoot()
-                
-                # 添加键盘事件处理
-                if event.type == KEYDOWN:
-                    # 武器切换 - Q/E键
-                    if event.key == K_q and self.game_mode == GameMode.BOSS:
-                        self.player.switch_weapon(-1)  # 上一个武器
-                    elif event.key == K_e and self.game_mode == GameMode.BOSS:
-                        self.player.switch_weapon(1)   # 下一个武器
-                    
-                    # 数字键1-4直接选择武器
-                    if self.game_mode == GameMode.BOSS:
-                        if event.key == K_1 and len(self.player.weapons) > 0:
-                            self.player.current_weapon_index = 0
-                        elif event.key == K_2 and len(self.player.weapons) > 1:
-                            self.player.current_weapon_index = 1
-                        elif event.key == K_3 and len(self.player.weapons) > 2:
-                            self.player.current_weapon_index = 2
-                        elif event.key == K_4 and len(self.player.weapons) > 3:
-                            self.player.current_weapon_index = 3
-                    
-                    # 测试模式 - 直接生成特定道具
-                    if test_mode_active:
-                        if event.key == K_5:  # 5键生成速度道具
-                            self.spawn_test_powerup(PowerUpType.SPEED_BOOST)
-                        elif event.key == K_6:  # 6键生成无敌道具
-                            self.spawn_test_powerup(PowerUpType.INVINCIBLE)
-                        elif event.key == K_7:  # 7键生成慢动作道具
-                            self.spawn_test_powerup(PowerUpType.SLOW_MOTION)
-                        elif event.key == K_8:  # 8键生成缩小道具
-                            self.spawn_test_powerup(PowerUpType.SMALL_SIZE)
+            with frame_profiler.section("events"):
+                for event in pygame.event.get():
+                    self.check_quit_event(event)  # 检查退出事件
+                    self.profiler_keys(event)
+                    for action in self.event_actions(event):
+                        self.replay.record(self.step_count, action)
+                        self.apply_action(action)
 
-            # 限时模式时间更新
-            if self.game_mode == GameMode.TIMED:
-                self.time_remaining -= delta_time
-                if self.time_remaining <= 0:
-                    self.time_remaining = 0
-                    game_over = True
-            
-            # 更新道具管理器
-            self.powerup_manager.tick(delta_time)
-            
-            # 检查道具碰撞
-            self.check_powerup_collisions()
+            # 按固定步长推进游戏逻辑，渲染帧率不影响游戏速度
+            while accumulator >= step_ms:
+                accumulator -= step_ms
+                result = self.simulate_step(step_ms)
+                if result == "boss_defeated":
+                    # 无限循环Boss，转场动画结束后继续游戏
+                    self.config.interpolation = 1.0
+                    await self.next_boss()
+                    accumulator = 0
+                    self.last_frame_time = pygame.time.get_ticks()
+                    break
+                if result == "game_over":
+                    self.config.interpolation = 1.0
+                    self.replay.finish(self.step_count, self.score.score)
+                    frame_profiler.dump()  # 设置了 PROFILE 导出文件时写出本局的帧记录
+                    return
             
-            # 更新玩家状态效果
-            self.update_player_effects()
+            # 按未消耗的时间在两个模拟步之间插值绘制
+            self.config.interpolation = accumulator / step_ms
             
-            # 检查管道通过情况并更新分数（除了Boss模式和金币模式）
-            if self.game_mode not in [GameMode.BOSS, GameMode.COIN]:
-                self.check_pipe_pass()
-
-            self.background.tick()  # 更新背景
-            self.floor.tick()  # 更新地面
+            self.background.draw()  # 绘制背景
+            self.floor.draw()  # 绘制地面
             
-            # 金币模式特有的逻辑
             if self.game_mode == GameMode.COIN:
-                # 更新金币管理器
-                self.coin_manager.tick(delta_time)
-                
-                # 检查金币碰撞并增加分数
-                collected_score = self.coin_manager.check_player_collision(self.player)
-                if collected_score > 0:
-                    # 增加分数
-                    for _ in range(collected_score):
-                        self.score.add()
-                    
-                    # 增加收集的金币数量
-                    self.collected_coins += collected_score
-                
-                # 仍然保留管道，但是间隔更大，速度更快，使游戏更具挑战性
-                self.pipes.tick()
+                with frame_profiler.section("coins"):
+                    self.coin_manager.draw()
+                with frame_profiler.section("pipes"):
+                    self.pipes.draw()
                 
                 # 显示金币计数器
-                self.render_coin_counter()
+                with frame_profiler.section("hud"):
+                    self.render_coin_counter()
             # Boss模式下不渲染管道
             elif self.game_mode != GameMode.BOSS:
-                self.pipes.tick()  # 更新管道
-                
-            self.score.tick()  # 更新得分
-            self.player.tick()  # 更新玩家
+                with frame_profiler.section("pipes"):
+                    self.pipes.draw()
+            
+            with frame_profiler.section("hud"):
+                self.score.draw()  # 绘制得分
+            self.player.draw()  # 绘制玩家
             
-            # Boss模式特有的逻辑
             if self.game_mode == GameMode.BOSS:
-                # 更新Boss
-                self.boss.tick()
-                
-                # 设置Boss级别
-                self.boss.level = self.boss_cycle + 1
-                
-                # 之前的状态栏已移除，Boss血条现在直接显示在头上
-                
-                # 检查玩家子弹是否击中Boss
-                if self.player.check_bullet_hit_boss(self.boss):
-                    # 增加分数
-                    self.score.add()
-                    
-                # 检查Boss是否被打败，然后进入下一关卡或结束游戏
-                if self.boss and self.boss.is_defeated():
-                    self.boss_level += 1
-                    
-                    # 调试输出
-                    if hasattr(self.config, 'debug') and self.config.debug:
-                        print(f"Boss defeated! Moving to level {self.boss_level}")
-                    
-                    # 无限循环Boss，无论boss_level多大都会继续
-                    # 创建下一个Boss
-                    await self.next_boss()
-                    # 继续游戏而不是退出游戏循环
-                    continue
-                
-                # 检查玩家是否被Boss子弹击中
-                if self.player.check_boss_bullet_collision(self.boss):
-                    if not self.player.invincible:
-                        return  # 玩家死亡
+                with frame_profiler.section("boss"):
+                    self.boss.draw()
             
             # 绘制道具
-            for powerup in self.powerup_manager.powerups:
-                powerup.tick()
-                
-            # 绘制活跃效果提示
-            self.render_active_effects()
+            with frame_profiler.section("powerups"):
+                self.powerup_manager.draw()
             
-            # 如果是限时模式，显示剩余时间
-            if self.game_mode == GameMode.TIMED:
-                seconds_left = max(0, int(self.time_remaining / 1000))
-                
-                # 创建一个半透明的计时器背景
-                timer_bg = pygame.Surface((100, 40), pygame.SRCALPHA)
-                alpha = 180  # 透明度
-                timer_bg.fill((0, 0, 0, alpha))
-                self.config.screen.blit(timer_bg, (self.config.window.width - 110, 5))
-                
-                # 绘制计时器文本
-                time_text = time_font.render(f"时间: {seconds_left}秒", True, (255, 255, 255))
-                time_rect = time_text.get_rect(center=(self.config.window.width - 60, 25))
-                self.config.screen.blit(time_text, time_rect)
-                
-                # 当时间小于10秒时闪烁显示并添加红色警告效果
-                if seconds_left <= 10 and self.time_remaining > 0:
-                    # 闪烁效果
-                    if (current_time // 500) % 2 == 0:  # 每500毫秒闪烁一次
-                        # 创建警告背景
-                        warning_bg = pygame.Surface((200, 40), pygame.SRCALPHA)
-                        warning_bg.fill((255, 0, 0, 150))  # 半透明红色
-                        warning_rect = warning_bg.get_rect(center=(self.config.window.width//2, 50))
-                        self.config.screen.blit(warning_bg, warning_rect)
-                        
-                        # 警告文本
-                        warning_text = time_font.render("时间即将结束！", True, (255, 255, 255))
-                        warning_text_rect = warning_text.get_rect(center=(self.config.window.width//2, 50))
-                        self.config.screen.blit(warning_text, warning_text_rect)
-            
-            # 金币模式的提示
-            if self.game_mode == GameMode.COIN:
-                # 创建一个半透明的提示背景
-                coin_tip_bg = pygame.Surface((180, 40), pygame.SRCALPHA)
-                coin_tip_bg.fill((0, 0, 0, 150))  # 半透明黑色
-                self.config.screen.blit(coin_tip_bg, (5, 5))
-                
-                # 绘制提示文本
-                try:
-                    coin_tip_font = get_font('SimHei', 16)  # 尝试使用中文字体
-                except:
-                    coin_tip_font = pygame.font.SysFont('Arial', 16)  # 如果失败，使用系统字体
-                
-                coin_tip_text = coin_tip_font.render("收集金币以获得更高分数!", True, (255, 215, 0))
-                coin_tip_rect = coin_tip_text.get_rect(center=(95, 25))
-                self.config.screen.blit(coin_tip_text, coin_tip_rect)
-            
-            # 显示测试模式提示
-            if test_mode_active:
-                # 测试模式提示放在顶部右侧
-                bg_rect = pygame.Rect(self.config.window.width - 150, 5, 140, 20)
-                
-                # 添加边框使其更明显，但更细
-                pygame.draw.rect(self.config.screen, (255, 255, 255, 70), bg_rect, 1)
-                
-                self.config.screen.blit(test_mode_bg, bg_rect)
-                # 居中文本
-                text_rect = test_mode_text.get_rect(center=(bg_rect.centerx, bg_rect.centery))
-                self.config.screen.blit(test_mode_text, text_rect)
+            with frame_profiler.section("hud"):
+                self.render_hud(time_font, test_mode_active, test_mode_bg, test_mode_text, current_time)
+            
+            # 帧分析叠加层（F3开关）
+            frame_profiler.draw(self.config.screen)
 
-            pygame.display.update()  # 刷新显示
+            with frame_profiler.section("display"):
+                pygame.display.update()  # 刷新显示
+            if frame_profiler.enabled:
+                frame_profiler.end_frame(**self.entity_counts())
             await asyncio.sleep(0)  # 等待下一帧
             self.config.tick()  # 更新游戏配置
+
+    def render_hud(self, time_font, test_mode_active, test_mode_bg, test_mode_text, current_time):
+        """
+        绘制局内HUD：活跃效果、限时模式计时器、金币模式提示和测试模式提示
+        """
+        # 绘制活跃效果提示
+        self.render_active_effects()
+        
+        # 如果是限时模式，显示剩余时间
+        if self.game_mode == GameMode.TIMED:
+            seconds_left = max(0, int(self.time_remaining / 1000))
+            
+            # 创建一个半透明的计时器背景
+            timer_bg = pygame.Surface((100, 40), pygame.SRCALPHA)
+            alpha = 180  # 透明度
+            timer_bg.fill((0, 0, 0, alpha))
+            self.config.screen.blit(timer_bg, (self.config.window.width - 110, 5))
+            
+            # 绘制计时器文本
+            time_text = render_text(time_font, f"时间: {seconds_left}秒", (255, 255, 255))
+            time_rect = time_text.get_rect(center=(self.config.window.width - 60, 25))
+            self.config.screen.blit(time_text, time_rect)
+            
+            # 当时间小于10秒时闪烁显示并添加红色警告效果
+            if seconds_left <= 10 and self.time_remaining > 0:
+                # 闪烁效果
+                if (current_time // 500) % 2 == 0:  # 每500毫秒闪烁一次
+                    # 创建警告背景
+                    warning_bg = pygame.Surface((200, 40), pygame.SRCALPHA)
+                    warning_bg.fill((255, 0, 0, 150))  # 半透明红色
+                    warning_rect = warning_bg.get_rect(center=(self.config.window.width//2, 50))
+                    self.config.screen.blit(warning_bg, warning_rect)
+                    
+                    # 警告文本
+                    warning_text = render_text(time_font, "时间即将结束！", (255, 255, 255))
+                    warning_text_rect = warning_text.get_rect(center=(self.config.window.width//2, 50))
+                    self.config.screen.blit(warning_text, warning_text_rect)
+        
+        # 金币模式的提示
+        if self.game_mode == GameMode.COIN:
+            # 创建一个半透明的提示背景
+            coin_tip_bg = pygame.Surface((180, 40), pygame.SRCALPHA)
+            coin_tip_bg.fill((0, 0, 0, 150))  # 半透明黑色
+            self.config.screen.blit(coin_tip_bg, (5, 5))
+            
+            # 绘制提示文本
+            coin_tip_font = get_font('SimHei', 16)  # 中文字体，首次使用后缓存
+            
+            coin_tip_text = render_text(coin_tip_font, "收集金币以获得更高分数!", (255, 215, 0))
+            coin_tip_rect = coin_tip_text.get_rect(center=(95, 25))
+            self.config.screen.blit(coin_tip_text, coin_tip_rect)
+        
+        # 显示测试模式提示
+        if test_mode_active:
+            # 测试模式提示放在顶部右侧
+            bg_rect = pygame.Rect(self.config.window.width - 150, 5, 140, 20)
+            
+            # 添加边框使其更明显，但更细
+            pygame.draw.rect(self.config.screen, (255, 255, 255, 70), bg_rect, 1)
+            
+            self.config.screen.blit(test_mode_bg, bg_rect)
+            # 居中文本
+            text_rect = test_mode_text.get_rect(center=(bg_rect.centerx, bg_rect.centery))
+            self.config.screen.blit(test_mode_text, text_rect)
+
+    def profiler_keys(self, event):
+        """
+        帧分析器的开发按键：F3开关计时和叠加层，F4导出逐帧记录（不计入回放）
+        """
+        if event.type != KEYDOWN:
+            return
+        if event.key == K_F3:
+            frame_profiler.toggle()
+        elif event.key == K_F4 and frame_profiler.enabled:
+            for path in ("frame_profile.csv", "frame_profile.json"):
+                if frame_profiler.dump(path):
+                    print(f"帧记录已导出到 {path}")
+
+    def entity_counts(self):
+        """
+        返回当前的实体数量（帧分析器记录用）
+        """
+        return {
+            "pipes": len(self.pipes.upper) + len(self.pipes.lower),
+            "bullets": len(self.player.bullets),
+            "boss_bullets": len(self.boss.bullets) if self.boss else 0,
+            "coins": len(self.coin_manager.coins),
+            "powerups": len(self.powerup_manager.powerups),
+            "particles": len(self.player.explosions),
+        }
+
+    def simulate_step(self, delta_time):
+        """
+        推进一个固定时长的模拟步（逻辑与碰撞），不做任何绘制
+        :param delta_time: 模拟步长（毫秒）
+        :return: None表示继续游戏，"boss_defeated"表示Boss被击败，"game_over"表示游戏结束
+        """
+        self.step_count += 1
+        game_over = False
+        
+        # 限时模式时间更新
+        if self.game_mode == GameMode.TIMED:
+            self.time_remaining -= delta_time
+            if self.time_remaining <= 0:
+                self.time_remaining = 0
+                game_over = True
+        
+        # 更新道具管理器
+        with frame_profiler.section("powerups"):
+            self.powerup_manager.update(delta_time)
+        
+        # 检查道具碰撞
+        with frame_profiler.section("collisions"):
+            self.check_powerup_collisions()
+        
+        # 更新玩家状态效果
+        self.update_player_effects()
+        
+        # 检查管道通过情况并更新分数（除了Boss模式和金币模式）
+        if self.game_mode not in [GameMode.BOSS, GameMode.COIN]:
+            self.check_pipe_pass()
+
+        self.background.step()  # 更新背景
+        self.floor.step()  # 更新地面
+        
+        # 金币模式特有的逻辑
+        if self.game_mode == GameMode.COIN:
+            # 更新金币管理器
+            with frame_profiler.section("coins"):
+                self.coin_manager.update(delta_time)
             
-            # 玩家碰撞检测
-            if self.game_mode == GameMode.BOSS:
-                # Boss模式下只检测与地板的碰撞
-                if (self.player.y + self.player.h >= self.floor.y - 1 or self.player.y < 0) and not self.player.invincible:
-                    return
-            else:
-                # 其他模式下检测与管道和地板的碰撞
-                if self.player.collided(self.pipes, self.floor) and not self.player.invincible:
-                    return
-            
-            # 限时模式结束
-            if game_over:
-                return
+            # 检查金币碰撞并增加分数
+            with frame_profiler.section("collisions"):
+                collected_score = self.coin_manager.check_player_collision(self.player)
+            if collected_score > 0:
+                # 增加分数
+                for _ in range(collected_score):
+                    self.score.add()
+                
+                # 增加收集的金币数量
+                self.collected_coins += collected_score
+            
+            # 仍然保留管道，但是间隔更大，速度更快，使游戏更具挑战性
+            with frame_profiler.section("pipes"):
+                self.pipes.step()
+        # Boss模式下没有管道
+        elif self.game_mode != GameMode.BOSS:
+            with frame_profiler.section("pipes"):
+                self.pipes.step()  # 更新管道
+            
+        self.score.step()  # 更新得分
+        self.player.step()  # 更新玩家
+        
+        # Boss模式特有的逻辑
+        if self.game_mode == GameMode.BOSS:
+            # 更新Boss
+            with frame_profiler.section("boss"):
+                self.boss.step()
+            
+            # 设置Boss级别
+            self.boss.level = self.boss_cycle + 1
+            
+            # 检查玩家子弹是否击中Boss
+            with frame_profiler.section("collisions"):
+                hit_boss = self.player.check_bullet_hit_boss(self.boss)
+            if hit_boss:
+                # 增加分数
+                self.score.add()
+                
+            # 检查Boss是否被打败，然后进入下一关卡或结束游戏
+            if self.boss and self.boss.is_defeated():
+                self.boss_level += 1
+                
+                # 调试输出
+                if hasattr(self.config, 'debug') and self.config.debug:
+                    print(f"Boss defeated! Moving to level {self.boss_level}")
+                return "boss_defeated"
+            
+            # 检查玩家是否被Boss子弹击中
+            with frame_profiler.section("collisions"):
+                hit_player = self.player.check_boss_bullet_collision(self.boss)
+            if hit_player:
+                if not self.player.invincible:
+                    return "game_over"  # 玩家死亡
+        
+        # 玩家碰撞检测
+        if self.game_mode == GameMode.BOSS:
+            # Boss模式下只检测与地板的碰撞
+            if (self.player.y + self.player.h >= self.floor.y - 1 or self.player.y < 0) and not self.player.invincible:
+                return "game_over"
+        else:
+            # 其他模式下检测与管道和地板的碰撞
+            with frame_profiler.section("collisions"):
+                collided = self.player.collided(self.pipes, self.floor)
+            if collided and not self.player.invincible:
+                return "game_over"
+        
+        # 限时模式结束
+        if game_over:
+            return "game_over"
+        return None
+
+    def run_headless(self, game_mode, seed=None, inputs=(), max_steps=30 * 60 * 10):
+        """
+        不绘制、不限帧地完整模拟一局游戏
+        :param game_mode: 游戏模式
+        :param seed: 随机种子，为None时随机生成
+        :param inputs: 按步数排序的输入序列 [(step, InputAction), ...]，step为该动作之前已推进的步数
+        :param max_steps: 最多模拟的步数（默认约10分钟游戏时间）
+        :return: 本局结果
+        """
+        self.game_mode = game_mode
+        seed = self.setup_play(seed)
+        inputs = iter(inputs)
+        next_input = next(inputs, None)
+        finished = False
+        
+        while self.step_count < max_steps:
+            # 应用在这一步之前发生的所有输入
+            while next_input is not None and next_input[0] <= self.step_count:
+                self.apply_action(InputAction(next_input[1]))
+                next_input = next(inputs, None)
+            
+            result = self.simulate_step(self.config.step_ms)
+            if result == "boss_defeated":
+                self.advance_to_next_boss()
+            elif result == "game_over":
+                finished = True
+                break
+        
+        return {
+            'seed': seed,
+            'game_mode': game_mode.name,
+            'score': self.score.score,
+            'steps': self.step_count,
+            'finished': finished,
+            'coins': self.collected_coins,
+            'boss_level': self.boss_level,
+        }
 
     async def game_over(self):
         """
@@ -1490,10 +1758,11 @@ class Flappy:
             final_score = self.score.score
             game_mode_str = self.game_mode.value
             
-            # 尝试上传分数
-            upload_success = self.network.upload_score(final_score, self.total_playtime, game_mode_str)
+            # 尝试上传分数，附带回放供服务器校验
+            replay = self.replay.to_base64() if self.replay else None
+            upload_success = self.network.upload_score(final_score, self.total_playtime, game_mode_str, replay)
             if upload_success:
-                print(f"[游戏] 分数已上传: {final_score}分, 游戏时长: {self.total_playtime//1000}秒")
+                print(f"[游戏] 分数已提交: {final_score}分, 游戏时长: {self.total_playtime//1000}秒")
             else:
                 print(f"[游戏] 分数上传失败: {final_score}分")
         
@@ -1503,29 +1772,55 @@ class Flappy:
         if hasattr(self, 'floor'):
             self.floor.stop()  # 停止地面
 
+        # Boss模式下不需要更新管道
+        show_pipes = self.game_mode != GameMode.BOSS and hasattr(self, 'pipes')
+        # 坠落时小鸟会旋转，旋转后的图像超出原尺寸
+        player_margin = max(self.player.w, self.player.h)
+
+        def draw_game_over():
+            self.background.draw()  # 绘制背景
+            self.floor.draw()  # 绘制地面
+            if show_pipes:
+                self.pipes.draw()  # 绘制管道
+            self.score.draw()  # 绘制得分
+            self.player.draw()  # 绘制玩家
+            self.game_over_message.draw()  # 绘制游戏结束信息
+
+        dirty_rects.invalidate()  # 进入界面时整屏绘制一次
+
         while True:
             for event in pygame.event.get():
                 self.check_quit_event(event)  # 检查退出事件
+                dirty_rects.handle_event(event)
                 if self.is_tap_event(event):
                     if self.player.y + self.player.h >= self.floor.y - 1:
                         return  # 如果玩家落到地面，结束游戏
 
-            self.background.tick()  # 更新背景
-            self.floor.tick()  # 更新地面
-            
-            # Boss模式下不需要更新管道
-            if self.game_mode != GameMode.BOSS and hasattr(self, 'pipes'):
-                self.pipes.tick()  # 更新管道
-                
-            self.score.tick()  # 更新得分
-            self.player.tick()  # 更新玩家
-            self.game_over_message.tick()  # 更新游戏结束信息
+            self.floor.step()  # 更新地面
+            if show_pipes:
+                self.pipes.step()  # 更新管道
+            self.player.step()  # 更新玩家
+
+            # 地面和管道已经停止，通常只有坠落的小鸟需要重画
+            dirty_rects.track('floor', self.floor.rect, self.floor.x)
+            if show_pipes:
+                pipes = self.pipes.upper + self.pipes.lower
+                if pipes:
+                    pipes_rect = entity_rect(pipes[0]).unionall([entity_rect(pipe) for pipe in pipes[1:]])
+                    dirty_rects.track('pipes', pipes_rect, tuple((pipe.x, pipe.y) for pipe in pipes))
+            dirty_rects.track('score', self.score.rect, self.score.score)
+            dirty_rects.track('player', entity_rect(self.player, player_margin),
+                              (self.player.y, self.player.rot, self.player.image))
+            dirty_rects.present(self.config.screen, draw_game_over)
 
-            pygame.display.update()  # 刷新显示
             await asyncio.sleep(0)  # 等待下一帧
 
     def create_boss(self):
         """创建对应等级的Boss"""
+        # 上一个Boss剩下的子弹放回对象池
+        if self.boss is not None:
+            self.boss.release_bullets()
+        
         # 取模运算以支持循环Boss
         effective_level = self.boss_level % 4
         
@@ -1580,17 +1875,37 @@ class Flappy:
                 if self.boss.bullet_rate > 100:
                     self.boss.bullet_rate -= 1
     
+    def begin_boss_transition(self):
+        """Boss被击败后开始转场：清理旧Boss并让玩家回到屏幕中心"""
+        # 清理旧Boss的子弹等资源（同时清空子弹网格）
+        if self.boss:
+            self.boss.release_bullets()
+        
+        # 确保玩家不会掉落 - 重置位置到中心
+        self.player.y = self.config.window.height // 2 - self.player.h // 2
+        self.player.vel_y = 0  # 重置速度，防止继续掉落
+
+    def boss_transition_step(self):
+        """推进一个转场模拟步"""
+        self.floor.step()
+        
+        # 确保玩家留在屏幕中心
+        self.player.y = self.config.window.height // 2 - self.player.h // 2
+        self.player.step()
+
+    def advance_to_next_boss(self):
+        """不绘制地完成Boss转场（无头模式使用），逻辑与next_boss完全一致"""
+        self.begin_boss_transition()
+        for _ in range(BOSS_TRANSITION_STEPS):
+            self.boss_transition_step()
+        self.spawn_next_boss()
+
     async def next_boss(self):
         """显示Boss转场动画并创建下一个Boss"""
-        # 清理旧Boss的子弹等资源
-        if self.boss:
-            self.boss.bullets.clear()
+        self.begin_boss_transition()
         
         # 创建动画字体 - 使用Arial或系统默认字体
-        try:
-            font = pygame.font.SysFont('Arial', 36)
-        except:
-            font = pygame.font.Font(None, 36)
+        font = get_font('Arial', 36)
         
         # 计算有效的Boss等级
         effective_level = self.boss_level % 4
@@ -1612,25 +1927,20 @@ class Flappy:
         
         # 添加循环次数信息
         if cycle_count > 0:
-            text = font.render(f"{boss_name} Lv.{cycle_count+1} Appears!", True, color)
+            text = render_text(font, f"{boss_name} Lv.{cycle_count+1} Appears!", color)
         else:
-            text = font.render(f"{boss_name} Appears!", True, color)
+            text = render_text(font, f"{boss_name} Appears!", color)
         
         rect = text.get_rect(center=(self.config.window.width//2, self.config.window.height//2))
         
-        # 确保玩家不会掉落 - 重置位置到中心
-        self.player.y = self.config.window.height // 2 - self.player.h // 2
-        self.player.vel_y = 0  # 重置速度，防止继续掉落
-        
         # 显示过渡动画
-        for i in range(60):  # 约2秒
-            # 绘制游戏元素
-            self.background.tick()
-            self.floor.tick()
+        for i in range(BOSS_TRANSITION_STEPS):  # 约2秒
+            self.boss_transition_step()
             
-            # 确保玩家留在屏幕中心
-            self.player.y = self.config.window.height // 2 - self.player.h // 2
-            self.player.tick()
+            # 绘制游戏元素
+            self.background.draw()
+            self.floor.draw()
+            self.player.draw()
             
             # 添加半透明背景
             overlay = pygame.Surface((self.config.window.width, self.config.window.height), pygame.SRCALPHA)
@@ -1643,6 +1953,12 @@ class Flappy:
             pygame.display.update()
             await asyncio.sleep(0.03)
         
+        self.spawn_next_boss()
+
+    def spawn_next_boss(self):
+        """转场结束后创建下一个Boss并给玩家补充弹药"""
+        effective_level = self.boss_level % 4
+        
         # 创建新Boss
         self.create_boss()
         
@@ -1678,7 +1994,7 @@ class Flappy:
         y = self.player.y  # 与玩家相同的高度
         
         # 创建道具并添加到列表
-        powerup = PowerUp(self.config, power_type, x, y)
+        powerup = powerup_pool.acquire(self.config, power_type, x, y)
         self.powerup_manager.powerups.append(powerup)
         
         # 可选：播放提示音效
@@ -1702,11 +2018,8 @@ class Flappy:
         pygame.draw.circle(coin_icon, (255, 235, 100), (15, 15), 10)  # 浅金色内圈
         
         # 添加 "$" 符号
-        try:
-            coin_font = pygame.font.SysFont("Arial", 16, bold=True)
-        except:
-            coin_font = pygame.font.Font(None, 16)
-        coin_symbol = coin_font.render("$", True, (100, 80, 0))
+        coin_font = get_font("Arial", 16, bold=True)
+        coin_symbol = render_text(coin_font, "$", (100, 80, 0))
         symbol_rect = coin_symbol.get_rect(center=(15, 15))
         coin_icon.blit(coin_symbol, symbol_rect)
         
@@ -1714,12 +2027,9 @@ class Flappy:
         self.config.screen.blit(coin_icon, (bg_pos[0] + 10, bg_pos[1] + 5))
         
         # 绘制收集的金币数量
-        try:
-            counter_font = get_font('SimHei', 18)
-        except:
-            counter_font = pygame.font.SysFont('Arial', 18)
+        counter_font = get_font('SimHei', 18)
         
-        counter_text = counter_font.render(f"x {self.collected_coins}", True, (255, 215, 0))
+        counter_text = render_text(counter_font, f"x {self.collected_coins}", (255, 215, 0))
         text_pos = (bg_pos[0] + 45, bg_pos[1] + 20)
         self.config.screen.blit(counter_text, text_pos)
 
@@ -1729,9 +2039,9 @@ class Flappy:
         
         # 网络状态指示（不再重复ping服务器）
         if self.network.is_online:
-            network_text = font.render("🌐 在线", True, (64, 192, 64))
+            network_text = render_text(font, "🌐 在线", (64, 192, 64))
         else:
-            network_text = font.render("🌐 离线", True, (255, 64, 64))
+            network_text = render_text(font, "🌐 离线", (255, 64, 64))
         
         network_rect = network_text.get_rect(center=(center_x, y_start))
         self.config.screen.blit(network_text, network_rect)
@@ -1740,16 +2050,16 @@ class Flappy:
         if self.network.is_logged_in():
             user_info = self.network.get_user_info()
             if user_info:
-                user_status_text = font.render(f"👤 {user_info['username']}", True, (255, 255, 255))
+                user_status_text = render_text(font, f"👤 {user_info['username']}", (255, 255, 255))
                 user_status_rect = user_status_text.get_rect(center=(center_x, y_start + 20))
                 self.config.screen.blit(user_status_text, user_status_rect)
                 
                 # 显示最佳分数
-                best_score_text = font.render(f"最佳: {user_info.get('best_score', 0)}分", True, (255, 215, 0))
+                best_score_text = render_text(font, f"最佳: {user_info.get('best_score', 0)}分", (255, 215, 0))
                 best_score_rect = best_score_text.get_rect(center=(center_x, y_start + 40))
                 self.config.screen.blit(best_score_text, best_score_rect)
         else:
-            guest_text = font.render("👤 游客模式", True, (192, 192, 192))
+            guest_text = render_text(font, "👤 游客模式", (192, 192, 192))
             guest_rect = guest_text.get_rect(center=(center_x, y_start + 20))
             self.config.screen.blit(guest_text, guest_rect)
 
@@ -1762,7 +2072,7 @@ class Flappy:
         
         # 创建提示文本
         coming_soon_font = get_font('SimHei', 36)
-        coming_soon_text = coming_soon_font.render(f"{feature}功能敬请期待...", True, (255, 255, 255))
+        coming_soon_text = render_text(coming_soon_font, f"{feature}功能敬请期待...", (255, 255, 255))
         coming_soon_rect = coming_soon_text.get_rect(center=(self.config.window.width//2, self.config.window.height//2))
         self.config.screen.blit(coming_soon_text, coming_soon_rect)
         
@@ -1771,8 +2081,9 @@ class Flappy:
 
     async def show_ranking(self):
         """显示排行榜"""
-        # 获取排行榜数据
-        leaderboard = self.network.get_leaderboard()
+        # 在网络线程上获取排行榜数据，返回前每帧检查是否已完成
+        leaderboard_future = self.network.get_leaderboard_async()
+        leaderboard = None
         
         # 创建字体
         title_font = get_font('SimHei', 32)
@@ -1787,38 +2098,35 @@ class Flappy:
         silver_color = (192, 192, 192)
         bronze_color = (205, 127, 50)
         
-        while True:
-            for event in pygame.event.get():
-                self.check_quit_event(event)
-                if event.type == pygame.KEYDOWN or event.type == pygame.MOUSEBUTTONDOWN:
-                    return  # 返回主菜单
-            
+        # 半透明背景面板（静止不变，只创建一次）
+        panel_width = 300
+        panel_height = 400
+        panel_x = self.config.window.width // 2 - panel_width // 2
+        panel_y = self.config.window.height // 2 - panel_height // 2
+        
+        panel_surface = pygame.Surface((panel_width, panel_height), pygame.SRCALPHA)
+        panel_surface.fill(background_color)
+        pygame.draw.rect(panel_surface, (255, 255, 255, 80), (0, 0, panel_width, panel_height), 3, border_radius=15)
+        panel_rect = pygame.Rect(panel_x, panel_y, panel_width, panel_height)
+        
+        def draw_ranking():
             # 绘制背景
-            self.background.tick()
-            self.floor.tick()
-            self.player.tick()
-            
-            # 创建半透明背景面板
-            panel_width = 300
-            panel_height = 400
-            panel_x = self.config.window.width // 2 - panel_width // 2
-            panel_y = self.config.window.height // 2 - panel_height // 2
+            self.background.draw()
+            self.floor.draw()
+            self.player.draw()
             
-            panel_surface = pygame.Surface((panel_width, panel_height), pygame.SRCALPHA)
-            panel_surface.fill(background_color)
-            pygame.draw.rect(panel_surface, (255, 255, 255, 80), (0, 0, panel_width, panel_height), 3, border_radius=15)
             self.config.screen.blit(panel_surface, (panel_x, panel_y))
             
             # 绘制标题
-            title_text = title_font.render("🏆 排行榜", True, gold_color)
+            title_text = render_text(title_font, "🏆 排行榜", gold_color)
             title_rect = title_text.get_rect(center=(self.config.window.width // 2, panel_y + 40))
             self.config.screen.blit(title_text, title_rect)
             
             # 绘制表头
             header_y = panel_y + 80
-            rank_header = header_font.render("排名", True, text_color)
-            name_header = header_font.render("玩家", True, text_color)
-            score_header = header_font.render("分数", True, text_color)
+            rank_header = render_text(header_font, "排名", text_color)
+            name_header = render_text(header_font, "玩家", text_color)
+            score_header = render_text(header_font, "分数", text_color)
             
             self.config.screen.blit(rank_header, (panel_x + 20, header_y))
             self.config.screen.blit(name_header, (panel_x + 80, header_y))
@@ -1846,30 +2154,51 @@ class Flappy:
                         rank_color = text_color
                     
                     # 绘制排名
-                    rank_text = content_font.render(f"{i+1}", True, rank_color)
+                    rank_text = render_text(content_font, f"{i+1}", rank_color)
                     self.config.screen.blit(rank_text, (panel_x + 30, y_pos))
                     
                     # 绘制玩家名
                     name = score_data.get('username', '未知')
-                    name_text = content_font.render(name[:8], True, text_color)  # 限制名称长度
+                    name_text = render_text(content_font, name[:8], text_color)  # 限制名称长度
                     self.config.screen.blit(name_text, (panel_x + 80, y_pos))
                     
                     # 绘制分数
                     score = score_data.get('score', 0)
-                    score_text = content_font.render(str(score), True, rank_color)
+                    score_text = render_text(content_font, str(score), rank_color)
                     score_rect = score_text.get_rect(topright=(panel_x + panel_width - 20, y_pos))
                     self.config.screen.blit(score_text, score_rect)
             else:
-                # 显示无数据提示
-                no_data_text = content_font.render("暂无排行榜数据", True, text_color)
+                # 显示加载中或无数据提示
+                no_data_text = render_text(content_font, "加载中..." if leaderboard is None else "暂无排行榜数据",
+                                           text_color)
                 no_data_rect = no_data_text.get_rect(center=(self.config.window.width // 2, header_y + 100))
                 self.config.screen.blit(no_data_text, no_data_rect)
             
             # 绘制返回提示
-            back_text = back_font.render("按任意键返回", True, (200, 200, 200))
+            back_text = render_text(back_font, "按任意键返回", (200, 200, 200))
             back_rect = back_text.get_rect(center=(self.config.window.width // 2, panel_y + panel_height - 30))
             self.config.screen.blit(back_text, back_rect)
+        
+        dirty_rects.invalidate()  # 进入界面时整屏绘制一次
+        
+        while True:
+            for event in pygame.event.get():
+                self.check_quit_event(event)
+                dirty_rects.handle_event(event)
+                if event.type == pygame.KEYDOWN or event.type == pygame.MOUSEBUTTONDOWN:
+                    return  # 返回主菜单
+            
+            if leaderboard is None and leaderboard_future.done():
+                leaderboard = leaderboard_future.result() or {"success": False}
+            
+            self.floor.step()
+            self.player.step()
+            
+            # 登记会变化的元素：地面、小鸟，以及数据加载完成时的面板
+            dirty_rects.track('floor', self.floor.rect, self.floor.x)
+            dirty_rects.track('player', entity_rect(self.player), (self.player.y, self.player.image))
+            dirty_rects.track('ranking', panel_rect, leaderboard is None)
+            dirty_rects.present(self.config.screen, draw_ranking)
             
-            pygame.display.update()
             await asyncio.sleep(0)
             self.config.tick()
@@ -7,7 +7,7 @@
 
 import pygame
 from pygame.locals import K_ESCAPE, K_BACKSPACE, K_RETURN, K_TAB, KEYDOWN
-from .utils import get_font
+from .utils import get_font, render_text
 
 class LoginScreen:
     def __init__(self, config, network_manager):
@@ -29,6 +29,9 @@ class LoginScreen:
         self.active_field = "username"
         self.input_active = False
         
+        # 进行中的登录/注册请求: (类型, Future, 用户名)，每帧渲染时检查结果
+        self.pending_request = None
+        
         # 字体
         try:
             self.title_font = get_font('SimHei', 32)
@@ -222,6 +225,8 @@ class LoginScreen:
     
     def submit_form(self):
         """提交表单"""
+        if self.pending_request is not None:
+            return  # 上一个请求还没有返回
         if self.current_screen == "login":
             self.do_login()
         elif self.current_screen == "register":
@@ -236,13 +241,8 @@ class LoginScreen:
             self.show_message("请填写用户名和密码", self.colors["error"])
             return
         
-        result = self.network.login(username, password)
-        if result["success"]:
-            self.show_message(f"欢迎回来, {username}!", self.colors["success"])
-            self.current_screen = "main"
-            self.clear_inputs()
-        else:
-            self.show_message(result["message"], self.colors["error"])
+        self.pending_request = ("login", self.network.login_async(username, password), username)
+        self.show_message("正在登录...", self.colors["warning"])
     
     def do_register(self):
         """执行注册"""
@@ -263,13 +263,27 @@ class LoginScreen:
             self.show_message("密码长度至少6位", self.colors["error"])
             return
         
-        result = self.network.register(username, password, email)
-        if result["success"]:
+        self.pending_request = ("register", self.network.register_async(username, password, email), username)
+        self.show_message("正在注册...", self.colors["warning"])
+    
+    def poll_pending_request(self):
+        """检查登录/注册请求是否完成（每帧调用，不等待网络）"""
+        if self.pending_request is None or not self.pending_request[1].done():
+            return
+        action, future, username = self.pending_request
+        self.pending_request = None
+        result = future.result() or {"success": False, "message": "网络不可用"}
+        
+        if not result["success"]:
+            self.show_message(result["message"], self.colors["error"])
+        elif action == "login":
+            self.show_message(f"欢迎回来, {username}!", self.colors["success"])
+            self.current_screen = "main"
+            self.clear_inputs()
+        else:
             self.show_message("注册成功！请登录", self.colors["success"])
             self.current_screen = "login"
             self.clear_inputs()
-        else:
-            self.show_message(result["message"], self.colors["error"])
     
     def next_field(self):
         """切换到下一个输入框"""
@@ -302,6 +316,8 @@ class LoginScreen:
     
     def render(self, screen):
         """渲染界面"""
+        self.poll_pending_request()
+        
         # 创建半透明背景
         overlay = pygame.Surface((self.config.window.width, self.config.window.height))
         overlay.set_alpha(200)
@@ -338,9 +354,9 @@ class LoginScreen:
         # 标题
         if self.network.is_logged_in():
             user_info = self.network.get_user_info()
-            title_text = self.title_font.render(f"欢迎, {user_info['username']}", True, self.colors["white"])
+            title_text = render_text(self.title_font, f"欢迎, {user_info['username']}", self.colors["white"])
         else:
-            title_text = self.title_font.render("用户登录", True, self.colors["white"])
+            title_text = render_text(self.title_font, "用户登录", self.colors["white"])
         
         title_rect = title_text.get_rect(center=(center_x, 150))
         screen.blit(title_text, title_rect)
@@ -348,7 +364,7 @@ class LoginScreen:
         # 网络状态指示
         status_color = self.colors["success"] if self.network.is_online else self.colors["error"]
         status_text = "在线" if self.network.is_online else "离线"
-        status_surface = self.message_font.render(f"服务器: {status_text}", True, status_color)
+        status_surface = render_text(self.message_font, f"服务器: {status_text}", status_color)
         status_rect = status_surface.get_rect(center=(center_x, 175))
         screen.blit(status_surface, status_rect)
         
@@ -367,7 +383,7 @@ class LoginScreen:
         center_x = self.config.window.width // 2
         
         # 标题
-        title_text = self.title_font.render("用户登录", True, self.colors["white"])
+        title_text = render_text(self.title_font, "用户登录", self.colors["white"])
         title_rect = title_text.get_rect(center=(center_x, 150))
         screen.blit(title_text, title_rect)
         
@@ -384,7 +400,7 @@ class LoginScreen:
         center_x = self.config.window.width // 2
         
         # 标题
-        title_text = self.title_font.render("用户注册", True, self.colors["white"])
+        title_text = render_text(self.title_font, "用户注册", self.colors["white"])
         title_rect = title_text.get_rect(center=(center_x, 130))
         screen.blit(title_text, title_rect)
         
@@ -407,7 +423,7 @@ class LoginScreen:
             return
         
         # 标题
-        title_text = self.title_font.render("个人资料", True, self.colors["white"])
+        title_text = render_text(self.title_font, "个人资料", self.colors["white"])
         title_rect = title_text.get_rect(center=(center_x, 130))
         screen.blit(title_text, title_rect)
         
@@ -422,7 +438,7 @@ class LoginScreen:
         ]
         
         for item in info_items:
-            text_surface = self.input_font.render(item, True, self.colors["white"])
+            text_surface = render_text(self.input_font, item, self.colors["white"])
             text_rect = text_surface.get_rect(center=(center_x, y_pos))
             screen.blit(text_surface, text_rect)
             y_pos += 30
@@ -433,7 +449,7 @@ class LoginScreen:
     def render_input_field(self, screen, label, field_name, x, y, width, height, password=False):
         """渲染输入框"""
         # 标签
-        label_surface = self.input_font.render(label + ":", True, self.colors["white"])
+        label_surface = render_text(self.input_font, label + ":", self.colors["white"])
         screen.blit(label_surface, (x, y - 25))
         
         # 输入框背景
@@ -454,7 +470,7 @@ class LoginScreen:
         if len(display_text) > 20:
             display_text = display_text[-20:]  # 只显示最后20个字符
         
-        text_surface = self.input_font.render(display_text, True, self.colors["black"])
+        text_surface = render_text(self.input_font, display_text, self.colors["black"])
         screen.blit(text_surface, (x + 5, y + 5))
         
         # 光标
@@ -472,7 +488,7 @@ class LoginScreen:
         pygame.draw.rect(screen, self.colors["white"], (x, y, width, height), 2)
         
         # 按钮文本
-        text_surface = self.button_font.render(text, True, self.colors["white"])
+        text_surface = render_text(self.button_font, text, self.colors["white"])
         text_rect = text_surface.get_rect(center=(x + width // 2, y + height // 2))
         screen.blit(text_surface, text_rect)
     
@@ -480,7 +496,7 @@ class LoginScreen:
         """渲染消息"""
         if self.message:
             center_x = self.config.window.width // 2
-            message_surface = self.message_font.render(self.message, True, self.message_color)
+            message_surface = render_text(self.message_font, self.message, self.message_color)
             message_rect = message_surface.get_rect(center=(center_x, 50))
             
             # 消息背景
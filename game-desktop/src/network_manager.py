@@ -3,12 +3,18 @@
 """
 网络管理模块
 处理游戏与服务器的通信，包括用户登录、分数上传等
+
+所有请求都在专用的后台网络线程上执行，*_async 方法立即返回 Future，
+游戏循环每帧用 done() 检查结果，服务器响应慢时不会卡住画面
 """
 
 import json
+import os
 import time
 import threading
-from typing import Optional, Dict, Any
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional, Dict, Any, List
 try:
     import requests
     from requests.adapters import HTTPAdapter
@@ -17,14 +23,28 @@ except ImportError:
     print("警告: requests模块未安装，网络功能将被禁用")
     requests = None
 
+# 未上传成功的分数保存在本地，联网后合并成一次请求补交
+PENDING_SCORES_FILE = os.path.join(os.path.expanduser("~"), ".flappybird", "pending_scores.json")
+MAX_PENDING_SCORES = 200  # 本地最多缓存的局数，超出时丢弃最早的
+SCORE_BATCH_SIZE = 100  # 单次批量提交的局数上限（与服务器一致）
+
 class NetworkManager:
-    def __init__(self, base_url="http://localhost:8000"):
+    def __init__(self, base_url="http://localhost:8000", pending_file=PENDING_SCORES_FILE):
         self.base_url = base_url
         self.token = None
         self.user_info = None
         self.is_online = False
         self.last_ping = 0
         
+        # 离线成绩队列
+        self.pending_file = pending_file
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.pending_scores = self._load_pending_scores()
+        
+        # 网络线程：请求按提交顺序依次执行，登录状态只在这个线程里修改
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="network")
+        
         # 创建会话，复用连接
         if requests:
             self.session = requests.Session()
@@ -44,8 +64,23 @@ class NetworkManager:
         else:
             self.session = None
         
-        # 检查服务器连接
-        self.check_server_connection()
+        # 检查服务器连接（后台执行，不阻塞启动）
+        self.last_ping = time.time()
+        self._submit(self.check_server_connection)
+    
+    def _submit(self, fn, *args, **kwargs) -> Future:
+        """把请求交给网络线程执行，返回 Future"""
+        try:
+            return self._executor.submit(fn, *args, **kwargs)
+        except RuntimeError:
+            # 已经调用过 close()
+            future = Future()
+            future.set_result(None)
+            return future
+    
+    def close(self):
+        """退出游戏时关闭网络线程，丢弃尚未开始的请求"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
     
     def check_server_connection(self):
         """检查服务器连接状态"""
@@ -79,6 +114,7 @@ class NetworkManager:
                 self.token = data.get("token")
                 self.user_info = data.get("user")
                 print(f"[网络] 登录成功: {username}")
+                self.flush_pending_scores_async()
                 return data
             else:
                 print(f"[网络] 登录失败: {data.get('message')}")
@@ -111,65 +147,178 @@ class NetworkManager:
             print(f"[网络] 注册请求失败: {e}")
             return {"success": False, "message": f"网络错误: {str(e)}"}
     
+    def login_async(self, username: str, password: str) -> Future:
+        """在网络线程上登录，Future 结果同 login()"""
+        return self._submit(self.login, username, password)
+    
+    def register_async(self, username: str, password: str, email: str) -> Future:
+        """在网络线程上注册，Future 结果同 register()"""
+        return self._submit(self.register, username, password, email)
+    
     def logout(self) -> bool:
-        """用户登出"""
-        if not self.is_online or not self.session or not self.token:
-            self.token = None
-            self.user_info = None
-            return True
-        
+        """用户登出：立即清除本地登录状态，通知服务器在网络线程上完成"""
+        token = self.token
+        self.token = None
+        self.user_info = None
+        if token and self.is_online and self.session:
+            self._submit(self._post_logout, token)
+        return True
+    
+    def _post_logout(self, token: str) -> bool:
         try:
             self.session.post(
                 f"{self.base_url}/api/users/logout",
-                json={"token": self.token},
+                json={"token": token},
                 timeout=3
             )
-            self.token = None
-            self.user_info = None
             print("[网络] 登出成功")
             return True
             
         except Exception as e:
             print(f"[网络] 登出请求失败: {e}")
-            self.token = None
-            self.user_info = None
             return False
     
-    def upload_score(self, score: int, playtime: int, game_mode: str = "classic") -> bool:
-        """上传游戏分数"""
-        if not self.is_online or not self.session or not self.token:
+    def upload_score(self, score: int, playtime: int, game_mode: str = "classic",
+                     replay: Optional[str] = None) -> bool:
+        """提交游戏分数：先写入本地队列，在线时由后台线程批量上传，离线时等恢复连接后补交
+
+        replay 为base64编码的本局回放，服务器用它重跑一局来校验分数
+        """
+        if not self.session or not self.token:
             print("[网络] 无法上传分数: 未登录或网络不可用")
             return False
         
+        entry = {
+            "user_id": (self.user_info or {}).get("user_id"),
+            "score": score,
+            "playtime": playtime,
+            "game_mode": game_mode,
+            "played_at": datetime.now().isoformat()
+        }
+        if replay:
+            entry["replay"] = replay
+        self._enqueue_score(entry)
+        
+        # 更新本地用户信息
+        if self.user_info:
+            self.user_info["total_score"] = self.user_info.get("total_score", 0) + score
+            self.user_info["games_played"] = self.user_info.get("games_played", 0) + 1
+            if score > self.user_info.get("best_score", 0):
+                self.user_info["best_score"] = score
+        
+        if self.is_online:
+            self.flush_pending_scores_async()
+        else:
+            print(f"[网络] 服务器离线，分数已暂存: {score}分（待上传 {len(self.pending_scores)} 局）")
+        return True
+    
+    def _load_pending_scores(self) -> List[Dict[str, Any]]:
+        """读取上次未上传的分数"""
+        try:
+            with open(self.pending_file, "r", encoding="utf-8") as f:
+                pending = json.load(f)
+            if pending:
+                print(f"[网络] 有 {len(pending)} 局分数等待上传")
+            return pending[-MAX_PENDING_SCORES:]
+        except FileNotFoundError:
+            return []
+        except Exception as e:
+            print(f"[网络] 读取待上传分数失败: {e}")
+            return []
+    
+    def _save_pending_scores(self):
+        """把队列写回本地文件（调用方需持有 _pending_lock）"""
+        try:
+            os.makedirs(os.path.dirname(self.pending_file), exist_ok=True)
+            tmp_file = self.pending_file + ".tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(self.pending_scores, f, ensure_ascii=False)
+            os.replace(tmp_file, self.pending_file)
+        except Exception as e:
+            print(f"[网络] 保存待上传分数失败: {e}")
+    
+    def _enqueue_score(self, entry: Dict[str, Any]):
+        with self._pending_lock:
+            self.pending_scores.append(entry)
+            del self.pending_scores[:-MAX_PENDING_SCORES]
+            self._save_pending_scores()
+    
+    def flush_pending_scores_async(self) -> Optional[Future]:
+        """在网络线程上传队列中的分数，不阻塞游戏循环"""
+        if self.pending_scores and not self._flush_lock.locked():
+            return self._submit(self.flush_pending_scores)
+        return None
+    
+    def flush_pending_scores(self) -> int:
+        """把当前用户的待上传分数合并成一次请求提交，返回上传成功的局数"""
+        if not self.is_online or not self.session or not self.token:
+            return 0
+        if not self._flush_lock.acquire(blocking=False):
+            return 0  # 已有线程在上传
+        try:
+            user_id = (self.user_info or {}).get("user_id")
+            with self._pending_lock:
+                # 只提交属于当前登录用户的分数，其他账号的等其登录后再传
+                batch = [entry for entry in self.pending_scores
+                         if entry.get("user_id") in (None, user_id)][:SCORE_BATCH_SIZE]
+            if not batch:
+                return 0
+            
+            sent = self._post_score_batch(batch)
+            if sent:
+                sent_ids = {id(entry) for entry in sent}
+                with self._pending_lock:
+                    self.pending_scores = [entry for entry in self.pending_scores
+                                           if id(entry) not in sent_ids]
+                    self._save_pending_scores()
+                print(f"[网络] 分数上传成功: {len(sent)} 局（剩余 {len(self.pending_scores)} 局）")
+            return len(sent)
+        finally:
+            self._flush_lock.release()
+    
+    def _post_score_batch(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """提交一批分数，返回服务器已接收的条目"""
+        results = [{key: value for key, value in entry.items() if key != "user_id"} for entry in batch]
         try:
             response = self.session.post(
-                f"{self.base_url}/api/users/score",
-                json={
-                    "token": self.token,
-                    "score": score,
-                    "playtime": playtime,
-                    "game_mode": game_mode
-                },
+                f"{self.base_url}/api/game/submit-batch",
+                json={"token": self.token, "results": results},
                 timeout=5
             )
+            if response.status_code == 404:
+                # 旧版服务器没有批量接口，逐局提交
+                return self._post_scores_one_by_one(batch)
             
             data = response.json()
             if data.get("success"):
-                print(f"[网络] 分数上传成功: {score}分")
-                # 更新本地用户信息
-                if self.user_info:
-                    self.user_info["total_score"] = self.user_info.get("total_score", 0) + score
-                    self.user_info["games_played"] = self.user_info.get("games_played", 0) + 1
-                    if score > self.user_info.get("best_score", 0):
-                        self.user_info["best_score"] = score
-                return True
-            else:
-                print(f"[网络] 分数上传失败: {data.get('message')}")
-                return False
-                
+                return batch
+            print(f"[网络] 分数上传失败: {data.get('message')}")
+            return []
         except Exception as e:
             print(f"[网络] 分数上传请求失败: {e}")
-            return False
+            return []
+    
+    def _post_scores_one_by_one(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        sent = []
+        for entry in batch:
+            try:
+                response = self.session.post(
+                    f"{self.base_url}/api/users/score",
+                    json={
+                        "token": self.token,
+                        "score": entry["score"],
+                        "playtime": entry["playtime"],
+                        "game_mode": entry["game_mode"]
+                    },
+                    timeout=5
+                )
+                if not response.json().get("success"):
+                    break
+            except Exception as e:
+                print(f"[网络] 分数上传请求失败: {e}")
+                break
+            sent.append(entry)
+        return sent
     
     def get_user_info(self) -> Optional[Dict[str, Any]]:
         """获取用户信息"""
@@ -180,12 +329,16 @@ class NetworkManager:
         return self.token is not None and self.user_info is not None
     
     def ping_server(self) -> bool:
-        """ping服务器检查连接"""
+        """检查服务器连接：立即返回当前状态，需要时在网络线程上重新ping"""
         current_time = time.time()
         if current_time - self.last_ping < 60:  # 增加到60秒内不重复ping
             return self.is_online
         
         self.last_ping = current_time
+        self._submit(self._ping)
+        return self.is_online
+    
+    def _ping(self) -> bool:
         was_online = self.is_online
         
         # 使用更短的超时时间，避免阻塞
@@ -204,6 +357,10 @@ class NetworkManager:
             status = "在线" if self.is_online else "离线"
             print(f"[网络] 服务器状态变更: {status}")
         
+        # 连接正常时补交离线期间缓存的分数
+        if self.is_online and self.token:
+            self.flush_pending_scores_async()
+        
         return self.is_online
     
     def get_leaderboard(self, limit: int = 10) -> Optional[Dict[str, Any]]:
@@ -227,4 +384,8 @@ class NetworkManager:
                 
         except Exception as e:
             print(f"[网络] 排行榜请求失败: {e}")
-            return {"success": False, "message": f"网络错误: {str(e)}"} 
\ No newline at end of file
+            return {"success": False, "message": f"网络错误: {str(e)}"} 
+    
+    def get_leaderboard_async(self, limit: int = 10) -> Future:
+        """在网络线程上获取排行榜，Future 结果同 get_leaderboard()"""
+        return self._submit(self.get_leaderboard, limit)
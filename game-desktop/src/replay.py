@@ -0,0 +1,142 @@
+"""
+游戏回放：记录一局的随机种子、游戏模式和按模拟步编号的输入动作。
+
+游戏逻辑是确定性的（同一种子、模式和输入总会得到同一局），因此服务器可以用回放
+无头重跑一局来校验客户端提交的分数。回放使用紧凑的二进制格式，只依赖标准库：
+
+    头部   3s 魔数 "FBR" | B 版本 | B 模式 | I 种子 | I 总步数 | I 分数   （小端）
+    输入   varint 输入数量，之后每个输入为 varint(与上一输入的步数差) + B 动作
+
+一局5分钟、每秒拍打3次的游戏大约只占2KB。
+"""
+import base64
+import struct
+from typing import List, Tuple
+
+REPLAY_MAGIC = b"FBR"
+REPLAY_VERSION = 1
+
+# 模式编码，顺序固定，只能在末尾追加
+MODE_CODES = ("CLASSIC", "TIMED", "REVERSE", "BOSS", "COIN")
+
+_HEADER = struct.Struct("<3sBBIII")
+
+# 玩家操作的最大动作编码（拍打和武器切换，对应 InputAction 1-7）。
+# 更大的编码是测试模式生成道具的动作，包含它们的回放不能作为正式成绩提交
+MAX_PLAYER_ACTION = 7
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    """写入无符号变长整数（每字节7位）"""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    """读取无符号变长整数，返回 (值, 新位置)"""
+    value = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise ValueError("回放数据不完整")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+        if shift > 35:
+            raise ValueError("回放数据格式错误")
+
+
+class Replay:
+    """一局游戏的回放"""
+
+    def __init__(self, mode: str, seed: int, inputs: List[Tuple[int, int]] = None,
+                 steps: int = 0, score: int = 0) -> None:
+        """
+        :param mode: 游戏模式名称（GameMode 的 name，如 "CLASSIC"）
+        :param seed: 本局随机种子
+        :param inputs: 输入序列 [(step, action), ...]，step为该动作之前已推进的模拟步数
+        :param steps: 本局总模拟步数
+        :param score: 本局最终分数
+        """
+        if mode not in MODE_CODES:
+            raise ValueError(f"未知的游戏模式: {mode}")
+        self.mode = mode
+        self.seed = seed
+        self.inputs = inputs if inputs is not None else []
+        self.steps = steps
+        self.score = score
+
+    def record(self, step: int, action: int) -> None:
+        """记录一个输入动作"""
+        self.inputs.append((step, int(action)))
+
+    def finish(self, steps: int, score: int) -> None:
+        """一局结束时记录总步数和分数"""
+        self.steps = steps
+        self.score = score
+
+    def has_test_actions(self) -> bool:
+        """回放中是否有测试模式的动作（生成道具等）"""
+        return any(action > MAX_PLAYER_ACTION for _, action in self.inputs)
+
+    def encode(self) -> bytes:
+        """编码为二进制回放"""
+        out = bytearray(_HEADER.pack(
+            REPLAY_MAGIC, REPLAY_VERSION, MODE_CODES.index(self.mode),
+            self.seed, self.steps, self.score,
+        ))
+        _write_varint(out, len(self.inputs))
+        last_step = 0
+        for step, action in self.inputs:
+            _write_varint(out, step - last_step)
+            out.append(action)
+            last_step = step
+        return bytes(out)
+
+    @classmethod
+    def decode(cls, data: bytes) -> "Replay":
+        """从二进制回放解码，格式错误时抛出ValueError"""
+        if len(data) < _HEADER.size:
+            raise ValueError("回放数据不完整")
+        magic, version, mode_code, seed, steps, score = _HEADER.unpack_from(data)
+        if magic != REPLAY_MAGIC:
+            raise ValueError("不是有效的回放数据")
+        if version != REPLAY_VERSION:
+            raise ValueError(f"不支持的回放版本: {version}")
+        if mode_code >= len(MODE_CODES):
+            raise ValueError(f"未知的游戏模式编码: {mode_code}")
+
+        count, pos = _read_varint(data, _HEADER.size)
+        inputs = []
+        step = 0
+        for _ in range(count):
+            delta, pos = _read_varint(data, pos)
+            if pos >= len(data):
+                raise ValueError("回放数据不完整")
+            step += delta
+            inputs.append((step, data[pos]))
+            pos += 1
+        if pos != len(data):
+            raise ValueError("回放数据末尾有多余内容")
+        if step > steps:
+            raise ValueError("回放输入超出了总步数")
+
+        return cls(MODE_CODES[mode_code], seed, inputs, steps, score)
+
+    def to_base64(self) -> str:
+        """编码为base64文本，用于JSON提交"""
+        return base64.b64encode(self.encode()).decode("ascii")
+
+    @classmethod
+    def from_base64(cls, text: str) -> "Replay":
+        """从base64文本解码"""
+        try:
+            data = base64.b64decode(text, validate=True)
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"回放数据不是有效的base64: {e}")
+        return cls.decode(data)
@@ -1,27 +1,14 @@
+from .dirty_rects import DirtyRectRenderer, dirty_rects, entity_rect
+from .frame_profiler import FrameProfiler, frame_profiler
 from .game_config import GameConfig
 from .images import Images
+from .object_pool import ObjectPool
+from .particles import ParticleSystem
 from .sounds import Sounds
-from .utils import clamp, get_hit_mask, pixel_collision
+from .spatial_grid import SpatialGrid
+from .sprite_atlas import SpriteAtlas, sprite_atlas
+from .text_cache import FontRegistry, TextCache, font_registry, get_font, render_text, text_cache
+from .trail import Trail
+from .transform_cache import TransformCache, transform_cache
+from .utils import MaskCache, clamp, get_hit_mask, hit_mask_cache, pixel_collision
 from .window import Window
-
-# 添加字体助手函数
-def get_font(name='SimHei', size=12, fallback_name=None):
-    """获取指定名称和大小的字体，如果失败则使用后备字体"""
-    import pygame
-    try:
-        return pygame.font.SysFont(name, size)
-    except:
-        try:
-            if fallback_name:
-                return pygame.font.SysFont(fallback_name, size) 
-            else:
-                # 尝试常见中文字体
-                for font_name in ['Microsoft YaHei', 'SimHei', 'NSimSun', 'SimSun', 'STHeiti']:
-                    try:
-                        return pygame.font.SysFont(font_name, size)
-                    except:
-                        pass
-                # 都失败了就用系统默认
-                return pygame.font.Font(None, size)
-        except:
-            return pygame.font.Font(None, size)
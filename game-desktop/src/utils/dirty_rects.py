@@ -0,0 +1,154 @@
+from typing import Callable, Hashable, List, Optional
+
+import pygame
+
+
+class DirtyRectRenderer:
+    """
+    菜单和静态界面的脏矩形渲染器
+
+    菜单、模式选择、排行榜和游戏结束界面原来每帧都重画整个窗口并用
+    pygame.display.update() 提交全部像素，而画面上真正在动的只有地面、小鸟、
+    脉动的标题和选中的按钮。界面每帧先登记会变化的元素（区域和决定外观的状态），
+    渲染器与上一帧比较，只在变化元素的旧区域和新区域内重画（用裁剪区限制绘制），
+    再只把这些区域传给 pygame.display.update(rects)；没有登记的元素视为静止不变
+    """
+
+    def __init__(self, max_rects: int = 8) -> None:
+        self.max_rects = max_rects  # 脏区域超过这个数量时合并成一个外接矩形
+        self._previous = {}  # 元素键 -> (区域, 状态)，上一帧登记的元素
+        self._current = {}  # 本帧登记的元素
+        self._full = True  # 下一帧是否需要整屏重画
+        self.frames = 0  # 提交的帧数
+        self.full_frames = 0  # 其中整屏重画的帧数
+        self.skipped_frames = 0  # 没有任何变化、不必提交的帧数
+        self.updated_pixels = 0  # 累计提交的像素数
+        self.screen_pixels = 0  # 累计的整屏像素数（用于计算提交比例）
+
+    def invalidate(self) -> None:
+        """
+        要求下一帧整屏重画（进入新界面、从子界面返回或窗口被遮挡后调用）
+        """
+        self._full = True
+
+    def handle_event(self, event: pygame.event.Event) -> None:
+        """
+        窗口重新显示或改变大小时整屏重画
+        """
+        if event.type in (pygame.VIDEOEXPOSE, pygame.VIDEORESIZE, getattr(pygame, 'WINDOWEXPOSED', -1)):
+            self.invalidate()
+
+    def track(self, key: Hashable, rect, state=None) -> None:
+        """
+        登记本帧一个会变化的元素
+
+        :param key: 元素键，同一元素每帧使用相同的键
+        :param rect: 元素本帧绘制时覆盖的区域
+        :param state: 决定元素外观的状态，与上一帧相同且区域不变时不重画
+        """
+        self._current[key] = (pygame.Rect(rect), state)
+
+    def _dirty_rects(self, bounds: pygame.Rect) -> List[pygame.Rect]:
+        """
+        比较本帧与上一帧登记的元素，返回需要重画的区域（已合并并裁剪到屏幕内）
+        """
+        rects = []
+        for key, (rect, state) in self._current.items():
+            previous = self._previous.get(key)
+            if previous is None:
+                rects.append(rect)
+            elif previous[0] != rect or previous[1] != state:
+                rects.append(previous[0])
+                rects.append(rect)
+        for key, (rect, _) in self._previous.items():
+            if key not in self._current:
+                rects.append(rect)  # 元素消失，擦除它原来的区域
+
+        # 扩大1像素，容纳插值位置取整和抗锯齿边缘
+        rects = [rect.inflate(2, 2).clip(bounds) for rect in rects]
+        rects = [rect for rect in rects if rect.width and rect.height]
+
+        # 反复合并相交的区域，避免重叠部分重画两次
+        merged = []
+        for rect in rects:
+            i = 0
+            while i < len(merged):
+                if merged[i].colliderect(rect):
+                    rect = rect.union(merged.pop(i))
+                    i = 0
+                else:
+                    i += 1
+            merged.append(rect)
+
+        if len(merged) > self.max_rects:
+            merged = [merged[0].unionall(merged[1:])]
+        return merged
+
+    def present(self, screen: pygame.Surface, draw: Callable[[], None]) -> None:
+        """
+        绘制并提交本帧
+
+        draw 画出整个界面且不能改变任何状态：整屏重画时调用一次，
+        否则对每个脏区域设置裁剪区后各调用一次
+        """
+        bounds = screen.get_rect()
+        area = bounds.width * bounds.height
+        self.frames += 1
+        self.screen_pixels += area
+
+        if self._full:
+            draw()
+            pygame.display.update()
+            self.full_frames += 1
+            self.updated_pixels += area
+        else:
+            rects = self._dirty_rects(bounds)
+            if rects:
+                for rect in rects:
+                    screen.set_clip(rect)
+                    draw()
+                screen.set_clip(None)
+                pygame.display.update(rects)
+                self.updated_pixels += sum(rect.width * rect.height for rect in rects)
+            else:
+                self.skipped_frames += 1
+
+        self._previous, self._current = self._current, {}
+        self._full = False
+
+    def stats(self) -> dict:
+        """
+        返回渲染统计：帧数、整屏重画帧数、无变化帧数和平均提交的像素比例
+        """
+        return {
+            "frames": self.frames,
+            "full_frames": self.full_frames,
+            "skipped_frames": self.skipped_frames,
+            "updated_ratio": round(self.updated_pixels / self.screen_pixels, 3) if self.screen_pixels else 0.0,
+        }
+
+    def reset_stats(self) -> None:
+        """
+        清空统计
+        """
+        self.frames = 0
+        self.full_frames = 0
+        self.skipped_frames = 0
+        self.updated_pixels = 0
+        self.screen_pixels = 0
+
+
+def entity_rect(entity, margin: int = 0, rect: Optional[pygame.Rect] = None) -> pygame.Rect:
+    """
+    返回实体在插值绘制时可能覆盖的区域：上一步位置和当前位置的外接矩形
+
+    :param margin: 向四周扩大的像素数（旋转后的图像会超出原尺寸）
+    :param rect: 当前位置的区域，默认使用实体的 rect
+    """
+    current = rect if rect is not None else entity.rect
+    previous = current.move(int(entity.prev_x - entity.x), int(entity.prev_y - entity.y))
+    return current.union(previous).inflate(margin * 2, margin * 2)
+
+
+# 全局脏矩形渲染器实例
+dirty_rects = DirtyRectRenderer()
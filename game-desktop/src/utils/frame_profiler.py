@@ -0,0 +1,246 @@
+import csv
+import json
+import os
+from collections import deque
+from contextlib import nullcontext
+from time import perf_counter
+from typing import Dict, Iterable, List, Optional
+
+import pygame
+
+from .text_cache import get_font, render_text
+
+_DISABLED = nullcontext()  # 未启用时各阶段共用的空上下文，不计时
+
+
+class _Section:
+    """
+    一个阶段的计时器（同一阶段每帧可以进入多次，耗时累加）
+    """
+
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler: 'FrameProfiler', name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self) -> None:
+        self.start = perf_counter()
+
+    def __exit__(self, *exc) -> None:
+        elapsed = (perf_counter() - self.start) * 1000
+        current = self.profiler.current
+        current[self.name] = current.get(self.name, 0.0) + elapsed
+
+
+class FrameProfiler:
+    """
+    游戏循环的帧分析器（默认关闭）
+
+    Flappy.play 的各阶段（事件处理、道具、碰撞、管道、Boss、HUD、提交画面）用
+    with frame_profiler.section(名称) 包起来，每帧结束时记录整帧耗时、各阶段耗时和
+    实体数量。最近 window 帧的样本用于滚动计算 p50/p95/p99，游戏内叠加层显示
+    FPS、帧耗时百分位和实体数；最近 history 帧的逐帧记录可以导出为 CSV 或 JSON 离线分析。
+    关闭时 section 返回一个共用的空上下文，几乎没有开销。
+    设置环境变量 PROFILE 启动时即开启；PROFILE 的值以 .csv 或 .json 结尾时，每局结束后导出到该文件
+    """
+
+    def __init__(self, window: int = 300, history: int = 3600, refresh: int = 15) -> None:
+        """
+        :param window: 计算百分位使用的最近帧数
+        :param history: 保留用于导出的逐帧记录数
+        :param refresh: 叠加层每隔多少帧刷新一次文字（避免每帧重新渲染）
+        """
+        profile = os.environ.get("PROFILE", "")
+        self.enabled = bool(profile)  # 是否计时
+        self.dump_path = profile if profile.endswith((".csv", ".json")) else None  # 每局结束后导出的文件
+        self.window = window
+        self.refresh = refresh
+        self.current: Dict[str, float] = {}  # 本帧各阶段的累计耗时（毫秒）
+        self.counts: Dict[str, int] = {}  # 最近一帧的实体数量
+        self.frames = 0  # 已记录的帧数
+        self.frame_times = deque(maxlen=window)  # 最近各帧的耗时（毫秒）
+        self.intervals = deque(maxlen=window)  # 最近相邻两帧开始时刻的间隔（毫秒），用于计算FPS
+        self.section_times: Dict[str, deque] = {}  # 阶段名 -> 最近各帧的耗时
+        self.history = deque(maxlen=history)  # 逐帧记录，用于导出
+        self._sections: Dict[str, _Section] = {}  # 阶段名 -> 计时器
+        self._frame_start: Optional[float] = None
+        self._overlay: List[pygame.Surface] = []  # 叠加层当前显示的文字行
+
+    def toggle(self) -> None:
+        """
+        开启或关闭计时（开启时清空之前的样本）
+        """
+        self.enabled = not self.enabled
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        清空所有样本
+        """
+        self.current = {}
+        self.counts = {}
+        self.frames = 0
+        self.frame_times.clear()
+        self.intervals.clear()
+        self.section_times.clear()
+        self.history.clear()
+        self._frame_start = None
+        self._overlay = []
+
+    def begin_frame(self) -> None:
+        """
+        开始一帧
+        """
+        if not self.enabled:
+            return
+        now = perf_counter()
+        if self._frame_start is not None:
+            self.intervals.append((now - self._frame_start) * 1000)
+        self._frame_start = now
+        self.current = {}
+
+    def section(self, name: str):
+        """
+        返回阶段 name 的计时上下文：with frame_profiler.section("pipes"): ...
+        """
+        if not self.enabled:
+            return _DISABLED
+        section = self._sections.get(name)
+        if section is None:
+            section = self._sections[name] = _Section(self, name)
+        return section
+
+    def end_frame(self, **counts: int) -> None:
+        """
+        结束一帧，记录整帧耗时、各阶段耗时和实体数量
+        """
+        if not self.enabled or self._frame_start is None:
+            return
+        frame_ms = (perf_counter() - self._frame_start) * 1000
+        self.frames += 1
+        self.frame_times.append(frame_ms)
+        self.counts = counts
+
+        for name in self.current:
+            if name not in self.section_times:
+                self.section_times[name] = deque(maxlen=self.window)
+        for name, samples in self.section_times.items():
+            samples.append(self.current.get(name, 0.0))  # 本帧没有执行的阶段记为0
+
+        row = {"frame": self.frames, "frame_ms": round(frame_ms, 3)}
+        row.update((name, round(value, 3)) for name, value in self.current.items())
+        row.update(counts)
+        self.history.append(row)
+
+    @staticmethod
+    def percentile(samples: Iterable[float], p: float) -> float:
+        """
+        返回样本的第 p 百分位数（最近秩法），没有样本时为0
+        """
+        ordered = sorted(samples)
+        if not ordered:
+            return 0.0
+        rank = max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered))) - 1))
+        return ordered[rank]
+
+    def fps(self) -> float:
+        """
+        返回最近 window 帧的平均帧率
+        """
+        if not self.intervals:
+            return 0.0
+        return 1000 * len(self.intervals) / sum(self.intervals)
+
+    def summary(self) -> dict:
+        """
+        返回统计摘要：帧率、帧耗时百分位、各阶段平均值和p95、最近一帧的实体数量
+        """
+        frame_times = list(self.frame_times)
+        return {
+            "frames": self.frames,
+            "fps": round(self.fps(), 1),
+            "frame_ms": {
+                "p50": round(self.percentile(frame_times, 50), 3),
+                "p95": round(self.percentile(frame_times, 95), 3),
+                "p99": round(self.percentile(frame_times, 99), 3),
+            },
+            "sections": {
+                name: {
+                    "mean": round(sum(samples) / len(samples), 3),
+                    "p95": round(self.percentile(samples, 95), 3),
+                }
+                for name, samples in self.section_times.items()
+                if samples
+            },
+            "counts": dict(self.counts),
+        }
+
+    def draw(self, screen: pygame.Surface) -> None:
+        """
+        在屏幕左下角绘制叠加层
+        """
+        if not self.enabled:
+            return
+        if not self._overlay or self.frames % self.refresh == 0:
+            self._overlay = self._render_overlay()
+
+        width = max(line.get_width() for line in self._overlay) + 8
+        height = sum(line.get_height() for line in self._overlay) + 8
+        y = screen.get_height() - height - 5
+        background = pygame.Surface((width, height), pygame.SRCALPHA)
+        background.fill((0, 0, 0, 170))  # 半透明黑色
+        screen.blit(background, (5, y))
+        y += 4
+        for line in self._overlay:
+            screen.blit(line, (9, y))
+            y += line.get_height()
+
+    def _render_overlay(self) -> List[pygame.Surface]:
+        """
+        按当前统计渲染叠加层的各行文字
+        """
+        summary = self.summary()
+        frame_ms = summary["frame_ms"]
+        lines = [
+            f"FPS {summary['fps']:.1f}",
+            f"帧耗时 p50 {frame_ms['p50']:.2f} p95 {frame_ms['p95']:.2f} p99 {frame_ms['p99']:.2f} ms",
+        ]
+        sections = summary["sections"]
+        for name in sorted(sections, key=lambda name: -sections[name]["mean"]):
+            lines.append(f"{name} {sections[name]['mean']:.2f} / p95 {sections[name]['p95']:.2f} ms")
+        if summary["counts"]:
+            lines.append(" ".join(f"{name} {count}" for name, count in summary["counts"].items()))
+
+        font = get_font('SimHei', 12)
+        return [render_text(font, line, (255, 255, 255)) for line in lines]
+
+    def dump(self, path: Optional[str] = None) -> Optional[str]:
+        """
+        导出逐帧记录：.json 文件包含摘要和逐帧记录，其他扩展名按 CSV 每帧一行
+
+        :param path: 导出的文件，默认使用 PROFILE 指定的文件
+        :return: 实际写入的文件，没有记录或没有文件名时为None
+        """
+        path = path or self.dump_path
+        if not path or not self.history:
+            return None
+
+        rows = list(self.history)
+        if path.endswith(".json"):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"summary": self.summary(), "frames": rows}, f, ensure_ascii=False, indent=2)
+        else:
+            fieldnames = []
+            for row in rows:
+                fieldnames.extend(name for name in row if name not in fieldnames)
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=fieldnames, restval=0)
+                writer.writeheader()
+                writer.writerows(rows)
+        return path
+
+
+# 全局帧分析器实例
+frame_profiler = FrameProfiler()
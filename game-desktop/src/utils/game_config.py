@@ -1,4 +1,6 @@
 import os
+import random
+from typing import Optional
 
 import pygame
 
@@ -6,6 +8,9 @@ from .images import Images
 from .sounds import Sounds
 from .window import Window
 
+SIM_RATE = 30  # 游戏逻辑按每秒30步设计（速度、冷却等都以步为单位）
+MAX_FRAME_MS = 250  # 单帧最多追赶的时间，防止卡顿后连续模拟太多步
+
 
 class GameConfig:
     """
@@ -19,6 +24,7 @@ class GameConfig:
         window: Window,
         images: Images,
         sounds: Sounds,
+        seed: Optional[int] = None,
     ) -> None:
         """
         初始化游戏配置
@@ -28,6 +34,7 @@ class GameConfig:
         :param window: 窗口配置
         :param images: 图像配置
         :param sounds: 声音配置
+        :param seed: 随机种子，为None时自动生成
         """
         self.screen = screen  # 游戏屏幕
         self.clock = clock  # 游戏时钟
@@ -36,6 +43,25 @@ class GameConfig:
         self.images = images  # 图像配置
         self.sounds = sounds  # 声音配置
         self.debug = os.environ.get("DEBUG", False)  # 调试模式
+        self.sim_rate = SIM_RATE  # 每秒模拟步数，与渲染帧率无关
+        self.step_ms = 1000 / SIM_RATE  # 每个模拟步代表的时间（毫秒）
+        self.max_frame_ms = MAX_FRAME_MS  # 单帧累计时间上限（毫秒）
+        self.interpolation = 1.0  # 渲染插值系数：0为上一步的位置，1为当前位置
+        # 游戏逻辑中所有随机数都来自这个随机数生成器，同一种子和输入可以完全复现一局
+        self.rng = random.Random()
+        self.seed = self.reseed(seed)
+
+    def reseed(self, seed: Optional[int] = None) -> int:
+        """
+        重新设置游戏随机种子（每局开始时调用）
+        :param seed: 随机种子，为None时随机生成一个
+        :return: 实际使用的种子
+        """
+        if seed is None:
+            seed = random.SystemRandom().randrange(1 << 32)
+        self.seed = seed
+        self.rng.seed(seed)
+        return seed
 
     def tick(self) -> None:
         """
@@ -1,3 +1,4 @@
+import os
 import random
 from typing import List, Tuple
 
@@ -15,29 +16,37 @@ class Images:
     player: Tuple[pygame.Surface]  # 玩家图像
     pipe: Tuple[pygame.Surface]  # 管道图像
 
-    def __init__(self) -> None:
+    def __init__(self, root: str = "") -> None:
         """
         初始化图像资源
+        :param root: 资源所在目录（assets的上级目录），默认为当前工作目录
         """
+        self.root = root
         self.numbers = list(
             (
-                pygame.image.load(f"assets/sprites/{num}.png").convert_alpha()  # 加载数字图像
+                self.load(f"assets/sprites/{num}.png").convert_alpha()  # 加载数字图像
                 for num in range(10)
             )
         )
 
         # 游戏结束图像
-        self.game_over = pygame.image.load(
+        self.game_over = self.load(
             "assets/sprites/gameover.png"
         ).convert_alpha()
         # 欢迎信息图像
-        self.welcome_message = pygame.image.load(
+        self.welcome_message = self.load(
             "assets/sprites/message.png"
         ).convert_alpha()
         # 地面图像
-        self.base = pygame.image.load("assets/sprites/base.png").convert_alpha()
+        self.base = self.load("assets/sprites/base.png").convert_alpha()
         self.randomize()  # 随机化背景和玩家图像
 
+    def load(self, path: str) -> pygame.Surface:
+        """
+        加载资源目录下的图像
+        """
+        return pygame.image.load(os.path.join(self.root, path))
+
     def randomize(self):
         """
         随机选择背景、玩家和管道图像
@@ -49,17 +58,17 @@ class Images:
         # 随机选择管道图像
         rand_pipe = random.randint(0, len(PIPES) - 1)
 
-        self.background = pygame.image.load(BACKGROUNDS[rand_bg]).convert()  # 加载随机背景图像
+        self.background = self.load(BACKGROUNDS[rand_bg]).convert()  # 加载随机背景图像
         self.player = (
-            pygame.image.load(PLAYERS[rand_player][0]).convert_alpha(),  # 加载玩家上拍图像
-            pygame.image.load(PLAYERS[rand_player][1]).convert_alpha(),  # 加载玩家中拍图像
-            pygame.image.load(PLAYERS[rand_player][2]).convert_alpha(),  # 加载玩家下拍图像
+            self.load(PLAYERS[rand_player][0]).convert_alpha(),  # 加载玩家上拍图像
+            self.load(PLAYERS[rand_player][1]).convert_alpha(),  # 加载玩家中拍图像
+            self.load(PLAYERS[rand_player][2]).convert_alpha(),  # 加载玩家下拍图像
         )
         self.pipe = (
             pygame.transform.flip(
-                pygame.image.load(PIPES[rand_pipe]).convert_alpha(),
+                self.load(PIPES[rand_pipe]).convert_alpha(),
                 False,
                 True,
             ),  # 加载并翻转管道图像
-            pygame.image.load(PIPES[rand_pipe]).convert_alpha(),  # 加载管道图像
+            self.load(PIPES[rand_pipe]).convert_alpha(),  # 加载管道图像
         )
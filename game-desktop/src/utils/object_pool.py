@@ -0,0 +1,74 @@
+from typing import Callable, Generic, Iterable, List, TypeVar
+
+T = TypeVar('T')
+
+
+class ObjectPool(Generic[T]):
+    """
+    按类型复用实体对象的对象池
+
+    Boss战里子弹、金币和道具成批生成又很快消失，原来每次都新建实体对象、用完丢给
+    垃圾回收，频繁分配会引起卡顿。对象池保存用完的对象：acquire 优先取出一个旧对象
+    并调用它的 reset(...) 重新初始化（参数与构造函数相同），没有空闲对象时才新建；
+    release 调用对象的 recycle() 释放它对其他对象的引用，再放回空闲列表。
+    放回后就不能再使用这个对象，它随时会被重新取出
+    """
+
+    def __init__(self, factory: Callable[..., T], max_size: int = 256) -> None:
+        """
+        :param factory: 新建对象的函数（通常就是实体类本身）
+        :param max_size: 最多保留的空闲对象数，超出的直接丢弃
+        """
+        self.factory = factory
+        self.max_size = max_size
+        self.created = 0  # 新建的对象数
+        self.reused = 0  # 复用的对象数
+        self._free: List[T] = []  # 空闲对象
+
+    def acquire(self, *args, **kwargs) -> T:
+        """
+        取出一个对象，按给定参数初始化
+        """
+        if self._free:
+            obj = self._free.pop()
+            obj.reset(*args, **kwargs)
+            self.reused += 1
+            return obj
+        self.created += 1
+        return self.factory(*args, **kwargs)
+
+    def release(self, obj: T) -> None:
+        """
+        放回一个不再使用的对象
+        """
+        obj.recycle()
+        if len(self._free) < self.max_size:
+            self._free.append(obj)
+
+    def release_all(self, objs: Iterable[T]) -> None:
+        """
+        放回一组不再使用的对象
+        """
+        for obj in objs:
+            self.release(obj)
+
+    def clear(self) -> None:
+        """
+        丢弃所有空闲对象并清空统计
+        """
+        self._free.clear()
+        self.created = 0
+        self.reused = 0
+
+    def stats(self) -> dict:
+        """
+        返回对象池统计：新建、复用和当前空闲的对象数
+        """
+        return {
+            "created": self.created,
+            "reused": self.reused,
+            "free": len(self._free),
+        }
+
+    def __len__(self) -> int:
+        return len(self._free)
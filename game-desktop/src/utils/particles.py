@@ -0,0 +1,91 @@
+from array import array
+from itertools import compress, islice, repeat
+from operator import add
+from typing import Callable, Iterator, Tuple, Union
+
+
+class ParticleSystem:
+    """
+    结构数组（SoA）形式的粒子系统
+
+    原来大招特效和爆炸的每个粒子都是一个字典，逐个粒子按键更新，死亡粒子在循环里
+    用 list.remove 删除，粒子数一多就是平方级开销。这里每个属性（位置、速度、寿命、
+    颜色……）各占一个连续的 array('d') 缓冲区，第 i 个粒子就是各缓冲区的第 i 项：
+    整列更新交给 map 和 operator 在C层完成，死亡粒子由 compact 一次遍历压缩掉。
+    缓冲区只增不减，clear 和 compact 之后空出的位置留给之后发射的粒子复用
+    """
+
+    def __init__(self, *fields: str) -> None:
+        """
+        :param fields: 粒子的属性名，每个属性一列
+        """
+        self.fields = fields
+        self.count = 0  # 存活粒子数，各列的前 count 项有效
+        self._columns = {name: array('d') for name in fields}
+
+    def __len__(self) -> int:
+        return self.count
+
+    def clear(self) -> None:
+        """
+        清除所有粒子，保留缓冲区
+        """
+        self.count = 0
+
+    def emit(self, **values: float) -> None:
+        """
+        发射一个粒子，未给出的属性为0
+        """
+        for name, column in self._columns.items():
+            value = values.get(name, 0.0)
+            if self.count < len(column):
+                column[self.count] = value  # 复用空出的位置
+            else:
+                column.append(value)
+        self.count += 1
+
+    def _live(self, name: str) -> Iterator[float]:
+        return islice(self._columns[name], self.count)
+
+    def apply(self, name: str, func: Callable[..., float], *sources: str) -> None:
+        """
+        对每个存活粒子计算 name = func(各来源属性)，整列一次完成
+        """
+        if self.count:
+            values = map(func, *(self._live(source) for source in sources))
+            self._columns[name][:self.count] = array('d', values)
+
+    def add(self, name: str, value: Union[float, str]) -> None:
+        """
+        给每个存活粒子的属性加上一个常数，或加上另一列（如位置加速度）
+        """
+        source = self._live(value) if isinstance(value, str) else repeat(value)
+        if self.count:
+            self._columns[name][:self.count] = array('d', map(add, self._live(name), source))
+
+    def integrate(self) -> None:
+        """
+        按速度移动所有粒子
+        """
+        self.add('x', 'vel_x')
+        self.add('y', 'vel_y')
+
+    def compact(self, keep: Callable[..., bool], *sources: str) -> None:
+        """
+        一次遍历移除 keep(各来源属性) 为假的粒子，存活粒子保持原来的顺序
+        """
+        if not self.count:
+            return
+        mask = list(map(keep, *(self._live(source) for source in sources)))
+        alive = sum(mask)
+        if alive == self.count:
+            return
+        for column in self._columns.values():
+            column[:alive] = array('d', compress(islice(column, self.count), mask))
+        self.count = alive
+
+    def rows(self, *names: str) -> Iterator[Tuple[float, ...]]:
+        """
+        逐个粒子返回指定属性组成的元组（绘制时使用）
+        """
+        return zip(*(self._live(name) for name in names))
@@ -3,6 +3,37 @@ import sys
 import pygame
 
 
+class SilentSound:
+    """无声音效，无头模式下替代pygame.mixer.Sound（提供同样的方法，全部不发声）"""
+
+    def __init__(self) -> None:
+        self.volume = 1.0  # 只记录音量，与 Sound.get_volume 的行为一致
+
+    def play(self, *args, **kwargs) -> None:
+        return None  # Sound.play 没有空闲声道时同样返回None
+
+    def stop(self) -> None:
+        pass
+
+    def fadeout(self, time: int) -> None:
+        pass
+
+    def set_volume(self, value: float) -> None:
+        self.volume = min(max(value, 0.0), 1.0)
+
+    def get_volume(self) -> float:
+        return self.volume
+
+    def get_num_channels(self) -> int:
+        return 0
+
+    def get_length(self) -> float:
+        return 0.0
+
+    def get_raw(self) -> bytes:
+        return b""
+
+
 class Sounds:
     die: pygame.mixer.Sound  # 死亡音效
     hit: pygame.mixer.Sound  # 撞击音效
@@ -10,10 +41,19 @@ class Sounds:
     swoosh: pygame.mixer.Sound  # 翅膀音效
     wing: pygame.mixer.Sound  # 拍打音效
 
-    def __init__(self) -> None:
+    def __init__(self, muted: bool = False) -> None:
         """
         初始化音效
+        :param muted: 为True时不加载音频，所有音效静音（无头模式使用）
         """
+        if muted:
+            self.die = SilentSound()
+            self.hit = SilentSound()
+            self.point = SilentSound()
+            self.swoosh = SilentSound()
+            self.wing = SilentSound()
+            return
+
         if "win" in sys.platform:
             ext = "wav"  # Windows平台使用wav格式
         else:
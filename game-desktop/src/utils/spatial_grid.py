@@ -0,0 +1,91 @@
+from typing import Dict, Iterable, List, Tuple
+
+import pygame
+
+CellType = Tuple[int, int]  # 网格坐标类型定义
+
+
+class SpatialGrid:
+    """
+    均匀网格碰撞粗检测
+
+    每帧实体移动后由其管理者调用 rebuild() 把实体按矩形登记到所覆盖的格子里，
+    碰撞检测时 query() 只返回与目标矩形同格且矩形相交的候选实体，
+    之后再对这些候选做像素级的掩码检测
+    """
+
+    def __init__(self, cell_size: int = 64) -> None:
+        self.cell_size = cell_size  # 格子边长（像素）
+        self._cells: Dict[CellType, List[object]] = {}  # 格子 -> 实体列表
+        self._entries: Dict[object, Tuple[int, pygame.Rect]] = {}  # 实体 -> (登记顺序, 登记时的矩形)
+        self._counter = 0  # 登记顺序计数，保证查询结果顺序稳定
+
+    def _cells_of(self, rect: pygame.Rect):
+        """
+        遍历矩形覆盖的所有格子
+        """
+        size = self.cell_size
+        for cx in range(rect.left // size, (rect.right - 1) // size + 1):
+            for cy in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                yield cx, cy
+
+    def clear(self) -> None:
+        """
+        清空网格
+        """
+        self._cells.clear()
+        self._entries.clear()
+        self._counter = 0
+
+    def insert(self, entity) -> None:
+        """
+        按实体当前的矩形登记到网格
+        """
+        if entity in self._entries:
+            self.remove(entity)
+        rect = entity.rect
+        self._entries[entity] = (self._counter, rect)
+        self._counter += 1
+        for cell in self._cells_of(rect):
+            self._cells.setdefault(cell, []).append(entity)
+
+    def remove(self, entity) -> None:
+        """
+        从网格中移除实体（如子弹命中后被删除）
+        """
+        entry = self._entries.pop(entity, None)
+        if entry is None:
+            return
+        for cell in self._cells_of(entry[1]):
+            entities = self._cells.get(cell)
+            if entities is not None:
+                entities.remove(entity)
+                if not entities:
+                    del self._cells[cell]
+
+    def rebuild(self, entities: Iterable) -> None:
+        """
+        清空后重新登记一组实体（每帧实体移动之后调用）
+        """
+        self.clear()
+        for entity in entities:
+            self.insert(entity)
+
+    def query(self, rect: pygame.Rect) -> List[object]:
+        """
+        返回登记矩形与 rect 相交的实体，按登记顺序排列
+        """
+        found = {}
+        for cell in self._cells_of(rect):
+            for entity in self._cells.get(cell, ()):
+                if entity not in found:
+                    order, entity_rect = self._entries[entity]
+                    if entity_rect.colliderect(rect):
+                        found[entity] = order
+        return sorted(found, key=found.get)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, entity) -> bool:
+        return entity in self._entries
@@ -0,0 +1,100 @@
+from typing import Callable, Hashable, Tuple
+
+import pygame
+
+from .utils import hit_mask_cache
+
+
+class SpriteAtlas:
+    """
+    程序绘制精灵的缓存
+
+    Boss、道具、金币和各种子弹的外观都是用图元现画的，原来每生成一个实例就重画
+    一次（金币还会每次创建字体），Boss大招和金币波次时集中生成会造成卡顿。
+    这里按外观键缓存绘制结果，每种外观只在首次使用时绘制一次，之后的实例共用
+    同一张图像；图像同时登记到碰撞掩码缓存，生成实体时不必再计算像素摘要
+    """
+
+    def __init__(self) -> None:
+        self.hits = 0  # 命中次数
+        self.misses = 0  # 未命中（实际绘制）次数
+        self._sprites = {}  # 外观键 -> 图像
+
+    def get(self, key: Hashable, factory: Callable[[], pygame.Surface]) -> pygame.Surface:
+        """
+        返回外观键对应的图像，缓存中没有时调用 factory 绘制
+
+        返回的图像被多个实体共用，不要在上面绘制或修改透明度
+        """
+        sprite = self._sprites.get(key)
+        if sprite is not None:
+            self.hits += 1
+            return sprite
+
+        self.misses += 1
+        sprite = factory()
+        self._sprites[key] = sprite
+        hit_mask_cache.pin(sprite)  # 图像常驻缓存，掩码也按对象常驻
+        return sprite
+
+    def circle(self, size: int, color: Tuple[int, ...]) -> pygame.Surface:
+        """
+        返回直径为 size 的实心圆图像
+        """
+        def draw() -> pygame.Surface:
+            surface = pygame.Surface((size, size), pygame.SRCALPHA)
+            pygame.draw.circle(surface, color, (size // 2, size // 2), size // 2)
+            return surface
+
+        return self.get(("circle", size, color), draw)
+
+    def ellipse(self, width: int, height: int, color: Tuple[int, ...]) -> pygame.Surface:
+        """
+        返回铺满 width x height 的实心椭圆图像
+        """
+        def draw() -> pygame.Surface:
+            surface = pygame.Surface((width, height), pygame.SRCALPHA)
+            pygame.draw.ellipse(surface, color, surface.get_rect())
+            return surface
+
+        return self.get(("ellipse", width, height, color), draw)
+
+    def faded(self, image: pygame.Surface, alpha: int) -> pygame.Surface:
+        """
+        返回 image 整体淡化到透明度 alpha 的副本（用于拖尾等残影）
+
+        image 应当是缓存中的常驻图像：键里保存着图像本身，每张图像每种透明度只复制一次
+        """
+        def draw() -> pygame.Surface:
+            surface = image.copy()
+            surface.set_alpha(alpha)
+            return surface
+
+        return self.get(("faded", image, alpha), draw)
+
+    def clear(self) -> None:
+        """
+        清空缓存和统计
+        """
+        for sprite in self._sprites.values():
+            hit_mask_cache.unpin(sprite)
+        self._sprites.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        """
+        返回缓存统计：命中、未命中和当前图像数
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._sprites),
+        }
+
+    def __len__(self) -> int:
+        return len(self._sprites)
+
+
+# 全局精灵缓存实例
+sprite_atlas = SpriteAtlas()
@@ -0,0 +1,132 @@
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import pygame
+
+# 指定字体不可用时依次尝试的常见中文字体
+FALLBACK_FONTS = ('Microsoft YaHei', 'SimHei', 'NSimSun', 'SimSun', 'STHeiti')
+
+
+class FontRegistry:
+    """
+    字体注册表
+
+    原来菜单和HUD每帧都调用 get_font / SysFont 新建字体对象，每次都要查找系统字体
+    并打开字体文件；这里按 (名称, 字号, 粗体) 缓存解析结果，每种字体只解析一次
+    """
+
+    def __init__(self) -> None:
+        self._fonts = {}  # (名称, 字号, 粗体, 后备名称) -> 字体
+
+    def get(self, name: str = 'SimHei', size: int = 12, bold: bool = False,
+            fallback_name: Optional[str] = None) -> pygame.font.Font:
+        """
+        返回字体，首次请求时解析，失败时依次使用后备字体和系统默认字体
+        """
+        key = (name, size, bold, fallback_name)
+        font = self._fonts.get(key)
+        if font is None:
+            font = self._resolve(name, size, bold, fallback_name)
+            self._fonts[key] = font
+        return font
+
+    @staticmethod
+    def _resolve(name, size, bold, fallback_name) -> pygame.font.Font:
+        candidates = [name] + ([fallback_name] if fallback_name else list(FALLBACK_FONTS))
+        for font_name in candidates:
+            try:
+                return pygame.font.SysFont(font_name, size, bold=bold)
+            except Exception:
+                pass
+        return pygame.font.Font(None, size)  # 都失败了就用系统默认
+
+    def preload(self, sizes, name: str = 'SimHei') -> None:
+        """
+        启动时预先解析常用字号，避免第一次进入菜单时卡顿
+        """
+        for size in sizes:
+            self.get(name, size)
+
+    def __len__(self) -> int:
+        return len(self._fonts)
+
+
+class TextCache:
+    """
+    按 (字体, 文本, 抗锯齿, 颜色, 背景色) 缓存渲染好的文字图像的LRU缓存
+
+    静态标签只渲染一次，分数、倒计时等动态文字只在数值变化时重新渲染；
+    超出容量时淘汰最久未使用的条目
+    """
+
+    def __init__(self, maxsize: int = 512) -> None:
+        self.maxsize = maxsize  # 最多缓存的文字图像数量
+        self.hits = 0  # 命中次数
+        self.misses = 0  # 未命中次数
+        self._surfaces = OrderedDict()  # 渲染键 -> 文字图像，按最近使用排序
+
+    def render(self, font: pygame.font.Font, text: str, color: Tuple[int, ...],
+               antialias: bool = True, background: Optional[Tuple[int, ...]] = None) -> pygame.Surface:
+        """
+        返回渲染好的文字图像，缓存中没有时渲染并加入缓存
+
+        返回的图像可能被多处共用，不要修改
+        """
+        key = (font, text, antialias, tuple(color), tuple(background) if background else None)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self._surfaces.move_to_end(key)  # 标记为最近使用
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color, background)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.maxsize:
+            self._surfaces.popitem(last=False)  # 淘汰最久未使用的文字图像
+        return surface
+
+    def clear(self) -> None:
+        """
+        清空缓存和统计
+        """
+        self._surfaces.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        """
+        返回缓存统计：命中、未命中、当前条目数和容量
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._surfaces),
+            "maxsize": self.maxsize,
+        }
+
+    def __len__(self) -> int:
+        return len(self._surfaces)
+
+
+# 全局字体注册表实例
+font_registry = FontRegistry()
+
+# 全局文字渲染缓存实例
+text_cache = TextCache()
+
+
+def get_font(name: str = 'SimHei', size: int = 12, fallback_name: Optional[str] = None,
+             bold: bool = False) -> pygame.font.Font:
+    """
+    获取指定名称和大小的字体，如果失败则使用后备字体（同一字体只解析一次）
+    """
+    return font_registry.get(name, size, bold, fallback_name)
+
+
+def render_text(font: pygame.font.Font, text: str, color: Tuple[int, ...],
+                antialias: bool = True, background: Optional[Tuple[int, ...]] = None) -> pygame.Surface:
+    """
+    渲染文字，内容不变时直接返回缓存的图像（不要修改返回的图像）
+    """
+    return text_cache.render(font, text, color, antialias, background)
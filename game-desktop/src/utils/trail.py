@@ -0,0 +1,62 @@
+from array import array
+
+import pygame
+
+from .sprite_atlas import sprite_atlas
+
+
+class Trail:
+    """
+    子弹拖尾
+
+    原来激光子弹每步把 self.image.copy() 存进列表，绘制时再逐张 set_alpha，
+    几颗激光同时飞行时每帧要新建和修改几十张图像。这里用环形缓冲区只记录最近
+    几步的整数坐标，绘制时从精灵缓存取预先淡化好的图像，每条拖尾只占
+    O(拖尾长度) 个整数，不再分配图像
+    """
+
+    __slots__ = ('xs', 'ys', 'length', 'head', 'count')
+
+    def __init__(self, length: int = 0) -> None:
+        self.xs = array('i')  # 环形缓冲区：x坐标
+        self.ys = array('i')  # 环形缓冲区：y坐标
+        self.reset(length)
+
+    def reset(self, length: int) -> None:
+        """
+        清空拖尾并设置长度（只在需要时扩大缓冲区，子弹复用时不重新分配）
+        """
+        if length > len(self.xs):
+            grow = length - len(self.xs)
+            self.xs.extend([0] * grow)
+            self.ys.extend([0] * grow)
+        self.length = length  # 最多记录的步数
+        self.head = 0  # 下一次写入的位置
+        self.count = 0  # 已记录的步数
+
+    def push(self, x: float, y: float) -> None:
+        """
+        记录一步的位置，超出长度时覆盖最早的一步
+        """
+        if self.length <= 0:
+            return
+        self.xs[self.head] = int(x)  # 绘制时坐标本来就会取整
+        self.ys[self.head] = int(y)
+        self.head = (self.head + 1) % self.length
+        self.count = min(self.count + 1, self.length)
+
+    def draw(self, screen: pygame.Surface, image: pygame.Surface) -> None:
+        """
+        绘制拖尾：最新一步由子弹自己绘制，更早的各步越早越透明
+
+        image 须是精灵缓存中的常驻图像，淡化后的图像按 (图像, 透明度) 缓存
+        """
+        count = self.count
+        start = self.head - count
+        for i in range(count - 1):
+            index = (start + i) % self.length
+            alpha = 128 * (i + 1) // count  # 越早的帧越透明
+            screen.blit(sprite_atlas.faded(image, alpha), (self.xs[index], self.ys[index]))
+
+    def __len__(self) -> int:
+        return self.count
@@ -0,0 +1,101 @@
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import pygame
+
+
+class TransformCache:
+    """
+    旋转和缩放结果的LRU缓存
+
+    小鸟每帧按角度旋转（缩小道具生效时还要先缩放），道具每步先缩放再旋转，
+    追踪弹和金币也每帧旋转，原来每次都调用 pygame.transform 生成新图像。
+    这里把角度量化到 angle_step 度、尺寸取整数像素，以 (源图像, 尺寸, 角度档) 为键
+    缓存变换结果：每种组合只变换一次，之后只是一次字典查找；超出容量时淘汰最久未使用的条目。
+    键里保存着源图像本身，源图像应当是常驻的共享图像（素材、精灵缓存中的图像），
+    返回的图像同样被共用，不要在上面绘制或修改透明度
+    """
+
+    def __init__(self, maxsize: int = 2048, angle_step: float = 1.0) -> None:
+        self.maxsize = maxsize  # 最多缓存的图像数量
+        self.angle_step = angle_step  # 角度量化的步长（度）
+        self.hits = 0  # 命中次数
+        self.misses = 0  # 未命中（实际变换）次数
+        self._frames = OrderedDict()  # (源图像, 尺寸, 角度档) -> 图像，按最近使用排序
+
+    def bucket(self, angle: float) -> int:
+        """
+        返回角度所在的档位（0 到一整圈的档数之间）
+        """
+        return round((angle % 360) / self.angle_step) % round(360 / self.angle_step)
+
+    def get(
+        self,
+        image: pygame.Surface,
+        angle: float = 0,
+        size: Optional[Tuple[int, int]] = None,
+    ) -> pygame.Surface:
+        """
+        返回 image 先缩放到 size、再逆时针旋转 angle 度的图像
+
+        :param angle: 旋转角度，与 pygame.transform.rotate 相同，按 angle_step 量化
+        :param size: 缩放后的尺寸，None 表示不缩放
+        """
+        size = image.get_size() if size is None else (int(size[0]), int(size[1]))
+        bucket = self.bucket(angle)
+        if bucket == 0 and size == image.get_size():
+            return image  # 无需变换
+
+        key = (image, size, bucket)
+        frame = self._frames.get(key)
+        if frame is not None:
+            self.hits += 1
+            self._frames.move_to_end(key)  # 标记为最近使用
+            return frame
+
+        self.misses += 1
+        frame = image if size == image.get_size() else pygame.transform.scale(image, size)
+        if bucket:
+            frame = pygame.transform.rotate(frame, bucket * self.angle_step)
+        self._frames[key] = frame
+        if len(self._frames) > self.maxsize:
+            self._frames.popitem(last=False)  # 淘汰最久未使用的图像
+        return frame
+
+    def rotate(self, image: pygame.Surface, angle: float) -> pygame.Surface:
+        """
+        返回旋转 angle 度的图像
+        """
+        return self.get(image, angle)
+
+    def scale(self, image: pygame.Surface, size: Tuple[int, int]) -> pygame.Surface:
+        """
+        返回缩放到 size 的图像
+        """
+        return self.get(image, 0, size)
+
+    def clear(self) -> None:
+        """
+        清空缓存和统计
+        """
+        self._frames.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        """
+        返回缓存统计：命中、未命中、当前图像数和容量
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._frames),
+            "maxsize": self.maxsize,
+        }
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+
+# 全局变换缓存实例
+transform_cache = TransformCache()
@@ -1,9 +1,9 @@
-from functools import wraps
-from typing import List
+import hashlib
+from collections import OrderedDict
 
 import pygame
 
-HitMaskType = List[List[bool]]  # 碰撞掩码类型定义
+HitMaskType = pygame.mask.Mask  # 碰撞掩码类型定义（按位存储的像素掩码）
 
 
 def clamp(n: float, minn: float, maxn: float) -> float:
@@ -13,38 +13,105 @@ def clamp(n: float, minn: float, maxn: float) -> float:
     return max(min(maxn, n), minn)  # 返回限制后的值
 
 
-def memoize(func):
+class MaskCache:
     """
-    缓存函数结果
+    按图像内容缓存碰撞掩码的LRU缓存
+
+    子弹、金币等每个实例都会新建一张内容相同的图像，按图像对象缓存会让
+    缓存随游戏时间无限增长并一直引用这些图像；这里以 (尺寸, 像素摘要) 为键，
+    相同外观的精灵共用一个掩码，超出容量时淘汰最久未使用的条目
     """
-    cache = {}  # 创建缓存字典
 
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        key = (args, frozenset(kwargs.items()))  # 创建唯一键
-        if key not in cache:
-            cache[key] = func(*args, **kwargs)  # 缓存函数结果
-        return cache[key]  # 返回缓存结果
+    def __init__(self, maxsize: int = 256) -> None:
+        self.maxsize = maxsize  # 最多缓存的掩码数量
+        self.hits = 0  # 命中次数
+        self.misses = 0  # 未命中次数
+        self._masks = OrderedDict()  # 内容键 -> 掩码，按最近使用排序
+        self._pinned = {}  # id(图像) -> (图像, 掩码)，常驻的共享图像按对象查找
+
+    @staticmethod
+    def key_of(image: pygame.Surface) -> tuple:
+        """
+        计算图像的内容键（不引用图像本身）
+        """
+        pixels = pygame.image.tobytes(image, "RGBA")  # 含透明度的原始像素
+        return image.get_size(), hashlib.blake2b(pixels, digest_size=16).digest()
+
+    def get(self, image: pygame.Surface) -> HitMaskType:
+        """
+        返回图像的碰撞掩码，缓存中没有时生成并加入缓存
+        """
+        pinned = self._pinned.get(id(image))
+        if pinned is not None and pinned[0] is image:
+            self.hits += 1
+            return pinned[1]
+
+        key = self.key_of(image)
+        mask = self._masks.get(key)
+        if mask is not None:
+            self.hits += 1
+            self._masks.move_to_end(key)  # 标记为最近使用
+            return mask
+
+        self.misses += 1
+        mask = pygame.mask.from_surface(image, 0)  # 在C层一次生成整张图的位掩码
+        self._masks[key] = mask
+        if len(self._masks) > self.maxsize:
+            self._masks.popitem(last=False)  # 淘汰最久未使用的掩码
+        return mask
+
+    def pin(self, image: pygame.Surface) -> HitMaskType:
+        """
+        登记一张常驻的共享图像（如精灵缓存中的图像），之后按对象直接返回掩码，
+        不再计算像素摘要；图像内容登记后不能再修改
+        """
+        mask = pygame.mask.from_surface(image, 0)
+        self._pinned[id(image)] = (image, mask)
+        return mask
+
+    def unpin(self, image: pygame.Surface) -> None:
+        """
+        取消登记共享图像
+        """
+        pinned = self._pinned.get(id(image))
+        if pinned is not None and pinned[0] is image:
+            del self._pinned[id(image)]
+
+    def clear(self) -> None:
+        """
+        清空缓存和统计（登记的共享图像保留）
+        """
+        self._masks.clear()
+        self.hits = 0
+        self.misses = 0
 
-    return wrapper
+    def stats(self) -> dict:
+        """
+        返回缓存统计：命中、未命中、当前条目数和容量
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._masks),
+            "pinned": len(self._pinned),
+            "maxsize": self.maxsize,
+        }
+
+    def __len__(self) -> int:
+        return len(self._masks)
+
+
+# 全局碰撞掩码缓存实例
+hit_mask_cache = MaskCache()
 
 
-@memoize
 def get_hit_mask(image: pygame.Surface) -> HitMaskType:
     """
-    根据图像的透明度返回碰撞掩码
+    根据图像的透明度返回碰撞掩码（alpha 不为0的像素为实心）
+
+    返回的掩码可能被多个实体共用，不要修改
     """
-    return list(
-        (
-            list(
-                (
-                    bool(image.get_at((x, y))[3])  # 获取像素的alpha值
-                    for y in range(image.get_height())  # 遍历图像高度
-                )
-            )
-            for x in range(image.get_width())  # 遍历图像宽度
-        )
-    )
+    return hit_mask_cache.get(image)
 
 
 def pixel_collision(
@@ -56,28 +123,14 @@ def pixel_collision(
     """
     检查两个对象是否碰撞，而不仅仅是它们的矩形
     """
-    rect = rect1.clip(rect2)  # 获取两个矩形的交集
-
-    if rect.width == 0 or rect.height == 0:
-        return False  # 如果没有交集，返回False
-
-    x1, y1 = rect.x - rect1.x, rect.y - rect1.y  # 计算相对位置
-    x2, y2 = rect.x - rect2.x, rect.y - rect2.y
+    if not rect1.colliderect(rect2):
+        return False  # 如果矩形没有交集，返回False
 
     # 安全检查：确保碰撞掩码存在且不为None
-    if not hitmask1 or not hitmask2:
-        return rect1.colliderect(rect2)  # 如果没有掩码，退回到矩形碰撞检测
-    
-    # 获取碰撞掩码的维度
-    width1, height1 = len(hitmask1), len(hitmask1[0]) if hitmask1 else 0
-    width2, height2 = len(hitmask2), len(hitmask2[0]) if hitmask2 else 0
-    
-    for x in range(rect.width):
-        for y in range(rect.height):
-            # 添加边界检查
-            if (0 <= x1 + x < width1 and 0 <= y1 + y < height1 and
-                0 <= x2 + x < width2 and 0 <= y2 + y < height2):
-                # 只有在范围内的索引才检查碰撞
-                if hitmask1[x1 + x][y1 + y] and hitmask2[x2 + x][y2 + y]:
-                    return True  # 如果两个碰撞掩码都为True，返回True
-    return False  # 没有碰撞，返回False
+    if hitmask1 is None or hitmask2 is None:
+        return True  # 如果没有掩码，退回到矩形碰撞检测
+
+    # 按两个矩形的相对位置对齐掩码，由 Mask.overlap 逐字按位与重叠区域；
+    # 超出掩码尺寸的部分视为透明
+    offset = (rect2.x - rect1.x, rect2.y - rect1.y)
+    return hitmask1.overlap(hitmask2, offset) is not None